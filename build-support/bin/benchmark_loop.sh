@@ -0,0 +1,89 @@
+#!/usr/bin/env bash
+
+REPO_ROOT="$(git rev-parse --show-toplevel)"
+cd ${REPO_ROOT}
+
+source build-support/common.sh
+
+function usage() {
+  echo "Compares the time of no-op runs of pants goals in a fresh pants process (cold)"
+  echo "against re-runs in a long lived './pants --loop' process (warm)."
+  echo
+  echo "Usage: $0 (-h|-n RUNS|-c TARGET|-e FILE)"
+  echo " -h         print out this help message"
+  echo " -n RUNS    the number of timed runs of each goal, 5 by default"
+  echo " -c TARGET  the target to compile, by default"
+  echo "            examples/src/java/org/pantsbuild/example/hello/greet"
+  echo " -e FILE    the file to touch to trigger warm re-runs, by default"
+  echo "            examples/src/java/org/pantsbuild/example/hello/greet/Greeting.java"
+  if (( $# > 0 )); then
+    die "$@"
+  else
+    exit 0
+  fi
+}
+
+runs=5
+compile_target="examples/src/java/org/pantsbuild/example/hello/greet"
+edit_file="examples/src/java/org/pantsbuild/example/hello/greet/Greeting.java"
+
+while getopts "hn:c:e:" opt
+do
+  case ${opt} in
+    h) usage ;;
+    n) runs=${OPTARG} ;;
+    c) compile_target=${OPTARG} ;;
+    e) edit_file=${OPTARG} ;;
+    *) usage "Invalid option: -${OPTARG}" ;;
+  esac
+done
+
+[[ -f "${edit_file}" ]] || usage "No such file to edit: ${edit_file}"
+
+function now() {
+  python -c 'import time; print(time.time())'
+}
+
+function mean() {
+  awk '{ total += $1 } END { printf "%.3f", total / NR }'
+}
+
+function time_cold() {
+  # The first run warms the workdir and artifact caches, so that every timed run is a no-op.
+  ./pants "$@" > /dev/null 2>&1 || die "Failed to run ./pants $*"
+  for (( i = 0; i < runs; i++ ))
+  do
+    start=$(now)
+    ./pants "$@" > /dev/null 2>&1 || die "Failed to run ./pants $*"
+    end=$(now)
+    echo "${start} ${end}" | awk '{ print $2 - $1 }'
+  done | mean
+}
+
+function time_warm() {
+  log_file=$(mktemp -t benchmark_loop.XXXXXX)
+  ./pants --loop "$@" > /dev/null 2> "${log_file}" &
+  loop_pid=$!
+  trap "kill -INT ${loop_pid} 2>/dev/null; rm -f ${log_file}" RETURN
+
+  # Each run touches the file without changing its contents, so the run only has to notice the
+  # edit, re-fingerprint the file's owners and find there is nothing to do.
+  for (( i = 0; i <= runs; i++ ))
+  do
+    while (( $(grep -c 'Waiting for edits' "${log_file}") <= i ))
+    do
+      kill -0 ${loop_pid} 2>/dev/null || die "./pants --loop $* exited early:\n$(cat ${log_file})"
+      sleep 0.1
+    done
+    (( i < runs )) && touch "${edit_file}"
+  done
+  grep 'Ran goals in' "${log_file}" | sed -e 's/^Ran goals in \([0-9.]*\)s.*/\1/' | mean
+}
+
+printf "%-40s %10s %10s\n" "goal" "cold (s)" "warm (s)"
+for goal in "list ::" "compile ${compile_target}"
+do
+  cold=$(time_cold ${goal})
+  warm=$(time_warm ${goal})
+  printf "%-40s %10s %10s\n" "${goal}" "${cold}" "${warm}"
+done
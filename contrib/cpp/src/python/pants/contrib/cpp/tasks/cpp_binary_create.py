@@ -51,9 +51,7 @@ class CppBinaryCreate(CppTask):
     objects = []
     for basedir, objs in self.context.products.get('objs').get(binary).items():
       objects.extend([os.path.join(basedir, obj) for obj in objs])
-    output = self._link_binary(binary, objects)
-    self.context.log.info('Built c++ binary: {0}'.format(output))
-    return output
+    return self._link_binary(binary, objects)
 
   def _link_binary(self, target, objects):
     output = os.path.join(self.workdir, target.id, target.name)
@@ -63,6 +61,7 @@ class CppBinaryCreate(CppTask):
 
     library_dirs = []
     libraries = []
+    library_archives = []
 
     # TODO(dhamon): should this use self.context.products.get('lib').get(binary).items()
     def add_library(tgt):
@@ -70,6 +69,7 @@ class CppBinaryCreate(CppTask):
         if self.is_library(dep):
           library_dirs.extend([os.path.join(dep.workdir, dep.id)])
           libraries.extend([dep.name])
+          library_archives.append(os.path.join(dep.workdir, dep.id, 'lib' + dep.name + '.a'))
 
     target.walk(add_library)
 
@@ -83,7 +83,14 @@ class CppBinaryCreate(CppTask):
     if self.get_options().ld_options != None:
       cmd.extend(('-Wl,{0}'.format(o) for o in self.get_options().ld_options.split(' ')))
 
+    # Only re-link if an object or library changed since the binary was last linked.
+    if self.output_is_current(output, cmd):
+      return output
+
     with self.context.new_workunit(name='cpp-link', labels=[WorkUnit.COMPILER]) as workunit:
       self.run_command(cmd, workunit)
+    inputs = objects + [archive for archive in library_archives if os.path.exists(archive)]
+    self.record_output(output, cmd, inputs)
+    self.context.log.info('Built c++ binary: {0}'.format(output))
 
     return output
@@ -5,15 +5,31 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import multiprocessing
 import os
+import re
 
 from pants.base.build_environment import get_buildroot
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnit
 from pants.util.dirutil import safe_mkdir
 
 from pants.contrib.cpp.tasks.cpp_task import CppTask
 
 
+def parse_make_dependencies(content):
+  """Parses the prerequisites of the rule in a make dependency file, as written by `gcc -MD`.
+
+  :param string content: The contents of the dependency file.
+  :returns: The list of prerequisites, in order, starting with the source file.
+  """
+  # Join continuation lines, then split the rule on unescaped whitespace.
+  content = content.replace('\\\n', ' ')
+  rule = content.split('\n', 1)[0]
+  _, _, prerequisites = rule.partition(':')
+  return [path.replace('\\ ', ' ') for path in re.split(r'(?<!\\)\s+', prerequisites) if path]
+
+
 class CppCompile(CppTask):
   """Compiles object files from C++ sources."""
 
@@ -26,13 +42,20 @@ class CppCompile(CppTask):
              default=['cc', 'cxx', 'cpp'],
              help=('The list of extensions (without the .) to consider when '
                    'determining if a file is a C++ source file.'))
+    register('--worker-count', type=int, default=multiprocessing.cpu_count(), advanced=True,
+             help='The number of sources to compile concurrently.')
 
   @classmethod
   def product_types(cls):
     return ['objs']
 
   def execute(self):
-    """Compile all sources in a given target to object files."""
+    """Compile all sources in a given target to object files.
+
+    Of the sources of invalid targets, only those whose object files are out of date are
+    recompiled: those whose source, included headers or compile command line have changed since
+    they were last compiled.
+    """
 
     def is_cc(source):
       _, ext = os.path.splitext(source)
@@ -51,15 +74,20 @@ class CppCompile(CppTask):
       invalid_targets = []
       for vt in invalidation_check.invalid_vts:
         invalid_targets.extend(vt.targets)
-      for target in invalid_targets:
-        with self.context.new_workunit(name='cpp-compile', labels=[WorkUnit.MULTITOOL]):
+      with self.context.new_workunit(name='cpp-compile', labels=[WorkUnit.MULTITOOL]) as workunit:
+        invalid_sources = []
+        for target in invalid_targets:
           for source in target.sources_relative_to_buildroot():
-            if is_cc(source):
-              # TODO: Parallelise the compilation.
-              # TODO: Only recompile source files that have changed since the
-              #       object file was last written. Also use the output from
-              #       gcc -M to track dependencies on headers.
-              self._compile(target, source)
+            if is_cc(source) and not self.output_is_current(self._objpath(target, source),
+                                                             self._compile_command(target, source)):
+              invalid_sources.append((target, source))
+        if invalid_sources:
+          pool = WorkerPool(workunit, self.context.run_tracker, self.get_options().worker_count)
+          try:
+            pool.submit_work_and_wait(Work(self._compile, invalid_sources),
+                                      workunit_parent=workunit)
+          finally:
+            pool.shutdown()
 
   def _objpath(self, target, source):
     abs_source_root = os.path.join(get_buildroot(), target.target_base)
@@ -70,11 +98,8 @@ class CppCompile(CppTask):
 
     return os.path.join(self.workdir, target.id, obj_name)
 
-  def _compile(self, target, source):
-    """Compile given source to an object file."""
+  def _compile_command(self, target, source):
     obj = self._objpath(target, source)
-    safe_mkdir(os.path.dirname(obj))
-
     abs_source = os.path.join(get_buildroot(), source)
 
     # TODO: include dir should include dependent work dir when headers are copied there.
@@ -86,12 +111,29 @@ class CppCompile(CppTask):
     cmd = [self.cpp_toolchain.compiler]
     cmd.extend(['-c'])
     cmd.extend(('-I{0}'.format(i) for i in include_dirs))
+    # Have the compiler list the headers the source includes, so changes to them invalidate it.
+    cmd.extend(['-MMD', '-MF', self._deppath(obj)])
     cmd.extend(['-o' + obj, abs_source])
     if self.get_options().cc_options != None:
       cmd.extend([self.get_options().cc_options])
+    return cmd
 
-    # TODO: submit_async_work with self.run_command, [(cmd)] as a Work object.
+  @staticmethod
+  def _deppath(obj):
+    root, _ = os.path.splitext(obj)
+    return root + '.d'
+
+  def _compile(self, target, source):
+    """Compile given source to an object file."""
+    obj = self._objpath(target, source)
+    safe_mkdir(os.path.dirname(obj))
+
+    cmd = self._compile_command(target, source)
     with self.context.new_workunit(name='cpp-compile', labels=[WorkUnit.COMPILER]) as workunit:
       self.run_command(cmd, workunit)
 
+    with open(self._deppath(obj), 'r') as fp:
+      inputs = parse_make_dependencies(fp.read())
+    self.record_output(obj, cmd, [os.path.abspath(path) for path in inputs])
+
     self.context.log.info('Built c++ object: {0}'.format(obj))
@@ -48,9 +48,7 @@ class CppLibraryCreate(CppTask):
     for basedir, objs in self.context.products.get('objs').get(library).items():
       objects = [os.path.join(basedir, obj) for obj in objs]
     # TODO: copy public headers to work dir.
-    output = self._link_library(library, objects)
-    self.context.log.info('Built c++ library: {0}'.format(output))
-    return output
+    return self._link_library(library, objects)
 
   def _libpath(self, target):
     output_dir = os.path.join(self.workdir, target.id)
@@ -65,7 +63,13 @@ class CppLibraryCreate(CppTask):
     cmd.extend([output])
     cmd.extend(objects)
 
+    # Only re-archive if an object changed since the library was last created.
+    if self.output_is_current(output, cmd):
+      return output
+
     with self.context.new_workunit(name='cpp-link', labels=[WorkUnit.COMPILER]) as workunit:
       self.run_command(cmd, workunit)
+    self.record_output(output, cmd, objects)
+    self.context.log.info('Built c++ library: {0}'.format(output))
 
     return output
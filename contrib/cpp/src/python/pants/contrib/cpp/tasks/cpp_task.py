@@ -5,11 +5,14 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import json
 import os
 import subprocess
 
 from pants.backend.core.tasks.task import Task
 from pants.base.exceptions import TaskError
+from pants.base.file_digest_cache import digest_file
+from pants.util.dirutil import safe_mkdir_for
 
 from pants.contrib.cpp.targets.cpp_binary import CppBinary
 from pants.contrib.cpp.targets.cpp_library import CppLibrary
@@ -18,6 +21,9 @@ from pants.contrib.cpp.toolchain.cpp_toolchain import CppToolchain
 
 
 class CppTask(Task):
+  # Bump this if the format of the records written by `record_output` changes.
+  _OUTPUT_RECORD_VERSION = 1
+
   @staticmethod
   def is_cpp(target):
     return isinstance(target, CppTarget)
@@ -36,6 +42,51 @@ class CppTask(Task):
     register('--compiler',
              help='Set a specific compiler to use (eg, g++-4.8, clang++)')
 
+  @staticmethod
+  def _output_record_path(output):
+    return '{}.inputs.json'.format(output)
+
+  @classmethod
+  def record_output(cls, output, cmd, inputs):
+    """Records that output was built by running cmd over the current contents of inputs.
+
+    :param string output: The path of the file that was built.
+    :param list cmd: The command line that built it.
+    :param list inputs: The paths of all the files it was built from.
+    """
+    record = {
+      'version': cls._OUTPUT_RECORD_VERSION,
+      'command': cmd,
+      'inputs': {path: digest_file(path) for path in inputs},
+    }
+    record_path = cls._output_record_path(output)
+    safe_mkdir_for(record_path)
+    tmp_path = '{}.tmp.{}'.format(record_path, os.getpid())
+    with open(tmp_path, 'w') as fp:
+      json.dump(record, fp)
+    os.rename(tmp_path, record_path)
+
+  @classmethod
+  def output_is_current(cls, output, cmd):
+    """Returns True if output exists and was last built by cmd from inputs that are unchanged.
+
+    Only outputs recorded by `record_output` can be current.
+    """
+    record_path = cls._output_record_path(output)
+    if not os.path.exists(output) or not os.path.exists(record_path):
+      return False
+    try:
+      with open(record_path, 'r') as fp:
+        record = json.load(fp)
+      if record.get('version') != cls._OUTPUT_RECORD_VERSION or record['command'] != cmd:
+        return False
+      for path, digest in record['inputs'].items():
+        if not os.path.exists(path) or digest_file(path) != digest:
+          return False
+      return True
+    except (IOError, ValueError, KeyError, TypeError):
+      return False
+
   def execute(self):
     raise NotImplementedError('execute must be implemented by subclasses of CppTask')
 
@@ -0,0 +1,63 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+
+from pants.util.contextutil import temporary_dir
+
+from pants.contrib.cpp.tasks.cpp_compile import parse_make_dependencies
+from pants.contrib.cpp.tasks.cpp_task import CppTask
+
+
+class ParseMakeDependenciesTest(unittest.TestCase):
+  def test_single_line(self):
+    self.assertEqual(['a.cc', 'a.h'], parse_make_dependencies('a.o: a.cc a.h\n'))
+
+  def test_continuation_lines(self):
+    self.assertEqual(['/src/a.cc', '/src/a.h', '/src/b dir/b.h'],
+                     parse_make_dependencies('/out/a.o: /src/a.cc \\\n'
+                                             '  /src/a.h \\\n'
+                                             '  /src/b\\ dir/b.h\n'
+                                             '\n'
+                                             '/src/a.h:\n'))
+
+  def test_no_prerequisites(self):
+    self.assertEqual([], parse_make_dependencies('a.o:\n'))
+
+
+class OutputRecordTest(unittest.TestCase):
+  def write(self, path, content):
+    with open(path, 'w') as fp:
+      fp.write(content)
+    then = time.time() - 10
+    os.utime(path, (then, then))
+
+  def test_output_is_current(self):
+    with temporary_dir() as tmpdir:
+      source = os.path.join(tmpdir, 'a.cc')
+      header = os.path.join(tmpdir, 'a.h')
+      output = os.path.join(tmpdir, 'a.o')
+      self.write(source, 'int a() { return A; }')
+      self.write(header, '#define A 1')
+      cmd = ['g++', '-c', source]
+
+      self.assertFalse(CppTask.output_is_current(output, cmd))
+      self.write(output, 'object')
+      self.assertFalse(CppTask.output_is_current(output, cmd))
+
+      CppTask.record_output(output, cmd, [source, header])
+      self.assertTrue(CppTask.output_is_current(output, cmd))
+      self.assertFalse(CppTask.output_is_current(output, cmd + ['-O2']))
+
+      self.write(header, '#define A 2')
+      self.assertFalse(CppTask.output_is_current(output, cmd))
+
+      CppTask.record_output(output, cmd, [source, header])
+      os.unlink(header)
+      self.assertFalse(CppTask.output_is_current(output, cmd))
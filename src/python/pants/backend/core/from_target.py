@@ -17,6 +17,8 @@ class FromTarget(object):
     """Thrown if an object that is not an address is added to an import attribute.
     """
 
+  build_file_cacheable = True
+
   def __init__(self, parse_context):
     """
     :param ParseContext parse_context: build file context
@@ -0,0 +1,269 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import fnmatch
+import os
+import re
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+from twitter.common.dirutil.fileset import Fileset, fnmatch_translate_extended
+
+
+class GlobEngine(object):
+  """Expands `globs`, `rglobs` and `zglobs` against a shared cache of directory listings.
+
+  Each directory is listed once and its listing reused by every later glob that reads it for as
+  long as the directory's mtime is unchanged, so overlapping globs in sibling targets cost one stat
+  per directory rather than a fresh listing.  As with git's index, a listing taken in the same
+  second its directory was modified is not reused, since a later modification in that second would
+  not change the mtime.
+
+  Patterns are compiled once per call, and results are computed lazily the first time the returned
+  `Fileset` is evaluated.  All recursive globs under the same root that are still pending when one
+  of them is evaluated are matched together in a single walk of the root.
+
+  The results match those of the corresponding `twitter.common.dirutil.fileset.Fileset` methods.
+  """
+
+  _MAGIC = re.compile(r'[*?[]')
+
+  class _Listing(object):
+    def __init__(self, mtime, names, dirnames, linknames):
+      self.mtime = mtime
+      self.names = names
+      self.dirnames = dirnames
+      # The subset of dirnames that are symlinks, which are only walked when following links.
+      self.linknames = linknames
+
+  class _Walk(object):
+    """The matches of an `rglobs` or `zglobs` call, filled in when the root is walked."""
+
+    def __init__(self, matches, allow_dirs):
+      self.matches = matches
+      self.allow_dirs = allow_dirs
+      self.result = None
+
+  _global_instance = None
+
+  @classmethod
+  def global_instance(cls):
+    """Returns the engine shared by all the globs in BUILD files parsed in this run."""
+    if cls._global_instance is None:
+      cls._global_instance = cls()
+    return cls._global_instance
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._listings = {}  # {path: _Listing}
+    # {(root, follow_links): set(_Walk)}, for the recursive globs not yet evaluated.
+    self._pending_walks = defaultdict(weakref.WeakSet)
+
+    # The number of directories listed, and the number of times a cached listing was reused.
+    self.listed = 0
+    self.reused = 0
+
+  def globs(self, *globspecs, **kw):
+    """Like `Fileset.globs`: matches each globspec with `glob.glob` relative to root.
+
+    :param root: The directory the globspecs are relative to, the current directory by default.
+    :returns: A lazily evaluated Fileset of paths relative to root.
+    """
+    root = kw.pop('root', os.curdir)
+
+    def expand():
+      files = set()
+      for globspec in globspecs:
+        if globspec:
+          # As with `Fileset.globs`, the matches of each globspec are combined by symmetric
+          # difference.
+          files ^= set(os.path.relpath(path, root)
+                       for path in self._iglob(os.path.join(root, globspec)))
+      return files
+
+    return Fileset(self._memoized(expand))
+
+  def rglobs(self, *globspecs, **kw):
+    """Like `Fileset.rglobs`: matches the files under root against each globspec with `fnmatch`.
+
+    As with `fnmatch`, a `*` also matches across path separators.  Hidden files are only matched by
+    globspecs that don't start with `*`.
+
+    :param root: The directory to walk, the current directory by default.
+    :param bool follow_links: True to walk symlinked directories, False by default.
+    :returns: A lazily evaluated Fileset of paths relative to root.
+    """
+    patterns = [(globspec.startswith('*'), re.compile(fnmatch.translate(globspec)))
+                for globspec in globspecs]
+    return self._walked_fileset(self._matcher(patterns), allow_dirs=False, **kw)
+
+  def zglobs(self, *globspecs, **kw):
+    """Like `Fileset.zglobs`: matches the files and directories under root with zsh-style globs.
+
+    A `**` component matches any number of directories.  Directories are matched both with and
+    without a trailing path separator.
+
+    :param root: The directory to walk, the current directory by default.
+    :param bool follow_links: True to walk symlinked directories, False by default.
+    :returns: A lazily evaluated Fileset of paths relative to root.
+    """
+    patterns = [(os.path.basename(globspec).startswith('*'),
+                 re.compile(fnmatch_translate_extended(globspec)))
+                for globspec in globspecs]
+    return self._walked_fileset(self._matcher(patterns), allow_dirs=True, **kw)
+
+  @staticmethod
+  def _matcher(patterns):
+    """Returns a function that matches a path against any of the given compiled patterns.
+
+    :param patterns: A list of (no_hidden, pattern) tuples, where no_hidden is True if the pattern
+                     must not match hidden files.
+    """
+    def matches(path):
+      hidden = os.path.basename(path).startswith('.')
+      return any(pattern.match(path) for no_hidden, pattern in patterns
+                 if not (no_hidden and hidden))
+    return matches
+
+  @staticmethod
+  def _memoized(expand):
+    results = []
+
+    def memoized():
+      if not results:
+        results.append(expand())
+      # Fileset callers may modify the set they are handed.
+      return set(results[0])
+
+    return memoized
+
+  def _walked_fileset(self, matches, allow_dirs, root=os.curdir, follow_links=False):
+    walk = self._Walk(matches, allow_dirs)
+    key = (root, follow_links)
+    with self._lock:
+      self._pending_walks[key].add(walk)
+
+    def expand():
+      if walk.result is None:
+        self._evaluate_walks(key, walk)
+      return set(walk.result)
+
+    return Fileset(expand)
+
+  def _evaluate_walks(self, key, walk):
+    """Evaluates walk along with all the other walks pending for the same key."""
+    with self._lock:
+      pending = self._pending_walks.pop(key, None)
+      walks = list(pending) if pending is not None else []
+    if walk not in walks:
+      walks.append(walk)
+    results = [set() for _ in walks]
+
+    root, follow_links = key
+    for path, is_dir in self._walk(root, follow_links):
+      for each, result in zip(walks, results):
+        if (each.allow_dirs or not is_dir) and each.matches(path):
+          result.add(path)
+
+    for each, result in zip(walks, results):
+      each.result = result
+
+  def _walk(self, root, follow_links):
+    """Yields a (relpath, is_dir) tuple for each entry under root, like `Fileset.walk`.
+
+    Directories are yielded twice, with and without a trailing path separator.
+    """
+    to_walk = [(root, '')]
+    while to_walk:
+      path, relpath = to_walk.pop()
+      listing = self._listing(path)
+      if listing is None:
+        continue
+      for name in listing.names:
+        entry_relpath = os.path.join(relpath, name) if relpath else name
+        if name in listing.dirnames:
+          yield entry_relpath, True
+          yield entry_relpath + os.sep, True
+          if follow_links or name not in listing.linknames:
+            to_walk.append((os.path.join(path, name), entry_relpath))
+        else:
+          yield entry_relpath, False
+
+  def _iglob(self, pathname):
+    """Like `glob.iglob`, but reads directories from their cached listings."""
+    dirname, basename = os.path.split(pathname)
+    if not self._MAGIC.search(pathname):
+      if basename:
+        if os.path.lexists(pathname):
+          yield pathname
+      elif os.path.isdir(dirname):
+        # Patterns ending with a slash only match directories.
+        yield pathname
+      return
+
+    if not dirname:
+      for name in self._glob1(os.curdir, basename):
+        yield name
+      return
+
+    if dirname != pathname and self._MAGIC.search(dirname):
+      dirs = self._iglob(dirname)
+    else:
+      dirs = [dirname]
+    for dirname in dirs:
+      if self._MAGIC.search(basename):
+        names = self._glob1(dirname, basename)
+      elif basename:
+        names = [basename] if os.path.lexists(os.path.join(dirname, basename)) else []
+      else:
+        names = [basename] if os.path.isdir(dirname) else []
+      for name in names:
+        yield os.path.join(dirname, name)
+
+  def _glob1(self, dirname, pattern):
+    listing = self._listing(dirname)
+    if listing is None:
+      return []
+    names = listing.names
+    if not pattern.startswith('.'):
+      names = [name for name in names if not name.startswith('.')]
+    return fnmatch.filter(names, pattern)
+
+  def _listing(self, path):
+    """Returns the _Listing for the directory at path, or None if it can't be listed."""
+    try:
+      mtime = os.stat(path).st_mtime
+    except OSError:
+      return None
+    with self._lock:
+      listing = self._listings.get(path)
+      if listing is not None and listing.mtime == mtime:
+        self.reused += 1
+        return listing
+
+    try:
+      names = os.listdir(path)
+    except OSError:
+      return None
+    dirnames, linknames = set(), set()
+    for name in names:
+      entry = os.path.join(path, name)
+      if os.path.isdir(entry):
+        dirnames.add(name)
+        if os.path.islink(entry):
+          linknames.add(name)
+    listing = self._Listing(mtime, names, dirnames, linknames)
+
+    with self._lock:
+      self.listed += 1
+      if int(mtime) < int(time.time()) - 1:
+        self._listings[path] = listing
+      else:
+        self._listings.pop(path, None)
+    return listing
@@ -15,7 +15,7 @@ from pants.backend.core.targets.prep_command import PrepCommand
 from pants.backend.core.targets.resources import Resources
 from pants.backend.core.tasks.builddictionary import BuildBuildDictionary
 from pants.backend.core.tasks.changed_target_goals import CompileChanged, TestChanged
-from pants.backend.core.tasks.clean import Cleaner, Invalidator
+from pants.backend.core.tasks.clean import ArtifactCacheCleaner, Cleaner, Invalidator
 from pants.backend.core.tasks.confluence_publish import ConfluencePublish
 from pants.backend.core.tasks.deferred_sources_mapper import DeferredSourcesMapper
 from pants.backend.core.tasks.dependees import ReverseDepmap
@@ -44,6 +44,8 @@ from pants.goal.task_registrar import TaskRegistrar as task
 
 class BuildFilePath(object):
   """Returns path containing this ``BUILD`` file."""
+  build_file_cacheable = True
+
   def __init__(self, parse_context):
     self.rel_path = parse_context.rel_path
 
@@ -121,6 +123,9 @@ def register_goals():
       '[deprecated] Clean all build output in a background process.')
   clean_all_async.install(invalidate, first=True)
 
+  task(name='clean-cache', action=ArtifactCacheCleaner).install().with_description(
+      'Evict the least recently used artifacts from local artifact caches.')
+
   # Reporting.
   task(name='server', action=RunServer, serialize=False).install().with_description(
       'Run the pants reporting server.')
@@ -51,6 +51,8 @@ class ChangedTargetTask(NoopExecTask, ChangedFileTaskMixin):
     changed_addresses = change_calculator.changed_target_addresses()
     readable = ''.join(sorted('\n\t* {}'.format(addr.reference()) for addr in changed_addresses))
     logger.info('Operating on changed {} target(s): {}'.format(len(changed_addresses), readable))
+    for address in changed_addresses:
+      build_graph.inject_address_closure(address)
     return [build_graph.get_target(addr) for addr in changed_addresses]
 
 
@@ -10,6 +10,8 @@ import os
 from pants.backend.core.tasks.task import Task
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
+from pants.goal.goal import Goal
 from pants.util.dirutil import safe_rmtree
 
 
@@ -32,3 +34,47 @@ class Cleaner(Task):
   """Clean all current build products."""
   def execute(self):
     _cautious_rmtree(self.get_options().pants_workdir)
+
+
+class ArtifactCacheCleaner(Task):
+  """Evict the least recently used artifacts from local content-addressed artifact caches.
+
+  Cleans the caches configured for every installed task, not just those of this goal's scope, since
+  tasks may override the artifact cache options.
+  """
+
+  def execute(self):
+    budgets = self._content_addressed_cache_budgets()
+    if not budgets:
+      self.context.log.info('Only content-addressed local artifact caches can be cleaned.')
+      return
+
+    for cache_root, max_size in sorted(budgets.items()):
+      if not os.path.isdir(cache_root):
+        continue
+      cache = ContentAddressedArtifactCache(self.get_options().pants_workdir, cache_root,
+                                            namespace=self.__class__.__name__,
+                                            compression=self.get_options().cache_compression)
+      evicted, freed = cache.prune(max_size)
+      self.context.log.info('Evicted {0} artifacts, freeing {1} bytes, from {2}.'
+                            .format(evicted, freed, cache_root))
+
+  def _content_addressed_cache_budgets(self):
+    """Returns the smallest size budget configured for each content-addressed cache root."""
+    scopes = set(self.known_scopes())
+    for goal in Goal.all():
+      for task_type in goal.task_types():
+        scopes.update(task_type.known_scopes())
+
+    budgets = {}
+    for scope in scopes:
+      options = self.context.options.for_scope(scope)
+      if options.local_artifact_cache_layout != 'content-addressed':
+        continue
+      max_size = options.local_artifact_cache_max_size
+      for spec in (options.read_artifact_caches or []) + (options.write_artifact_caches or []):
+        for alternate in spec.split('|'):
+          if alternate.startswith('/') or alternate.startswith('~'):
+            cache_root = os.path.realpath(os.path.expanduser(alternate))
+            budgets[cache_root] = min(budgets.get(cache_root, max_size), max_size)
+    return budgets
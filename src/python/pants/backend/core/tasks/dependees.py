@@ -6,12 +6,12 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
-from collections import defaultdict
 
 from twitter.common.collections import OrderedSet
 
 from pants.backend.core.tasks.console_task import ConsoleTask
 from pants.base.build_environment import get_buildroot
+from pants.base.dependee_index import DependeeIndex
 from pants.base.exceptions import TaskError
 from pants.base.source_root import SourceRoot
 
@@ -69,42 +69,14 @@ class ReverseDepmap(ConsoleTask):
     else:
       buildfiles = address_mapper.scan_buildfiles(get_buildroot(), spec_excludes=self._spec_excludes)
 
-    build_graph = self.context.build_graph
-    build_file_parser = self.context.build_file_parser
-
-    dependees_by_target = defaultdict(set)
-    for build_file in buildfiles:
-      address_map = build_file_parser.parse_build_file(build_file)
-      for address in address_map.keys():
-        build_graph.inject_address_closure(address)
-      for address in address_map.keys():
-        target = build_graph.get_target(address)
-        # TODO(John Sirois): tighten up the notion of targets written down in a BUILD by a
-        # user vs. targets created by pants at runtime.
-        target = self.get_concrete_target(target)
-        for dependency in target.dependencies:
-          dependency = self.get_concrete_target(dependency)
-          dependees_by_target[dependency].add(target)
+    dependee_index = DependeeIndex.global_instance() or DependeeIndex()
+    dependee_index.update(address_mapper, self.context.build_graph, buildfiles)
 
     roots = set(self.context.target_roots)
     if self._closed:
       for root in roots:
         yield root.address.spec
 
-    for dependant in self.get_dependants(dependees_by_target, roots):
-      yield dependant.address.spec
-
-  def get_dependants(self, dependees_by_target, roots):
-    check = set(roots)
-    known_dependants = set()
-    while True:
-      dependants = set(known_dependants)
-      for target in check:
-        dependants.update(dependees_by_target[target])
-      check = dependants - known_dependants
-      if not check or not self._transitive:
-        return dependants - set(roots)
-      known_dependants = dependants
-
-  def get_concrete_target(self, target):
-    return target.concrete_derived_from
+    for dependee in dependee_index.dependees_of([root.address for root in roots],
+                                                transitive=self._transitive):
+      yield dependee.spec
@@ -5,24 +5,39 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
-import os
-
 from pants.backend.core.tasks.console_task import ConsoleTask
+from pants.base.build_environment import get_buildroot
+from pants.base.source_owner_index import SourceOwnerIndex
 
 
 class Filemap(ConsoleTask):
   """Outputs a mapping from source file to the target that owns the source file."""
 
   def console_output(self, _):
-    visited = set()
-    for target in self._find_targets():
-      if target not in visited:
-        visited.add(target)
-        for rel_source in target.sources_relative_to_buildroot():
-          yield '{} {}'.format(rel_source, target.address.spec)
-
-  def _find_targets(self):
     if len(self.context.target_roots) > 0:
-      return self.context.target_roots
+      visited = set()
+      for target in self.context.target_roots:
+        if target not in visited:
+          visited.add(target)
+          for rel_source in target.sources_relative_to_buildroot():
+            yield '{} {}'.format(rel_source, target.address.spec)
     else:
-      return self.context.scan().targets()
+      for rel_source, address in self._index_all_sources():
+        yield '{} {}'.format(rel_source, address.spec)
+
+  def _index_all_sources(self):
+    # Look the sources of every target up in the index, which only parses the BUILD files that
+    # changed since they were last indexed, rather than scanning the whole build graph.
+    address_mapper = self.context.address_mapper
+    source_owner_index = SourceOwnerIndex.global_instance() or SourceOwnerIndex()
+    spec_paths = set()
+    for build_file in address_mapper.scan_buildfiles(get_buildroot(),
+                                                     spec_excludes=self.context.spec_excludes):
+      if build_file.spec_path not in spec_paths:
+        spec_paths.add(build_file.spec_path)
+        sources_by_address = source_owner_index.sources_by_address(address_mapper,
+                                                                   self.context.build_graph,
+                                                                   build_file.spec_path)
+        for address, sources in sorted(sources_by_address.items()):
+          for rel_source in sources:
+            yield rel_source, address
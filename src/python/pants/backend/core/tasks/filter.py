@@ -115,9 +115,8 @@ class Filter(ConsoleTask):
 
     def filter_for_ancestor(spec):
       ancestors = _get_targets(spec)
-      children = set()
-      for ancestor in ancestors:
-        ancestor.walk(children.add)
+      children = set(self.context.build_graph.iter_closure([ancestor.address
+                                                            for ancestor in ancestors]))
       return lambda target: target in children
     self._filters.extend(_create_filters(self.get_options().ancestor, filter_for_ancestor))
 
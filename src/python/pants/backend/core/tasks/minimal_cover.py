@@ -16,18 +16,18 @@ class MinimalCover(ConsoleTask):
   """
 
   def console_output(self, _):
-    internal_deps = set()
-    for target in self.context.target_roots:
-      internal_deps.update(self._collect_internal_deps(target))
+    roots = set(self.context.target_roots)
+
+    # A root is redundant if it is reachable from the dependencies of any root, which one walk of
+    # the closure of all their dependencies finds.
+    dependency_addresses = [dependency.address
+                            for target in roots for dependency in target.dependencies]
+    internal_roots = set(target for target in
+                         self.context.build_graph.iter_closure(dependency_addresses)
+                         if target in roots)
 
     minimal_cover = set()
     for target in self.context.target_roots:
-      if target not in internal_deps and target not in minimal_cover:
+      if target not in internal_roots and target not in minimal_cover:
         minimal_cover.add(target)
         yield target.address.spec
-
-  def _collect_internal_deps(self, target):
-    internal_deps = set()
-    target.walk(internal_deps.add)
-    internal_deps.discard(target)
-    return internal_deps
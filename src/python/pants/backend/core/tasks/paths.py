@@ -5,9 +5,6 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
-import copy
-from collections import defaultdict
-
 from pants.backend.core.tasks.console_task import ConsoleTask
 from pants.base.exceptions import TaskError
 
@@ -18,34 +15,41 @@ class PathFinder(ConsoleTask):
     self.log = self.context.log
     self.target_roots = self.context.target_roots
 
-  @classmethod
-  def _find_paths(cls, from_target, to_target, log):
+  def _find_paths(self, from_target, to_target, log):
     log.debug('Looking for all paths from {} to {}'.format(from_target.address.reference(),
                                                            to_target.address.reference()))
 
-    paths = cls._find_paths_rec(from_target, to_target)
-    print('Found {} paths'.format(len(paths)))
-    print('')
-    for path in paths:
+    num_paths = 0
+    for path in self._iter_paths(from_target, to_target):
+      num_paths += 1
       log.debug('\t[{}]'.format(', '.join([target.address.reference() for target in path])))
+    print('Found {} paths'.format(num_paths))
+    print('')
 
-  all_paths = defaultdict(lambda: defaultdict(list))
-  @classmethod
-  def _find_paths_rec(cls, from_target, to_target):
+  def _iter_paths(self, from_target, to_target):
+    """Yields each dependency path from from_target to to_target, as a list of targets."""
     if from_target == to_target:
-      return [[from_target]]
-
-    if from_target not in cls.all_paths or to_target not in cls.all_paths[from_target]:
-      paths = []
-      for dep in from_target.dependencies:
-        for path in cls._find_paths_rec(dep, to_target):
-          new_path = copy.copy(path)
-          new_path.insert(0, from_target)
-          paths.append(new_path)
-
-      cls.all_paths[from_target][to_target] = paths
-
-    return cls.all_paths[from_target][to_target]
+      yield [from_target]
+      return
+
+    # Only the transitive dependees of to_target can be on a path to it.
+    on_paths = set(self.context.build_graph.iter_dependees([to_target.address]))
+    if from_target not in on_paths:
+      return
+
+    path = [from_target]
+    stack = [iter(from_target.dependencies)]
+    while stack:
+      for dep in stack[-1]:
+        if dep == to_target:
+          yield path + [dep]
+        elif dep in on_paths:
+          path.append(dep)
+          stack.append(iter(dep.dependencies))
+          break
+      else:
+        stack.pop()
+        path.pop()
 
   examined_targets = set()
 
@@ -224,7 +224,12 @@ class TaskBase(AbstractClass):
         spec=spec,
         task_name=my_name,
         compression=compression,
-        action=action)
+        action=action,
+        local_layout=self.get_options().local_artifact_cache_layout,
+        hardlink=self.get_options().local_artifact_cache_hardlink,
+        artifact_format=self.get_options().cache_artifact_format,
+        max_concurrent_requests=self.get_options().remote_artifact_cache_max_concurrent_requests,
+        bulk_probe=self.get_options().remote_artifact_cache_bulk_probe)
     else:
       return None
 
@@ -254,7 +259,8 @@ class TaskBase(AbstractClass):
 
   def invalidate(self):
     """Invalidates all targets for this task."""
-    BuildInvalidator(self._build_invalidator_dir).force_invalidate_all()
+    invalidation_store = self.context.options.for_global_scope().invalidation_store
+    BuildInvalidator(self._build_invalidator_dir, store=invalidation_store).force_invalidate_all()
 
   def create_cache_manager(self, invalidate_dependents, fingerprint_strategy=None):
     """Creates a cache manager that can be used to invalidate targets on behalf of this task.
@@ -267,10 +273,14 @@ class TaskBase(AbstractClass):
                              fingerprinting of a given Target.
     """
 
+    global_options = self.context.options.for_global_scope()
     return InvalidationCacheManager(self._cache_key_generator,
                                     self._build_invalidator_dir,
                                     invalidate_dependents,
-                                    fingerprint_strategy=fingerprint_strategy)
+                                    fingerprint_strategy=fingerprint_strategy,
+                                    hashing_workers=global_options.source_hashing_workers,
+                                    invalidation_store=global_options.invalidation_store,
+                                    build_graph=self.context.build_graph)
 
   @contextmanager
   def invalidated(self,
@@ -280,7 +290,8 @@ class TaskBase(AbstractClass):
                   silent=False,
                   locally_changed_targets=None,
                   fingerprint_strategy=None,
-                  topological_order=False):
+                  topological_order=False,
+                  target_weights=None):
     """Checks targets for invalidation, first checking the artifact cache.
 
     Subclasses call this to figure out what to work on.
@@ -298,6 +309,9 @@ class TaskBase(AbstractClass):
                                   and over, and partitioning them separately is a performance win.
     :param fingerprint_strategy:   A FingerprintStrategy instance, which can do per task, finer grained
                                   fingerprinting of a given Target.
+    :param target_weights:        If specified, a map from target to the number of source files it
+                                  should count as when partitioning, eg: to balance partitions by
+                                  expected cost rather than by size.
 
     If no exceptions are thrown by work in the block, the build cache is updated for the targets.
     Note: the artifact cache is not updated. That must be done manually.
@@ -326,7 +340,9 @@ class TaskBase(AbstractClass):
           colors[t] = 'locally_changed'
         else:
           colors[t] = 'not_locally_changed'
-    invalidation_check = cache_manager.check(targets, partition_size_hint, colors, topological_order=topological_order)
+    invalidation_check = cache_manager.check(targets, partition_size_hint, colors,
+                                             topological_order=topological_order,
+                                             target_weights=target_weights)
 
     if invalidation_check.invalid_vts and self.artifact_cache_reads_enabled():
       with self.context.new_workunit('cache'):
@@ -346,7 +362,8 @@ class TaskBase(AbstractClass):
           self._report_targets('No cached artifacts for ', uncached_targets, '.')
       # Now that we've checked the cache, re-partition whatever is still invalid.
       invalidation_check = \
-        InvalidationCheck(invalidation_check.all_vts, uncached_vts, partition_size_hint, colors)
+        InvalidationCheck(invalidation_check.all_vts, uncached_vts, partition_size_hint, colors,
+                          target_weights)
 
     if not silent:
       targets = []
@@ -396,9 +413,11 @@ class TaskBase(AbstractClass):
     uncached_vts = OrderedSet(vts)
 
     cache = self.get_artifact_cache()
-    items = [(cache, vt.cache_key) for vt in vts]
-
-    res = self.context.subproc_map(call_use_cached_files, items)
+    if cache.supports_batched_reads:
+      res = cache.use_cached_files_many([vt.cache_key for vt in vts])
+    else:
+      items = [(cache, vt.cache_key) for vt in vts]
+      res = self.context.subproc_map(call_use_cached_files, items)
 
     for vt, was_in_cache in zip(vts, res):
       if was_in_cache:
@@ -8,7 +8,8 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import re
 
 from pants.backend.core.tasks.console_task import ConsoleTask
-from pants.base.build_environment import get_scm
+from pants.base.build_environment import get_buildroot, get_scm
+from pants.base.dependee_index import DependeeIndex
 from pants.base.exceptions import TaskError
 from pants.base.lazy_source_mapper import LazySourceMapper
 from pants.goal.workspace import ScmWorkspace
@@ -73,18 +74,21 @@ class ChangeCalculator(object):
     if self._include_dependees == 'none':
       return changed
 
-    # Load the whole build graph since we need it for dependee finding in either remaining case.
-    for address in self._address_mapper.scan_addresses(spec_excludes=self._spec_excludes):
-      self._build_graph.inject_address_closure(address)
+    # Find dependees from an index of all BUILD files, which only parses those that changed since it
+    # was last updated, rather than by loading the whole build graph.
+    build_files = self._address_mapper.scan_buildfiles(get_buildroot(),
+                                                       spec_excludes=self._spec_excludes)
+    dependee_index = DependeeIndex.global_instance() or DependeeIndex()
+    dependee_index.update(self._address_mapper, self._build_graph, build_files)
 
     if self._include_dependees == 'direct':
-      return changed.union(*[self._build_graph.dependents_of(addr) for addr in changed])
-
-    if self._include_dependees == 'transitive':
-      return set(t.address for t in self._build_graph.transitive_dependees_of_addresses(changed))
-
-    # Should never get here.
-    raise ValueError('Unknown dependee inclusion: "{}"'.format(self._include_dependees))
+      dependees = set(dependee_index.dependees_of(changed))
+    elif self._include_dependees == 'transitive':
+      dependees = set(dependee_index.dependees_of(changed, transitive=True))
+    else:
+      # Should never get here.
+      raise ValueError('Unknown dependee inclusion: "{}"'.format(self._include_dependees))
+    return changed.union(dependees)
 
   def changed_target_addresses(self):
     """Find changed targets, according to SCM.
@@ -95,6 +99,9 @@ class ChangeCalculator(object):
       - Optionally include direct or transitive dependees.
       - Optionally filter targets matching exclude_target_regexp.
 
+    Note that the targets at the returned addresses are not necessarily injected into the build
+    graph.
+
     :returns: A set of target addresses.
     """
     # Find changed targets (and maybe their dependees).
@@ -6,13 +6,19 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import pickle
 from copy import deepcopy
 
 from six import string_types
-from twitter.common.dirutil.fileset import Fileset
 
+from pants.backend.core.glob_engine import GlobEngine
 from pants.base.build_environment import get_buildroot
 from pants.base.deprecated import deprecated
+from pants.base.parse_context import ParseContext
+
+
+def _reglob(wrapper_type, rel_path, args, kwargs):
+  return wrapper_type(ParseContext(rel_path=rel_path, type_aliases={}))(*args, **kwargs)
 
 
 class FilesetWithSpec(object):
@@ -20,10 +26,22 @@ class FilesetWithSpec(object):
 
   The filespec is what globs or file list it came from.
   """
-  def __init__(self, rel_root, result, filespec):
+  def __init__(self, rel_root, result, filespec, recipe=None):
+    """
+    :param recipe: An optional (wrapper_type, rel_path, args, kwargs) tuple of the call that
+                   produced this fileset.  Filesets with a recipe are pickled as the call, which is
+                   repeated when unpickled to glob the files present then.
+    """
     self._rel_root = rel_root
     self._result = result
     self.filespec = filespec
+    self._recipe = recipe
+
+  def __reduce__(self):
+    if self._recipe is None:
+      raise pickle.PicklingError('Only filesets that were globbed directly can be pickled, given '
+                                 'a fileset for {}'.format(self.filespec))
+    return _reglob, self._recipe
 
   def __iter__(self):
     return self._result.__iter__()
@@ -63,12 +81,17 @@ class FilesetRelPathWrapper(object):
   def __init__(self, parse_context):
     self.rel_path = parse_context.rel_path
 
+  # Globbing has no side effects, and results are re-globbed when unpickled.
+  build_file_cacheable = True
+
   def __call__(self, *args, **kwargs):
     root = os.path.join(get_buildroot(), self.rel_path)
+    recipe = (type(self), self.rel_path, args, kwargs.copy())
 
     excludes = kwargs.pop('exclude', [])
     if isinstance(excludes, string_types):
         raise ValueError("Expected exclude parameter to be a list of globs, lists, or strings")
+    excludes = list(excludes)
 
     for i, exclude in enumerate(excludes):
       if isinstance(exclude, string_types):
@@ -87,7 +110,7 @@ class FilesetRelPathWrapper(object):
     buildroot = get_buildroot()
     rel_root = os.path.relpath(root, buildroot)
     filespec = self.to_filespec(args, root=rel_root, excludes=excludes)
-    return FilesetWithSpec(rel_root, result, filespec)
+    return FilesetWithSpec(rel_root, result, filespec, recipe=recipe)
 
   def _is_glob_dir_outside_root(self, glob, root):
     # The assumption is that a correct glob starts with the root,
@@ -135,7 +158,11 @@ class Globs(FilesetRelPathWrapper):
   :rtype FilesetWithSpec
 
   """
-  wrapped_fn = Fileset.globs
+  @staticmethod
+  def globs(*globspecs, **kw):
+    return GlobEngine.global_instance().globs(*globspecs, **kw)
+
+  wrapped_fn = globs
 
 
 class RGlobs(FilesetRelPathWrapper):
@@ -160,7 +187,7 @@ class RGlobs(FilesetRelPathWrapper):
   def rglobs_following_symlinked_dirs_by_default(*globspecs, **kw):
     if 'follow_links' not in kw:
       kw['follow_links'] = True
-    return Fileset.rglobs(*globspecs, **kw)
+    return GlobEngine.global_instance().rglobs(*globspecs, **kw)
 
   wrapped_fn = rglobs_following_symlinked_dirs_by_default
 
@@ -191,6 +218,6 @@ class ZGlobs(FilesetRelPathWrapper):
   def zglobs_following_symlinked_dirs_by_default(*globspecs, **kw):
     if 'follow_links' not in kw:
       kw['follow_links'] = True
-    return Fileset.zglobs(*globspecs, **kw)
+    return GlobEngine.global_instance().zglobs(*globspecs, **kw)
 
   wrapped_fn = zglobs_following_symlinked_dirs_by_default
@@ -41,6 +41,7 @@ from pants.backend.jvm.tasks.jvm_compile.java.java_compile import JavaCompile
 from pants.backend.jvm.tasks.jvm_compile.scala.scala_compile import (JavaZincCompile,
                                                                      ScalaZincCompile)
 from pants.backend.jvm.tasks.jvm_run import JvmRun
+from pants.backend.jvm.tasks.list_compile_times import ListCompileTimes
 from pants.backend.jvm.tasks.nailgun_task import NailgunKillall
 from pants.backend.jvm.tasks.scala_repl import ScalaRepl
 from pants.backend.jvm.tasks.scaladoc_gen import ScaladocGen
@@ -134,6 +135,9 @@ def register_goals():
 
   task(name='jvm', action=jvm_compile).install('compile').with_description('Compile source code.')
 
+  task(name='compile-times', action=ListCompileTimes).install().with_description(
+      'List the compile times recorded for targets in previous runs.')
+
   # Generate documentation.
   task(name='javadoc', action=JavadocGen).install('doc').with_description('Create documentation.')
   task(name='scaladoc', action=ScaladocGen).install('doc')
@@ -0,0 +1,158 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import logging
+import os
+import threading
+
+from pants.subsystem.subsystem import Subsystem
+from pants.util.dirutil import safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+class CompileTimeDB(object):
+  """A persistent record of how long each target took to compile in previous runs.
+
+  Durations are recorded per language and target spec, along with the number of sources the target
+  had at the time.  Repeated observations of a target are smoothed with an exponential moving
+  average, so that one slow run (eg: on a loaded machine) does not dominate its prediction.
+  """
+
+  # Bump this if the on-disk format changes.
+  _VERSION = 1
+
+  # The weight given to the newest observation of a target in its moving average.
+  _SMOOTHING = 0.5
+
+  class Entry(object):
+    def __init__(self, secs, num_sources, samples):
+      self.secs = secs
+      self.num_sources = num_sources
+      self.samples = samples
+
+  def __init__(self, path):
+    """
+    :param string path: The file to load the record from and `save` it to.
+    """
+    self._path = path
+    self._lock = threading.Lock()
+    self._entries = self._load()  # {language: {spec: Entry}}
+    self._dirty = False
+
+  @property
+  def path(self):
+    return self._path
+
+  def languages(self):
+    return sorted(self._entries.keys())
+
+  def entries(self, language):
+    """Returns a list of (spec, Entry) tuples for the given language, sorted by spec."""
+    return sorted(self._entries.get(language, {}).items())
+
+  def record(self, language, spec, secs, num_sources):
+    """Records that the target with the given spec took secs to compile.
+
+    May be called concurrently.
+
+    :param string language: The language the target was compiled as, eg: 'java'.
+    :param string spec: The spec of the target's address.
+    :param float secs: The seconds the target took to compile.
+    :param int num_sources: The number of sources the target had.
+    """
+    with self._lock:
+      entries = self._entries.setdefault(language, {})
+      entry = entries.get(spec)
+      if entry is None:
+        entries[spec] = self.Entry(secs, num_sources, 1)
+      else:
+        entry.secs = self._SMOOTHING * secs + (1 - self._SMOOTHING) * entry.secs
+        entry.num_sources = num_sources
+        entry.samples += 1
+      self._dirty = True
+
+  def predict(self, language, spec, num_sources):
+    """Returns the predicted seconds to compile the given target, or None if it was never seen.
+
+    The recorded duration is scaled by how much the target's number of sources has changed since.
+    """
+    entry = self._entries.get(language, {}).get(spec)
+    if entry is None:
+      return None
+    if entry.num_sources and num_sources:
+      return entry.secs * num_sources / entry.num_sources
+    return entry.secs
+
+  def secs_per_source(self, language):
+    """Returns the average seconds taken to compile one source of the given language, or None."""
+    entries = self._entries.get(language, {}).values()
+    num_sources = sum(entry.num_sources for entry in entries)
+    if not num_sources:
+      return None
+    return sum(entry.secs for entry in entries) / num_sources
+
+  def save(self):
+    """Persists the record, if anything was recorded since it was loaded."""
+    with self._lock:
+      if not self._dirty:
+        return
+      data = {
+        'version': self._VERSION,
+        'entries': {language: {spec: [entry.secs, entry.num_sources, entry.samples]
+                               for spec, entry in entries.items()}
+                    for language, entries in self._entries.items()}
+      }
+      self._dirty = False
+    safe_mkdir_for(self._path)
+    tmp_path = '{}.tmp.{}'.format(self._path, os.getpid())
+    with open(tmp_path, 'w') as fp:
+      json.dump(data, fp)
+    os.rename(tmp_path, self._path)
+
+  def _load(self):
+    if not os.path.exists(self._path):
+      return {}
+    try:
+      with open(self._path, 'r') as fp:
+        data = json.load(fp)
+      if data.get('version') != self._VERSION:
+        return {}
+      return {language: {spec: self.Entry(secs, num_sources, samples)
+                         for spec, (secs, num_sources, samples) in entries.items()}
+              for language, entries in data['entries'].items()}
+    except (ValueError, KeyError, TypeError) as e:
+      logger.warn('Ignoring corrupt compile time database at {}: {}'.format(self._path, e))
+      return {}
+
+
+class CompileTimes(Subsystem):
+  """Records how long targets take to compile, to balance future compiles by."""
+
+  @classmethod
+  def scope_qualifier(cls):
+    return 'compile-times'
+
+  @classmethod
+  def register_options(cls, register):
+    super(CompileTimes, cls).register_options(register)
+    register('--path', advanced=True, metavar='<path>',
+             default=os.path.join(register.bootstrap.pants_workdir, 'compile_times.json'),
+             help='The file to record compile times in.')
+
+  def __init__(self, *args, **kwargs):
+    super(CompileTimes, self).__init__(*args, **kwargs)
+    self._db = None
+
+  @property
+  def db(self):
+    """The CompileTimeDB shared by everything using this subsystem in this run."""
+    if self._db is None:
+      self._db = CompileTimeDB(self.get_options().path)
+    return self._db
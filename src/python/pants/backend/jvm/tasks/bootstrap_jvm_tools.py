@@ -21,6 +21,7 @@ from pants.base.exceptions import TaskError
 from pants.ivy.ivy_subsystem import IvySubsystem
 from pants.java import util
 from pants.java.executor import Executor
+from pants.java.jar.jar_index import JarIndexing
 from pants.java.jar.shader import Shader
 from pants.util.dirutil import safe_mkdir_for
 
@@ -81,7 +82,7 @@ class BootstrapJvmTools(IvyTaskMixin, JarTask):
 
   @classmethod
   def global_subsystems(cls):
-    return super(BootstrapJvmTools, cls).global_subsystems() + (IvySubsystem, )
+    return super(BootstrapJvmTools, cls).global_subsystems() + (IvySubsystem, JarIndexing)
 
   def __init__(self, *args, **kwargs):
     super(BootstrapJvmTools, self).__init__(*args, **kwargs)
@@ -145,7 +146,7 @@ class BootstrapJvmTools(IvyTaskMixin, JarTask):
   def shader(self):
     if self._shader is None:
       jarjar = self.tool_jar('jarjar')
-      self._shader = Shader(jarjar)
+      self._shader = Shader(jarjar, jar_index=JarIndexing.global_instance().index)
     return self._shader
 
   def _bootstrap_shaded_jvm_tool(self, key, scope, tools, main, custom_rules=None):
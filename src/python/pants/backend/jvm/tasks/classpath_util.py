@@ -11,6 +11,7 @@ from twitter.common.collections import OrderedSet
 
 from pants.backend.jvm.targets.jvm_target import JvmTarget
 from pants.base.build_environment import get_buildroot
+from pants.base.build_graph import sort_targets
 from pants.base.exceptions import TaskError
 
 
@@ -46,7 +47,7 @@ class ClasspathUtil(object):
     :param target_closure: The transitive closure of the target
     """
 
-    classpath_tuples = classpath_products.get_for_target(target)
+    classpath_tuples = classpath_products.get_for_targets_by_target([target])[target]
 
     target_closure = target_closure or target.closure()
     exclude_patterns = cls._exclude_patterns_for_closure(target_closure)
@@ -63,6 +64,43 @@ class ClasspathUtil(object):
 
     return cls._pluck_paths(full_classpath_tuples)
 
+  @classmethod
+  def compute_classpaths_for_targets(cls, targets, classpath_products, extra_classpath_tuples,
+                                     confs):
+    """Returns the classpath of each of the passed targets, as `compute_classpath_for_target` would.
+
+    The exclude patterns of every target in the closure of the passed targets are computed in one
+    pass over it, dependencies first, and each distinct classpath entry is validated once.
+
+    :param targets: The targets to generate classpaths for
+    :param UnionProducts classpath_products: Product containing classpath elements.
+    :param extra_classpath_tuples: Additional classpath entries
+    :param confs: The list of confs for use by this classpath
+    :returns: A dict from each target to the list of its classpath entries.
+    """
+    exclude_patterns_by_target = {}
+    for target in reversed(sort_targets(targets)):
+      exclude_patterns = set(cls._exclude_patterns_for_closure([target]))
+      for dep in target.dependencies:
+        exclude_patterns.update(exclude_patterns_by_target[dep])
+      exclude_patterns_by_target[target] = frozenset(exclude_patterns)
+
+    filtered_extra_classpath_tuples = \
+      cls._filter_classpath_by_excludes_and_confs(extra_classpath_tuples, [], confs)
+
+    classpaths = {}
+    validated = set()
+    for target, classpath_tuples in classpath_products.get_for_targets_by_target(targets).items():
+      filtered_classpath_tuples = cls._filter_classpath_by_excludes_and_confs(
+        classpath_tuples, exclude_patterns_by_target[target], confs)
+      full_classpath_tuples = filtered_classpath_tuples + filtered_extra_classpath_tuples
+      cls._validate_classpath_paths([classpath_tuple for classpath_tuple in full_classpath_tuples
+                                     if classpath_tuple not in validated],
+                                    classpath_products)
+      validated.update(full_classpath_tuples)
+      classpaths[target] = cls._pluck_paths(full_classpath_tuples)
+    return classpaths
+
   @classmethod
   def classpath_entries(cls, targets, classpath_products, confs):
     """Returns the list of jar entries for a classpath covering all the passed targets.
@@ -116,7 +154,12 @@ class ClasspathUtil(object):
   def _validate_classpath_paths(cls, classpath, classpath_products):
     """Validates that all files are located within the working copy, to simplify relativization."""
     buildroot = get_buildroot()
+    buildroot_prefix = os.path.join(buildroot, '')
     for conf, path in classpath:
+      # Most entries are absolute paths under the buildroot with no parent references, which are
+      # cheap to recognize as inside it.
+      if path.startswith(buildroot_prefix) and '..' not in path:
+        continue
       if os.path.relpath(path, buildroot).startswith('..'):
         target = classpath_products.target_for_product((conf, path))
         raise TaskError(
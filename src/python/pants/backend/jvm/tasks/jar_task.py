@@ -20,6 +20,7 @@ from pants.backend.jvm.targets.jvm_binary import Duplicate, JarRules, JvmBinary,
 from pants.backend.jvm.tasks.nailgun_task import NailgunTask
 from pants.base.exceptions import TaskError
 from pants.binary_util import safe_args
+from pants.java.jar.jar_writer import CompressedEntryCache, JarWriter
 from pants.java.jar.manifest import Manifest
 from pants.util.contextutil import temporary_dir
 from pants.util.meta import AbstractClass
@@ -39,14 +40,23 @@ class Jar(object):
   class Entry(AbstractClass):
     """An entry to be written to a jar."""
 
-    def __init__(self, dest):
+    def __init__(self, dest, cache_key=None):
       self._dest = dest
+      self._cache_key = cache_key
 
     @property
     def dest(self):
       """The destination path of the entry in the jar."""
       return self._dest
 
+    @property
+    def cache_key(self):
+      """The key to cache the compressed contents of the entry under, if any.
+
+      Only used when the jar is written in-process.
+      """
+      return self._cache_key
+
     @abstractmethod
     def materialize(self, scratch_dir):
       """Materialize this entry's source data into a filesystem path.
@@ -60,8 +70,8 @@ class Jar(object):
   class FileSystemEntry(Entry):
     """An entry backed by an existing file on disk."""
 
-    def __init__(self, src, dest=None):
-      super(Jar.FileSystemEntry, self).__init__(dest)
+    def __init__(self, src, dest=None, cache_key=None):
+      super(Jar.FileSystemEntry, self).__init__(dest, cache_key=cache_key)
       self._src = src
 
     def materialize(self, _):
@@ -105,7 +115,7 @@ class Jar(object):
     """
     self._classpath = maybe_list(classpath)
 
-  def write(self, src, dest=None):
+  def write(self, src, dest=None, cache_key=None):
     """Schedules a write of the file at ``src`` to the ``dest`` path in this jar.
 
     If the ``src`` is a file, then ``dest`` must be specified.
@@ -116,6 +126,8 @@ class Jar(object):
 
     :param string src: the path to the pre-existing source file or directory
     :param string dest: the path the source file or directory should have in this jar
+    :param string cache_key: an optional key to cache the compressed contents of the source file or
+      directory under when the jar is written in-process, eg: the id of the target it belongs to
     """
     if not src or not isinstance(src, string_types):
       raise ValueError('The src path must be a non-empty string, got {} of type {}.'.format(
@@ -126,7 +138,7 @@ class Jar(object):
     if not os.path.isdir(src) and not dest:
       raise self.Error('Source file {} must have a jar destination specified'.format(src))
 
-    self._add_entry(self.FileSystemEntry(src, dest))
+    self._add_entry(self.FileSystemEntry(src, dest, cache_key=cache_key))
 
   def writestr(self, path, contents):
     """Schedules a write of the file ``contents`` to the given ``path`` in this jar.
@@ -158,6 +170,27 @@ class Jar(object):
 
     self._jars.append(jar)
 
+  def _is_empty(self):
+    return not (self._entries or self._jars or self._manifest_entry or self._main or
+                self._classpath)
+
+  def _write_in_process(self, writer):
+    """Writes the scheduled contents of this jar with the given `JarWriter`.
+
+    :param writer: A `pants.java.jar.jar_writer.JarWriter` for the jar's path.
+    """
+    with temporary_dir() as scratch_dir:
+      if self._main:
+        writer.main(self._main)
+      if self._classpath:
+        writer.classpath(self._classpath)
+      entries = ([self._manifest_entry] if self._manifest_entry else []) + self._entries
+      for entry in entries:
+        writer.write(entry.materialize(scratch_dir), entry.dest, cache_key=entry.cache_key)
+      for jar in self._jars:
+        writer.writejar(jar)
+      writer.close()
+
   @contextmanager
   def _render_jar_tool_args(self, options):
     """Format the arguments to jar-tool.
@@ -221,6 +254,18 @@ class JarTask(NailgunTask):
   def global_subsystems(cls):
     return super(JarTask, cls).global_subsystems() + (JarTool, )
 
+  @classmethod
+  def register_options(cls, register):
+    super(JarTask, cls).register_options(register)
+    register('--in-process-writer', action='store_true', default=False, advanced=True,
+             help='Write jars in-process rather than with the jar-tool.  Entries already '
+                  'compressed in other jars or in the compressed entry cache are copied rather '
+                  'than recompressed, and the rest are compressed in parallel.')
+    register('--compressed-entry-cache-dir', advanced=True, metavar='<dir>',
+             default=os.path.join(register.bootstrap.pants_workdir, 'compressed_jar_entries'),
+             help='The directory to cache the compressed classes and resources of targets in when '
+                  'writing jars in-process.  Set to the empty string to disable the cache.')
+
   @staticmethod
   def _flag(bool_value):
     return 'true' if bool_value else 'false'
@@ -239,9 +284,24 @@ class JarTask(NailgunTask):
       raise ValueError('Unrecognized duplicate action: {}'.format(action))
     return name
 
+  @classmethod
+  def _split_rules(cls, jar_rules):
+    """Returns the skip patterns and the (pattern, action name) duplicate policies of jar_rules."""
+    skip_patterns = []
+    policies = []
+    for rule in jar_rules.rules:
+      if isinstance(rule, Skip):
+        skip_patterns.append(rule.apply_pattern)
+      elif isinstance(rule, Duplicate):
+        policies.append((rule.apply_pattern, cls._action_name(rule.action)))
+      else:
+        raise ValueError('Unrecognized rule: {}'.format(rule))
+    return skip_patterns, policies
+
   def __init__(self, *args, **kwargs):
     super(JarTask, self).__init__(*args, **kwargs)
     self.set_distribution(jdk=True)
+    self._entry_cache = None
 
     # TODO(John Sirois): Consider poking a hole for custom jar-tool jvm args - namely for Xmx
     # control.
@@ -262,25 +322,22 @@ class JarTask(NailgunTask):
     except jar.Error as e:
       raise TaskError('Failed to write to jar at {}: {}'.format(path, e))
 
+    jar_rules = jar_rules or JarRules.default()
+    if self.get_options().in_process_writer:
+      if not jar._is_empty():  # Don't build an empty jar
+        self._write_jar_in_process(jar, path, overwrite, compressed, jar_rules)
+      return
+
     with jar._render_jar_tool_args(self.get_options()) as args:
       if args:  # Don't build an empty jar
         args.append('-update={}'.format(self._flag(not overwrite)))
         args.append('-compress={}'.format(self._flag(compressed)))
 
-        jar_rules = jar_rules or JarRules.default()
         args.append('-default_action={}'.format(self._action_name(jar_rules.default_dup_action)))
 
-        skip_patterns = []
-        duplicate_actions = []
-
-        for rule in jar_rules.rules:
-          if isinstance(rule, Skip):
-            skip_patterns.append(rule.apply_pattern)
-          elif isinstance(rule, Duplicate):
-            duplicate_actions.append('{}={}'.format(
-              rule.apply_pattern.pattern, self._action_name(rule.action)))
-          else:
-            raise ValueError('Unrecognized rule: {}'.format(rule))
+        skip_patterns, policies = self._split_rules(jar_rules)
+        duplicate_actions = ['{}={}'.format(pattern.pattern, action)
+                             for pattern, action in policies]
 
         if skip_patterns:
           args.append('-skip={}'.format(','.join(p.pattern for p in skip_patterns)))
@@ -292,6 +349,27 @@ class JarTask(NailgunTask):
 
         JarTool.global_instance().run(context=self.context, runjava=self.runjava, args=args)
 
+  def _write_jar_in_process(self, jar, path, overwrite, compressed, jar_rules):
+    skip_patterns, policies = self._split_rules(jar_rules)
+    writer = JarWriter(path,
+                       update=not overwrite,
+                       compress=compressed,
+                       skip_patterns=skip_patterns,
+                       default_action=self._action_name(jar_rules.default_dup_action),
+                       policies=policies,
+                       cache=self._compressed_entry_cache())
+    try:
+      jar._write_in_process(writer)
+    except JarWriter.Error as e:
+      raise TaskError('Failed to write to jar at {}: {}'.format(path, e))
+
+  def _compressed_entry_cache(self):
+    if self._entry_cache is None:
+      cache_dir = self.get_options().compressed_entry_cache_dir
+      if cache_dir:
+        self._entry_cache = CompressedEntryCache(cache_dir)
+    return self._entry_cache
+
   class JarBuilder(AbstractClass):
     """A utility to aid in adding the classes and resources associated with targets to a jar."""
 
@@ -373,7 +451,7 @@ class JarTask(NailgunTask):
             if target_products:
               for root, products in target_products.rel_paths():
                 for prod in products:
-                  self._jar.write(os.path.join(root, prod), prod)
+                  self._jar.write(os.path.join(root, prod), prod, cache_key=tgt.id)
 
           add_products(target_classes)
           for resources_target in target_resources:
@@ -7,10 +7,12 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import itertools
 import sys
+import time
 from abc import abstractmethod
 from collections import defaultdict
 
 from pants.backend.core.tasks.group_task import GroupMember
+from pants.backend.jvm.subsystems.compile_times import CompileTimes
 from pants.backend.jvm.tasks.jvm_compile.jvm_compile_global_strategy import JvmCompileGlobalStrategy
 from pants.backend.jvm.tasks.jvm_compile.jvm_compile_isolated_strategy import \
   JvmCompileIsolatedStrategy
@@ -18,6 +20,7 @@ from pants.backend.jvm.tasks.jvm_compile.jvm_dependency_analyzer import JvmDepen
 from pants.backend.jvm.tasks.jvm_compile.jvm_fingerprint_strategy import JvmFingerprintStrategy
 from pants.backend.jvm.tasks.nailgun_task import NailgunTaskBase
 from pants.goal.products import MultipleRootedProducts
+from pants.java.jar.jar_index import JarIndexing
 from pants.option.options import Options
 from pants.reporting.reporting_utils import items_to_report_element
 
@@ -36,6 +39,15 @@ class JvmCompile(NailgunTaskBase, GroupMember):
              help='Roughly how many source files to attempt to compile together. Set to a large '
                   'number to compile all sources together. Set to 0 to compile target-by-target.')
 
+    register('--partition-by', choices=['source-count', 'compile-time'], default='source-count',
+             advanced=True,
+             help='Balance partitions by the number of sources in each target, or by how long each '
+                  'target took to compile in previous runs. Targets that have not been compiled '
+                  'before count as their number of sources. Only the time taken by a whole '
+                  'partition is measured, and it is shared out among its targets by their number '
+                  'of sources, so targets last compiled in the same partition are weighed as '
+                  'equally costly per source.')
+
     register('--jvm-options', type=Options.list,
              help='Run the compiler with these JVM options.')
 
@@ -71,6 +83,10 @@ class JvmCompile(NailgunTaskBase, GroupMember):
     JvmCompileGlobalStrategy.register_options(register, cls._language, cls._supports_concurrent_execution)
     JvmCompileIsolatedStrategy.register_options(register, cls._language, cls._supports_concurrent_execution)
 
+  @classmethod
+  def global_subsystems(cls):
+    return super(JvmCompile, cls).global_subsystems() + (CompileTimes, JarIndexing)
+
   @classmethod
   def product_types(cls):
     return ['classes_by_target', 'classes_by_source', 'resources_by_target']
@@ -246,12 +262,15 @@ class JvmCompile(NailgunTaskBase, GroupMember):
     # Invalidation check. Everything inside the with block must succeed for the
     # invalid targets to become valid.
     partition_size_hint, locally_changed_targets = self._strategy.invalidation_hints(relevant_targets)
+    target_weights = (self._predicted_target_weights(relevant_targets)
+                      if self.get_options().partition_by == 'compile-time' else None)
     with self.invalidated(relevant_targets,
                           invalidate_dependents=True,
                           partition_size_hint=partition_size_hint,
                           locally_changed_targets=locally_changed_targets,
                           fingerprint_strategy=self._jvm_fingerprint_strategy(),
-                          topological_order=True) as invalidation_check:
+                          topological_order=True,
+                          target_weights=target_weights) as invalidation_check:
       if invalidation_check.invalid_vts:
         # Find the invalid targets for this chunk.
         invalid_targets = [vt.target for vt in invalidation_check.invalid_vts]
@@ -309,7 +328,42 @@ class JvmCompile(NailgunTaskBase, GroupMember):
         # change triggering the error is reverted, we won't rebuild to restore the missing
         # classfiles. So we force-invalidate here, to be on the safe side.
         vts.force_invalidate()
+        start = time.time()
         self.compile(self._args, classpath, sources, outdir, upstream_analysis, analysis_file)
+        self._record_compile_time(vts, time.time() - start)
+
+  def post_execute(self):
+    CompileTimes.global_instance().db.save()
+
+  def _record_compile_time(self, vts, secs):
+    """Records secs against the targets in vts, shared out by their number of sources.
+
+    The compiler reports no per-target times, so the targets of a multi-target partition are all
+    recorded as taking the same time per source, whatever their individual cost.
+    """
+    db = CompileTimes.global_instance().db
+    total_sources = sum(vt.num_chunking_units for vt in vts.versioned_targets)
+    for vt in vts.versioned_targets:
+      share = (vt.num_chunking_units / total_sources if total_sources
+               else 1 / len(vts.versioned_targets))
+      db.record(self._language, vt.target.address.spec, secs * share, vt.num_chunking_units)
+
+  def _predicted_target_weights(self, targets):
+    """Returns a map from target to its predicted compile time, in sources' worth of time.
+
+    Expressing the prediction as a number of average sources means that the partition size hint
+    keeps its meaning, and that targets never compiled before can be weighed by their sources.
+    """
+    db = CompileTimes.global_instance().db
+    secs_per_source = db.secs_per_source(self._language)
+    if not secs_per_source:
+      return None
+    target_weights = {}
+    for target in targets:
+      predicted = db.predict(self._language, target.address.spec, target.num_chunking_units)
+      if predicted is not None:
+        target_weights[target] = predicted / secs_per_source
+    return target_weights
 
   def check_artifact_cache(self, vts):
     post_process_cached_vts = lambda vts: self._strategy.post_process_cached_vts(vts)
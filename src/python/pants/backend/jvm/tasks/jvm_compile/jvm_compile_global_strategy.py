@@ -21,8 +21,9 @@ from pants.base.build_environment import get_buildroot, get_scm
 from pants.base.exceptions import TaskError
 from pants.base.target import Target
 from pants.base.worker_pool import Work
+from pants.java.jar.jar_index import JarIndexing
 from pants.option.options import Options
-from pants.util.contextutil import open_zip, temporary_dir
+from pants.util.contextutil import temporary_dir
 from pants.util.dirutil import safe_mkdir, safe_rmtree, safe_walk
 
 
@@ -515,19 +516,22 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
 
     Returns a list of targets, or None if no SCM is available.
     """
-    # Compute the src->targets mapping. There should only be one target per source,
-    # but that's not yet a hard requirement, so the value is a list of targets.
-    # TODO(benjy): Might this inverse mapping be needed elsewhere too?
+    scm = get_scm()
+    if not scm:
+      return None
+    changed_files = scm.changed_files(include_untracked=True, relative_to=get_buildroot())
+
+    # Compute the src->targets mapping for just the changed files, rather than inverting every
+    # source of every relevant target. There should only be one target per source, but that's not
+    # yet a hard requirement, so the value is a list of targets.
+    changed_files_set = set(changed_files)
     targets_by_source = defaultdict(list)
     for tgt, srcs in self._sources_for_targets(relevant_targets).items():
       for src in srcs:
-        targets_by_source[src].append(tgt)
+        if src in changed_files_set:
+          targets_by_source[src].append(tgt)
 
     ret = OrderedSet()
-    scm = get_scm()
-    if not scm:
-      return None
-    changed_files = scm.changed_files(include_untracked=True, relative_to=get_buildroot())
     for f in changed_files:
       ret.update(targets_by_source.get(f, []))
     return list(ret)
@@ -540,15 +544,15 @@ class JvmCompileGlobalStrategy(JvmCompileStrategy):
 
     if self._upstream_class_to_path is None:
       self._upstream_class_to_path = {}
+      jar_index = JarIndexing.global_instance().index
       classpath_entries = filter(non_product, classpath)
       for cp_entry in self._find_all_bootstrap_jars() + classpath_entries:
         # Per the classloading spec, a 'jar' in this context can also be a .zip file.
         if os.path.isfile(cp_entry) and ((cp_entry.endswith('.jar') or cp_entry.endswith('.zip'))):
-          with open_zip(cp_entry, 'r') as jar:
-            for cls in jar.namelist():
-              # First jar with a given class wins, just like when classloading.
-              if cls.endswith(b'.class') and not cls in self._upstream_class_to_path:
-                self._upstream_class_to_path[cls] = cp_entry
+          for cls in jar_index.classes(cp_entry):
+            # First jar with a given class wins, just like when classloading.
+            if not cls in self._upstream_class_to_path:
+              self._upstream_class_to_path[cls] = cp_entry
         elif os.path.isdir(cp_entry):
           for dirpath, _, filenames in safe_walk(cp_entry, followlinks=True):
             for f in filter(lambda x: x.endswith('.class'), filenames):
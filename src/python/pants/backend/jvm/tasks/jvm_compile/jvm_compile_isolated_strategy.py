@@ -10,12 +10,11 @@ from collections import defaultdict
 from contextlib import contextmanager
 
 from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
-from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
-                                                                 Job)
 from pants.backend.jvm.tasks.jvm_compile.jvm_compile_strategy import JvmCompileStrategy
 from pants.backend.jvm.tasks.jvm_compile.resource_mapping import ResourceMapping
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
+from pants.base.execution_graph import ExecutionFailure, ExecutionGraph, Job
 from pants.base.worker_pool import Work, WorkerPool
 from pants.util.dirutil import safe_delete, safe_mkdir, safe_walk
 
@@ -145,21 +144,24 @@ class JvmCompileIsolatedStrategy(JvmCompileStrategy):
                            compile_contexts, extra_compile_time_classpath,
                      invalid_targets, invalid_vts_partitioned,  compile_vts, register_vts,
                      update_artifact_cache_vts_work):
-    def create_work_for_vts(vts, compile_context, target_closure):
+    def create_work_for_vts(vts, compile_context, target_closure, cp_entries=None):
       def work():
         progress_message = vts.targets[0].address.spec
         upstream_analysis = dict(self._upstream_analysis(compile_contexts,
                                                          target_closure))
-        cp_entries = self._compute_classpath_entries(compile_classpaths,
-                                                     target_closure,
-                                                     compile_context,
-                                                     extra_compile_time_classpath)
+        if cp_entries is None:
+          entries = self._compute_classpath_entries(compile_classpaths,
+                                                    target_closure,
+                                                    compile_context,
+                                                    extra_compile_time_classpath)
+        else:
+          entries = cp_entries
         with self._empty_analysis_cleanup(compile_context):
           compile_vts(vts,
                       compile_context.sources,
                       compile_context.analysis_file,
                       upstream_analysis,
-                      cp_entries,
+                      entries,
                       compile_context.classes_dir,
                       progress_message)
 
@@ -172,26 +174,43 @@ class JvmCompileIsolatedStrategy(JvmCompileStrategy):
 
       return work
 
-    jobs = []
     invalid_target_set = set(invalid_targets)
+    closures = {}
+    invalid_dependencies_by_target = {}
     for vts in invalid_vts_partitioned:
       assert len(vts.targets) == 1, ("Requested one target per partition, got {}".format(vts))
+      compile_target = vts.targets[0]
+      closures[compile_target] = compile_target.closure()
+      # dependencies of the current target which are invalid for this chunk
+      invalid_dependencies_by_target[compile_target] = (
+        (closures[compile_target] & invalid_target_set) - [compile_target])
+
+    # Targets with no invalid dependencies have all of their classpath products registered
+    # already, so their classpaths are computed together up front. The rest are computed when
+    # their compiles run, after their upstream compiles have registered products of their own.
+    cp_entries_by_target = ClasspathUtil.compute_classpaths_for_targets(
+      [target for target, deps in invalid_dependencies_by_target.items() if not deps],
+      compile_classpaths, extra_compile_time_classpath, self._confs)
 
+    jobs = []
+    for vts in invalid_vts_partitioned:
       # Invalidated targets are a subset of relevant targets: get the context for this one.
       compile_target = vts.targets[0]
       compile_context = compile_contexts[compile_target]
-      compile_target_closure = compile_target.closure()
-
-      # dependencies of the current target which are invalid for this chunk
-      invalid_dependencies = (compile_target_closure & invalid_target_set) - [compile_target]
+      compile_target_closure = closures[compile_target]
+      invalid_dependencies = invalid_dependencies_by_target[compile_target]
 
       jobs.append(Job(self.exec_graph_key_for_target(compile_target),
-                      create_work_for_vts(vts, compile_context, compile_target_closure),
+                      create_work_for_vts(vts, compile_context, compile_target_closure,
+                                          cp_entries_by_target.get(compile_target)),
                       [self.exec_graph_key_for_target(target) for target in invalid_dependencies],
                       # If compilation and analysis work succeeds, validate the vts.
                       # Otherwise, fail it.
                       on_success=vts.update,
-                      on_failure=vts.force_invalidate))
+                      on_failure=vts.force_invalidate,
+                      # Estimate the cost of a compile by its number of sources, so that long
+                      # chains of large targets are started first.
+                      weight=len(compile_context.sources) or 1))
     return jobs
 
   def compile_chunk(self,
@@ -229,6 +248,8 @@ class JvmCompileIsolatedStrategy(JvmCompileStrategy):
       exec_graph.execute(self._worker_pool, self.context.log)
     except ExecutionFailure as e:
       raise TaskError("Compilation failure: {}".format(e))
+    finally:
+      self.context.log.info(exec_graph.format_execution_report(self._worker_count))
 
   def compute_resource_mapping(self, compile_contexts):
     return ResourceMapping(self._classes_dir)
@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import itertools
 import os
 from collections import defaultdict
 
@@ -19,7 +20,29 @@ from pants.base.build_graph import sort_targets
 from pants.base.exceptions import TaskError
 
 
+class _TargetBitset(object):
+  """An immutable set of targets, held as a bitmask over integer ids assigned to the targets."""
+
+  def __init__(self, ids, mask):
+    """
+    :param dict ids: A map from target to its id.
+    :param long mask: The bitmask of the ids of the targets in the set.
+    """
+    self._ids = ids
+    self._mask = mask
+
+  def __contains__(self, target):
+    target_id = self._ids.get(target)
+    return target_id is not None and bool(self._mask >> target_id & 1)
+
+
 class JvmDependencyAnalyzer(object):
+  """Checks the deps of compiled sources, as noted by the compiler, against their BUILD deps.
+
+  The maps from files to the targets that provide them and from targets to their transitive deps
+  are computed on the first check and reused by the checks of later partitions in the same run.
+  """
+
   def __init__(self,
                context,
                check_missing_deps,
@@ -35,6 +58,12 @@ class JvmDependencyAnalyzer(object):
     # These targets we will not report as having any dependency issues even if they do.
     self._target_whitelist = OrderedSet(target_whitelist)
 
+    # Computed lazily on the first check, since the products they need aren't available until then.
+    self._targets_by_file = None
+    self._transitive_deps_by_target = None
+    # {(target, classes dir): (classes OrderedSet, number mapped)}, see _map_classes.
+    self._mapped_classes = {}
+
   @classmethod
   def prepare(clsc, options, round_manager):
     round_manager.require_data('ivy_jar_products')
@@ -47,7 +76,17 @@ class JvmDependencyAnalyzer(object):
     However a single jar may be provided (transitively or intransitively) by multiple JarLibrary
     targets. But if there is a JarLibrary target that depends on a jar directly, then that
     "canonical" target will be the first one in the list of targets.
+
+    The map is computed on first use and then updated in place: the sources and jars in play are
+    fixed for the duration of a run, and the classes of each target are only ever added to, so
+    later calls only map the classes registered since the previous call.
     """
+    if self._targets_by_file is None:
+      self._targets_by_file = self._map_sources_and_jars()
+    self._map_classes(self._targets_by_file)
+    return self._targets_by_file
+
+  def _map_sources_and_jars(self):
     targets_by_file = defaultdict(OrderedSet)
 
     # Multiple JarLibrary targets can provide the same (org, name).
@@ -70,14 +109,6 @@ class JvmDependencyAnalyzer(object):
             for src in java_source.sources_relative_to_buildroot():
               targets_by_file[os.path.join(buildroot, src)].add(target)
 
-    # Compute class -> target.
-    with self._context.new_workunit(name='map_classes'):
-      classes_by_target = self._context.products.get_data('classes_by_target')
-      for tgt, target_products in classes_by_target.items():
-        for _, classes in target_products.abs_paths():
-          for cls in classes:
-            targets_by_file[cls].add(tgt)
-
     # Compute jar -> target.
     with self._context.new_workunit(name='map_jars'):
       with IvyTaskMixin.symlink_map_lock:
@@ -113,27 +144,53 @@ class JvmDependencyAnalyzer(object):
 
     return targets_by_file
 
+  def _map_classes(self, targets_by_file):
+    """Adds the classes registered since the last call to targets_by_file."""
+    with self._context.new_workunit(name='map_classes'):
+      classes_by_target = self._context.products.get_data('classes_by_target')
+      for tgt, target_products in classes_by_target.items():
+        for root, classes in target_products.rel_paths():
+          mapped_classes, num_mapped = self._mapped_classes.get((tgt, root), (None, 0))
+          if mapped_classes is not classes:
+            num_mapped = 0
+          if len(classes) > num_mapped:
+            for cls in itertools.islice(classes, num_mapped, None):
+              targets_by_file[os.path.join(root, cls)].add(tgt)
+            self._mapped_classes[(tgt, root)] = (classes, len(classes))
+
   def _compute_transitive_deps_by_target(self):
-    """Map from target to all the targets it depends on, transitively."""
-    # Sort from least to most dependent.
-    sorted_targets = reversed(sort_targets(self._context.targets()))
-    transitive_deps_by_target = defaultdict(set)
-    # Iterate in dep order, to accumulate the transitive deps for each target.
-    for target in sorted_targets:
-      transitive_deps = set()
-      for dep in target.dependencies:
-        transitive_deps.update(transitive_deps_by_target.get(dep, []))
-        transitive_deps.add(dep)
-
-      # Need to handle the case where a java_sources target has dependencies.
-      # In particular if it depends back on the original target.
-      if hasattr(target, 'java_sources'):
-        for java_source_target in target.java_sources:
-          for transitive_dep in java_source_target.dependencies:
-            transitive_deps_by_target[java_source_target].add(transitive_dep)
-
-      transitive_deps_by_target[target] = transitive_deps
-    return transitive_deps_by_target
+    """Map from target to a set of all the targets it depends on, transitively.
+
+    Each target's transitive deps are held as a bitmask over integer target ids, so accumulating
+    them costs a few word-wise ors per dep rather than a set copy.  The map is computed once per
+    run, since the targets in play don't change once compilation starts.
+    """
+    if self._transitive_deps_by_target is None:
+      ids = {}
+
+      def bit(target):
+        return 1 << ids.setdefault(target, len(ids))
+
+      # Sort from least to most dependent.
+      sorted_targets = reversed(sort_targets(self._context.targets()))
+      masks = {}
+      # Iterate in dep order, to accumulate the transitive deps for each target.
+      for target in sorted_targets:
+        mask = 0
+        for dep in target.dependencies:
+          mask |= masks.get(dep, 0) | bit(dep)
+
+        # Need to handle the case where a java_sources target has dependencies.
+        # In particular if it depends back on the original target.
+        if hasattr(target, 'java_sources'):
+          for java_source_target in target.java_sources:
+            for transitive_dep in java_source_target.dependencies:
+              masks[java_source_target] = masks.get(java_source_target, 0) | bit(transitive_dep)
+
+        masks[target] = mask
+      self._transitive_deps_by_target = {target: _TargetBitset(ids, mask)
+                                         for target, mask in masks.items()}
+    return self._transitive_deps_by_target
 
   def check(self, srcs, actual_deps):
     """Check for missing deps.
@@ -215,10 +272,12 @@ class JvmDependencyAnalyzer(object):
 
     All paths in the input and output are absolute.
     """
+    java_home = self._context.java_home
+
     def must_be_explicit_dep(dep):
       # We don't require explicit deps on the java runtime, so we shouldn't consider that
       # a missing dep.
-      return not dep.startswith(self._context.java_home)
+      return not dep.startswith(java_home)
 
     def target_or_java_dep_in_targets(target, targets):
       # We want to check if the target is in the targets collection
@@ -233,9 +292,6 @@ class JvmDependencyAnalyzer(object):
       else:
         return False
 
-    # TODO: If recomputing these every time becomes a performance issue, memoize for
-    # already-seen targets and incrementally compute for new targets not seen in a previous
-    # partition, in this or a previous chunk.
     targets_by_file = self._compute_targets_by_file()
     transitive_deps_by_target = self._compute_transitive_deps_by_target()
 
@@ -259,7 +315,8 @@ class JvmDependencyAnalyzer(object):
             elif not target_or_java_dep_in_targets(src_tgt, actual_dep_tgts):
               # Obviously intra-target deps are fine.
               canonical_actual_dep_tgt = next(iter(actual_dep_tgts))
-              if actual_dep_tgts.isdisjoint(transitive_deps_by_target.get(src_tgt, [])):
+              transitive_deps = transitive_deps_by_target.get(src_tgt, ())
+              if not any(tgt in transitive_deps for tgt in actual_dep_tgts):
                 missing_tgt_deps_map[(src_tgt, canonical_actual_dep_tgt)].append((src, actual_dep))
               elif canonical_actual_dep_tgt not in src_tgt.dependencies:
                 # The canonical dep is the only one a direct dependency makes sense on.
@@ -12,10 +12,10 @@ from xml.etree import ElementTree
 
 from pants.backend.jvm.subsystems.scala_platform import ScalaPlatform
 from pants.backend.jvm.targets.jar_library import JarLibrary
-from pants.backend.jvm.tasks.jvm_compile.analysis_tools import AnalysisTools
 from pants.backend.jvm.tasks.jvm_compile.jvm_compile import JvmCompile
 from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis import ZincAnalysis
 from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_parser import ZincAnalysisParser
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_tools import ZincAnalysisTools
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
 from pants.base.hash_utils import hash_file
@@ -99,7 +99,7 @@ class ZincCompile(JvmCompile):
     self._lazy_plugin_args = None
 
   def create_analysis_tools(self):
-    return AnalysisTools(self.context.java_home, ZincAnalysisParser(), ZincAnalysis)
+    return ZincAnalysisTools(self.context.java_home, ZincAnalysisParser(), ZincAnalysis)
 
   def zinc_classpath(self):
     # Zinc takes advantage of tools.jar if it's presented in classpath.
@@ -0,0 +1,205 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+import marshal
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from pants.backend.jvm.tasks.jvm_compile.analysis_parser import ParseError
+
+
+logger = logging.getLogger(__name__)
+
+
+class ZincAnalysisIndex(object):
+  """An index of the byte offsets of the sections of a zinc analysis file.
+
+  A zinc analysis is a text file holding a format version line followed by a series of sections,
+  each a `<name>:` header line, an `<n> items` line and then the section's items.  Finding the
+  sections only requires matching their header lines, which is far cheaper than parsing the
+  analysis, and lets callers read or copy individual sections without parsing the rest of it.
+
+  The sections before `products` describe how the analysis was compiled rather than what was
+  compiled, and along with `compilations` they are the same in every split of an analysis.
+  """
+
+  Section = namedtuple('Section', ['name', 'start', 'end', 'count'])
+
+  _ITEMS = b' items\n'
+  _HEADER_RE = re.compile(br'([a-z][a-z ]*):\n(\d+) items\n\Z')
+
+  # The number of bytes copied at a time when copying sections.
+  _CHUNK_SIZE = 1024 * 1024
+
+  @classmethod
+  def from_path(cls, path):
+    """Indexes the zinc analysis at path.
+
+    :param string path: The path of the analysis file.
+    :raises: `ParseError` if path does not hold a zinc analysis.
+    """
+    with open(path, 'rb') as infile:
+      version_line = infile.readline()
+      size = os.fstat(infile.fileno()).st_size
+      if not version_line.startswith(b'format version: ') or size == len(version_line):
+        raise ParseError('{} is not a zinc analysis.'.format(path))
+      mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+      try:
+        headers = list(cls._find_headers(mapped, len(version_line)))
+      finally:
+        mapped.close()
+
+    ends = [start for start, _, _ in headers[1:]] + [size]
+    sections = [cls.Section(name, start, end, count)
+                for (start, name, count), end in zip(headers, ends)]
+    index = cls(path, version_line, sections)
+    for required in (b'products', b'source stamps'):
+      if index.section(required) is None:
+        raise ParseError('Expected a "{}" section in {}.'.format(required, path))
+    return index
+
+  @classmethod
+  def _find_headers(cls, mapped, start):
+    """Yields a (offset, name, count) tuple for each section header in mapped, from start on.
+
+    Rather than matching every line, this finds each `<n> items` line, which is a plain substring
+    search that runs at memchr speed, and then checks the line before it is a section header.
+    """
+    pos = start
+    while True:
+      found = mapped.find(cls._ITEMS, pos)
+      if found == -1:
+        return
+      pos = found + len(cls._ITEMS)
+      count_start = mapped.rfind(b'\n', start, found) + 1
+      if count_start > start:
+        header_start = max(mapped.rfind(b'\n', start, count_start - 1) + 1, start)
+        match = cls._HEADER_RE.match(mapped[header_start:pos])
+        if match:
+          yield header_start, match.group(1), int(match.group(2))
+
+  def __init__(self, path, version_line, sections):
+    """
+    :param string path: The path of the indexed analysis file.
+    :param string version_line: The format version line the analysis starts with.
+    :param list sections: The `Section`s of the analysis, in file order.
+    """
+    self._path = path
+    self._version_line = version_line
+    self._sections = sections
+
+  @property
+  def path(self):
+    return self._path
+
+  @property
+  def sections(self):
+    return self._sections
+
+  def section(self, name):
+    """Returns the first `Section` with the given name, or None if there is none.
+
+    Note that some names, eg: `class names`, are used by more than one section.
+    """
+    for section in self._sections:
+      if section.name == name:
+        return section
+    return None
+
+  def count(self, name):
+    """Returns the number of items in the first section with the given name, or 0."""
+    section = self.section(name)
+    return section.count if section else 0
+
+  def sources(self):
+    """Returns the frozenset of the absolute paths of the sources covered by the analysis."""
+    section = self.section(b'source stamps')
+    with open(self._path, 'rb') as infile:
+      infile.seek(section.start)
+      lines = infile.read(section.end - section.start).splitlines()
+    # Skip the header and item count lines.
+    return frozenset(line.split(b' -> ', 1)[0].decode('utf-8') for line in lines[2:])
+
+  def write_empty(self, outfile):
+    """Writes an analysis with the same compile setup as this one but no sources to outfile."""
+    products = self.section(b'products')
+    with open(self._path, 'rb') as infile:
+      outfile.write(self._version_line)
+      for section in self._sections:
+        if section.start < products.start or section.name == b'compilations':
+          self._copy(infile, outfile, section)
+        else:
+          outfile.write(section.name + b':\n0 items\n')
+
+  def write_empty_to_path(self, outfile_path):
+    with open(outfile_path, 'wb') as outfile:
+      self.write_empty(outfile)
+
+  def _copy(self, infile, outfile, section):
+    infile.seek(section.start)
+    remaining = section.end - section.start
+    while remaining > 0:
+      data = infile.read(min(remaining, self._CHUNK_SIZE))
+      if not data:
+        raise ParseError('Unexpected end-of-file copying {} from {}'.format(section.name,
+                                                                           self._path))
+      outfile.write(data)
+      remaining -= len(data)
+
+
+# Bump this if the on-disk format of persisted parse results changes.
+_PARSE_CACHE_VERSION = 1
+
+
+def cached_parse(analysis_path, name, parse, key=None):
+  """Returns the result of parsing part of the analysis at analysis_path, cached in a sidecar file.
+
+  The result is persisted in marshal format next to the analysis, and reused for as long as the
+  analysis' size and mtime are unchanged.  As with git's index, the result for an analysis modified
+  in the same second it was parsed is not persisted, since a later modification in that second
+  might not change its size or mtime.
+
+  :param string analysis_path: The path of the analysis file.
+  :param string name: The name of the part parsed, eg: `products`, used to name the sidecar file.
+  :param parse: A no-arg function that parses the analysis, returning a dict of lists or sets of
+                strings.
+  :param key: Any other marshallable value the parse result depends on, eg: a classes dir.
+  """
+  sidecar_path = '{}.{}'.format(analysis_path, name)
+  stat = os.stat(analysis_path)
+  header = (_PARSE_CACHE_VERSION, tuple(sys.version_info[:2]), stat.st_size, stat.st_mtime, key)
+
+  if os.path.exists(sidecar_path):
+    try:
+      with open(sidecar_path, 'rb') as fp:
+        persisted_header, result = marshal.load(fp)
+      if persisted_header == header and isinstance(result, dict):
+        return result
+    except (EOFError, ValueError, TypeError) as e:
+      logger.warn('Ignoring corrupt parsed analysis at {}: {}'.format(sidecar_path, e))
+
+  result = parse()
+  if int(stat.st_mtime) < int(time.time()) - 1:
+    try:
+      data = marshal.dumps((header, dict(result)))
+    except ValueError as e:
+      logger.debug('Cannot persist the parsed analysis at {}: {}'.format(sidecar_path, e))
+      return result
+    tmp_path = '{}.tmp.{}.{}'.format(sidecar_path, os.getpid(), threading.current_thread().ident)
+    try:
+      with open(tmp_path, 'wb') as fp:
+        fp.write(data)
+      os.rename(tmp_path, sidecar_path)
+    except (IOError, OSError) as e:
+      logger.debug('Failed to persist the parsed analysis at {}: {}'.format(sidecar_path, e))
+  return result
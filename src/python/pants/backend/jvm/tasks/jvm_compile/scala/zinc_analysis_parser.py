@@ -10,12 +10,16 @@ from zincutils.zinc_analysis_parser import ZincAnalysisParser as UnderlyingParse
 from pants.backend.jvm.tasks.jvm_compile.analysis_parser import (AnalysisParser, ParseError,
                                                                  raise_on_eof)
 from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis import ZincAnalysis
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_index import cached_parse
 
 
 class ZincAnalysisParser(AnalysisParser):
   """Parses a zinc analysis file.
 
   Implemented by delegating to an underlying zincutils.ZincAnalysisParser instance.
+
+  The products and deps parsed from an analysis file are cached in sidecar files next to it, so
+  that they are only parsed again once the analysis changes.
   """
 
   # Implement AnalysisParser properties.
@@ -35,6 +39,16 @@ class ZincAnalysisParser(AnalysisParser):
       except UnderlyingParser.ParseError as e:
         raise ParseError(e)
 
+  def parse_products_from_path(self, infile_path, classes_dir):
+    parse = super(ZincAnalysisParser, self).parse_products_from_path
+    return cached_parse(infile_path, 'products', lambda: parse(infile_path, classes_dir))
+
+  def parse_deps_from_path(self, infile_path, classpath_indexer, classes_dir):
+    parse = super(ZincAnalysisParser, self).parse_deps_from_path
+    return cached_parse(infile_path, 'deps',
+                        lambda: parse(infile_path, classpath_indexer, classes_dir),
+                        key=classes_dir)
+
   def parse_products(self, infile, classes_dir):
     """An efficient parser of just the products section."""
     with raise_on_eof(infile):
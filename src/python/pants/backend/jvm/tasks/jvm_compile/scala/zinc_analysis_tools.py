@@ -0,0 +1,78 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import shutil
+
+from pants.backend.jvm.tasks.jvm_compile.analysis_parser import ParseError
+from pants.backend.jvm.tasks.jvm_compile.analysis_tools import AnalysisTools
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_index import ZincAnalysisIndex
+
+
+class ZincAnalysisTools(AnalysisTools):
+  """AnalysisTools for zinc analyses.
+
+  Parsing and rewriting a large zinc analysis takes far longer than copying it, and many of the
+  splits and merges the compile strategies ask for just move whole analyses around: eg: splitting
+  out the analysis of a single partition, or merging a new analysis into an empty one.  Those are
+  done by copying the analysis files verbatim, using a `ZincAnalysisIndex` to find the analysis'
+  sources and the sections of its compile setup.  All other splits and merges parse as usual.
+  """
+
+  def split_to_paths(self, analysis_path, split_path_pairs, catchall_path=None):
+    index = self._index(analysis_path)
+    if index is not None:
+      sources = index.sources()
+      outputs = []  # A list of (output_path, whole), see _whole_or_empty below.
+      split_sources = set()
+      for split, output_path in split_path_pairs:
+        selected = sources.intersection(os.path.join(self._pants_home, s) for s in split)
+        split_sources.update(selected)
+        outputs.append((output_path, self._whole_or_empty(selected, sources)))
+      if catchall_path is not None:
+        outputs.append((catchall_path, self._whole_or_empty(sources - split_sources, sources)))
+
+      if all(whole is not None for _, whole in outputs):
+        for output_path, whole in outputs:
+          if whole:
+            shutil.copyfile(analysis_path, output_path)
+          else:
+            index.write_empty_to_path(output_path)
+        return
+
+    super(ZincAnalysisTools, self).split_to_paths(analysis_path, split_path_pairs, catchall_path)
+
+  def merge_from_paths(self, analysis_paths, merged_analysis_path):
+    indexes = [self._index(path) for path in analysis_paths]
+    if all(index is not None for index in indexes):
+      # An analysis without sources contributes nothing to a merge.
+      nonempty = [index for index in indexes if index.count(b'source stamps')]
+      if len(nonempty) == 1:
+        shutil.copyfile(nonempty[0].path, merged_analysis_path)
+        return
+
+    super(ZincAnalysisTools, self).merge_from_paths(analysis_paths, merged_analysis_path)
+
+  @staticmethod
+  def _index(analysis_path):
+    """Returns a ZincAnalysisIndex of the analysis at analysis_path, or None if it can't be indexed.
+
+    Analyses that can't be indexed are left to the parser, which reports any errors in them.
+    """
+    try:
+      return ZincAnalysisIndex.from_path(analysis_path)
+    except (IOError, OSError, ParseError):
+      return None
+
+  @staticmethod
+  def _whole_or_empty(selected, sources):
+    """Returns False if no sources are selected, True if all are, and None otherwise."""
+    if not selected:
+      return False
+    if selected == sources:
+      return True
+    return None
@@ -0,0 +1,38 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+from pants.backend.core.tasks.console_task import ConsoleTask
+from pants.backend.jvm.subsystems.compile_times import CompileTimes
+
+
+class ListCompileTimes(ConsoleTask):
+  """Lists the compile times recorded for targets in previous runs.
+
+  Lists every recorded target if no targets are specified.
+  """
+
+  @classmethod
+  def register_options(cls, register):
+    super(ListCompileTimes, cls).register_options(register)
+    register('--sort', choices=['spec', 'time'], default='spec',
+             help='List the targets by spec, or slowest first.')
+
+  @classmethod
+  def global_subsystems(cls):
+    return super(ListCompileTimes, cls).global_subsystems() + (CompileTimes, )
+
+  def console_output(self, targets):
+    db = CompileTimes.global_instance().db
+    specs = set(target.address.spec for target in targets)
+    for language in db.languages():
+      entries = [(spec, entry) for spec, entry in db.entries(language)
+                 if not specs or spec in specs]
+      if self.get_options().sort == 'time':
+        entries.sort(key=lambda item: item[1].secs, reverse=True)
+      for spec, entry in entries:
+        yield '{} {}: {:.3f}s for {} sources ({} samples)'.format(language, spec, entry.secs,
+                                                                 entry.num_sources, entry.samples)
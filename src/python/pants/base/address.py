@@ -6,7 +6,10 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import threading
+from abc import ABCMeta
 from collections import namedtuple
+from weakref import WeakValueDictionary
 
 from pants.util.meta import AbstractClass
 
@@ -94,6 +97,24 @@ class Addresses (namedtuple('Addresses', ['addresses', 'rel_path'])):
   """
 
 
+class _InterningMeta(ABCMeta):
+  """Interns the instances of Address types.
+
+  Constructing an Address equal to one that is still alive returns the live instance, so a large
+  BuildGraph holds a single instance per address and address equality is usually identity.
+  """
+
+  def __init__(cls, name, bases, attrs):
+    super(_InterningMeta, cls).__init__(name, bases, attrs)
+    cls._interned = WeakValueDictionary()
+    cls._interned_lock = threading.Lock()
+
+  def __call__(cls, *args, **kwargs):
+    address = super(_InterningMeta, cls).__call__(*args, **kwargs)
+    with cls._interned_lock:
+      return cls._interned.setdefault(address._intern_key(), address)
+
+
 class Address(AbstractClass):
   """A target address.
 
@@ -111,8 +132,14 @@ class Address(AbstractClass):
     )
 
   Where ``path/to/buildfile:targetname`` is the dependent target address.
+
+  Addresses are immutable and interned per type: there is at most one live instance of each type
+  of Address for a given spec (and BUILD file, for a BuildFileAddress).
   """
 
+  __metaclass__ = _InterningMeta
+  __slots__ = ('_spec_path', '_target_name', '_hash', '__weakref__')
+
   def __init__(self, spec_path, target_name):
     """
     :param string spec_path: The path from the root of the repo to this Target.
@@ -124,6 +151,15 @@ class Address(AbstractClass):
     norm_path = os.path.normpath(spec_path)
     self._spec_path = norm_path if norm_path != '.' else ''
     self._target_name = target_name
+    self._hash = hash((self._spec_path, self._target_name))
+
+  def _intern_key(self):
+    """Returns a key that is equal for two instances of this type if they're interchangeable."""
+    return self._spec_path, self._target_name
+
+  def __reduce__(self):
+    # Reconstruct through the constructor so that unpickled and copied addresses are interned too.
+    return type(self), (self._spec_path, self._target_name)
 
   @property
   def spec_path(self):
@@ -162,14 +198,11 @@ class Address(AbstractClass):
       return self._spec_path
 
   def __eq__(self, other):
-    return (other and
-            self._spec_path == other._spec_path and
-            self._target_name == other._target_name)
+    return self is other or (other and
+                             self._spec_path == other._spec_path and
+                             self._target_name == other._target_name)
 
-  _hash = None
   def __hash__(self):
-    if self._hash is None:
-      self._hash = hash((self._spec_path, self._target_name))
     return self._hash
 
   def __ne__(self, other):
@@ -183,6 +216,8 @@ class Address(AbstractClass):
 
 
 class BuildFileAddress(Address):
+  __slots__ = ('build_file',)
+
   def __init__(self, build_file, target_name=None):
     self.build_file = build_file
     spec_path = os.path.dirname(build_file.relpath)
@@ -190,6 +225,13 @@ class BuildFileAddress(Address):
     super(BuildFileAddress, self).__init__(spec_path=spec_path,
                                            target_name=target_name or default_target_name)
 
+  def _intern_key(self):
+    # BuildFiles with the same relpath may be under different roots.
+    return self.build_file, self._target_name
+
+  def __reduce__(self):
+    return type(self), (self.build_file, self._target_name)
+
   def __repr__(self):
     return ("BuildFileAddress({build_file}, {target_name})"
             .format(build_file=self.build_file,
@@ -197,6 +239,8 @@ class BuildFileAddress(Address):
 
 
 class SyntheticAddress(Address):
+  __slots__ = ()
+
   @classmethod
   def parse(cls, spec, relative_to=''):
     """
@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import hashlib
 import inspect
 import logging
 from collections import namedtuple
@@ -13,6 +14,7 @@ from pants.base.addressable import AddressableCallProxy
 from pants.base.build_file_aliases import BuildFileAliases
 from pants.base.parse_context import ParseContext
 from pants.base.target import Target
+from pants.version import VERSION
 
 
 logger = logging.getLogger(__name__)
@@ -35,6 +37,7 @@ class BuildConfiguration(object):
     self._exposed_objects = {}
     self._exposed_context_aware_object_factories = {}
     self._subsystems = set()
+    self._aliases_fingerprint = None
 
   def subsystem_types(self):
     return self._subsystems
@@ -73,6 +76,7 @@ class BuildConfiguration(object):
       logger.debug('Target alias {alias} has already been registered. Overwriting!'
                   .format(alias=alias))
     self._target_aliases[alias] = target
+    self._aliases_fingerprint = None
     self.register_addressable_alias(alias, target.get_addressable_type())
     self._subsystems.update(target.subsystems())
 
@@ -90,6 +94,7 @@ class BuildConfiguration(object):
       logger.debug('Object alias {alias} has already been registered. Overwriting!'
                   .format(alias=alias))
     self._exposed_objects[alias] = obj
+    self._aliases_fingerprint = None
     # obj doesn't implement any common base class, so we have to test for this attr.
     if hasattr(obj, 'subsystems'):
       self._subsystems.update(obj.subsystems())
@@ -110,12 +115,18 @@ class BuildConfiguration(object):
       logger.debug('Addressable alias {alias} has already been registered. Overwriting!'
                   .format(alias=alias))
     self._addressable_alias_map[alias] = addressable_type
+    self._aliases_fingerprint = None
 
   def register_exposed_context_aware_object_factory(self, alias, context_aware_object_factory):
     """Registers the given context aware object factory under the given alias.
 
     Context aware object factories must be callables that take a single ParseContext argument
     and return some object that will be exposed in the BUILD file parse context under `alias`.
+
+    BUILD files that use a context aware object are executed on every run unless its factory has a
+    true `build_file_cacheable` attribute, which declares that the objects it creates have no side
+    effects, and that any results they return are picklable and depend only on their arguments and
+    the BUILD file's path.
     """
     if self._is_target_type(context_aware_object_factory):
       raise TypeError('The exposed context aware object factory {factory} is a Target - these '
@@ -128,10 +139,49 @@ class BuildConfiguration(object):
 
     if callable(context_aware_object_factory):
       self._exposed_context_aware_object_factories[alias] = context_aware_object_factory
+      self._aliases_fingerprint = None
     else:
       raise TypeError('The given context aware object factory {factory} must be a callable.'
                       .format(factory=context_aware_object_factory))
 
+  def aliases_fingerprint(self):
+    """Returns a fingerprint of the registered aliases and the types and objects they expose.
+
+    The results of executing a BUILD file may be reused for as long as this fingerprint is the same.
+    """
+    if self._aliases_fingerprint is None:
+      hasher = hashlib.sha1()
+      hasher.update(VERSION.encode('utf-8'))
+      for kind, aliases in (('target', self._target_aliases),
+                            ('object', self._exposed_objects),
+                            ('addressable', self._addressable_alias_map),
+                            ('factory', self._exposed_context_aware_object_factories)):
+        for alias, obj in sorted(aliases.items()):
+          hasher.update('{} {}={} {}\n'.format(kind, alias, self._qualified_name(obj),
+                                               self._is_build_file_cacheable(obj))
+                        .encode('utf-8'))
+      self._aliases_fingerprint = hasher.hexdigest()
+    return self._aliases_fingerprint
+
+  def uncacheable_aliases(self):
+    """Returns the aliases of context aware object factories that are not `build_file_cacheable`.
+
+    See `register_exposed_context_aware_object_factory`.
+    """
+    factories = self._exposed_context_aware_object_factories
+    return frozenset(alias for alias, factory in factories.items()
+                     if not self._is_build_file_cacheable(factory))
+
+  @staticmethod
+  def _is_build_file_cacheable(obj):
+    return bool(getattr(obj, 'build_file_cacheable', False))
+
+  @staticmethod
+  def _qualified_name(obj):
+    if not hasattr(obj, '__name__'):
+      obj = type(obj)
+    return '{}.{}'.format(getattr(obj, '__module__', None), obj.__name__)
+
   def initialize_parse_state(self, build_file):
     """Creates a fresh parse state for the given build file."""
     type_aliases = self._exposed_objects.copy()
@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import hashlib
 import logging
 import os
 import re
@@ -260,6 +261,16 @@ class BuildFile(AbstractClass):
     """Returns the code object for this BUILD file."""
     return compile(self.source(), self.full_path, 'exec', flags=0, dont_inherit=True)
 
+  def family_fingerprint(self):
+    """Returns a sha1 hexdigest of the paths and contents of the BUILD files in this family."""
+    hasher = hashlib.sha1()
+    for build_file in sorted(self.family(), key=lambda build_file: build_file.relpath):
+      hasher.update(build_file.relpath.encode('utf-8'))
+      hasher.update(b'\0')
+      hasher.update(build_file.source())
+      hasher.update(b'\0')
+    return hasher.hexdigest()
+
   def __eq__(self, other):
     result = other and (
       type(other) == type(self)) and (
@@ -281,7 +292,20 @@ class FilesystemBuildFile(BuildFile):
   # class needs to access it, so it can't be moved yet.
   _cache = {}
 
+  # An optional FilesystemSnapshot to answer filesystem queries from.
+  _snapshot = None
+
+  @classmethod
+  def set_snapshot(cls, snapshot):
+    """Serve filesystem queries under the snapshot's root from the given FilesystemSnapshot.
+
+    :param snapshot: A FilesystemSnapshot, or None to query the filesystem directly.
+    """
+    cls._snapshot = snapshot
+
   def _glob1(self, path, glob):
+    if self._snapshot:
+      return self._snapshot.glob1(path, glob)
     return glob1(path, glob)
 
   def source(self):
@@ -290,15 +314,23 @@ class FilesystemBuildFile(BuildFile):
       return source.read()
 
   def _isdir(self, path):
+    if self._snapshot:
+      return self._snapshot.isdir(path)
     return os.path.isdir(path)
 
   def _isfile(self, path):
+    if self._snapshot:
+      return self._snapshot.isfile(path)
     return os.path.isfile(path)
 
   def _exists(self, path):
+    if self._snapshot:
+      return self._snapshot.exists(path)
     return os.path.exists(path)
 
   @classmethod
-  def _walk(self, root_dir, relpath, topdown=False):
+  def _walk(cls, root_dir, relpath, topdown=False):
     path = os.path.join(root_dir, relpath)
+    if cls._snapshot:
+      return cls._snapshot.walk(path, topdown=True)
     return safe_walk(path, topdown=True)
@@ -5,6 +5,8 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
+
 from pants.base.address import BuildFileAddress, SyntheticAddress, parse_spec
 from pants.base.address_lookup_error import AddressLookupError
 from pants.base.build_environment import get_buildroot
@@ -54,6 +56,7 @@ class BuildFileAddressMapper(object):
     """
     self._build_file_parser = build_file_parser
     self._spec_path_to_address_map_map = {}  # {spec_path: {address: addressable}} mapping
+    self._spec_path_to_build_file_stats = {}  # {spec_path: {full_path: stat}} mapping
     self._build_file_type = build_file_type
 
   @property
@@ -144,6 +147,7 @@ class BuildFileAddressMapper(object):
           raise self.BuildFileScanError("{message}\n searching {spec_path}"
                                         .format(message=e,
                                                 spec_path=spec_path))
+        build_file_stats = self._stat_build_file_family(build_file)
         mapping = self._build_file_parser.address_map_from_build_file(build_file)
       except BuildFileParser.BuildFileParserError as e:
         raise AddressLookupError("{message}\n Loading addresses from '{spec_path}' failed."
@@ -151,8 +155,54 @@ class BuildFileAddressMapper(object):
 
       address_map = {address: (address, addressed) for address, addressed in mapping.items()}
       self._spec_path_to_address_map_map[spec_path] = address_map
+      self._spec_path_to_build_file_stats[spec_path] = build_file_stats
     return self._spec_path_to_address_map_map[spec_path]
 
+  @staticmethod
+  def _stat(path):
+    try:
+      stat = os.stat(path)
+      return stat.st_mtime, stat.st_size
+    except OSError:
+      return None
+
+  def _stat_build_file_family(self, build_file):
+    return {bf.full_path: self._stat(bf.full_path) for bf in build_file.family()}
+
+  def changed_spec_paths(self):
+    """Returns the spec paths whose BUILD files have changed on disk since they were parsed.
+
+    A spec path has changed if any BUILD file in its family was edited, added or deleted.  This
+    polls the modification time and size of each BUILD file parsed so far, and is intended for
+    long lived mappers that need to notice edits made between uses.
+
+    :returns: A set of spec paths.
+    """
+    changed = set()
+    for spec_path, build_file_stats in self._spec_path_to_build_file_stats.items():
+      if any(self._stat(full_path) != stat for full_path, stat in build_file_stats.items()):
+        changed.add(spec_path)
+        continue
+      try:
+        build_file = self._build_file_type.from_cache(self.root_dir, spec_path)
+        family = set(bf.full_path for bf in build_file.family())
+      except BuildFile.BuildFileError:
+        family = set()
+      if family != set(build_file_stats):
+        changed.add(spec_path)
+    return changed
+
+  def invalidate_spec_paths(self, spec_paths):
+    """Forgets the parsed addresses in the given spec paths so they are re-parsed on next use.
+
+    :param spec_paths: An iterable of spec paths.
+    """
+    for spec_path in spec_paths:
+      self._spec_path_to_address_map_map.pop(spec_path, None)
+      self._spec_path_to_build_file_stats.pop(spec_path, None)
+    # The BuildFile for a spec path may now resolve to a different file in its family.
+    self._build_file_type.clear_cache()
+
   def addresses_in_spec_path(self, spec_path):
     """Returns only the addresses gathered by `address_map_from_spec_path`, with no values."""
     return self._address_map_from_spec_path(spec_path).keys()
@@ -186,6 +236,13 @@ class BuildFileAddressMapper(object):
     """
     return self._build_file_type.scan_buildfiles(root_dir, *args, **kwargs)
 
+  def preparse_build_files(self, build_files):
+    """Prepares a batch of BUILD files for parsing.  See `BuildFileParser.preparse_build_files`.
+
+    :param build_files: An iterable of BuildFile instances.
+    """
+    self._build_file_parser.preparse_build_files(build_files)
+
   def specs_to_addresses(self, specs, relative_to=''):
     """The equivalent of `spec_to_address` for a group of specs all relative to the same path.
     :param spec: iterable of Addresses.
@@ -202,7 +259,9 @@ class BuildFileAddressMapper(object):
     addresses = set()
     root = root or get_buildroot()
     try:
-      for build_file in self._build_file_type.scan_buildfiles(root, spec_excludes=spec_excludes):
+      build_files = self._build_file_type.scan_buildfiles(root, spec_excludes=spec_excludes)
+      self.preparse_build_files(build_files)
+      for build_file in build_files:
         for address in self.addresses_in_spec_path(build_file.spec_path):
           addresses.add(address)
     except BuildFile.BuildFileError as e:
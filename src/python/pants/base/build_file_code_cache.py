@@ -0,0 +1,208 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import threading
+from collections import namedtuple
+
+from pants.util.dirutil import safe_mkdir_for
+
+
+try:
+  import cPickle as pickle
+except ImportError:
+  import pickle
+
+
+logger = logging.getLogger(__name__)
+
+
+class BuildFileCodeCache(object):
+  """A persistent cache of compiled BUILD file code objects and the address maps they produce.
+
+  Entries are keyed by the BUILD file's full path and validated against the sha1 of its current
+  contents, so an edited BUILD file is simply recompiled on its next use.  The whole cache lives in
+  a single marshal file that is loaded lazily on first use and rewritten atomically by `flush`.
+
+  Alongside its code, an entry may hold the pickled addressables that executing the BUILD file
+  registered, along with a fingerprint of the aliases it was executed against.  These are only
+  reused while that fingerprint is unchanged, and it is up to the caller to only store the
+  addressables of BUILD files whose execution is free of side effects.
+
+  Entries can be handed between processes with `dump_entry` and `load_entry`, eg: to seed the
+  cache with BUILD files parsed by subprocess workers.
+  """
+
+  # Bump this if the on-disk layout of the cache changes.
+  _VERSION = 2
+
+  Lookup = namedtuple('Lookup', ['fingerprint', 'source', 'code', 'addressables'])
+
+  def __init__(self, cache_dir):
+    """
+    :param string cache_dir: The directory to persist the cache under, or None to only cache in
+                             memory.
+    """
+    # marshal'ed code objects are only readable by the interpreter version that wrote them.
+    self._path = None
+    if cache_dir is not None:
+      self._path = os.path.join(cache_dir,
+                                'v{}'.format(self._VERSION),
+                                'py{}{}.marshal'.format(*sys.version_info[:2]))
+    self._lock = threading.Lock()
+    self._entries = None  # {full_path: (sha1, code, (aliases_fingerprint, pickled) or None)}
+    self._dirty = False
+    self.hits = 0
+    self.misses = 0
+    self.address_map_hits = 0
+    self.address_map_misses = 0
+
+  @property
+  def path(self):
+    return self._path
+
+  def code(self, build_file):
+    """Returns the code object for the given BuildFile, compiling it only on a cache miss.
+
+    :raises: SyntaxError if the BUILD file needs compiling and cannot be compiled.
+    """
+    return self.lookup(build_file).code
+
+  def lookup(self, build_file, aliases_fingerprint=None):
+    """Looks up the given BuildFile, compiling it on a cache miss.
+
+    :param build_file: The BuildFile to look up.
+    :param string aliases_fingerprint: The fingerprint of the aliases the BUILD file will be
+                                       executed against, or None to only look up its code.
+    :returns: A `BuildFileCodeCache.Lookup` of the sha1 of the BUILD file's contents, its source,
+              its code and a list of the (name, addressable) pairs executing it registers, or None
+              if these are not cached for the given `aliases_fingerprint`.
+    :raises: SyntaxError if the BUILD file needs compiling and cannot be compiled.
+    """
+    source = build_file.source()
+    fingerprint = hashlib.sha1(source).hexdigest()
+    with self._lock:
+      entries = self._load()
+      entry = entries.get(build_file.full_path)
+      if entry and entry[0] == fingerprint:
+        self.hits += 1
+        code, parsed = entry[1], entry[2]
+      else:
+        self.misses += 1
+        code = parsed = None
+
+    if code is None:
+      code = compile(source, build_file.full_path, 'exec', flags=0, dont_inherit=True)
+      with self._lock:
+        self._entries[build_file.full_path] = (fingerprint, code, None)
+        self._dirty = True
+
+    addressables = None
+    if aliases_fingerprint is not None:
+      if parsed and parsed[0] == aliases_fingerprint:
+        try:
+          addressables = pickle.loads(parsed[1])
+        except Exception as e:
+          # Any exception can come out of unpickling, eg: when a pickled type no longer exists.
+          logger.debug('Failed to load the cached addressables of {}: {}'.format(build_file, e))
+      with self._lock:
+        if addressables is None:
+          self.address_map_misses += 1
+        else:
+          self.address_map_hits += 1
+    return self.Lookup(fingerprint, source, code, addressables)
+
+  def store_addressables(self, build_file, lookup, aliases_fingerprint, addressables):
+    """Caches the addressables executing a BUILD file registered.
+
+    :param build_file: The BuildFile that was executed.
+    :param lookup: The `BuildFileCodeCache.Lookup` of the code that was executed.
+    :param string aliases_fingerprint: The fingerprint of the aliases the code was executed against.
+    :param addressables: A list of the (name, addressable) pairs the BUILD file registered.
+    :returns: True if the addressables were cached, False if they could not be pickled.
+    """
+    try:
+      pickled = pickle.dumps(addressables, pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+      # Any exception can come out of pickling, eg: from a `__reduce__` refusing to pickle.
+      logger.debug('Not caching the addressables of {}: {}'.format(build_file, e))
+      return False
+    with self._lock:
+      entry = self._load().get(build_file.full_path)
+      # Don't clobber the entry for newer contents cached in the meantime.
+      if not entry or entry[0] == lookup.fingerprint:
+        self._entries[build_file.full_path] = (lookup.fingerprint, lookup.code,
+                                               (aliases_fingerprint, pickled))
+        self._dirty = True
+    return True
+
+  def has_addressables(self, build_file, aliases_fingerprint):
+    """Returns True if the addressables of the BUILD file's current contents are cached.
+
+    :param build_file: The BuildFile to check.
+    :param string aliases_fingerprint: The fingerprint of the aliases the BUILD file will be
+                                       executed against.
+    """
+    fingerprint = hashlib.sha1(build_file.source()).hexdigest()
+    with self._lock:
+      entry = self._load().get(build_file.full_path)
+    return bool(entry and entry[0] == fingerprint and entry[2] and
+                entry[2][0] == aliases_fingerprint)
+
+  def dump_entry(self, build_file):
+    """Returns the BUILD file's cache entry marshalled for shipping to another process.
+
+    :param build_file: The BuildFile whose entry to dump.
+    :returns: The marshalled entry, or None if the BUILD file's addressables are not cached.
+    """
+    with self._lock:
+      entry = self._load().get(build_file.full_path)
+    if not entry or entry[2] is None:
+      return None
+    return marshal.dumps(entry)
+
+  def load_entry(self, full_path, dumped_entry):
+    """Caches an entry dumped by `dump_entry`, possibly in another process.
+
+    The entry is validated against the BUILD file's contents on lookup like any other.
+
+    :param string full_path: The full path of the BUILD file the entry is for.
+    :param dumped_entry: The marshalled entry.
+    """
+    entry = marshal.loads(dumped_entry)
+    with self._lock:
+      self._load()[full_path] = entry
+      self._dirty = True
+
+  def flush(self):
+    """Writes the cache back to disk if any entries were added or changed this run."""
+    with self._lock:
+      if not self._dirty or self._path is None:
+        return
+      safe_mkdir_for(self._path)
+      tmp_path = '{}.tmp.{}'.format(self._path, os.getpid())
+      with open(tmp_path, 'wb') as fp:
+        marshal.dump(self._entries, fp)
+      os.rename(tmp_path, self._path)
+      self._dirty = False
+
+  def _load(self):
+    if self._entries is None:
+      self._entries = {}
+      if self._path is not None and os.path.exists(self._path):
+        try:
+          with open(self._path, 'rb') as fp:
+            entries = marshal.load(fp)
+          if isinstance(entries, dict):
+            self._entries = entries
+        except (EOFError, ValueError, TypeError) as e:
+          logger.warn('Ignoring corrupt BUILD file code cache at {}: {}'.format(self._path, e))
+    return self._entries
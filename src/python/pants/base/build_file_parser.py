@@ -5,15 +5,60 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import ast
 import logging
+import os
+import time
 import warnings
 
 import six
 
+from pants.base.address import BuildFileAddress
+from pants.base.build_file import FilesystemBuildFile
+from pants.base.build_file_code_cache import BuildFileCodeCache
+from pants.base.workunit import WorkUnit
+
 
 logger = logging.getLogger(__name__)
 
 
+# The BuildConfiguration subprocess pool workers parse BUILD files with.  Workers get a copy of it
+# when they are forked, so it must be set before the pool is created.
+_worker_build_configuration = None
+
+
+def _parse_build_file_in_worker(args):
+  """Parses a BUILD file in a subprocess worker.
+
+  The BUILD file is parsed just as in the parent, conflict checks included, but into a throwaway
+  in-memory code cache.  Only a cache entry holding its addressables is shipped back, so BUILD files
+  that fail to parse, warn, or have side effects when executed yield nothing here and are left for
+  the parent to parse itself.
+
+  :param args: A tuple of (root_dir, relpath, aliases_fingerprint).
+  :returns: A tuple of (relpath, dumped cache entry or None, worker pid, seconds spent parsing).
+  """
+  root_dir, relpath, aliases_fingerprint = args
+  start = time.time()
+  entry = None
+  build_configuration = _worker_build_configuration
+  if (build_configuration is not None and
+      build_configuration.aliases_fingerprint() == aliases_fingerprint):
+    code_cache = BuildFileCodeCache(cache_dir=None)
+    parser = BuildFileParser(build_configuration, root_dir, code_cache=code_cache)
+    # Any warnings are reported when the parent parses the BUILD file itself.
+    disabled, logger.disabled = logger.disabled, True
+    try:
+      build_file = FilesystemBuildFile(root_dir, relpath)
+      parser.parse_build_file(build_file)
+      entry = code_cache.dump_entry(build_file)
+    except (FilesystemBuildFile.BuildFileError, BuildFileParser.BuildFileParserError):
+      pass
+    finally:
+      logger.disabled = disabled
+  return relpath, entry, os.getpid(), time.time() - start
+
+
 # Note: Significant effort has been made to keep the types BuildFile, BuildGraph, Address, and
 # Target separated appropriately.  The BulidFileParser is intended to have knowledge of just
 # BuildFile and Address.
@@ -51,10 +96,41 @@ class BuildFileParser(object):
   class ExecuteError(BuildFileParserError):
     """An exception was encountered executing code in the BUILD file"""
 
-  def __init__(self, build_configuration, root_dir, run_tracker=None):
+  # Builtins that let a BUILD file reach beyond its own contents and the exposed aliases, making
+  # the results of executing it unfit for caching.
+  _UNCACHEABLE_BUILTINS = frozenset(['__builtins__', '__import__', 'compile', 'eval', 'execfile',
+                                     'file', 'getattr', 'globals', 'input', 'locals', 'open',
+                                     'raw_input', 'reload', 'vars'])
+
+  @staticmethod
+  def set_worker_build_configuration(build_configuration):
+    """Sets the BuildConfiguration subprocess pool workers parse BUILD files with.
+
+    Must be called before the subprocess pool is created for its workers to see the configuration.
+    Workers without one leave all BUILD files for the parent to parse.
+
+    :param build_configuration: The BuildConfiguration, or None to stop workers parsing.
+    """
+    global _worker_build_configuration
+    _worker_build_configuration = build_configuration
+
+  def __init__(self, build_configuration, root_dir, run_tracker=None, code_cache=None,
+               parallel_map_func=None):
+    """
+    :param build_configuration: The BuildConfiguration supplying the aliases BUILD files may use.
+    :param string root_dir: The root directory of the repo.
+    :param run_tracker: An optional RunTracker.
+    :param code_cache: An optional BuildFileCodeCache to fetch compiled BUILD file code and the
+                       addressables it registers from.
+    :param parallel_map_func: An optional `map` compatible function used to parse batches of BUILD
+                              files into the `code_cache` in parallel, eg: a function mapping over
+                              the subprocess pool.
+    """
     self._build_configuration = build_configuration
     self._root_dir = root_dir
     self.run_tracker = run_tracker
+    self._code_cache = code_cache
+    self._parallel_map_func = parallel_map_func
 
   @property
   def root_dir(self):
@@ -64,6 +140,53 @@ class BuildFileParser(object):
     """Returns a copy of the registered build file aliases this build file parser uses."""
     return self._build_configuration.registered_aliases()
 
+  def preparse_build_files(self, build_files):
+    """Parses a batch of BUILD files that are about to be parsed in parallel.
+
+    This is purely an optimization: the BUILD files are parsed across the workers of the
+    `parallel_map_func` and the addressables they register merged into the code cache in sorted
+    path order, for `parse_build_file` to use.  Address maps are still built, and checked for
+    sibling conflicts, in this process.  BUILD files the workers cannot parse are skipped here and
+    parsed, or reported, by `parse_build_file`.  Does nothing unless both a code cache and a
+    parallel map function were supplied.
+
+    :param build_files: An iterable of BuildFiles.
+    """
+    if not self._code_cache or not self._parallel_map_func:
+      return
+
+    aliases_fingerprint = self._build_configuration.aliases_fingerprint()
+    # Workers read BUILD files from disk, so leave BUILD files read from elsewhere, eg: an scm rev,
+    # to be parsed here.
+    to_parse = dict((build_file.relpath, build_file) for build_file in build_files
+                    if type(build_file) is FilesystemBuildFile and
+                    not self._code_cache.has_addressables(build_file, aliases_fingerprint))
+    if not to_parse:
+      return
+
+    def preparse():
+      timings = {}
+      items = [(build_file.root_dir, relpath, aliases_fingerprint)
+               for relpath, build_file in sorted(to_parse.items())]
+      for relpath, entry, pid, secs in self._parallel_map_func(_parse_build_file_in_worker, items):
+        timings[pid] = timings.get(pid, 0.0) + secs
+        if entry is not None:
+          self._code_cache.load_entry(to_parse[relpath].full_path, entry)
+      return timings
+
+    if not self.run_tracker:
+      preparse()
+      return
+
+    with self.run_tracker.new_workunit(name='preparse', labels=[WorkUnit.SETUP]) as workunit:
+      timings = preparse()
+      # The workers are subprocesses, which can't open workunits of their own, so their time is
+      # accounted for under the workunit that fanned them out.
+      for index, (_, secs) in enumerate(sorted(timings.items())):
+        label = '{}:worker-{}'.format(workunit.path(), index)
+        self.run_tracker.cumulative_timings.add_timing(label, secs)
+        self.run_tracker.self_timings.add_timing(label, secs)
+
   def address_map_from_build_file(self, build_file):
     family_address_map_by_build_file = self.parse_build_file_family(build_file)
     address_map = {}
@@ -122,8 +245,14 @@ class BuildFileParser(object):
     logger.debug("Parsing BUILD file {build_file}."
                  .format(build_file=build_file))
 
+    lookup = None
     try:
-      build_file_code = build_file.code()
+      if self._code_cache:
+        lookup = self._code_cache.lookup(build_file,
+                                         self._build_configuration.aliases_fingerprint())
+        build_file_code = lookup.code
+      else:
+        build_file_code = build_file.code()
     except SyntaxError as e:
       raise self.ParseError(_format_context_msg(e.lineno, e.offset, e.__class__.__name__, e))
     except Exception as e:
@@ -131,10 +260,17 @@ class BuildFileParser(object):
                               .format(error_type=e.__class__.__name__,
                                       message=e, build_file=build_file))
 
+    if lookup and lookup.addressables is not None:
+      logger.debug("Using the cached addressables of BUILD file {build_file}."
+                   .format(build_file=build_file))
+      return dict((BuildFileAddress(build_file, name), addressable)
+                  for name, addressable in lookup.addressables)
+
     parse_state = self._build_configuration.initialize_parse_state(build_file)
     try:
       with warnings.catch_warnings(record=True) as warns:
         six.exec_(build_file_code, parse_state.parse_globals)
+        warned = bool(warns)
         for warn in warns:
           logger.warning(_format_context_msg(lineno=warn.lineno,
                                              offset=None,
@@ -156,6 +292,15 @@ class BuildFileParser(object):
                   target_name=address.target_name))
       address_map[address] = addressable
 
+    # Warnings are only reported when the BUILD file is executed, so keep executing it until they
+    # are addressed.
+    if lookup and not warned and self._is_cacheable(lookup.source):
+      addressables = [(address.target_name, addressable)
+                      for address, addressable in parse_state.registered_addressable_instances]
+      self._code_cache.store_addressables(build_file, lookup,
+                                          self._build_configuration.aliases_fingerprint(),
+                                          addressables)
+
     logger.debug("{build_file} produced the following Addressables:"
                  .format(build_file=build_file))
     for address, addressable in address_map.items():
@@ -163,3 +308,17 @@ class BuildFileParser(object):
                    .format(address=address,
                            addressable=addressable))
     return address_map
+
+  def _is_cacheable(self, source):
+    """Returns True if the results of executing the given BUILD file source may be cached.
+
+    They may not if the source imports modules, or refers to a builtin or context aware object
+    that could give its execution side effects or results that depend on more than the source.
+    """
+    uncacheable_names = self._UNCACHEABLE_BUILTINS | self._build_configuration.uncacheable_aliases()
+    for node in ast.walk(ast.parse(source)):
+      if isinstance(node, (ast.Import, ast.ImportFrom)) or type(node).__name__ == 'Exec':
+        return False
+      if isinstance(node, ast.Name) and node.id in uncacheable_names:
+        return False
+    return True
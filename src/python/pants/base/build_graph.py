@@ -8,11 +8,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import logging
 import traceback
 from collections import OrderedDict, defaultdict, deque
+from hashlib import sha1
 
 from twitter.common.collections import OrderedSet
 
-from pants.base.address import SyntheticAddress
+from pants.base.address import BuildFileAddress, SyntheticAddress
 from pants.base.address_lookup_error import AddressLookupError
+from pants.base.fingerprint_strategy import DefaultFingerprintStrategy
 
 
 logger = logging.getLogger(__name__)
@@ -41,9 +43,35 @@ class BuildGraph(object):
     """Clear out the state of the BuildGraph, in particular Target mappings and dependencies."""
     self._addresses_already_closed = set()
     self._target_by_address = OrderedDict()
-    self._target_dependencies_by_address = defaultdict(OrderedSet)
-    self._target_dependees_by_address = defaultdict(set)
+    # Every address the graph refers to is assigned a dense integer id, and Targets and dependency
+    # edges are stored in lists indexed by id.  An address keeps its id when its Target is removed.
+    self._id_by_address = {}
+    self._address_by_id = []
+    self._target_by_id = []
+    self._dependency_ids_by_id = []  # Lists of ids in injection order, or None if empty.
+    self._dependee_ids_by_id = []  # Sets of ids, or None if empty.
     self._derived_from_by_derivative_address = {}
+    # {FingerprintStrategy: {Address: transitive fingerprint}}.  A fingerprint is only memoized
+    # once the fingerprints of all of its Target's dependencies are.
+    self._transitive_fingerprints_by_strategy = defaultdict(dict)
+
+  def _id(self, address):
+    """Returns the id of `address`, assigning it the next unused one if it has none yet."""
+    address_id = self._id_by_address.get(address)
+    if address_id is None:
+      address_id = len(self._address_by_id)
+      self._id_by_address[address] = address_id
+      self._address_by_id.append(address)
+      self._target_by_id.append(None)
+      self._dependency_ids_by_id.append(None)
+      self._dependee_ids_by_id.append(None)
+    return address_id
+
+  def _dependency_ids(self, address):
+    return self._dependency_ids_by_id[self._id_by_address[address]] or ()
+
+  def _dependee_ids(self, address):
+    return self._dependee_ids_by_id[self._id_by_address[address]] or ()
 
   def contains_address(self, address):
     return address in self._target_by_address
@@ -66,7 +94,7 @@ class BuildGraph(object):
       'Cannot retrieve dependencies of {address} because it is not in the BuildGraph.'
       .format(address=address)
     )
-    return self._target_dependencies_by_address[address]
+    return [self._address_by_id[dependency_id] for dependency_id in self._dependency_ids(address)]
 
   def dependents_of(self, address):
     """Returns the Targets which depend on the target at `address`.
@@ -77,7 +105,7 @@ class BuildGraph(object):
       'Cannot retrieve dependents of {address} because it is not in the BuildGraph.'
       .format(address=address)
     )
-    return self._target_dependees_by_address[address]
+    return [self._address_by_id[dependee_id] for dependee_id in self._dependee_ids(address)]
 
   def get_derived_from(self, address):
     """Get the target the specified target was derived from.
@@ -130,6 +158,7 @@ class BuildGraph(object):
       self._derived_from_by_derivative_address[target.address] = derived_from.address
 
     self._target_by_address[address] = target
+    self._target_by_id[self._id(address)] = target
 
     for dependency_address in dependencies:
       self.inject_dependency(dependent=address, dependency=dependency_address)
@@ -164,12 +193,195 @@ class BuildGraph(object):
                      ' the cycle.'
                      .format(dependent=dependent, dependency=dependency))
 
-    if dependency in self.dependencies_of(dependent):
+    dependent_id = self._id_by_address[dependent]
+    dependency_id = self._id(dependency)
+    # The dependee sets hold exactly the edges of the ordered dependency lists, so test membership
+    # in the former rather than scanning the latter.
+    if dependent_id in (self._dependee_ids_by_id[dependency_id] or ()):
       logger.debug('{dependent} already depends on {dependency}'
                    .format(dependent=dependent, dependency=dependency))
     else:
-      self._target_dependencies_by_address[dependent].add(dependency)
-      self._target_dependees_by_address[dependency].add(dependent)
+      if self._dependency_ids_by_id[dependent_id] is None:
+        self._dependency_ids_by_id[dependent_id] = []
+      self._dependency_ids_by_id[dependent_id].append(dependency_id)
+      if self._dependee_ids_by_id[dependency_id] is None:
+        self._dependee_ids_by_id[dependency_id] = set()
+      self._dependee_ids_by_id[dependency_id].add(dependent_id)
+      self.invalidate_transitive_fingerprints([dependent])
+
+  def invalidate_addresses(self, addresses):
+    """Removes the Targets at `addresses` along with everything that depends on them.
+
+    The transitive dependees of the given addresses and any Targets derived from the removed
+    Targets are removed as well, since they hold references to the removed Targets.  Targets only
+    depended on by removed Targets stay in the graph, along with their memoized fingerprints.
+
+    :param list<Address> addresses: The addresses of the Targets to remove.  Addresses not in the
+      BuildGraph are ignored.
+    :returns: An OrderedSet of the addresses of every Target removed.
+    """
+    derivatives_by_address = defaultdict(set)
+    for derivative, derived_from in self._derived_from_by_derivative_address.items():
+      derivatives_by_address[derived_from].add(derivative)
+
+    removed = OrderedSet()
+    to_remove = deque(address for address in addresses if self.contains_address(address))
+    while to_remove:
+      address = to_remove.popleft()
+      if address not in removed:
+        removed.add(address)
+        to_remove.extend(self._address_by_id[dependee_id]
+                         for dependee_id in self._dependee_ids(address))
+        to_remove.extend(derivatives_by_address.get(address, ()))
+
+    for address in removed:
+      address_id = self._id_by_address[address]
+      for dependency_id in self._dependency_ids(address):
+        dependee_ids = self._dependee_ids_by_id[dependency_id]
+        if dependee_ids:
+          dependee_ids.discard(address_id)
+      self._dependency_ids_by_id[address_id] = None
+      self._dependee_ids_by_id[address_id] = None
+      self._target_by_id[address_id] = None
+      self._derived_from_by_derivative_address.pop(address, None)
+      self._addresses_already_closed.discard(address)
+      for fingerprints in self._transitive_fingerprints_by_strategy.values():
+        fingerprints.pop(address, None)
+      del self._target_by_address[address]
+    return removed
+
+  def refresh(self, spec_paths=None, addresses=None):
+    """Brings a long lived BuildGraph up to date with BUILD files edited since they were parsed.
+
+    The Targets declared in changed BUILD files are removed using `invalidate_addresses` and every
+    removed Target that was declared in a BUILD file is re-injected if it still exists, so only
+    the part of the graph affected by the edits is re-parsed and re-fingerprinted.  Synthetic
+    Targets are not re-injected; the tasks that created them are expected to do so again.
+
+    :param spec_paths: Spec paths to re-parse, eg: because files their globs match were added,
+      in addition to those whose BUILD files changed on disk.
+    :param addresses: The addresses of more Targets to remove, eg: synthetic Targets whose tasks
+      are about to run again.
+    :returns: An OrderedSet of the addresses of the removed Targets that could not be re-injected,
+      eg: because they were deleted from their BUILD file.
+    """
+    changed_spec_paths = self._address_mapper.changed_spec_paths() | set(spec_paths or ())
+    stale = list(addresses or ())
+    if not changed_spec_paths and not stale:
+      return OrderedSet()
+
+    self._address_mapper.invalidate_spec_paths(changed_spec_paths)
+    stale.extend(address for address in self._target_by_address
+                 if address.spec_path in changed_spec_paths)
+    missing = OrderedSet()
+    for address in self.invalidate_addresses(stale):
+      if isinstance(address, BuildFileAddress):
+        try:
+          self.inject_address_closure(address)
+        except AddressLookupError as e:
+          logger.debug('Not re-injecting {address}: {error}'.format(address=address, error=e))
+          missing.add(address)
+    return missing
+
+  def invalidate_fingerprints(self, addresses):
+    """Discards every memoized fingerprint of the Targets at `addresses`, eg: after source edits.
+
+    The fingerprints of the Targets' payloads are recomputed on next use, as are the transitive
+    fingerprints of the Targets and their dependees.  All other Targets keep their fingerprints.
+
+    :param list<Address> addresses: The addresses of the Targets whose sources changed.  Addresses
+      not in the BuildGraph are ignored.
+    """
+    for address in addresses:
+      target = self.get_target(address)
+      if target:
+        target.payload.mark_dirty()
+        target.mark_invalidation_hash_dirty()
+
+  def transitive_invalidation_hash(self, address, fingerprint_strategy=None):
+    """Returns the fingerprint of the Target at `address` and all of its dependencies.
+
+    See `transitive_invalidation_hashes`.
+    """
+    return self.transitive_invalidation_hashes([address], fingerprint_strategy)[address]
+
+  def transitive_invalidation_hashes(self, addresses, fingerprint_strategy=None):
+    """Fingerprints the Targets at `addresses` and all of their dependencies.
+
+    The transitive closure of `addresses` is fingerprinted dependencies first in a single
+    iterative pass, so deep graphs don't exhaust the stack, and the fingerprints are memoized per
+    FingerprintStrategy until `invalidate_transitive_fingerprints` is called for the Target or one
+    of its dependencies.
+
+    :param list<Address> addresses: The addresses of the Targets to fingerprint.
+    :param FingerprintStrategy fingerprint_strategy: optional fingerprint strategy to use to
+      compute the fingerprint of each target.
+    :returns: A dict from each of `addresses` to its Target's transitive fingerprint.  A
+      fingerprint is `None` if neither the Target nor any of its transitive dependencies
+      contributed to it, according to the FingerprintStrategy.
+    :raises: :class:`CycleException` if the closure of `addresses` contains a cycle.
+    """
+    fingerprint_strategy = fingerprint_strategy or DefaultFingerprintStrategy()
+    fingerprints = self._transitive_fingerprints_by_strategy[fingerprint_strategy]
+
+    def fingerprint(address):
+      hasher = sha1()
+      dep_hashes = sorted(fingerprints[self._address_by_id[dep_id]]
+                          for dep_id in self._dependency_ids(address)
+                          if fingerprints[self._address_by_id[dep_id]] is not None)
+      for dep_hash in dep_hashes:
+        hasher.update(dep_hash)
+      target_hash = self._target_by_address[address].invalidation_hash(fingerprint_strategy)
+      if target_hash is None and not dep_hashes:
+        return None
+      return '{target_hash}.{deps_hash}'.format(target_hash=target_hash,
+                                                deps_hash=hasher.hexdigest()[:12])
+
+    for root in addresses:
+      if root in fingerprints:
+        continue
+      path = OrderedSet([root])
+      stack = [(root, iter(self._dependency_ids(root)))]
+      while stack:
+        address, unvisited_dep_ids = stack[-1]
+        for dep_id in unvisited_dep_ids:
+          dep_address = self._address_by_id[dep_id]
+          if dep_address not in fingerprints:
+            if dep_address in path:
+              path_list = list(path)
+              cycle = path_list[path_list.index(dep_address):] + [dep_address]
+              raise CycleException([self._target_by_address[a] for a in cycle])
+            path.add(dep_address)
+            stack.append((dep_address, iter(self._dependency_ids(dep_address))))
+            break
+        else:
+          stack.pop()
+          path.discard(address)
+          fingerprints[address] = fingerprint(address)
+    return {address: fingerprints[address] for address in addresses}
+
+  def invalidate_transitive_fingerprints(self, addresses):
+    """Discards the memoized transitive fingerprints of `addresses` and their dependees.
+
+    Only the dependee cone of `addresses` is walked, and the walk stops at any Target whose
+    fingerprint isn't memoized, since no dependee of such a Target can have one memoized either.
+
+    :param list<Address> addresses: The addresses of the Targets whose own fingerprints or
+      dependencies changed.
+    """
+    if not any(self._transitive_fingerprints_by_strategy.values()):
+      return
+    to_invalidate = deque(addresses)
+    while to_invalidate:
+      address = to_invalidate.popleft()
+      memoized = False
+      for fingerprints in self._transitive_fingerprints_by_strategy.values():
+        if address in fingerprints:
+          del fingerprints[address]
+          memoized = True
+      if memoized:
+        to_invalidate.extend(self._address_by_id[dependee_id]
+                             for dependee_id in self._dependee_ids(address))
 
   def targets(self, predicate=None):
     """Returns all the targets in the graph in no particular order.
@@ -182,6 +394,88 @@ class BuildGraph(object):
     """:return: targets ordered from most dependent to least."""
     return sort_targets(self._target_by_address.values())
 
+  def iter_closure(self, addresses, predicate=None, postorder=False, max_depth=None):
+    """Yields the Targets at `addresses` and their transitive dependencies, depth first.
+
+    Targets are yielded as they are walked, so a consumer that stops iterating early avoids walking
+    the rest of the closure.  The walk is iterative, so arbitrarily long dependency chains can be
+    walked.
+
+    :param list<Address> addresses: The addresses of the Targets to walk from.
+    :param function predicate: If given, any Target which fails the predicate is neither yielded
+      nor walked through, which trims out any subgraph only reachable through such Targets.
+    :param bool postorder: When ``True``, each Target is yielded after its dependencies (as long as
+      `max_depth` is not given), else before them.
+    :param int max_depth: If given, only Targets at most this many dependency edges away from the
+      nearest of `addresses` are yielded; 0 yields just the Targets at `addresses`.
+    """
+    return self._walk_ids([self._id_by_address[address] for address in addresses],
+                          self._dependency_ids_by_id, predicate, postorder, max_depth)
+
+  def iter_dependees(self, addresses, predicate=None, postorder=False, max_depth=None):
+    """Identical to `iter_closure`, but walks transitive dependees rather than dependencies."""
+    return self._walk_ids([self._id_by_address[address] for address in addresses],
+                          self._dependee_ids_by_id, predicate, postorder, max_depth)
+
+  def _walk_ids(self, root_ids, edge_ids_by_id, predicate, postorder, max_depth):
+    if max_depth is None:
+      return self._walk_all_ids(root_ids, edge_ids_by_id, predicate, postorder)
+    else:
+      return self._walk_ids_to_depth(root_ids, edge_ids_by_id, predicate, postorder, max_depth)
+
+  def _walk_all_ids(self, root_ids, edge_ids_by_id, predicate, postorder):
+    walked = set()
+    target_by_id = self._target_by_id
+    # [(Target, iter(ids of the Targets to walk from it))], under an entry for the roots.
+    stack = [(None, iter(root_ids))]
+    while stack:
+      for address_id in stack[-1][1]:
+        if address_id not in walked:
+          walked.add(address_id)
+          target = target_by_id[address_id]
+          if not predicate or predicate(target):
+            if not postorder:
+              yield target
+            stack.append((target, iter(edge_ids_by_id[address_id] or ())))
+            break
+      else:
+        target, _ = stack.pop()
+        if postorder and stack:
+          yield target
+
+  def _walk_ids_to_depth(self, root_ids, edge_ids_by_id, predicate, postorder, max_depth):
+    # {id: the depth it was last expanded at}.  A Target first reached along a long path is
+    # expanded again if later reached along a shorter one, so its dependencies within max_depth of
+    # it are walked too.
+    depth_by_id = {}
+    failed_predicate = set()
+    # [(Target, whether this is its first expansion, depth, iter(ids of the Targets to walk))]
+    stack = [(None, False, -1, iter(root_ids))]
+    while stack:
+      _, _, depth, edge_ids = stack[-1]
+      for address_id in edge_ids:
+        previous_depth = depth_by_id.get(address_id)
+        if ((previous_depth is None or depth + 1 < previous_depth) and
+            address_id not in failed_predicate):
+          depth_by_id[address_id] = depth + 1
+          target = self._target_by_id[address_id]
+          first = previous_depth is None
+          if first and predicate and not predicate(target):
+            failed_predicate.add(address_id)
+            continue
+          if first and not postorder:
+            yield target
+          if depth + 1 < max_depth:
+            edge_ids = iter(edge_ids_by_id[address_id] or ())
+          else:
+            edge_ids = iter(())
+          stack.append((target, first, depth + 1, edge_ids))
+          break
+      else:
+        target, first, _, _ = stack.pop()
+        if postorder and first:
+          yield target
+
   def walk_transitive_dependency_graph(self, addresses, work, predicate=None, postorder=False):
     """Given a work function, walks the transitive dependency closure of `addresses` using DFS.
 
@@ -195,20 +489,8 @@ class BuildGraph(object):
       walked, nor will its dependencies.  Thus predicate effectively trims out any subgraph
       that would only be reachable through Targets that fail the predicate.
     """
-    walked = set()
-    def _walk_rec(address):
-      if address not in walked:
-        walked.add(address)
-        target = self._target_by_address[address]
-        if not predicate or predicate(target):
-          if not postorder:
-            work(target)
-          for dep_address in self._target_dependencies_by_address[address]:
-            _walk_rec(dep_address)
-          if postorder:
-            work(target)
-    for address in addresses:
-      _walk_rec(address)
+    for target in self.iter_closure(addresses, predicate=predicate, postorder=postorder):
+      work(target)
 
   def walk_transitive_dependee_graph(self, addresses, work, predicate=None, postorder=False):
     """Identical to `walk_transitive_dependency_graph`, but walks dependees preorder (or postorder
@@ -217,20 +499,8 @@ class BuildGraph(object):
     This is identical to reversing the direction of every arrow in the DAG, then calling
     `walk_transitive_dependency_graph`.
     """
-    walked = set()
-    def _walk_rec(address):
-      if address not in walked:
-        walked.add(address)
-        target = self._target_by_address[address]
-        if not predicate or predicate(target):
-          if not postorder:
-            work(target)
-          for dep_address in self._target_dependees_by_address[address]:
-            _walk_rec(dep_address)
-          if postorder:
-            work(target)
-    for address in addresses:
-      _walk_rec(address)
+    for target in self.iter_dependees(addresses, predicate=predicate, postorder=postorder):
+      work(target)
 
   def transitive_dependees_of_addresses(self, addresses, predicate=None, postorder=False):
     """Returns all transitive dependees of `address`.
@@ -273,14 +543,14 @@ class BuildGraph(object):
       that would only be reachable through Targets that fail the predicate.
     """
     walked = OrderedSet()
-    to_walk = deque(addresses)
+    to_walk = deque(self._id_by_address[address] for address in addresses)
     while len(to_walk) > 0:
-      address = to_walk.popleft()
-      target = self._target_by_address[address]
+      address_id = to_walk.popleft()
+      target = self._target_by_id[address_id]
       if target not in walked:
         if not predicate or predicate(target):
           walked.add(target)
-          to_walk.extend(self._target_dependencies_by_address[address])
+          to_walk.extend(self._dependency_ids_by_id[address_id] or ())
     return walked
 
   def inject_synthetic_target(self,
@@ -0,0 +1,117 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+import os
+import time
+
+from pants.base.address import BuildFileAddress
+
+
+logger = logging.getLogger(__name__)
+
+
+def _stat(path):
+  try:
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+  except OSError:
+    return None
+
+
+class BuildGraphWatcher(object):
+  """Keeps a long lived BuildGraph up to date with edits to the files its Targets are defined by.
+
+  Edits are found by polling the modification time and size of the BUILD files parsed so far (see
+  `BuildFileAddressMapper.changed_spec_paths`), the source files of the Targets `record`ed, and
+  the directories holding those, and are applied as narrowly as possible:
+
+  - An edited BUILD file, or a file added to or removed from a directory holding a Target's BUILD
+    file or sources, re-parses the spec path and re-injects its Targets and their dependees (see
+    `BuildGraph.refresh`).  Files added to directories holding none of a Target's sources are not
+    noticed.
+  - An edited source file only invalidates the fingerprints of the Targets owning it and the
+    transitive fingerprints of their dependees (see `BuildGraph.invalidate_fingerprints`).
+
+  Synthetic Targets are removed from the BuildGraph whenever edits are applied, since the tasks
+  that created them will create them afresh.
+  """
+
+  def __init__(self, build_graph, root_dir):
+    """
+    :param build_graph: The BuildGraph to keep up to date.
+    :param string root_dir: The root directory of the repo.
+    """
+    self._build_graph = build_graph
+    self._root_dir = root_dir
+    self._source_stats_by_address = {}  # {address: (target, {full_path: stat})}
+    self._dir_stats = {}  # {full_path: (stat, set(spec_paths))}
+
+  def record(self):
+    """Records the stats of the files of every Target in the BuildGraph not already recorded.
+
+    Call once the BuildGraph is populated, eg: after each run of the goals, so that `poll` notices
+    edits to the files of Targets injected since.
+    """
+    for target in self._build_graph.targets():
+      address = target.address
+      if not isinstance(address, BuildFileAddress):
+        continue
+      recorded = self._source_stats_by_address.get(address)
+      if recorded and recorded[0] is target:
+        continue
+      paths = [os.path.join(self._root_dir, source)
+               for source in target.sources_relative_to_buildroot()]
+      self._source_stats_by_address[address] = (target, dict((path, _stat(path))
+                                                             for path in paths))
+      dirs = set(os.path.dirname(path) for path in paths)
+      dirs.add(os.path.join(self._root_dir, address.spec_path))
+      for path in dirs:
+        if path not in self._dir_stats:
+          self._dir_stats[path] = (_stat(path), set())
+        self._dir_stats[path][1].add(address.spec_path)
+
+  def poll(self):
+    """Applies the edits made since the files were recorded to the BuildGraph.
+
+    :returns: True if there were any edits.
+    """
+    changed_spec_paths = set()
+    for path, (stat, spec_paths) in list(self._dir_stats.items()):
+      if _stat(path) != stat:
+        changed_spec_paths.update(spec_paths)
+        del self._dir_stats[path]
+
+    changed_addresses = []
+    for address, (target, source_stats) in list(self._source_stats_by_address.items()):
+      if self._build_graph.get_target(address) is not target:
+        del self._source_stats_by_address[address]
+      elif any(_stat(path) != stat for path, stat in source_stats.items()):
+        changed_addresses.append(address)
+        del self._source_stats_by_address[address]
+
+    changed_spec_paths.update(self._build_graph.address_mapper.changed_spec_paths())
+    if not changed_spec_paths and not changed_addresses:
+      return False
+
+    logger.debug('Refreshing spec paths {} and the fingerprints of {}.'
+                 .format(sorted(changed_spec_paths), sorted(a.spec for a in changed_addresses)))
+    synthetic = [target.address for target in self._build_graph.targets()
+                 if not isinstance(target.address, BuildFileAddress)]
+    missing = self._build_graph.refresh(spec_paths=changed_spec_paths, addresses=synthetic)
+    for address in missing:
+      logger.debug('{} no longer exists.'.format(address.spec))
+    self._build_graph.invalidate_fingerprints(changed_addresses)
+    return True
+
+  def wait(self, poll_interval):
+    """Blocks until there are edits to apply, then applies them.
+
+    :param float poll_interval: The number of seconds to wait between polls.
+    """
+    while not self.poll():
+      time.sleep(poll_interval)
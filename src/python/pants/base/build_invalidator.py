@@ -6,14 +6,19 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import errno
+import fcntl
 import hashlib
 import os
+import threading
+from abc import abstractmethod
 from collections import namedtuple
+from contextlib import contextmanager
 
 from pants.base.hash_utils import hash_all
 from pants.base.target import Target
 from pants.fs.fs import safe_filename
 from pants.util.dirutil import safe_mkdir
+from pants.util.meta import AbstractClass
 
 
 # A CacheKey represents some version of a set of targets.
@@ -90,15 +95,284 @@ class CacheKeyGenerator(object):
       return None
 
 
+class InvalidationStore(AbstractClass):
+  """A persistent map from target set id to the hash of its last successfully processed version."""
+
+  @abstractmethod
+  def get(self, id):
+    """Returns the hash stored for id, or None if there is none."""
+
+  @abstractmethod
+  def set(self, id, hash):
+    """Stores hash as the current hash for id."""
+
+  @abstractmethod
+  def delete(self, id):
+    """Removes any hash stored for id."""
+
+  @abstractmethod
+  def clear(self):
+    """Removes all stored hashes."""
+
+  def flush(self):
+    """Persists any changes made since the last flush."""
+
+
+class DirectoryInvalidationStore(InvalidationStore):
+  """Stores the hash for each id in its own `<id>.hash` file under a root directory.
+
+  If a LogInvalidationStore has been used under the same root, hash files written before its log
+  was last written may have been superseded by it, and so are ignored.
+  """
+
+  def __init__(self, root):
+    self._root = root
+    safe_mkdir(self._root)
+    try:
+      self._superseded_before = os.path.getmtime(os.path.join(root, LogInvalidationStore.LOG_NAME))
+    except OSError:
+      self._superseded_before = None
+
+  def get(self, id):
+    try:
+      with open(self._sha_file(id), 'rb') as fd:
+        if (self._superseded_before is not None and
+            os.fstat(fd.fileno()).st_mtime <= self._superseded_before):
+          return None
+        return fd.read().strip()
+    except IOError as e:
+      if e.errno != errno.ENOENT:
+        raise
+      return None  # File doesn't exist.
+
+  def set(self, id, hash):
+    with open(self._sha_file(id), 'w') as fd:
+      fd.write(hash)
+
+  def delete(self, id):
+    try:
+      os.unlink(self._sha_file(id))
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        raise
+
+  def clear(self):
+    safe_mkdir(self._root, clean=True)
+
+  def _sha_file(self, id):
+    return os.path.join(self._root, safe_filename(id, extension='.hash'))
+
+
+class LogInvalidationStore(InvalidationStore):
+  """Stores the hashes for all ids in a single append-only log file under a root directory.
+
+  The log is read into memory the first time a store is used, and changes are appended to it with a
+  single write per `flush`.  Once most of its records are stale the log is compacted: it is re-read
+  to pick up records appended by other processes, and atomically replaced with just the live ones.
+  Appends and compactions hold a lock file, so that no process appends to a log being replaced.  A
+  record only partially written (eg: by a killed process) is ignored when the log is read.
+
+  The first time a log is created under a root, any hashes stored there by a
+  DirectoryInvalidationStore are imported, so switching stores does not invalidate everything.
+
+  Use `for_root` to get the store for a root, so that all its users in a process share one copy of
+  the log's contents.
+  """
+
+  LOG_NAME = 'invalidation.log'
+
+  # Compact the log once it has more than this many records per live entry.
+  _COMPACTION_RATIO = 2
+
+  # The stores created by `for_root`, by root.
+  _stores_by_root = {}
+  _stores_lock = threading.Lock()
+
+  @classmethod
+  def for_root(cls, root):
+    """Returns the store for root, shared by every caller in this process.
+
+    If another process has changed the log since the store last read or wrote it, and the store
+    has no unflushed changes, the log is re-read on next use.
+    """
+    root = os.path.realpath(root)
+    with cls._stores_lock:
+      store = cls._stores_by_root.get(root)
+      if store is None:
+        store = cls(root)
+        cls._stores_by_root[root] = store
+      else:
+        store._reload_if_changed()
+      return store
+
+  def __init__(self, root):
+    self._root = root
+    self._path = os.path.join(root, self.LOG_NAME)
+    self._lock_path = '{}.lock'.format(self._path)
+    self._lock = threading.Lock()
+    self._hashes = None  # {key: hash}, loaded lazily.
+    self._num_records = 0
+    self._pending = []  # (key, hash or None) records not yet flushed.
+    self._log_identity = None  # The (inode, size) of the log as of the last read or write of it.
+
+  def get(self, id):
+    with self._lock:
+      return self._load().get(self._key(id))
+
+  def _reload_if_changed(self):
+    """Forgets what was read from the log if something else has changed or removed it since."""
+    with self._lock:
+      if self._hashes is not None and not self._pending:
+        if self._current_log_identity() != self._log_identity:
+          self._hashes = None
+          self._num_records = 0
+
+  def _current_log_identity(self):
+    try:
+      stat = os.stat(self._path)
+      return stat.st_ino, stat.st_size
+    except OSError:
+      return None
+
+  def set(self, id, hash):
+    key = self._key(id)
+    with self._lock:
+      self._load()[key] = hash
+      self._pending.append((key, hash))
+
+  def delete(self, id):
+    key = self._key(id)
+    with self._lock:
+      if self._load().pop(key, None) is not None:
+        self._pending.append((key, None))
+
+  def clear(self):
+    with self._lock:
+      safe_mkdir(self._root, clean=True)
+      self._hashes = {}
+      self._num_records = 0
+      self._pending = []
+      self._log_identity = None
+
+  def flush(self):
+    with self._lock:
+      if not self._pending:
+        return
+      with self._log_file_lock():
+        self._num_records += len(self._pending)
+        if self._num_records > self._COMPACTION_RATIO * len(self._hashes) + 1000:
+          self._compact()
+        else:
+          with open(self._path, 'ab') as fd:
+            fd.write(b''.join(self._format(key, hash) for key, hash in self._pending))
+        self._pending = []
+        self._log_identity = self._current_log_identity()
+
+  @contextmanager
+  def _log_file_lock(self):
+    """Holds an exclusive lock, across processes, on changes to the log."""
+    safe_mkdir(self._root)
+    with open(self._lock_path, 'a') as lock_file:
+      fcntl.flock(lock_file, fcntl.LOCK_EX)
+      try:
+        yield
+      finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+  @staticmethod
+  def _key(id):
+    # Keyed as the DirectoryInvalidationStore names its files, to make importing them trivial.
+    return safe_filename(id, extension='.hash')
+
+  @staticmethod
+  def _format(key, hash):
+    return '{}\t{}\n'.format(key, hash or '').encode('utf-8')
+
+  def _compact(self):
+    """Replaces the log with the live records of its current contents plus the pending records.
+
+    Must be called holding the log file lock.
+    """
+    hashes = {}
+    self._read_log(hashes)
+    for key, hash in self._pending:
+      if hash:
+        hashes[key] = hash
+      else:
+        hashes.pop(key, None)
+    self._write_log(hashes)
+    self._hashes = hashes
+    self._num_records = len(hashes)
+
+  def _write_log(self, hashes):
+    tmp_path = '{}.tmp.{}'.format(self._path, os.getpid())
+    with open(tmp_path, 'wb') as fd:
+      fd.write(b''.join(self._format(key, hash) for key, hash in hashes.items()))
+    os.rename(tmp_path, self._path)
+
+  def _read_log(self, hashes):
+    """Applies the records of the log to the hashes dict, and returns the number read."""
+    num_records = 0
+    if os.path.exists(self._path):
+      with open(self._path, 'rb') as fd:
+        for line in fd:
+          if not line.endswith(b'\n'):
+            break  # A partially written record.
+          key, _, hash = line.decode('utf-8').rstrip('\n').partition('\t')
+          if hash:
+            hashes[key] = hash
+          else:
+            hashes.pop(key, None)
+          num_records += 1
+    return num_records
+
+  def _load(self):
+    if self._hashes is None:
+      if not os.path.exists(self._path) and os.path.isdir(self._root):
+        with self._log_file_lock():
+          if not os.path.exists(self._path):
+            self._import_directory_store()
+      self._hashes = {}
+      self._num_records = self._read_log(self._hashes)
+      self._log_identity = self._current_log_identity()
+    return self._hashes
+
+  def _import_directory_store(self):
+    """Writes a log of the hashes stored under the root by a DirectoryInvalidationStore.
+
+    Must be called holding the log file lock.  The hash files are left in place, for any process
+    still using a DirectoryInvalidationStore, which ignores them once the log is newer.
+    """
+    hashes = {}
+    for name in os.listdir(self._root):
+      if name.endswith('.hash'):
+        with open(os.path.join(self._root, name), 'rb') as fd:
+          hash = fd.read().strip()
+        if hash:
+          hashes[name] = hash
+    if hashes:
+      self._write_log(hashes)
+
+
 # A persistent map from target set to cache key, which is a fingerprint of all
 # the inputs to the current version of that target set. That cache key can then be used
 # to look up build artifacts in an artifact cache.
 class BuildInvalidator(object):
   """Invalidates build targets based on the SHA1 hash of source files and other inputs."""
 
-  def __init__(self, root):
-    self._root = os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION)
-    safe_mkdir(self._root)
+  # Factories of each type of InvalidationStore, given its root.
+  STORES = {
+    'directory': DirectoryInvalidationStore,
+    'log': LogInvalidationStore.for_root,
+  }
+
+  def __init__(self, root, store='log'):
+    """
+    :param string root: The directory to persist hashes under.
+    :param string store: The type of InvalidationStore to persist hashes with; one of the keys of
+                         `BuildInvalidator.STORES`.
+    """
+    self._store = self.STORES[store](os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION))
 
   def needs_update(self, cache_key):
     """Check if the given cached item is invalid.
@@ -106,52 +380,35 @@ class BuildInvalidator(object):
     :param cache_key: A CacheKey object (as returned by BuildInvalidator.key_for().
     :returns: True if the cached version of the item is out of date.
     """
-    return self._read_sha(cache_key) != cache_key.hash
+    return self._store.get(cache_key.id) != cache_key.hash
 
   def update(self, cache_key):
     """Makes cache_key the valid version of the corresponding target set.
 
+    The change may not be persisted until `flush` is called.
+
     :param cache_key: A CacheKey object (typically returned by BuildInvalidator.key_for()).
     """
-    self._write_sha(cache_key)
+    self._store.set(cache_key.id, cache_key.hash)
 
   def force_invalidate_all(self):
     """Force-invalidates all cached items."""
-    safe_mkdir(self._root, clean=True)
+    self._store.clear()
 
   def force_invalidate(self, cache_key):
-    """Force-invalidate the cached item."""
-    try:
-      os.unlink(self._sha_file(cache_key))
-    except OSError as e:
-      if e.errno != errno.ENOENT:
-        raise
+    """Force-invalidate the cached item.
+
+    The change may not be persisted until `flush` is called.
+    """
+    self._store.delete(cache_key.id)
+
+  def flush(self):
+    """Persists the updates and invalidations made since the last flush."""
+    self._store.flush()
 
   def existing_hash(self, id):
     """Returns the existing hash for the specified id.
 
     Returns None if there is no existing hash for this id.
     """
-    return self._read_sha_by_id(id)
-
-  def _sha_file(self, cache_key):
-    return self._sha_file_by_id(cache_key.id)
-
-  def _sha_file_by_id(self, id):
-    return os.path.join(self._root, safe_filename(id, extension='.hash'))
-
-  def _write_sha(self, cache_key):
-    with open(self._sha_file(cache_key), 'w') as fd:
-      fd.write(cache_key.hash)
-
-  def _read_sha(self, cache_key):
-    return self._read_sha_by_id(cache_key.id)
-
-  def _read_sha_by_id(self, id):
-    try:
-      with open(self._sha_file_by_id(id), 'rb') as fd:
-        return fd.read().strip()
-    except IOError as e:
-      if e.errno != errno.ENOENT:
-        raise
-      return None  # File doesn't exist.
+    return self._store.get(id)
@@ -6,9 +6,12 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import sys
+import threading
+from multiprocessing.pool import ThreadPool
 
 from pants.base.build_graph import sort_targets
 from pants.base.build_invalidator import BuildInvalidator, CacheKeyGenerator
+from pants.base.payload_field import SourcesField
 from pants.base.target import Target
 
 
@@ -92,7 +95,8 @@ class InvalidationCheck(object):
   """
 
   @classmethod
-  def _partition_versioned_targets(cls, versioned_targets, partition_size_hint, vt_colors=None):
+  def _partition_versioned_targets(cls, versioned_targets, partition_size_hint, vt_colors=None,
+                                   vt_weights=None):
     """Groups versioned targets so that each group has roughly the same number of sources.
 
     versioned_targets is a list of VersionedTarget objects  [vt1, vt2, vt3, vt4, vt5, vt6, ...].
@@ -106,6 +110,10 @@ class InvalidationCheck(object):
     If vt_colors is specified, it must be a map from VersionedTarget -> opaque 'color' values.
     Two VersionedTargets will be in the same partition only if they have the same color.
 
+    If vt_weights is specified, it must be a map from VersionedTarget -> the number of sources it
+    should count as, eg: so that partitions are balanced by expected cost rather than by size.
+    VersionedTargets missing from the map count as their number of chunking units.
+
     This is useful as a compromise between flat mode, where we build all targets in a
     single compiler invocation, and non-flat mode, where we invoke a compiler for each target,
     which may lead to lots of compiler startup overhead. A task can choose instead to build one
@@ -123,7 +131,8 @@ class InvalidationCheck(object):
 
     def add_to_current_group(vt):
       current_group.vts.append(vt)
-      current_group.total_chunking_units += vt.num_chunking_units
+      current_group.total_chunking_units += (vt_weights.get(vt, vt.num_chunking_units)
+                                             if vt_weights else vt.num_chunking_units)
 
     def close_current_group():
       if len(current_group.vts) > 0:
@@ -153,20 +162,26 @@ class InvalidationCheck(object):
 
     return res
 
-  def __init__(self, all_vts, invalid_vts, partition_size_hint=None, target_colors=None):
-    # target_colors is specified by Target. We need it by VersionedTarget.
+  def __init__(self, all_vts, invalid_vts, partition_size_hint=None, target_colors=None,
+               target_weights=None):
+    # target_colors and target_weights are specified by Target. We need them by VersionedTarget.
     vt_colors = {}
     if target_colors:
       for vt in all_vts:
         if vt.target in target_colors:
           vt_colors[vt] = target_colors[vt.target]
+    vt_weights = {}
+    if target_weights:
+      for vt in all_vts:
+        if vt.target in target_weights:
+          vt_weights[vt] = target_weights[vt.target]
 
     # All the targets, valid and invalid.
     self.all_vts = all_vts
 
     # All the targets, partitioned if so requested.
     self.all_vts_partitioned = \
-      self._partition_versioned_targets(all_vts, partition_size_hint, vt_colors) \
+      self._partition_versioned_targets(all_vts, partition_size_hint, vt_colors, vt_weights) \
         if (partition_size_hint or vt_colors) else all_vts
 
     # Just the invalid targets.
@@ -174,7 +189,7 @@ class InvalidationCheck(object):
 
     # Just the invalid targets, partitioned if so requested.
     self.invalid_vts_partitioned = \
-      self._partition_versioned_targets(invalid_vts, partition_size_hint, vt_colors) \
+      self._partition_versioned_targets(invalid_vts, partition_size_hint, vt_colors, vt_weights) \
         if (partition_size_hint or vt_colors) else invalid_vts
 
 
@@ -187,15 +202,35 @@ class InvalidationCacheManager(object):
   class CacheValidationError(Exception):
     """Indicates a problem accessing the cache."""
 
+  # Hashing ThreadPools by size, created on first use and stopped by `shutdown_hashing_pools`.
+  _hashing_pools = {}
+  _hashing_pools_lock = threading.Lock()
+
   def __init__(self,
                cache_key_generator,
                build_invalidator_dir,
                invalidate_dependents,
-               fingerprint_strategy=None):
+               fingerprint_strategy=None,
+               hashing_workers=None,
+               invalidation_store='log',
+               build_graph=None):
+    """
+    :param int hashing_workers: If greater than 1, the sources of the targets being checked are
+                                hashed up front by this many threads, rather than one at a time as
+                                each target is fingerprinted.  Only worthwhile when reading sources
+                                is slow.
+    :param string invalidation_store: The type of InvalidationStore to persist hashes with; one of
+                                      the keys of `BuildInvalidator.STORES`.
+    :param BuildGraph build_graph: If specified along with invalidate_dependents, the transitive
+                                   fingerprints of the targets being checked are computed up front
+                                   in one pass over this graph.
+    """
     self._cache_key_generator = cache_key_generator
     self._invalidate_dependents = invalidate_dependents
-    self._invalidator = BuildInvalidator(build_invalidator_dir)
+    self._invalidator = BuildInvalidator(build_invalidator_dir, store=invalidation_store)
     self._fingerprint_strategy = fingerprint_strategy
+    self._hashing_workers = hashing_workers
+    self._build_graph = build_graph
 
   def update(self, vts):
     """Mark a changed or invalidated VersionedTargetSet as successfully processed."""
@@ -204,6 +239,7 @@ class InvalidationCacheManager(object):
       vt.valid = True
     self._invalidator.update(vts.cache_key)
     vts.valid = True
+    self._invalidator.flush()
 
   def force_invalidate(self, vts):
     """Force invalidation of a VersionedTargetSet."""
@@ -212,12 +248,14 @@ class InvalidationCacheManager(object):
       vt.valid = False
     self._invalidator.force_invalidate(vts.cache_key)
     vts.valid = False
+    self._invalidator.flush()
 
   def check(self,
             targets,
             partition_size_hint=None,
             target_colors=None,
-            topological_order=False):
+            topological_order=False,
+            target_weights=None):
     """Checks whether each of the targets has changed and invalidates it if so.
 
     Returns a list of VersionedTargetSet objects (either valid or invalid). The returned sets
@@ -229,10 +267,16 @@ class InvalidationCacheManager(object):
 
     If target_colors is specified, it must be a map from Target -> opaque 'color' values.
     Two Targets will be in the same partition only if they have the same color.
+
+    If target_weights is specified, it must be a map from Target -> the number of sources it should
+    count as when partitioning.
     """
+    self._precompute_source_fingerprints(targets)
+    self._precompute_transitive_fingerprints(targets)
     all_vts = self._wrap_targets(targets, topological_order=topological_order)
     invalid_vts = filter(lambda vt: not vt.valid, all_vts)
-    return InvalidationCheck(all_vts, invalid_vts, partition_size_hint, target_colors)
+    return InvalidationCheck(all_vts, invalid_vts, partition_size_hint, target_colors,
+                             target_weights)
 
   def _wrap_targets(self, targets, topological_order=False):
     """Wrap targets and their computed cache keys in VersionedTargets.
@@ -253,6 +297,76 @@ class InvalidationCacheManager(object):
           yield VersionedTarget(self, target, target_key)
     return list(vt_iter())
 
+  def _precompute_source_fingerprints(self, targets):
+    """Hashes the sources of all the targets about to be fingerprinted concurrently.
+
+    The fingerprints are memoized on the targets' SourcesFields, so this is transparent to the
+    FingerprintStrategy that goes on to fingerprint the targets.
+    """
+    if not self._hashing_workers or self._hashing_workers < 2:
+      return
+
+    fields = []
+    seen = set()
+    to_walk = list(targets)
+    while to_walk:
+      target = to_walk.pop()
+      if target in seen:
+        continue
+      seen.add(target)
+      fields.extend(field for _, field in target.payload.fields if isinstance(field, SourcesField))
+      if self._invalidate_dependents:
+        to_walk.extend(target.dependencies)
+
+    pool = self._hashing_pool(self._hashing_workers)
+    # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+    # waiting on a condition variable, so we won't be able to ctrl-c out.
+    SourcesField.precompute_fingerprints(
+      fields, map_func=lambda f, items: pool.map_async(f, items, chunksize=64)
+                                            .get(timeout=1000000000))
+
+  @classmethod
+  def _hashing_pool(cls, workers):
+    """Returns a pool of the given number of hashing threads, shared by all cache managers.
+
+    Tasks check targets many times a run, so the threads are started once, not on every check.
+    """
+    with cls._hashing_pools_lock:
+      pool = cls._hashing_pools.get(workers)
+      if pool is None:
+        pool = ThreadPool(processes=workers)
+        cls._hashing_pools[workers] = pool
+      return pool
+
+  @classmethod
+  def shutdown_hashing_pools(cls):
+    """Stops the threads of the hashing pools, which are started afresh if hashing is needed again.
+
+    Call this once no more targets will be checked, eg: at the end of a run.
+    """
+    with cls._hashing_pools_lock:
+      pools = cls._hashing_pools.values()
+      cls._hashing_pools.clear()
+    for pool in pools:
+      pool.terminate()
+      pool.join()
+
+  def _precompute_transitive_fingerprints(self, targets):
+    """Fingerprints the targets and all their dependencies in one pass over the BuildGraph.
+
+    The fingerprints are memoized by the BuildGraph, where `_key_for` then finds them.
+    """
+    if not self._invalidate_dependents or not self._build_graph:
+      return
+    try:
+      self._build_graph.transitive_invalidation_hashes(
+        [target.address for target in targets], fingerprint_strategy=self._fingerprint_strategy)
+    except Exception as e:
+      exc_info = sys.exc_info()
+      new_exception = self.CacheValidationError("Problem validating targets: {}".format(e))
+
+      raise self.CacheValidationError, new_exception, exc_info[2]
+
   def needs_update(self, cache_key):
     return self._invalidator.needs_update(cache_key)
 
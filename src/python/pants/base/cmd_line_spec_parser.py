@@ -135,6 +135,7 @@ class CmdLineSpecParser(object):
       try:
         build_files = self._address_mapper.scan_buildfiles(self._root_dir, spec_dir,
                                                            spec_excludes=self._spec_excludes)
+        self._address_mapper.preparse_build_files(build_files)
       except (BuildFile.BuildFileError, AddressLookupError) as e:
         raise self.BadSpecError(e)
 
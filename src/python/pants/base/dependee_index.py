@@ -0,0 +1,161 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import logging
+import os
+from collections import defaultdict, deque
+
+from pants.base.address import SyntheticAddress
+from pants.util.dirutil import safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+class DependeeIndex(object):
+  """A persistent index of the direct dependees of the targets declared in BUILD files.
+
+  For each spec path the index records the dependencies of the targets its BUILD files declare,
+  along with a fingerprint of the contents of those BUILD files.  `update` only parses the spec
+  paths whose BUILD files have changed since they were indexed, so dependee queries against a
+  mostly unchanged repo need not parse and inject the whole build graph.
+
+  Note that the dependencies recorded for a spec path are assumed to depend only on the contents of
+  its own BUILD files.
+  """
+
+  # Bump this if the on-disk format of the index changes.
+  _VERSION = 1
+
+  _global_instance = None
+
+  @classmethod
+  def set_global_instance(cls, index):
+    """Sets the index returned by `global_instance`, or disables sharing one if index is None."""
+    cls._global_instance = index
+
+  @classmethod
+  def global_instance(cls):
+    return cls._global_instance
+
+  def __init__(self, persist_path=None):
+    """
+    :param string persist_path: If specified, a file to load a previously built index from and
+                                `save` the index to.
+    """
+    self._persist_path = persist_path
+    # {spec_path: (fingerprint, {spec: [dependency spec]})}
+    self._entries = self._load() if persist_path else {}
+    self._dirty = False
+    self._dependees_by_spec = {}
+
+    # The spec paths parsed, and the spec paths whose indexed dependencies were reused.
+    self.parsed_spec_paths = 0
+    self.reused_spec_paths = 0
+
+  def update(self, address_mapper, build_graph, build_files):
+    """Brings the index up to date for the spec paths of the given BUILD files.
+
+    The targets in spec paths that changed since they were last indexed are injected into the
+    build graph to find their dependencies.  Subsequent queries only see dependees declared in
+    these spec paths.
+
+    :param address_mapper: The BuildFileAddressMapper to resolve addresses with.
+    :param build_graph: The BuildGraph to inject the targets of changed spec paths into.
+    :param build_files: An iterable of BuildFiles.
+    :raises: AddressLookupError if a changed BUILD file can't be parsed.
+    """
+    build_file_by_spec_path = {}
+    for build_file in build_files:
+      build_file_by_spec_path.setdefault(build_file.spec_path, build_file)
+
+    fingerprints = {}
+    for spec_path, build_file in build_file_by_spec_path.items():
+      fingerprint = build_file.family_fingerprint()
+      entry = self._entries.get(spec_path)
+      if entry and entry[0] == fingerprint:
+        self.reused_spec_paths += 1
+      else:
+        fingerprints[spec_path] = fingerprint
+
+    address_mapper.preparse_build_files(
+      family_build_file
+      for spec_path in fingerprints
+      for family_build_file in build_file_by_spec_path[spec_path].family())
+    for spec_path, fingerprint in sorted(fingerprints.items()):
+      self._entries[spec_path] = (fingerprint, self._parse(address_mapper, build_graph, spec_path))
+      self.parsed_spec_paths += 1
+      self._dirty = True
+
+    dependees_by_spec = defaultdict(set)
+    for spec_path in build_file_by_spec_path:
+      for spec, dependency_specs in self._entries[spec_path][1].items():
+        for dependency_spec in dependency_specs:
+          dependees_by_spec[dependency_spec].add(spec)
+    self._dependees_by_spec = dependees_by_spec
+
+  def dependees_of(self, addresses, transitive=False):
+    """Yields the addresses of the dependees of the given addresses as they are found.
+
+    Dependees are found breadth first and each is yielded once.  The given addresses are never
+    yielded, even if they depend on one another.
+
+    :param addresses: An iterable of Addresses.
+    :param bool transitive: True to yield the transitive dependees of addresses as well.
+    """
+    seen = set(address.spec for address in addresses)
+    to_check = deque(seen)
+    while to_check:
+      spec = to_check.popleft()
+      for dependee_spec in self._dependees_by_spec.get(spec, ()):
+        if dependee_spec not in seen:
+          seen.add(dependee_spec)
+          yield SyntheticAddress.parse(dependee_spec)
+          if transitive:
+            to_check.append(dependee_spec)
+
+  def save(self):
+    """Persists the index, if any spec paths were parsed since it was loaded."""
+    if not self._persist_path or not self._dirty:
+      return
+    safe_mkdir_for(self._persist_path)
+    tmp_path = '{}.tmp.{}'.format(self._persist_path, os.getpid())
+    with open(tmp_path, 'w') as fp:
+      json.dump({'version': self._VERSION, 'entries': self._entries}, fp)
+    os.rename(tmp_path, self._persist_path)
+    self._dirty = False
+
+  @staticmethod
+  def _parse(address_mapper, build_graph, spec_path):
+    addresses = address_mapper.addresses_in_spec_path(spec_path)
+    for address in addresses:
+      build_graph.inject_address_closure(address)
+
+    dependencies_by_spec = {}
+    for address in addresses:
+      target = build_graph.get_target(address)
+      # TODO(John Sirois): tighten up the notion of targets written down in a BUILD by a
+      # user vs. targets created by pants at runtime.
+      dependency_specs = set(dependency.concrete_derived_from.address.spec
+                             for dependency in target.dependencies)
+      dependencies_by_spec[address.spec] = sorted(dependency_specs)
+    return dependencies_by_spec
+
+  def _load(self):
+    if not os.path.exists(self._persist_path):
+      return {}
+    try:
+      with open(self._persist_path, 'r') as fp:
+        data = json.load(fp)
+      if data.get('version') != self._VERSION:
+        return {}
+      return {spec_path: (fingerprint, dependencies_by_spec)
+              for spec_path, (fingerprint, dependencies_by_spec) in data['entries'].items()}
+    except (ValueError, KeyError, TypeError) as e:
+      logger.warn('Ignoring corrupt dependee index at {}: {}'.format(self._persist_path, e))
+      return {}
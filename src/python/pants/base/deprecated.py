@@ -104,3 +104,28 @@ def deprecated(removal_version, hint_message=None):
       return func(*args, **kwargs)
     return wrapper
   return decorator
+
+
+def deprecated_module(removal_version, hint_message=None):
+  """Marks the module calling this as deprecated, warning when it is imported.
+
+  Call this at the top level of a module that only remains to re-export names moved elsewhere.
+
+  :param str removal_version: The pantsbuild.pants version which will remove the deprecated
+                              module.
+  :param str hint_message: An optional hint pointing to alternatives to the deprecation.
+  :raises DeprecationApplicationError if the removal_version parameter is invalid.
+  """
+  if removal_version is None:
+    raise MissingRemovalVersionError('A removal_version must be specified for this deprecation.')
+
+  check_deprecated_semver(removal_version)
+
+  module = inspect.currentframe().f_back.f_globals['__name__']
+  warning_message = ('\nmodule {module} is deprecated and will be removed in version '
+                     '{removal_version}').format(module=module, removal_version=removal_version)
+
+  if hint_message:
+    warning_message += (':\n' + hint_message)
+
+  warnings.warn(warning_message, DeprecationWarning, stacklevel=3)
@@ -0,0 +1,157 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from pants.util.dirutil import safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+def _sha1_file(path):
+  digest = hashlib.sha1()
+  with open(path, 'rb') as fd:
+    s = fd.read(8192)
+    while s:
+      digest.update(s)
+      s = fd.read(8192)
+  return digest.hexdigest()
+
+
+def digest_file(path):
+  """Returns the sha1 hexdigest of the contents of the file at path.
+
+  Uses the global FileDigestCache, if one is set, to avoid re-reading unchanged files.
+  """
+  cache = FileDigestCache.global_instance()
+  return cache.digest(path) if cache else _sha1_file(path)
+
+
+class FileDigestCache(object):
+  """A persistent cache of the sha1 digests of file contents.
+
+  Each digest is stored with the size, mtime and inode its file had when hashed, and is reused as
+  long as a stat of the file still matches, so unchanged files are never re-read.  As with git's
+  index, a file modified in the same second it is hashed is not cached, since a later modification
+  in that second might not change its mtime.
+
+  Files under the given uncached directories, eg: the workdir, are always hashed afresh, since
+  build outputs churn between runs and would only bloat the cache.  And entries for files that no
+  longer exist are dropped whenever the cache is saved.
+  """
+
+  # Bump this if the on-disk format of persisted digests changes.
+  _VERSION = 1
+
+  _global_instance = None
+
+  @classmethod
+  def set_global_instance(cls, cache):
+    """Sets the cache used by `digest_file`, or disables caching if cache is None."""
+    cls._global_instance = cache
+
+  @classmethod
+  def global_instance(cls):
+    return cls._global_instance
+
+  def __init__(self, persist_path=None, uncached_dirs=()):
+    """
+    :param string persist_path: If specified, a file to load previously computed digests from and
+                                `save` digests to.
+    :param list uncached_dirs: Directories whose files' digests are never cached.
+    """
+    self._persist_path = persist_path
+    self._uncached_prefixes = tuple(os.path.join(os.path.abspath(d), '') for d in uncached_dirs)
+    self._lock = threading.Lock()
+    self._entries = self._load() if persist_path else {}  # {path: (size, mtime, inode, digest)}
+    self._dirty = False
+
+    # The files and bytes hashed, and the files and bytes whose cached digest was reused.
+    self.hashed_files = 0
+    self.hashed_bytes = 0
+    self.skipped_files = 0
+    self.skipped_bytes = 0
+
+  def digest(self, path):
+    """Returns the sha1 hexdigest of the contents of the file at path.
+
+    :raises: IOError if the file can't be read.
+    """
+    path = os.path.abspath(path)
+    try:
+      stat = os.stat(path)
+    except OSError:
+      return _sha1_file(path)  # Raises the IOError callers expect of a missing file.
+
+    mtime = getattr(stat, 'st_mtime_ns', None) or int(stat.st_mtime * 1e9)
+    key = (stat.st_size, mtime, stat.st_ino)
+    with self._lock:
+      entry = self._entries.get(path)
+      if entry and tuple(entry[:3]) == key:
+        self.skipped_files += 1
+        self.skipped_bytes += stat.st_size
+        return entry[3]
+
+    digest = _sha1_file(path)
+    with self._lock:
+      self.hashed_files += 1
+      self.hashed_bytes += stat.st_size
+      if int(stat.st_mtime) < int(time.time()) - 1 and not self._is_uncached(path):
+        self._entries[path] = key + (digest,)
+        self._dirty = True
+    return digest
+
+  def save(self):
+    """Persists the digests, if any were computed since they were loaded."""
+    if not self._persist_path:
+      return
+    with self._lock:
+      if not self._dirty:
+        return
+      entries = dict(self._entries)
+      self._dirty = False
+
+    missing = [path for path in entries if not os.path.exists(path)]
+    if missing:
+      with self._lock:
+        for path in missing:
+          # Unless the file was re-created and re-hashed meanwhile.
+          if self._entries.get(path) == entries[path]:
+            del self._entries[path]
+      for path in missing:
+        del entries[path]
+
+    data = {'version': self._VERSION, 'entries': entries}
+    safe_mkdir_for(self._persist_path)
+    tmp_path = '{}.tmp.{}'.format(self._persist_path, os.getpid())
+    with open(tmp_path, 'w') as fp:
+      json.dump(data, fp)
+    os.rename(tmp_path, self._persist_path)
+
+  def _is_uncached(self, path):
+    return path.startswith(self._uncached_prefixes)
+
+  def _load(self):
+    if not os.path.exists(self._persist_path):
+      return {}
+    try:
+      with open(self._persist_path, 'r') as fp:
+        data = json.load(fp)
+      if data.get('version') != self._VERSION:
+        return {}
+      return {path: (size, mtime, inode, digest)
+              for path, (size, mtime, inode, digest) in data['entries'].items()
+              if not self._is_uncached(path)}
+    except (ValueError, KeyError, TypeError) as e:
+      logger.warn('Ignoring corrupt file digest cache at {}: {}'.format(self._persist_path, e))
+      return {}
@@ -0,0 +1,264 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import fnmatch
+import json
+import logging
+import os
+import threading
+import time
+from glob import glob1
+
+from pants.subsystem.subsystem import Subsystem
+from pants.util.dirutil import safe_mkdir_for
+from pants.util.strutil import ensure_text
+
+
+logger = logging.getLogger(__name__)
+
+
+class FilesystemSnapshot(object):
+  """An in-memory snapshot of the directory listings under a root directory.
+
+  Each directory is listed at most once per run, the first time anything asks about it, and every
+  subsequent `glob1`, `isdir`, `isfile`, `exists` and `walk` call under the root is answered from
+  the recorded listing instead of hitting the filesystem.  Paths outside the root or under one of
+  the excluded directories (eg: the pants workdir, whose contents change during a run) are always
+  answered by the filesystem directly.
+
+  The snapshot can optionally be persisted.  Each persisted listing is stored with the mtime its
+  directory had when listed, and on the next run a directory is only re-listed if its mtime has
+  changed; since adding, removing or renaming an entry updates the mtime of its directory, this
+  needs one stat per directory rather than a full listing.  As with git's index, a listing taken in
+  the same second its directory was modified is not persisted, since a later modification in that
+  second would not change the mtime.
+
+  Note that the snapshot does not notice changes made under the root after a directory is listed
+  in the current run.
+  """
+
+  # Bump this if the on-disk format of persisted snapshots changes.
+  _VERSION = 1
+
+  class _Listing(object):
+    def __init__(self, mtime, dirnames, filenames, linknames):
+      self.mtime = mtime
+      self.dirnames = dirnames
+      self.filenames = filenames
+      # The subset of dirnames that are symlinks, which `walk` does not descend into.
+      self.linknames = linknames
+
+  def __init__(self, root_dir, excludes=None, persist_path=None):
+    """
+    :param string root_dir: The directory to snapshot.
+    :param excludes: Paths to leave out of the snapshot, either absolute or relative to root_dir.
+    :param string persist_path: If specified, a file to load a previous snapshot from and `save`
+                                this snapshot to.
+    """
+    self._root_dir = os.path.realpath(ensure_text(root_dir))
+    self._excludes = set()
+    for exclude in excludes or ():
+      if exclude:
+        self._excludes.add(os.path.normpath(os.path.join(self._root_dir, exclude)))
+    self._persist_path = persist_path
+
+    self._lock = threading.Lock()
+    self._listings = {}  # {relpath: _Listing}, or None if relpath is not a directory.
+    self._racy = set()  # The relpaths of listings that must not be persisted.
+    self._persisted = self._load() if persist_path else {}
+
+    # The number of directories listed, and the number whose persisted listing was reused.
+    self.listed = 0
+    self.reused = 0
+
+  @property
+  def root_dir(self):
+    return self._root_dir
+
+  def glob1(self, path, pattern):
+    """Like `glob.glob1`: returns the names of the entries in directory `path` matching pattern."""
+    listing = self._listing(path)
+    if listing is None:
+      return glob1(path, pattern)
+    names = listing.dirnames + listing.filenames
+    if not pattern.startswith('.'):
+      names = [name for name in names if not name.startswith('.')]
+    return fnmatch.filter(names, pattern)
+
+  def isdir(self, path):
+    parent_listing, name = self._parent_listing(path)
+    if parent_listing is None:
+      return os.path.isdir(path)
+    return name in parent_listing.dirnames
+
+  def isfile(self, path):
+    parent_listing, name = self._parent_listing(path)
+    if parent_listing is None:
+      return os.path.isfile(path)
+    return name in parent_listing.filenames
+
+  def exists(self, path):
+    parent_listing, name = self._parent_listing(path)
+    if parent_listing is None:
+      return os.path.exists(path)
+    return name in parent_listing.dirnames or name in parent_listing.filenames
+
+  def walk(self, path, topdown=True):
+    """Like `os.walk`.
+
+    As with `os.walk`, when walking top down the caller may prune the walk by removing entries
+    from the yielded dirnames list.
+    """
+    path = ensure_text(path)
+    listing = self._listing(path)
+    if listing is None:
+      for entry in os.walk(path, topdown=topdown):
+        yield entry
+      return
+
+    dirnames, filenames = list(listing.dirnames), list(listing.filenames)
+    if topdown:
+      yield path, dirnames, filenames
+    for dirname in dirnames:
+      if dirname not in listing.linknames:
+        for entry in self.walk(os.path.join(path, dirname), topdown=topdown):
+          yield entry
+    if not topdown:
+      yield path, dirnames, filenames
+
+  def save(self):
+    """Persists the directory listings taken so far, merged with any still-valid older ones."""
+    if not self._persist_path:
+      return
+    with self._lock:
+      listings = dict(self._persisted)
+      for relpath, listing in self._listings.items():
+        if listing is None or relpath in self._racy:
+          listings.pop(relpath, None)
+        else:
+          listings[relpath] = [listing.mtime, listing.dirnames, listing.filenames,
+                               sorted(listing.linknames)]
+      data = {'version': self._VERSION, 'listings': listings}
+    safe_mkdir_for(self._persist_path)
+    tmp_path = '{}.tmp.{}'.format(self._persist_path, os.getpid())
+    with open(tmp_path, 'w') as fp:
+      json.dump(data, fp)
+    os.rename(tmp_path, self._persist_path)
+
+  def _relpath(self, path):
+    """Returns the path relative to the root, or None if it is not covered by the snapshot."""
+    path = os.path.normpath(os.path.join(self._root_dir, ensure_text(path)))
+    if path != self._root_dir and not path.startswith(self._root_dir + os.sep):
+      return None
+    for exclude in self._excludes:
+      if path == exclude or path.startswith(exclude + os.sep):
+        return None
+    relpath = os.path.relpath(path, self._root_dir)
+    return '' if relpath == '.' else relpath
+
+  def _parent_listing(self, path):
+    """Returns a tuple of the listing of the directory containing path and path's basename.
+
+    The listing is None if the snapshot can't answer questions about path.
+    """
+    relpath = self._relpath(path)
+    if not relpath:  # Not covered, or the root itself.
+      return None, None
+    return self._listing(os.path.join(self._root_dir, os.path.dirname(relpath))), \
+           os.path.basename(relpath)
+
+  def _listing(self, path):
+    """Returns the _Listing for the directory at path.
+
+    Returns None if path is not covered by the snapshot or is not a directory.
+    """
+    relpath = self._relpath(path)
+    if relpath is None:
+      return None
+    with self._lock:
+      if relpath not in self._listings:
+        self._listings[relpath] = self._list(relpath)
+      return self._listings[relpath]
+
+  def _list(self, relpath):
+    path = os.path.join(self._root_dir, relpath)
+    try:
+      mtime = os.stat(path).st_mtime
+      if not os.path.isdir(path):
+        return None
+
+      persisted = self._persisted.pop(relpath, None)
+      if persisted and persisted.mtime == mtime:
+        self.reused += 1
+        return persisted
+
+      names = sorted(os.listdir(path))
+    except OSError:
+      return None
+
+    self.listed += 1
+    if int(mtime) >= int(time.time()) - 1:
+      self._racy.add(relpath)
+    dirnames, filenames, linknames = [], [], set()
+    for name in names:
+      entry = os.path.join(path, name)
+      if os.path.isdir(entry):
+        dirnames.append(name)
+        if os.path.islink(entry):
+          linknames.add(name)
+      else:
+        filenames.append(name)
+    return self._Listing(mtime, dirnames, filenames, linknames)
+
+  def _load(self):
+    if not os.path.exists(self._persist_path):
+      return {}
+    try:
+      with open(self._persist_path, 'r') as fp:
+        data = json.load(fp)
+      if data.get('version') != self._VERSION:
+        return {}
+      return {relpath: self._Listing(mtime, dirnames, filenames, set(linknames))
+              for relpath, (mtime, dirnames, filenames, linknames) in data['listings'].items()}
+    except (ValueError, KeyError, TypeError) as e:
+      logger.warn('Ignoring corrupt filesystem snapshot at {}: {}'.format(self._persist_path, e))
+      return {}
+
+
+class FilesystemSnapshotting(Subsystem):
+  """Configures the FilesystemSnapshot used when scanning and locating BUILD files."""
+
+  @classmethod
+  def scope_qualifier(cls):
+    return 'fs-snapshot'
+
+  @classmethod
+  def register_options(cls, register):
+    super(FilesystemSnapshotting, cls).register_options(register)
+    register('--enabled', action='store_true', default=False, advanced=True,
+             help='Answer the filesystem queries made when scanning and locating BUILD files '
+                  'from a snapshot of the buildroot that lists each directory at most once per '
+                  'run.')
+    register('--persist', action='store_true', default=True, advanced=True,
+             help='Persist the snapshot so that the next run only re-lists the directories that '
+                  'have changed since.')
+    register('--persist-path', advanced=True, metavar='<path>',
+             default=os.path.join(register.bootstrap.pants_workdir, 'fs_snapshot.json'),
+             help='The file to persist the snapshot to.')
+
+  def create_snapshot(self, root_dir, excludes):
+    """Returns a new FilesystemSnapshot of root_dir, or None if snapshots are not enabled.
+
+    :param string root_dir: The directory to snapshot.
+    :param excludes: Paths to leave out of the snapshot, either absolute or relative to root_dir.
+    """
+    options = self.get_options()
+    if not options.enabled:
+      return None
+    return FilesystemSnapshot(root_dir,
+                              excludes=list(excludes) + [options.pants_workdir],
+                              persist_path=options.persist_path if options.persist else None)
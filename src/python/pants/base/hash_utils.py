@@ -7,6 +7,8 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import hashlib
 
+from pants.base.file_digest_cache import digest_file
+
 
 def hash_all(strs, digest=None):
   """Returns a hash of the concatenation of all the strings in strs.
@@ -22,9 +24,11 @@ def hash_all(strs, digest=None):
 def hash_file(path, digest=None):
   """Hashes the contents of the file at the given path and returns the hash digest in hex form.
 
-  If a hashlib message digest is not supplied a new sha1 message digest is used.
+  If a hashlib message digest is not supplied a new sha1 message digest is used, and the hash may
+  be served from the global FileDigestCache.
   """
-  digest = digest or hashlib.sha1()
+  if digest is None:
+    return digest_file(path)
   with open(path, 'rb') as fd:
     s = fd.read(8192)
     while s:
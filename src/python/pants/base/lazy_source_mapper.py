@@ -9,7 +9,7 @@ import os
 from collections import defaultdict
 
 from pants.base.build_environment import get_buildroot
-from pants.base.build_file import BuildFile
+from pants.base.source_owner_index import SourceOwnerIndex
 
 
 class LazySourceMapper(object):
@@ -26,9 +26,11 @@ class LazySourceMapper(object):
 
   A LazySourceMapper reuses computed mappings and only searches a given path once as
   populating the BuildGraph is expensive, so in general there should only be one instance of it.
+  The sources owned by the targets in a BUILD file are looked up in a SourceOwnerIndex, which only
+  populates the BuildGraph for BUILD files that changed since they were last indexed.
   """
 
-  def __init__(self, address_mapper, build_graph, stop_after_match=False):
+  def __init__(self, address_mapper, build_graph, stop_after_match=False, source_owner_index=None):
     """Initialize LazySourceMapper.
 
     :param AddressMapper address_mapper: An address mapper that can be used to populate the
@@ -36,8 +38,12 @@ class LazySourceMapper(object):
     :param BuildGraph build_graph: The build graph to map sources from.
     :param bool stop_after_match: If `True` a search will not traverse into parent directories once
       an owner is identified.
+    :param SourceOwnerIndex source_owner_index: The index to look up the sources of targets in.
+      Defaults to the global SourceOwnerIndex, or else a new, unpersisted one.
     """
     self._stop_after_match = stop_after_match
+    self._source_owner_index = (source_owner_index or SourceOwnerIndex.global_instance() or
+                                SourceOwnerIndex())
     self._build_graph = build_graph
     self._address_mapper = address_mapper
     self._source_to_address = defaultdict(set)
@@ -69,7 +75,7 @@ class LazySourceMapper(object):
       if path not in self._mapped_paths:
         candidate = self._address_mapper.from_cache(root_dir=root, relpath=path, must_exist=False)
         if candidate.file_exists():
-          self._map_sources_from_family(candidate.family())
+          self._map_sources_from_spec_path(candidate.spec_path)
         self._mapped_paths.add(path)
       elif not self._stop_after_match:
         # If not in stop-after-match mode, once a path is seen visited, all parents can be assumed.
@@ -82,25 +88,21 @@ class LazySourceMapper(object):
       walking = bool(path)
       path = os.path.dirname(path)
 
-  def _map_sources_from_family(self, build_files):
-    """Populate mapping of source to owning addresses with targets from given BUILD files.
+  def _map_sources_from_spec_path(self, spec_path):
+    """Populate mapping of source to owning addresses with targets from given BUILD file family.
 
-    :param iterable<BuildFile> build_files: a family of BUILD files from which to map sources.
+    :param string spec_path: the spec path of a family of BUILD files from which to map sources.
     """
-    for build_file in build_files:
-      address_map = self._address_mapper._address_map_from_spec_path(build_file.spec_path)
-      for address, addressable in address_map.values():
-        self._build_graph.inject_address_closure(address)
-        target = self._build_graph._target_addressable_to_target(address, addressable)
-        if target.has_resources:
-          for resource in target.resources:
-            for item in resource.sources_relative_to_buildroot():
-              self._source_to_address[item].add(target.address)
-
-        for target_source in target.sources_relative_to_buildroot():
-          self._source_to_address[target_source].add(target.address)
-        if not target.is_synthetic:
-          self._source_to_address[target.address.build_file.relpath].add(target.address)
+    owners = self._source_owner_index.owners_in_spec_path(self._address_mapper,
+                                                          self._build_graph,
+                                                          spec_path)
+    for source, addresses in owners.items():
+      self._source_to_address[source].update(addresses)
+    build_files = self._source_owner_index.build_files_by_address(self._address_mapper,
+                                                                  self._build_graph,
+                                                                  spec_path)
+    for address, build_file_relpath in build_files.items():
+      self._source_to_address[build_file_relpath].add(address)
 
   def target_addresses_for_source(self, source):
     """Attempt to find targets which own a source by searching up directory structure to buildroot.
@@ -78,6 +78,16 @@ class Payload(object):
       self._fields[key] = field
       self._fingerprint_memo = None
 
+  def mark_dirty(self):
+    """Invalidates the memoized fingerprints of this Payload and all of its fields.
+
+    Useful for long lived Payloads whose fields fingerprint content that changes, eg: source files.
+    """
+    for field in self._fields.values():
+      if field is not None:
+        field.mark_dirty()
+    self._fingerprint_memo_map = {}
+
   def fingerprint(self, field_keys=None):
     """A memoizing fingerprint that rolls together the fingerprints of underlying PayloadFields.
 
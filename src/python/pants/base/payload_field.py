@@ -13,6 +13,7 @@ from hashlib import sha1
 from twitter.common.collections import OrderedSet
 
 from pants.base.build_environment import get_buildroot
+from pants.base.file_digest_cache import digest_file
 from pants.base.validation import assert_list
 from pants.util.meta import AbstractClass
 
@@ -46,6 +47,10 @@ class PayloadField(AbstractClass):
       self._fingerprint_memo = self._compute_fingerprint()
     return self._fingerprint_memo
 
+  def mark_dirty(self):
+    """Invalidates the memoized fingerprint of this PayloadField, eg: after its sources changed."""
+    self._fingerprint_memo = None
+
   @abstractmethod
   def _compute_fingerprint(self):
     """This method will be called and the result memoized for ``PayloadField.fingerprint``."""
@@ -134,15 +139,40 @@ class SourcesField(PayloadField):
     """All sources joined with ``self.rel_path``."""
     return [os.path.join(self.rel_path, source) for source in self.source_paths]
 
-  def _compute_fingerprint(self):
+  @classmethod
+  def precompute_fingerprints(cls, fields, map_func=map):
+    """Computes and memoizes the fingerprints of the given fields, hashing their sources en masse.
+
+    Fields whose fingerprint is already memoized, or that compute their fingerprint some other way,
+    are left to compute it lazily as usual.
+
+    :param fields: An iterable of SourcesFields.
+    :param map_func: A `map` compatible function used to fan out the hashing of source files, eg:
+                     a function mapping over a thread pool.
+    """
+    pending = [field for field in fields
+               if field._fingerprint_memo is None and
+                  type(field)._compute_fingerprint.__func__ is cls._compute_fingerprint.__func__]
+    paths = sorted(set(os.path.join(get_buildroot(), source)
+                       for field in pending for source in field.relative_to_buildroot()))
+    digests = dict(zip(paths, map_func(digest_file, paths)))
+    for field in pending:
+      field._fingerprint_memo = field._fingerprint(digests.__getitem__)
+
+  def _fingerprint(self, digest_for_path):
+    # NB: Hashing the digest of each source, rather than its contents, lets digests be cached by
+    # file stat.  Changing what is hashed here changes every target's fingerprint, and so every
+    # artifact cache key.
     hasher = sha1()
     hasher.update(self._rel_path)
     for source in sorted(self.relative_to_buildroot()):
       hasher.update(source)
-      with open(os.path.join(get_buildroot(), source), 'rb') as f:
-        hasher.update(f.read())
+      hasher.update(digest_for_path(os.path.join(get_buildroot(), source)))
     return hasher.hexdigest()
 
+  def _compute_fingerprint(self):
+    return self._fingerprint(digest_file)
+
 
 class DeferredSourcesField(SourcesField):
   """ A SourcesField that isn't populated immediately when the graph is constructed.
@@ -225,8 +255,7 @@ def hash_bundle(bundle):
     buildroot_relative_path = os.path.relpath(abs_path, get_buildroot())
     hasher.update(buildroot_relative_path)
     hasher.update(bundle.filemap[abs_path])
-    with open(abs_path, 'rb') as f:
-      hasher.update(f.read())
+    hasher.update(digest_file(abs_path))
   return hasher.hexdigest()
 
 
@@ -0,0 +1,249 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+
+from pants.base.address import SyntheticAddress
+from pants.util.dirutil import safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+class SourceOwnerIndex(object):
+  """A persistent index from source files to the addresses of the targets that own them.
+
+  For each spec path the index records the sources and resources of the targets its BUILD files
+  declare, with globs expanded, along with a fingerprint of the contents of those BUILD files and
+  of the listings of the directories its globs were expanded in.  A spec path is only re-parsed
+  when one of those has changed since it was indexed, so looking up the owners of a source in a
+  mostly unchanged repo need not parse and inject the targets that might own it.
+
+  Note that the sources recorded for a spec path are assumed to depend only on the contents of its
+  own BUILD files and the listings of the directories its globs match in.
+  """
+
+  # Bump this if the on-disk format of the index changes.
+  _VERSION = 1
+
+  _WILDCARD = re.compile(r'[*?[]')
+
+  _global_instance = None
+
+  @classmethod
+  def set_global_instance(cls, index):
+    """Sets the index returned by `global_instance`, or disables sharing one if index is None."""
+    cls._global_instance = index
+
+  @classmethod
+  def global_instance(cls):
+    return cls._global_instance
+
+  def __init__(self, persist_path=None, ignored_dirs=()):
+    """
+    :param string persist_path: If specified, a file to load a previously built index from and
+                                `save` the index to.
+    :param list ignored_dirs: Absolute paths of directories, such as the workdir, whose contents
+                              are not fingerprinted when a recursive glob reads the directories
+                              containing them.
+    """
+    self._persist_path = persist_path
+    self._ignored_dirs = frozenset(os.path.realpath(d) for d in ignored_dirs)
+    self._ignored_dir_names = frozenset(os.path.basename(d) for d in self._ignored_dirs)
+    # {spec_path: (fingerprint, glob dirs, listings fingerprint,
+    #              {spec: (build file, sources, synthetic resource sources, resource specs)})}
+    self._entries = self._load() if persist_path else {}
+    self._dirty = False
+    self._validated = set()  # The spec paths whose entries are known to be current this run.
+
+    # The spec paths parsed, and the spec paths whose indexed sources were reused.
+    self.parsed_spec_paths = 0
+    self.reused_spec_paths = 0
+
+  def sources_by_address(self, address_mapper, build_graph, spec_path):
+    """Returns the sources of each target declared in the BUILD files of a spec path.
+
+    The targets of the spec path are injected into the build graph if it changed since it was last
+    indexed.
+
+    :param address_mapper: The BuildFileAddressMapper to resolve addresses with.
+    :param build_graph: The BuildGraph to inject the targets of a changed spec path into.
+    :param string spec_path: The spec path to return sources for.
+    :returns: A dict from Address to a list of source paths relative to the buildroot.
+    :raises: AddressLookupError if the spec path changed and its BUILD files can't be parsed.
+    """
+    entry = self._entry(address_mapper, build_graph, spec_path)
+    return {SyntheticAddress.parse(spec): sources
+            for spec, (_, sources, _, _) in entry[3].items()}
+
+  def build_files_by_address(self, address_mapper, build_graph, spec_path):
+    """Returns the BUILD file that declares each target in a spec path.
+
+    :param address_mapper: The BuildFileAddressMapper to resolve addresses with.
+    :param build_graph: The BuildGraph to inject the targets of a changed spec path into.
+    :param string spec_path: The spec path to return BUILD files for.
+    :returns: A dict from Address to the path of a BUILD file relative to the buildroot.
+    :raises: AddressLookupError if the spec path changed and its BUILD files can't be parsed.
+    """
+    entry = self._entry(address_mapper, build_graph, spec_path)
+    return {SyntheticAddress.parse(spec): build_file_relpath
+            for spec, (build_file_relpath, _, _, _) in entry[3].items()}
+
+  def owners_in_spec_path(self, address_mapper, build_graph, spec_path):
+    """Returns the addresses of the targets declared in a spec path that own each source.
+
+    A target owns its own sources and the sources of its resources, but not the BUILD file it is
+    declared in; see `build_files_by_address` for those.
+
+    :param address_mapper: The BuildFileAddressMapper to resolve addresses with.
+    :param build_graph: The BuildGraph to inject the targets of changed spec paths into.
+    :param string spec_path: The spec path to map the sources of.
+    :returns: A dict from source paths relative to the buildroot to sets of Addresses.
+    :raises: AddressLookupError if a changed spec path's BUILD files can't be parsed.
+    """
+    owners = defaultdict(set)
+    entry = self._entry(address_mapper, build_graph, spec_path)
+    for spec, (_, sources, resource_sources, resource_specs) in entry[3].items():
+      address = SyntheticAddress.parse(spec)
+      for source in sources + resource_sources:
+        owners[source].add(address)
+      for resource_spec in resource_specs:
+        resource_spec_path = SyntheticAddress.parse(resource_spec).spec_path
+        resource_entry = self._entry(address_mapper, build_graph, resource_spec_path)
+        _, sources, _, _ = resource_entry[3].get(resource_spec, (None, [], [], []))
+        for source in sources:
+          owners[source].add(address)
+    return owners
+
+  def save(self):
+    """Persists the index, if any spec paths were parsed since it was loaded."""
+    if not self._persist_path or not self._dirty:
+      return
+    safe_mkdir_for(self._persist_path)
+    tmp_path = '{}.tmp.{}'.format(self._persist_path, os.getpid())
+    with open(tmp_path, 'w') as fp:
+      json.dump({'version': self._VERSION, 'entries': self._entries}, fp)
+    os.rename(tmp_path, self._persist_path)
+    self._dirty = False
+
+  def _entry(self, address_mapper, build_graph, spec_path):
+    if spec_path in self._validated:
+      return self._entries[spec_path]
+
+    build_file = address_mapper.from_cache(address_mapper.root_dir, spec_path)
+    fingerprint = build_file.family_fingerprint()
+    entry = self._entries.get(spec_path)
+    if (entry and entry[0] == fingerprint and
+        entry[2] == self._fingerprint_listings(address_mapper.root_dir, entry[1])):
+      self.reused_spec_paths += 1
+    else:
+      sources_by_spec, glob_dirs = self._parse(address_mapper, build_graph, spec_path)
+      entry = (fingerprint,
+               glob_dirs,
+               self._fingerprint_listings(address_mapper.root_dir, glob_dirs),
+               sources_by_spec)
+      self._entries[spec_path] = entry
+      self._dirty = True
+      self.parsed_spec_paths += 1
+    self._validated.add(spec_path)
+    return entry
+
+  @classmethod
+  def _parse(cls, address_mapper, build_graph, spec_path):
+    addresses = address_mapper.addresses_in_spec_path(spec_path)
+    for address in addresses:
+      build_graph.inject_address_closure(address)
+
+    sources_by_spec = {}
+    glob_dirs = set()
+    for address in addresses:
+      target = build_graph.get_target(address)
+      glob_dirs.update(cls._glob_dirs(target.globs_relative_to_buildroot()))
+      resource_sources = []
+      resource_specs = []
+      if target.has_resources:
+        for resource in target.resources:
+          # Resources synthesized from the target's own BUILD file aren't addressable in it.
+          if resource.is_synthetic:
+            resource_sources.extend(resource.sources_relative_to_buildroot())
+            glob_dirs.update(cls._glob_dirs(resource.globs_relative_to_buildroot()))
+          else:
+            resource_specs.append(resource.address.spec)
+      sources_by_spec[address.spec] = (address.build_file.relpath,
+                                       list(target.sources_relative_to_buildroot()),
+                                       resource_sources,
+                                       resource_specs)
+    return sources_by_spec, sorted(glob_dirs)
+
+  @classmethod
+  def _glob_dirs(cls, filespec):
+    """Yields a (dir, recursive) tuple for each directory whose listing the filespec's globs read.
+
+    Only the included globs are considered, since the matches of excluded globs only matter if
+    they are also matched by an included glob.
+    """
+    for glob in (filespec or {}).get('globs', ()):
+      components = glob.split(os.sep)
+      for index, component in enumerate(components):
+        if cls._WILDCARD.search(component):
+          yield os.sep.join(components[:index]), index < len(components) - 1
+          break
+
+  def _fingerprint_listings(self, root_dir, glob_dirs):
+    hasher = hashlib.sha1()
+    for relpath, recursive in glob_dirs:
+      path = os.path.join(root_dir, relpath)
+      if recursive:
+        listings = sorted(self._walk_listings(root_dir, path))
+      else:
+        try:
+          listings = [(relpath, os.listdir(path))]
+        except OSError:
+          listings = []
+      for dirpath, names in listings:
+        hasher.update(dirpath.encode('utf-8'))
+        hasher.update(b'\0')
+        for name in sorted(names):
+          hasher.update(name.encode('utf-8'))
+          hasher.update(b'\0')
+      hasher.update(b'\0')
+    return hasher.hexdigest()
+
+  def _walk_listings(self, root_dir, path):
+    for dirpath, dirnames, filenames in os.walk(path, followlinks=True):
+      # Don't descend into ignored dirs, whose contents churn from run to run.
+      dirnames[:] = [d for d in dirnames if not self._is_ignored(dirpath, d)]
+      yield os.path.relpath(dirpath, root_dir), dirnames + filenames
+
+  def _is_ignored(self, dirpath, dirname):
+    return (dirname in self._ignored_dir_names and
+            os.path.realpath(os.path.join(dirpath, dirname)) in self._ignored_dirs)
+
+  def _load(self):
+    if not os.path.exists(self._persist_path):
+      return {}
+    try:
+      with open(self._persist_path, 'r') as fp:
+        data = json.load(fp)
+      if data.get('version') != self._VERSION:
+        return {}
+      return {spec_path: (fingerprint,
+                          [(relpath, recursive) for relpath, recursive in glob_dirs],
+                          listings_fingerprint,
+                          {spec: (build_file_relpath, sources, resource_sources, resource_specs)
+                           for spec, (build_file_relpath, sources, resource_sources, resource_specs)
+                           in sources_by_spec.items()})
+              for spec_path, (fingerprint, glob_dirs, listings_fingerprint, sources_by_spec)
+              in data['entries'].items()}
+    except (ValueError, KeyError, TypeError) as e:
+      logger.warn('Ignoring corrupt source owner index at {}: {}'.format(self._persist_path, e))
+      return {}
@@ -7,7 +7,6 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import functools
 import os
-from hashlib import sha1
 
 from six import string_types
 
@@ -205,7 +204,6 @@ class Target(AbstractTarget):
     self.labels = set()
 
     self._cached_fingerprint_map = {}
-    self._cached_transitive_fingerprint_map = {}
 
   @property
   def tags(self):
@@ -240,7 +238,7 @@ class Target(AbstractTarget):
 
   def mark_invalidation_hash_dirty(self):
     self._cached_fingerprint_map = {}
-    self._cached_transitive_fingerprint_map = {}
+    self._build_graph.invalidate_transitive_fingerprints([self.address])
     self.mark_extra_invalidation_hash_dirty()
 
   def transitive_invalidation_hash(self, fingerprint_strategy=None):
@@ -252,28 +250,10 @@ class Target(AbstractTarget):
       did not contribute to the fingerprint, according to the provided FingerprintStrategy.
     :rtype: string
     """
-    fingerprint_strategy = fingerprint_strategy or DefaultFingerprintStrategy()
-    if fingerprint_strategy not in self._cached_transitive_fingerprint_map:
-      hasher = sha1()
-      def dep_hash_iter():
-        for dep in self.dependencies:
-          dep_hash = dep.transitive_invalidation_hash(fingerprint_strategy)
-          if dep_hash is not None:
-            yield dep_hash
-      dep_hashes = sorted(list(dep_hash_iter()))
-      for dep_hash in dep_hashes:
-        hasher.update(dep_hash)
-      target_hash = self.invalidation_hash(fingerprint_strategy)
-      if target_hash is None and not dep_hashes:
-        return None
-      dependencies_hash = hasher.hexdigest()[:12]
-      combined_hash = '{target_hash}.{deps_hash}'.format(target_hash=target_hash,
-                                                         deps_hash=dependencies_hash)
-      self._cached_transitive_fingerprint_map[fingerprint_strategy] = combined_hash
-    return self._cached_transitive_fingerprint_map[fingerprint_strategy]
+    return self._build_graph.transitive_invalidation_hash(self.address, fingerprint_strategy)
 
   def mark_transitive_invalidation_hash_dirty(self):
-    self._cached_transitive_fingerprint_map = {}
+    self._build_graph.invalidate_transitive_fingerprints([self.address])
     self.mark_extra_transitive_invalidation_hash_dirty()
 
   def mark_extra_transitive_invalidation_hash_dirty(self):
@@ -281,9 +261,6 @@ class Target(AbstractTarget):
 
   def inject_dependency(self, dependency_address):
     self._build_graph.inject_dependency(dependent=self.address, dependency=dependency_address)
-    def invalidate_dependee(dependee):
-      dependee.mark_transitive_invalidation_hash_dirty()
-    self._build_graph.walk_transitive_dependee_graph([self.address], work=invalidate_dependee)
 
   def has_sources(self, extension=''):
     """
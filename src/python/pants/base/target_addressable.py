@@ -11,7 +11,20 @@ from pants.base.addressable import Addressable
 from pants.base.exceptions import TargetDefinitionException
 
 
+def _restore_target_addressable(target_type, state):
+  addressable_type = TargetAddressable._addressable_types.get(target_type)
+  if addressable_type is None:
+    addressable_type = target_type.get_addressable_type()
+    TargetAddressable._addressable_types[target_type] = addressable_type
+  addressable = addressable_type.__new__(addressable_type)
+  addressable.__dict__.update(state)
+  return addressable
+
+
 class TargetAddressable(Addressable):
+  # The addressable types of unpickled addressables, by target type.
+  _addressable_types = {}
+
   @classmethod
   def get_target_type(cls):
     raise NotImplemented
@@ -47,6 +60,11 @@ class TargetAddressable(Addressable):
                .format(target_type=self.target_type, dep_spec=dep_spec))
         raise TargetDefinitionException(target=self, msg=msg)
 
+  def __reduce__(self):
+    # Addressable types are usually created on the fly by `Target.get_addressable_type`, so can't be
+    # pickled by reference.
+    return _restore_target_addressable, (self.target_type, self.__dict__)
+
   def with_description(self, description):
     self.kwargs['description'] = description
 
@@ -39,6 +39,7 @@ class WorkerPool(object):
 
   def __init__(self, parent_workunit, run_tracker, num_workers):
     self._run_tracker = run_tracker
+    self._num_workers = num_workers
     # All workers accrue work to the same root.
     self._pool = ThreadPool(processes=num_workers,
                             initializer=self._run_tracker.register_thread,
@@ -50,6 +51,10 @@ class WorkerPool(object):
 
     self._shutdown_hooks = []
 
+  @property
+  def num_workers(self):
+    return self._num_workers
+
   def add_shutdown_hook(self, hook):
     self._shutdown_hooks.append(hook)
 
@@ -182,6 +187,7 @@ class SubprocPool(object):
   To avoid this, the pools themselves are kept in this singleton and new RunTrackers re-use them.
   """
   _pool = None
+  _num_workers = None
   _lock = threading.Lock()
 
   @staticmethod
@@ -190,10 +196,19 @@ class SubprocPool(object):
     signal.signal(signal.SIGINT, lambda *args: sys.exit())
 
   @classmethod
-  def foreground(cls):
+  def foreground(cls, num_workers=None):
+    """Returns the shared pool, creating it if needed.
+
+    :param int num_workers: The number of worker processes to create the pool with, defaulting to
+                            the number of cpus.  Remembered for pools re-created after a shutdown,
+                            but has no effect on a pool that already exists.
+    """
     with cls._lock:
+      if num_workers is not None:
+        cls._num_workers = num_workers
       if cls._pool is None:
-        cls._pool = multiprocessing.Pool(initializer=SubprocPool.worker_init)
+        cls._pool = multiprocessing.Pool(processes=cls._num_workers,
+                                         initializer=SubprocPool.worker_init)
       return cls._pool
 
   @classmethod
@@ -6,7 +6,9 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import logging
+import os
 import sys
+import time
 
 import pkg_resources
 
@@ -15,13 +17,21 @@ from pants.backend.jvm.tasks.nailgun_task import NailgunTask  # XXX(pl)
 from pants.base.build_environment import get_buildroot, get_scm
 from pants.base.build_file import FilesystemBuildFile
 from pants.base.build_file_address_mapper import BuildFileAddressMapper
+from pants.base.build_file_code_cache import BuildFileCodeCache
 from pants.base.build_file_parser import BuildFileParser
 from pants.base.build_graph import BuildGraph
+from pants.base.build_graph_watcher import BuildGraphWatcher
+from pants.base.cache_manager import InvalidationCacheManager
 from pants.base.cmd_line_spec_parser import CmdLineSpecParser
+from pants.base.dependee_index import DependeeIndex
 from pants.base.extension_loader import load_plugins_and_backends
+from pants.base.file_digest_cache import FileDigestCache
+from pants.base.filesystem_snapshot import FilesystemSnapshotting
 from pants.base.scm_build_file import ScmBuildFile
+from pants.base.source_owner_index import SourceOwnerIndex
+from pants.base.worker_pool import SubprocPool
 from pants.base.workunit import WorkUnit
-from pants.engine.round_engine import RoundEngine
+from pants.engine.round_engine import ParallelRoundEngine, RoundEngine
 from pants.goal.context import Context
 from pants.goal.goal import Goal
 from pants.goal.run_tracker import RunTracker
@@ -75,7 +85,7 @@ class GoalRunner(object):
   @property
   def subsystems(self):
     # Subsystems used outside of any task.
-    return SourceRootBootstrapper, Reporting, RunTracker
+    return SourceRootBootstrapper, Reporting, RunTracker, FilesystemSnapshotting
 
   def setup(self):
     options_bootstrapper = OptionsBootstrapper()
@@ -118,6 +128,12 @@ class GoalRunner(object):
     # Make the options values available to all subsystems.
     Subsystem._options = self.options
 
+    # The subprocess pool is forked when the RunTracker is created, so hand its workers the build
+    # configuration first.
+    parallel_build_file_parsing = self.options.for_global_scope().parallel_build_file_parsing
+    if parallel_build_file_parsing:
+      BuildFileParser.set_worker_build_configuration(build_configuration)
+
     # Now that we have options we can instantiate subsystems.
     self.run_tracker = RunTracker.global_instance()
     self.reporting = Reporting.global_instance()
@@ -129,9 +145,42 @@ class GoalRunner(object):
     else:
       self.run_tracker.log(Report.INFO, '(To run a reporting server: ./pants server)')
 
+    self.source_digest_cache = None
+    if self.options.for_global_scope().source_digest_cache:
+      pants_workdir = self.options.for_global_scope().pants_workdir
+      self.source_digest_cache = FileDigestCache(
+        os.path.join(pants_workdir, 'source_digests.json'), uncached_dirs=[pants_workdir])
+    FileDigestCache.set_global_instance(self.source_digest_cache)
+
+    self.dependee_index = None
+    if self.options.for_global_scope().dependee_index:
+      self.dependee_index = DependeeIndex(
+        os.path.join(self.options.for_global_scope().pants_workdir, 'dependee_index.json'))
+    DependeeIndex.set_global_instance(self.dependee_index)
+
+    self.source_owner_index = None
+    if self.options.for_global_scope().source_owner_index:
+      pants_workdir = self.options.for_global_scope().pants_workdir
+      self.source_owner_index = SourceOwnerIndex(
+        os.path.join(pants_workdir, 'source_owner_index.json'), ignored_dirs=[pants_workdir])
+    SourceOwnerIndex.set_global_instance(self.source_owner_index)
+
+    self.fs_snapshot = None
+    self.build_file_code_cache = None
+    if self.options.for_global_scope().build_file_code_cache:
+      cache_dir = os.path.join(self.options.for_global_scope().pants_workdir,
+                               'build_file_code_cache')
+      self.build_file_code_cache = BuildFileCodeCache(cache_dir)
+    parallel_map_func = None
+    if parallel_build_file_parsing:
+      def parallel_map_func(f, items):
+        # Specify a timeout so that we can still be interrupted with ctrl-c while waiting.
+        return SubprocPool.foreground().map_async(f, items).get(timeout=1000000000)
     self.build_file_parser = BuildFileParser(build_configuration=build_configuration,
                                              root_dir=self.root_dir,
-                                             run_tracker=self.run_tracker)
+                                             run_tracker=self.run_tracker,
+                                             code_cache=self.build_file_code_cache,
+                                             parallel_map_func=parallel_map_func)
 
     rev = self.options.for_global_scope().build_file_rev
     if rev:
@@ -140,6 +189,11 @@ class GoalRunner(object):
       build_file_type = ScmBuildFile
     else:
       build_file_type = FilesystemBuildFile
+      # A snapshot doesn't notice edits made after a directory is listed, which a loop must.
+      if not self.global_options.loop:
+        self.fs_snapshot = FilesystemSnapshotting.global_instance().create_snapshot(
+          self.root_dir, excludes=self.spec_excludes)
+        FilesystemBuildFile.set_snapshot(self.fs_snapshot)
     self.address_mapper = BuildFileAddressMapper(self.build_file_parser, build_file_type)
     self.build_graph = BuildGraph(run_tracker=self.run_tracker,
                                   address_mapper=self.address_mapper)
@@ -179,8 +233,6 @@ class GoalRunner(object):
 
   def _expand_goals_and_specs(self):
     goals = self.options.goals
-    specs = self.options.target_specs
-    fail_fast = self.options.for_global_scope().fail_fast
 
     for goal in goals:
       if self.address_mapper.from_cache(get_buildroot(), goal, must_exist=False).file_exists():
@@ -191,7 +243,15 @@ class GoalRunner(object):
       sys.exit(0)
 
     self.requested_goals = goals
+    self._inject_targets()
+    self.goals = [Goal.by_name(goal) for goal in goals]
+
+  def _inject_targets(self):
+    """Injects the closures of the command line target specs and collects the targets they name."""
+    specs = self.options.target_specs
+    fail_fast = self.options.for_global_scope().fail_fast
 
+    self.targets = []
     with self.run_tracker.new_workunit(name='setup', labels=[WorkUnit.SETUP]):
       spec_parser = CmdLineSpecParser(self.root_dir, self.address_mapper,
                                       spec_excludes=self.spec_excludes,
@@ -201,7 +261,6 @@ class GoalRunner(object):
           for address in spec_parser.parse_addresses(spec, fail_fast):
             self.build_graph.inject_address_closure(address)
             self.targets.append(self.build_graph.get_target(address))
-    self.goals = [Goal.by_name(goal) for goal in goals]
 
   def run(self):
     def fail():
@@ -210,6 +269,8 @@ class GoalRunner(object):
     kill_nailguns = self.options.for_global_scope().kill_nailguns
     try:
       result = self._do_run()
+      if self.global_options.loop:
+        self._run_loop()
       if result:
         fail()
     except KeyboardInterrupt:
@@ -222,6 +283,12 @@ class GoalRunner(object):
       fail()
       raise
     finally:
+      self._flush_build_file_code_cache()
+      self._save_fs_snapshot()
+      self._save_source_digest_cache()
+      self._save_dependee_index()
+      self._save_source_owner_index()
+      InvalidationCacheManager.shutdown_hashing_pools()
       self.run_tracker.end()
       # Must kill nailguns only after run_tracker.end() is called, otherwise there may still
       # be pending background work that needs a nailgun.
@@ -232,6 +299,85 @@ class GoalRunner(object):
         NailgunTask.killall()
     return result
 
+  def _run_loop(self):
+    """Runs the goals again each time BUILD or source files are edited, until interrupted.
+
+    The build graph, parsed BUILD files and memoized fingerprints all live on between runs, and
+    only those affected by edits are discarded; see `BuildGraphWatcher`.
+    """
+    watcher = BuildGraphWatcher(self.build_graph, self.root_dir)
+    poll_interval = self.global_options.loop_poll_interval
+    while True:
+      watcher.record()
+      print('Waiting for edits, ctrl-c to stop.', file=sys.stderr)
+      watcher.wait(poll_interval)
+
+      start = time.time()
+      try:
+        self._inject_targets()
+        result = self._do_run()
+      except Exception as e:
+        # Keep looping, so that the edits fixing the error get a run of their own.
+        logger.debug('Error running goals.', exc_info=True)
+        print('Failed: {}'.format(e), file=sys.stderr)
+        result = 1
+      print('Ran goals in {:.3f}s with result {}.'.format(time.time() - start, result),
+            file=sys.stderr)
+
+  def _flush_build_file_code_cache(self):
+    if self.build_file_code_cache:
+      try:
+        self.run_tracker.run_info.add_infos(
+          ('build_file_code_cache_hits', self.build_file_code_cache.hits),
+          ('build_file_code_cache_misses', self.build_file_code_cache.misses),
+          ('build_file_address_map_cache_hits', self.build_file_code_cache.address_map_hits),
+          ('build_file_address_map_cache_misses', self.build_file_code_cache.address_map_misses))
+        self.build_file_code_cache.flush()
+      except (IOError, OSError) as e:
+        # The workdir may have been removed by a clean-all, which just means no cache next run.
+        logger.debug('Failed to persist the BUILD file code cache: {}'.format(e))
+
+  def _save_fs_snapshot(self):
+    if self.fs_snapshot:
+      try:
+        self.run_tracker.run_info.add_infos(('fs_snapshot_dirs_listed', self.fs_snapshot.listed),
+                                            ('fs_snapshot_dirs_reused', self.fs_snapshot.reused))
+        self.fs_snapshot.save()
+      except (IOError, OSError) as e:
+        logger.debug('Failed to persist the filesystem snapshot: {}'.format(e))
+
+  def _save_source_digest_cache(self):
+    if self.source_digest_cache:
+      try:
+        self.run_tracker.run_info.add_infos(
+          ('source_digest_hashed_files', self.source_digest_cache.hashed_files),
+          ('source_digest_hashed_bytes', self.source_digest_cache.hashed_bytes),
+          ('source_digest_skipped_files', self.source_digest_cache.skipped_files),
+          ('source_digest_skipped_bytes', self.source_digest_cache.skipped_bytes))
+        self.source_digest_cache.save()
+      except (IOError, OSError) as e:
+        logger.debug('Failed to persist the source digest cache: {}'.format(e))
+
+  def _save_dependee_index(self):
+    if self.dependee_index:
+      try:
+        self.run_tracker.run_info.add_infos(
+          ('dependee_index_parsed_spec_paths', self.dependee_index.parsed_spec_paths),
+          ('dependee_index_reused_spec_paths', self.dependee_index.reused_spec_paths))
+        self.dependee_index.save()
+      except (IOError, OSError) as e:
+        logger.debug('Failed to persist the dependee index: {}'.format(e))
+
+  def _save_source_owner_index(self):
+    if self.source_owner_index:
+      try:
+        self.run_tracker.run_info.add_infos(
+          ('source_owner_index_parsed_spec_paths', self.source_owner_index.parsed_spec_paths),
+          ('source_owner_index_reused_spec_paths', self.source_owner_index.reused_spec_paths))
+        self.source_owner_index.save()
+      except (IOError, OSError) as e:
+        logger.debug('Failed to persist the source owner index: {}'.format(e))
+
   def _do_run(self):
     # Update the reporting settings, now that we have flags etc.
     def is_quiet_task():
@@ -265,7 +411,10 @@ class GoalRunner(object):
       context.log.error('Unknown goal(s): {}\n'.format(' '.join(goal.name for goal in unknown)))
       return 1
 
-    engine = RoundEngine()
+    if self.global_options.parallel_tasks:
+      engine = ParallelRoundEngine(num_workers=self.global_options.parallel_task_workers)
+    else:
+      engine = RoundEngine()
     return engine.execute(context, self.goals)
 
   def _setup_logging(self, global_options):
@@ -6,12 +6,17 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import errno
+import multiprocessing
 import os
 import shutil
+import struct
 import tarfile
+import uuid
+import zlib
+from multiprocessing.pool import ThreadPool
 
-from pants.util.contextutil import open_tar
-from pants.util.dirutil import safe_mkdir, safe_mkdir_for, safe_walk
+from pants.util.contextutil import open_tar, temporary_dir
+from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for, safe_walk
 
 
 class ArtifactError(Exception):
@@ -121,3 +126,251 @@ class TarballArtifact(Artifact):
         self._relpaths.update(paths)
     except tarfile.ReadError as e:
       raise ArtifactError(str(e))
+
+
+class FramedArtifact(Artifact):
+  """An artifact stored in a container of individually compressed, length-prefixed entries.
+
+  The container is a magic number followed by one frame per directory and file, each made of a
+  fixed size header (kind, mode, data length and path length), the utf-8 path and then the file's
+  data, zlib compressed unless the compression level is 0.  Directories precede their contents.
+
+  Unlike a gzipped tarball, whose entries can only be decompressed one after the other, the headers
+  let a reader index the container by seeking from frame to frame, and then decompress and write
+  its files in parallel.  And since each frame is self-describing, a container can also be
+  extracted as it streams in, eg: while being downloaded from a remote cache.
+  """
+
+  MAGIC = b'PANTSFA1'
+
+  _DIR = b'd'
+  _STORED = b'f'
+  _DEFLATED = b'z'
+
+  _HEADER = struct.Struct(str('>cIQH'))
+
+  _BUFFER_SIZE_BYTES = 1024 * 1024
+
+  # Extracting in parallel only pays off once there is enough data to decompress and write.
+  _PARALLEL_THRESHOLD_BYTES = 1024 * 1024
+
+  @classmethod
+  def is_framed(cls, path):
+    """Returns True if the file at path is a framed artifact container."""
+    with open(path, 'rb') as fp:
+      return fp.read(len(cls.MAGIC)) == cls.MAGIC
+
+  def __init__(self, artifact_root, path, compression=9, max_workers=None):
+    """
+    :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str path: The path of the container file.
+    :param int compression: The zlib compression level used for file entries; 0 stores them as-is.
+    :param int max_workers: The maximum number of threads extracting entries at once; defaults to
+                            the number of cpus.
+    """
+    Artifact.__init__(self, artifact_root)
+    self._path = path
+    self._compression = compression
+    self._max_workers = max_workers or multiprocessing.cpu_count()
+
+  def collect(self, paths):
+    with open(self._path, 'wb') as out:
+      out.write(self.MAGIC)
+      for path in paths or ():
+        relpath = os.path.relpath(path, self._artifact_root)
+        if os.path.isdir(path):
+          self._write_dir(out, path)
+          # Follow symlinks, as TarballArtifact does.
+          for dirpath, dirnames, filenames in os.walk(path, followlinks=True):
+            dirnames.sort()
+            for name in dirnames:
+              self._write_dir(out, os.path.join(dirpath, name))
+            for name in sorted(filenames):
+              self._write_file(out, os.path.join(dirpath, name))
+        else:
+          self._write_file(out, path)
+        self._relpaths.add(relpath)
+
+  def extract(self):
+    """Extracts the container's entries, writing its files in parallel if worthwhile."""
+    dirs = []  # (relpath, mode)
+    files = []  # (relpath, mode, kind, offset, length)
+    total_length = 0
+    with open(self._path, 'rb') as fp:
+      self._check_magic(fp.read(len(self.MAGIC)))
+      for kind, mode, length, relpath in self._iter_headers(fp.read):
+        if kind == self._DIR:
+          safe_mkdir(os.path.join(self._artifact_root, relpath))
+          dirs.append((relpath, mode))
+        else:
+          files.append((relpath, mode, kind, fp.tell(), length))
+          total_length += length
+          fp.seek(length, os.SEEK_CUR)
+
+    workers = min(len(files), self._max_workers)
+    if workers > 1 and total_length >= self._PARALLEL_THRESHOLD_BYTES:
+      pool = ThreadPool(processes=workers)
+      try:
+        # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+        # waiting on a condition variable, so we won't be able to ctrl-c out.
+        pool.map_async(self._extract_file_at, files, chunksize=1).get(timeout=1000000000)
+      finally:
+        pool.close()
+        pool.join()
+    else:
+      for entry in files:
+        self._extract_file_at(entry)
+    self._chmod_dirs(dirs)
+    self._relpaths.update(relpath for relpath, _ in dirs)
+    self._relpaths.update(entry[0] for entry in files)
+
+  def extract_stream(self, chunks):
+    """Extracts the container from an iterator of its bytes as they arrive.
+
+    Files are written to a temporary directory as they arrive, and only moved into place once the
+    whole container has been read, so a stream that fails part way leaves no partial output.
+
+    :param chunks: An iterator over the container's contents, in chunks of any size.
+    """
+    read = _ChunkReader(chunks).read
+    self._check_magic(read(len(self.MAGIC)))
+    dirs = []  # (relpath, mode)
+    files = []  # (relpath, temporary path)
+    safe_mkdir(self._artifact_root)
+    # Keep the temporary directory on the same filesystem, so its files can be renamed into place.
+    with temporary_dir(root_dir=self._artifact_root) as staging_dir:
+      for kind, mode, length, relpath in self._iter_headers(read):
+        if kind == self._DIR:
+          dirs.append((relpath, mode))
+        else:
+          staged = os.path.join(staging_dir, str(len(files)))
+          self._write_data(staged, mode, kind, read, length)
+          files.append((relpath, staged))
+
+      for relpath, _ in dirs:
+        safe_mkdir(os.path.join(self._artifact_root, relpath))
+      for relpath, staged in files:
+        dst = os.path.join(self._artifact_root, relpath)
+        safe_mkdir_for(dst)
+        os.rename(staged, dst)
+    self._chmod_dirs(dirs)
+    self._relpaths.update(relpath for relpath, _ in dirs)
+    self._relpaths.update(relpath for relpath, _ in files)
+
+  def _write_dir(self, out, path):
+    relpath = os.path.relpath(path, self._artifact_root)
+    self._write_header(out, self._DIR, os.stat(path).st_mode, 0, relpath)
+    self._relpaths.add(relpath)
+
+  def _write_file(self, out, path):
+    kind = self._DEFLATED if self._compression else self._STORED
+    mode = os.stat(path).st_mode
+    relpath = os.path.relpath(path, self._artifact_root)
+    header_offset = out.tell()
+    self._write_header(out, kind, mode, 0, relpath)
+    compressor = zlib.compressobj(self._compression) if self._compression else None
+    length = 0
+    with open(path, 'rb') as fp:
+      for chunk in iter(lambda: fp.read(self._BUFFER_SIZE_BYTES), b''):
+        if compressor:
+          chunk = compressor.compress(chunk)
+        out.write(chunk)
+        length += len(chunk)
+    if compressor:
+      chunk = compressor.flush()
+      out.write(chunk)
+      length += len(chunk)
+    # Now that the data length is known, go back and fill it in.
+    end_offset = out.tell()
+    out.seek(header_offset)
+    self._write_header(out, kind, mode, length, relpath)
+    out.seek(end_offset)
+
+  def _write_header(self, out, kind, mode, length, relpath):
+    encoded_relpath = relpath.encode('utf-8')
+    out.write(self._HEADER.pack(kind, mode & 0o7777, length, len(encoded_relpath)))
+    out.write(encoded_relpath)
+
+  def _check_magic(self, magic):
+    if magic != self.MAGIC:
+      raise ArtifactError('Not a framed artifact: {0}'.format(self._path))
+
+  def _iter_headers(self, read):
+    """Yields (kind, mode, data length, relpath) for each frame, read using the given function.
+
+    The caller must consume or skip each frame's data before advancing the iterator.
+    """
+    while True:
+      header = read(self._HEADER.size)
+      if not header:
+        return
+      if len(header) != self._HEADER.size:
+        raise ArtifactError('Truncated framed artifact: {0}'.format(self._path))
+      kind, mode, length, relpath_length = self._HEADER.unpack(header)
+      relpath = read(relpath_length).decode('utf-8')
+      if kind not in (self._DIR, self._STORED, self._DEFLATED) or not self._is_contained(relpath):
+        raise ArtifactError('Corrupt framed artifact: {0}'.format(self._path))
+      yield kind, mode, length, relpath
+
+  @staticmethod
+  def _is_contained(relpath):
+    """Returns True if relpath names a path at or under the artifact root."""
+    if not relpath or os.path.isabs(relpath) or '\0' in relpath:
+      return False
+    return os.pardir not in relpath.split(os.sep)
+
+  def _chmod_dirs(self, dirs):
+    # Modes are applied once all files are written, since a directory may not be writable, and
+    # innermost first so that a directory's mode can't keep us from reaching its subdirectories.
+    for relpath, mode in reversed(dirs):
+      os.chmod(os.path.join(self._artifact_root, relpath), mode)
+
+  def _extract_file_at(self, entry):
+    relpath, mode, kind, offset, length = entry
+    dst = os.path.join(self._artifact_root, relpath)
+    safe_mkdir_for(dst)
+    # Replace rather than write through any existing file, which may be hardlinked elsewhere.
+    tmp_path = '{0}.tmp.{1}'.format(dst, uuid.uuid4().hex)
+    try:
+      with open(self._path, 'rb') as fp:
+        fp.seek(offset)
+        self._write_data(tmp_path, mode, kind, fp.read, length)
+      os.rename(tmp_path, dst)
+    finally:
+      safe_delete(tmp_path)
+
+  def _write_data(self, path, mode, kind, read, length):
+    """Writes the length bytes of a file frame's data, read using the given function, to path."""
+    decompressor = zlib.decompressobj() if kind == self._DEFLATED else None
+    with open(path, 'wb', self._BUFFER_SIZE_BYTES) as out:
+      remaining = length
+      while remaining > 0:
+        chunk = read(min(remaining, self._BUFFER_SIZE_BYTES))
+        if not chunk:
+          raise ArtifactError('Truncated framed artifact: {0}'.format(self._path))
+        remaining -= len(chunk)
+        out.write(decompressor.decompress(chunk) if decompressor else chunk)
+      if decompressor:
+        out.write(decompressor.flush())
+    os.chmod(path, mode)
+
+
+class _ChunkReader(object):
+  """Adapts an iterator of byte chunks of any size to a file-like `read(size)`."""
+
+  def __init__(self, chunks):
+    self._chunks = iter(chunks)
+    self._buffer = b''
+    self._offset = 0  # Track our position in the buffer to avoid re-copying it on every read.
+
+  def read(self, size):
+    """Returns the next size bytes, or fewer if the chunks run out."""
+    while len(self._buffer) - self._offset < size:
+      chunk = next(self._chunks, None)
+      if chunk is None:
+        break
+      self._buffer = self._buffer[self._offset:] + chunk
+      self._offset = 0
+    data = self._buffer[self._offset:self._offset + size]
+    self._offset += len(data)
+    return data
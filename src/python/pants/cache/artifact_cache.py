@@ -121,6 +121,31 @@ class ArtifactCache(object):
     """
     pass
 
+  @property
+  def supports_batched_reads(self):
+    """Whether `has_many` and `use_cached_files_many` are cheaper than per-key calls.
+
+    Callers that already fan per-key calls out over processes should only switch to the batch
+    methods when this is True.
+    """
+    return False
+
+  def has_many(self, cache_keys):
+    """Checks for the artifacts of several keys at once.
+
+    :param list cache_keys: A list of CacheKey objects.
+    :returns: A list of booleans, in the same order as `cache_keys`.
+    """
+    return [self.has(cache_key) for cache_key in cache_keys]
+
+  def use_cached_files_many(self, cache_keys):
+    """Uses the files cached for several keys at once.
+
+    :param list cache_keys: A list of CacheKey objects.
+    :returns: A list of results as per `use_cached_files`, in the same order as `cache_keys`.
+    """
+    return [self.use_cached_files(cache_key) for cache_key in cache_keys]
+
   def delete(self, cache_key):
     """Delete the artifacts for the specified key.
 
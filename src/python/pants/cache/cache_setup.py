@@ -11,6 +11,7 @@ import urlparse
 from six.moves import range
 
 from pants.cache.artifact_cache import ArtifactCacheError
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
 from pants.cache.pinger import Pinger
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
@@ -45,7 +46,8 @@ def select_best_url(spec, pinger, log):
 
 
 def create_artifact_cache(log, artifact_root, spec, task_name, compression,
-                          action='using', local=None):
+                          action='using', local=None, local_layout='tarball', hardlink=False,
+                          artifact_format='tgz', max_concurrent_requests=8, bulk_probe=False):
   """Returns an artifact cache for the specified spec.
 
   spec can be:
@@ -64,6 +66,16 @@ def create_artifact_cache(log, artifact_root, spec, task_name, compression,
                           providing checksums.
   :param str action: A verb, eg 'read' or 'write' for printed messages.
   :param LocalArtifactCache local: A local cache for use by created remote caches
+  :param str local_layout: How file-based caches store artifacts: 'tarball' stores a tarball per
+                           artifact, 'content-addressed' stores each distinct file once, shared
+                           across artifacts and tasks.
+  :param bool hardlink: Whether content-addressed caches restore files by hardlinking them.
+  :param str artifact_format: The format of created artifacts: 'tgz' for gzipped tarballs, or
+                              'framed' for containers that can be extracted in parallel and while
+                              streaming.  Artifacts of either format can be read regardless.
+  :param int max_concurrent_requests: The most requests created remote caches make at once when
+                                      reading many artifacts.
+  :param bool bulk_probe: Whether created remote caches probe for many artifacts in one request.
   """
   if not spec:
     raise EmptyCacheSpecError()
@@ -74,16 +86,24 @@ def create_artifact_cache(log, artifact_root, spec, task_name, compression,
   def recurse(new_spec, new_local=local):
     return create_artifact_cache(log=log, artifact_root=artifact_root, spec=new_spec,
                                  task_name=task_name, compression=compression, action=action,
-                                 local=new_local)
+                                 local=new_local, local_layout=local_layout, hardlink=hardlink,
+                                 artifact_format=artifact_format,
+                                 max_concurrent_requests=max_concurrent_requests,
+                                 bulk_probe=bulk_probe)
 
   def is_remote(spec):
     return spec.startswith('http://') or spec.startswith('https://')
 
   if isinstance(spec, basestring):
     if spec.startswith('/') or spec.startswith('~'):
+      if local_layout == 'content-addressed':
+        log.debug('{0} {1} content-addressed local artifact cache at {2}'.format(task_name, action,
+                                                                                spec))
+        return ContentAddressedArtifactCache(artifact_root, spec, task_name, compression,
+                                             hardlink=hardlink, artifact_format=artifact_format)
       path = os.path.join(spec, task_name)
       log.debug('{0} {1} local artifact cache at {2}'.format(task_name, action, path))
-      return LocalArtifactCache(artifact_root, path, compression)
+      return LocalArtifactCache(artifact_root, path, compression, artifact_format=artifact_format)
     elif is_remote(spec):
       # Caches are supposed to be close, and we don't want to waste time pinging on no-op builds.
       # So we ping twice with a short timeout.
@@ -92,8 +112,11 @@ def create_artifact_cache(log, artifact_root, spec, task_name, compression,
       if best_url:
         url = best_url.rstrip('/') + '/' + task_name
         log.debug('{0} {1} remote artifact cache at {2}'.format(task_name, action, url))
-        local = local or TempLocalArtifactCache(artifact_root, compression)
-        return RESTfulArtifactCache(artifact_root, url, local)
+        local = local or TempLocalArtifactCache(artifact_root, compression,
+                                                artifact_format=artifact_format)
+        return RESTfulArtifactCache(artifact_root, url, local,
+                                    max_concurrent_requests=max_concurrent_requests,
+                                    bulk_probe=bulk_probe)
       else:
         log.warn('{0} has no reachable artifact cache in {1}.'.format(task_name, spec))
         return None
@@ -103,7 +126,7 @@ def create_artifact_cache(log, artifact_root, spec, task_name, compression,
     return recurse(spec[0])
   elif isinstance(spec, (list, tuple)) and len(spec) is 2:
     first = recurse(spec[0])
-    if not isinstance(first, LocalArtifactCache):
+    if not isinstance(first, (LocalArtifactCache, ContentAddressedArtifactCache)):
       raise LocalCacheSpecRequiredError(
         'First of two cache specs must be a local cache path. Found: {0}'.format(spec[0]))
     if not is_remote(spec[1]):
@@ -0,0 +1,341 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from pants.cache.artifact_cache import UnreadableArtifact
+from pants.cache.local_artifact_cache import BaseLocalArtifactCache
+from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+class ContentAddressedArtifactCache(BaseLocalArtifactCache):
+  """A local artifact cache that stores each distinct file only once.
+
+  The cache root is laid out as:
+
+    blobs/<ab>/<cdef...>                  The contents of each distinct file, named by its sha1.
+    manifests/<namespace>/<id>/<hash>     The (relpath, blob sha1, mode) entries of each artifact.
+    access.log                            When each manifest was last used, one line per use.
+
+  Since blobs are shared by every namespace under the same root, tasks whose artifacts contain the
+  same files (eg: identical class files or resources) only store those files once.
+
+  Nothing is evicted while building, since reads and writes happen concurrently from many
+  processes.  Instead `prune` evicts the least recently used artifacts until the blobs fit under a
+  size budget; it is run by the `clean-cache` goal.
+  """
+
+  # Bump this if the on-disk format of manifests changes.
+  _VERSION = 1
+
+  # Blobs not referenced by any manifest are only deleted by `prune` once they are at least this
+  # old, to avoid racing a concurrent insert that has written its blobs but not yet its manifest.
+  _ORPHAN_GRACE_SECS = 3600
+
+  _READ_SIZE_BYTES = 1024 * 1024
+
+  # The mode of every blob.  Restored files can only be hardlinks to blobs if they want this mode
+  # once their write bits are dropped.
+  _BLOB_MODE = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+  def __init__(self, artifact_root, cache_root, namespace, compression, hardlink=False,
+               artifact_format='tgz'):
+    """
+    :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str cache_root: The blobs and manifests are stored under this directory.
+    :param str namespace: The namespace for this cache's manifests, typically the task name.
+    :param int compression: The compression level for artifacts created to back remote caches
+                            (0-9).
+    :param bool hardlink: Restore artifacts by hardlinking their files to the stored blobs instead
+                          of copying them.  This is much faster, but is only safe if nothing
+                          modifies restored files in place.  Files whose mode differs from that
+                          of the read-only blobs other than by write bits, such as executables,
+                          are still copied.
+    :param str artifact_format: The format of artifacts created to back remote caches, 'tgz' or
+                                'framed'.
+    """
+    super(ContentAddressedArtifactCache, self).__init__(artifact_root, compression,
+                                                        artifact_format=artifact_format)
+    self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
+    self._namespace = namespace
+    self._hardlink = hardlink
+    self._blobs_dir = os.path.join(self._cache_root, 'blobs')
+    self._manifests_dir = os.path.join(self._cache_root, 'manifests')
+    self._access_log = os.path.join(self._cache_root, 'access.log')
+
+    safe_mkdir(self._cache_root)
+
+  @property
+  def cache_root(self):
+    return self._cache_root
+
+  def has(self, cache_key):
+    return os.path.isfile(self._manifest_for_key(cache_key))
+
+  def try_insert(self, cache_key, paths):
+    self._store_paths(cache_key, paths)
+
+  @contextmanager
+  def insert_paths(self, cache_key, paths):
+    """Stores the paths, and yields the path of an artifact of them for upload to a remote cache."""
+    self._store_paths(cache_key, paths)
+    with self._tmpfile(cache_key, 'write') as tmp:
+      self._artifact(tmp.name).collect(paths)
+      yield tmp.name
+
+  def store_and_use_artifact(self, cache_key, src):
+    """Extracts an artifact read from the src iterator and stores the extracted files."""
+    artifact = self._store_and_extract(cache_key, src)
+    entries = []
+    for path in sorted(artifact.get_paths()):
+      if os.path.isdir(path):
+        entries.append((os.path.relpath(path, self.artifact_root), None,
+                        stat.S_IMODE(os.stat(path).st_mode)))
+      else:
+        entries.append(self._store_file(path))
+    self._write_manifest(cache_key, entries)
+    return True
+
+  def _store_tarball(self, cache_key, src):
+    # Artifacts are only kept as the blobs and manifest written by store_and_use_artifact.
+    return src
+
+  def use_cached_files(self, cache_key):
+    manifest = self._manifest_for_key(cache_key)
+    try:
+      entries = self._read_manifest(manifest)
+      if entries is None:
+        return False
+      for relpath, digest, mode in entries:
+        self._restore(relpath, digest, mode)
+      self._record_access(manifest)
+      return True
+    except Exception as e:
+      # A blob may have been pruned out from under the manifest, so it can't be trusted any more.
+      logger.warn('Error while reading from local artifact cache: {0}'.format(e))
+      safe_delete(manifest)
+      return UnreadableArtifact(cache_key, e)
+
+  def delete(self, cache_key):
+    # Any blobs left unreferenced are deleted by the next `prune`.
+    safe_delete(self._manifest_for_key(cache_key))
+
+  def prune(self, max_size_bytes):
+    """Evicts the least recently used artifacts until the blobs total at most max_size_bytes.
+
+    Evicts artifacts from every namespace under the cache root, and deletes any blobs no longer
+    referenced by an artifact.
+
+    :param int max_size_bytes: The size budget for all blobs under the cache root.
+    :returns: A tuple of (artifacts evicted, bytes freed).
+    """
+    start = time.time()
+    last_access = self._read_access_log()
+
+    manifests = []  # (last access, manifest path, blob digests)
+    refcounts = defaultdict(int)
+    for dirpath, _, filenames in os.walk(self._manifests_dir):
+      for filename in filenames:
+        manifest = os.path.join(dirpath, filename)
+        try:
+          entries = self._read_manifest(manifest)
+          mtime = os.path.getmtime(manifest)
+        except (IOError, OSError, ValueError) as e:
+          logger.warn('Deleting unreadable artifact manifest {0}: {1}'.format(manifest, e))
+          safe_delete(manifest)
+          continue
+        if entries is None:
+          continue
+        digests = set(digest for _, digest, _ in entries if digest)
+        for digest in digests:
+          refcounts[digest] += 1
+        relpath = os.path.relpath(manifest, self._manifests_dir)
+        manifests.append((max(mtime, last_access.get(relpath, 0)), manifest, digests))
+
+    sizes = {}
+    freed = 0
+    for dirpath, _, filenames in os.walk(self._blobs_dir):
+      for filename in filenames:
+        blob = os.path.join(dirpath, filename)
+        digest = os.path.basename(dirpath) + filename
+        try:
+          st = os.stat(blob)
+        except OSError:
+          continue
+        if digest in refcounts:
+          sizes[digest] = st.st_size
+        elif st.st_mtime < start - self._ORPHAN_GRACE_SECS:
+          safe_delete(blob)
+          freed += st.st_size
+
+    total = sum(sizes.values())
+    evicted = 0
+    for _, manifest, digests in sorted(manifests):
+      if total <= max_size_bytes:
+        break
+      safe_delete(manifest)
+      evicted += 1
+      for digest in digests:
+        refcounts[digest] -= 1
+        if refcounts[digest] == 0:
+          safe_delete(self._blob_path(digest))
+          size = sizes.pop(digest, 0)
+          total -= size
+          freed += size
+
+    self._compact_access_log(last_access)
+    return evicted, freed
+
+  def _manifest_for_key(self, cache_key):
+    # Note: it's important to use the id as well as the hash, because two different targets
+    # may have the same hash if both have no sources, but we may still want to differentiate them.
+    return os.path.join(self._manifests_dir, self._namespace, cache_key.id, cache_key.hash)
+
+  def _blob_path(self, digest):
+    return os.path.join(self._blobs_dir, digest[:2], digest[2:])
+
+  def _unique_tmp_path(self, path):
+    return '{0}.tmp.{1}'.format(path, uuid.uuid4().hex)
+
+  def _store_paths(self, cache_key, paths):
+    entries = []
+    for path in paths or ():
+      relpath = os.path.relpath(path, self.artifact_root)
+      if os.path.isdir(path):
+        entries.append((relpath, None, stat.S_IMODE(os.stat(path).st_mode)))
+        # Follow symlinks to match the tarball artifacts, which dereference them.
+        for dirpath, dirnames, filenames in os.walk(path, followlinks=True):
+          for name in sorted(dirnames):
+            subdir = os.path.join(dirpath, name)
+            entries.append((os.path.relpath(subdir, self.artifact_root), None,
+                            stat.S_IMODE(os.stat(subdir).st_mode)))
+          for name in sorted(filenames):
+            entries.append(self._store_file(os.path.join(dirpath, name)))
+      else:
+        entries.append(self._store_file(path))
+    self._write_manifest(cache_key, entries)
+
+  def _write_manifest(self, cache_key, entries):
+    # The blobs are all in place before the manifest referencing them appears.
+    manifest = self._manifest_for_key(cache_key)
+    safe_mkdir_for(manifest)
+    tmp_path = self._unique_tmp_path(manifest)
+    with open(tmp_path, 'w') as fp:
+      json.dump({'version': self._VERSION, 'entries': entries}, fp)
+    os.rename(tmp_path, manifest)
+    self._record_access(manifest)
+
+  def _store_file(self, path):
+    """Stores the file at path as a blob if it isn't already, and returns its manifest entry."""
+    mode = stat.S_IMODE(os.stat(path).st_mode)
+    safe_mkdir(self._blobs_dir)
+    tmp_path = self._unique_tmp_path(os.path.join(self._blobs_dir, 'incoming'))
+    sha = hashlib.sha1()
+    try:
+      with open(path, 'rb') as src:
+        with open(tmp_path, 'wb') as dst:
+          for chunk in iter(lambda: src.read(self._READ_SIZE_BYTES), b''):
+            sha.update(chunk)
+            dst.write(chunk)
+      digest = sha.hexdigest()
+      blob = self._blob_path(digest)
+      if os.path.exists(blob):
+        # Refresh the blob so that `prune` can't mistake it for an orphan before our manifest lands.
+        os.utime(blob, None)
+      else:
+        safe_mkdir_for(blob)
+        # Blobs may be hardlinked into the workdir, so guard them against in-place modification.
+        os.chmod(tmp_path, self._BLOB_MODE)
+        os.rename(tmp_path, blob)
+    finally:
+      safe_delete(tmp_path)
+    return os.path.relpath(path, self.artifact_root), digest, mode
+
+  def _restore(self, relpath, digest, mode):
+    dst = os.path.join(self.artifact_root, relpath)
+    if digest is None:
+      safe_mkdir(dst)
+      return
+    safe_mkdir_for(dst)
+    blob = self._blob_path(digest)
+    # Never write through an existing file, which may itself be a hardlink to a blob.
+    tmp_path = self._unique_tmp_path(dst)
+    try:
+      if self._hardlink and self._can_hardlink(mode):
+        os.link(blob, tmp_path)
+      else:
+        shutil.copyfile(blob, tmp_path)
+        os.chmod(tmp_path, mode)
+      os.rename(tmp_path, dst)
+    finally:
+      safe_delete(tmp_path)
+
+  def _can_hardlink(self, mode):
+    """Returns whether a file of the given mode can be restored as a (read-only) hardlink.
+
+    Files with any other bits set, such as executables, are copied so that they keep their mode.
+    """
+    return mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH) == self._BLOB_MODE
+
+  def _read_manifest(self, manifest):
+    """Returns the entries of the manifest, or None if there is no usable manifest there."""
+    try:
+      with open(manifest, 'r') as fp:
+        data = json.load(fp)
+    except IOError as e:
+      if e.errno == errno.ENOENT:
+        return None
+      raise
+    if data.get('version') != self._VERSION:
+      return None
+    return data['entries']
+
+  def _record_access(self, manifest):
+    line = '{0} {1}\n'.format(int(time.time()), os.path.relpath(manifest, self._manifests_dir))
+    # A single small O_APPEND write is atomic, so concurrent processes can all log here safely.
+    fd = os.open(self._access_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+      os.write(fd, line.encode('utf-8'))
+    finally:
+      os.close(fd)
+
+  def _read_access_log(self):
+    """Returns a dict of the last recorded access time of each manifest, by relpath."""
+    last_access = {}
+    if os.path.exists(self._access_log):
+      with open(self._access_log, 'rb') as fp:
+        for line in fp:
+          timestamp, _, relpath = line.decode('utf-8').rstrip('\n').partition(' ')
+          if relpath and timestamp.isdigit():
+            last_access[relpath] = max(int(timestamp), last_access.get(relpath, 0))
+    return last_access
+
+  def _compact_access_log(self, last_access):
+    """Rewrites the access log with just the last access of each manifest still in the cache.
+
+    Accesses logged by other processes while this runs may be lost, which only makes their
+    manifests look older than they are.
+    """
+    tmp_path = self._unique_tmp_path(self._access_log)
+    with open(tmp_path, 'wb') as fp:
+      for relpath, timestamp in sorted(last_access.items()):
+        if os.path.exists(os.path.join(self._manifests_dir, relpath)):
+          fp.write('{0} {1}\n'.format(timestamp, relpath).encode('utf-8'))
+    os.rename(tmp_path, self._access_log)
@@ -11,7 +11,7 @@ import shutil
 import uuid
 from contextlib import contextmanager
 
-from pants.cache.artifact import TarballArtifact
+from pants.cache.artifact import FramedArtifact, TarballArtifact
 from pants.cache.artifact_cache import ArtifactCache, UnreadableArtifact
 from pants.util.contextutil import temporary_file
 from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for
@@ -20,19 +20,32 @@ from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for
 logger = logging.getLogger(__name__)
 
 class BaseLocalArtifactCache(ArtifactCache):
-  def __init__(self, artifact_root, compression):
+  def __init__(self, artifact_root, compression, artifact_format='tgz'):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param int compression: The gzip compression level for created artifacts.
                             Valid values are 0-9.
+    :param str artifact_format: The format of created artifacts: 'tgz' for gzipped tarballs, or
+                                'framed' for FramedArtifact containers.  Artifacts of either format
+                                can be read regardless.
     """
     super(BaseLocalArtifactCache, self).__init__(artifact_root)
     self._compression = compression
+    self._artifact_format = artifact_format
     self._cache_root = None
 
   def _artifact(self, path):
+    """Returns an artifact of the configured format to collect into the file at path."""
+    if self._artifact_format == 'framed':
+      return FramedArtifact(self.artifact_root, path, self._compression)
     return TarballArtifact(self.artifact_root, path, self._compression)
 
+  def _artifact_for_read(self, path):
+    """Returns an artifact to extract the existing file at path, whatever its format."""
+    if FramedArtifact.is_framed(path):
+      return FramedArtifact(self.artifact_root, path)
+    return TarballArtifact(self.artifact_root, path)
+
   @contextmanager
   def _tmpfile(self, cache_key, use):
     """Allocate tempfile on same device as cache with a suffix chosen to prevent collisions"""
@@ -50,12 +63,41 @@ class BaseLocalArtifactCache(ArtifactCache):
     """
       Read the contents of an tarball from an iterator and return an artifact stored in the cache
     """
+    self._store_and_extract(cache_key, src)
+    return True
+
+  def _store_and_extract(self, cache_key, src):
+    """Stores the artifact read from the src iterator, extracts it and returns it.
+
+    Framed artifacts are extracted as they are read, rather than after being read in full.
+    """
     with self._tmpfile(cache_key, 'read') as tmp:
-      for chunk in src:
-        tmp.write(chunk)
-      tmp.close()
-      self._artifact(self._store_tarball(cache_key, tmp.name)).extract()
-      return True
+      chunks = iter(src)
+      head = b''
+      for chunk in chunks:
+        head += chunk
+        if len(head) >= len(FramedArtifact.MAGIC):
+          break
+      tmp.write(head)
+
+      if head.startswith(FramedArtifact.MAGIC):
+        def tee():
+          yield head
+          for chunk in chunks:
+            tmp.write(chunk)
+            yield chunk
+        artifact = FramedArtifact(self.artifact_root, tmp.name)
+        artifact.extract_stream(tee())
+        tmp.close()
+        # Only store the artifact once it has been read, and so checked, in full.
+        self._store_tarball(cache_key, tmp.name)
+      else:
+        for chunk in chunks:
+          tmp.write(chunk)
+        tmp.close()
+        artifact = self._artifact_for_read(self._store_tarball(cache_key, tmp.name))
+        artifact.extract()
+      return artifact
 
   def _store_tarball(self, cache_key, src):
     """Given a src path to an artifact tarball, store it and return stored artifact's path."""
@@ -63,13 +105,15 @@ class BaseLocalArtifactCache(ArtifactCache):
 
 class LocalArtifactCache(BaseLocalArtifactCache):
   """An artifact cache that stores the artifacts in local files."""
-  def __init__(self, artifact_root, cache_root, compression):
+  def __init__(self, artifact_root, cache_root, compression, artifact_format='tgz'):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param str cache_root: The locally cached files are stored under this directory.
     :param int compression: The gzip compression level for created artifacts (1-9 or false-y).
+    :param str artifact_format: The format of created artifacts, 'tgz' or 'framed'.
     """
-    super(LocalArtifactCache, self).__init__(artifact_root, compression)
+    super(LocalArtifactCache, self).__init__(artifact_root, compression,
+                                             artifact_format=artifact_format)
     self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
 
     safe_mkdir(self._cache_root)
@@ -87,7 +131,7 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     try:
       tarfile = self._cache_file_for_key(cache_key)
       if os.path.exists(tarfile):
-        self._artifact(tarfile).extract()
+        self._artifact_for_read(tarfile).extract()
         return True
     except Exception as e:
       # TODO(davidt): Consider being more granular in what is caught.
@@ -115,11 +159,13 @@ class TempLocalArtifactCache(BaseLocalArtifactCache):
     This implementation does not have a backing _cache_root, and never
     actually stores files between calls, but is useful for handling file IO for a remote cache.
   """
-  def __init__(self, artifact_root, compression):
+  def __init__(self, artifact_root, compression, artifact_format='tgz'):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str artifact_format: The format of created artifacts, 'tgz' or 'framed'.
     """
-    super(TempLocalArtifactCache, self).__init__(artifact_root, compression=compression)
+    super(TempLocalArtifactCache, self).__init__(artifact_root, compression=compression,
+                                                 artifact_format=artifact_format)
 
   def _store_tarball(self, cache_key, src):
     return src
@@ -49,6 +49,22 @@ class ReadWriteArtifactCache(ArtifactCache):
     else:
       return None
 
+  @property
+  def supports_batched_reads(self):
+    return bool(self._read_artifact_cache and self._read_artifact_cache.supports_batched_reads)
+
+  def has_many(self, cache_keys):
+    if self._read_artifact_cache:
+      return self._read_artifact_cache.has_many(cache_keys)
+    else:
+      return [False] * len(cache_keys)
+
+  def use_cached_files_many(self, cache_keys):
+    if self._read_artifact_cache:
+      return self._read_artifact_cache.use_cached_files_many(cache_keys)
+    else:
+      return [None] * len(cache_keys)
+
   def delete(self, cache_key):
     if self._write_artifact_cache:
       self._write_artifact_cache.delete(cache_key)
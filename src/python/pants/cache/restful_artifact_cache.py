@@ -7,9 +7,11 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import logging
 import urlparse
+from multiprocessing.pool import ThreadPool
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 
 from pants.cache.artifact import TarballArtifact
 from pants.cache.artifact_cache import (ArtifactCache, ArtifactCacheError,
@@ -30,23 +32,44 @@ class InvalidRESTfulCacheProtoError(ArtifactCacheError):
 
 class RequestsSession(object):
   _session = None
+
+  # The number of connections kept alive per host, which bounds useful request concurrency.
+  MAX_CONNECTIONS_PER_HOST = 16
+
   @classmethod
   def instance(cls):
     if cls._session is None:
       cls._session = requests.Session()
+      for prefix in ('http://', 'https://'):
+        cls._session.mount(prefix, HTTPAdapter(pool_connections=cls.MAX_CONNECTIONS_PER_HOST,
+                                               pool_maxsize=cls.MAX_CONNECTIONS_PER_HOST))
     return cls._session
 
 class RESTfulArtifactCache(ArtifactCache):
-  """An artifact cache that stores the artifacts on a RESTful service."""
+  """An artifact cache that stores the artifacts on a RESTful service.
+
+  Servers may optionally support probing for many artifacts in one request: a POST to
+  `<url_base>/_probe` of newline separated artifact paths relative to `url_base`, answered with the
+  newline separated subset of those paths the server has and an `X-Pants-Bulk-Probe: 1` header.
+  Bulk probes are only sent if enabled, since many servers accept arbitrary POSTs.  Against
+  servers whose answer to the probe lacks the header, artifacts are probed individually instead.
+  """
 
   READ_SIZE_BYTES = 4 * 1024 * 1024
 
-  def __init__(self, artifact_root, url_base, local):
+  BULK_PROBE_PATH = '_probe'
+  BULK_PROBE_HEADER = 'X-Pants-Bulk-Probe'
+  BULK_PROBE_VERSION = '1'
+
+  def __init__(self, artifact_root, url_base, local, max_concurrent_requests=8, bulk_probe=False):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param str url_base: The prefix for urls on some RESTful service. We must be able to PUT and GET to any
               path under this base.
     :param BaseLocalArtifactCache local: local cache instance for storing and creating artifacts
+    :param int max_concurrent_requests: The maximum number of requests batch operations have in
+              flight at once.
+    :param bool bulk_probe: Whether to try probing for many artifacts in one request.
     """
     super(RESTfulArtifactCache, self).__init__(artifact_root)
     parsed_url = urlparse.urlparse(url_base)
@@ -61,6 +84,10 @@ class RESTfulArtifactCache(ArtifactCache):
     self._netloc = parsed_url.netloc
     self._path_prefix = parsed_url.path.rstrip(b'/')
     self._localcache = local
+    self._max_concurrent_requests = max(1, min(max_concurrent_requests,
+                                               RequestsSession.MAX_CONNECTIONS_PER_HOST))
+    # Whether the server supports bulk probes, unknown until one is tried.
+    self._supports_bulk_probe = None if bulk_probe else False
 
   def try_insert(self, cache_key, paths):
     # Delegate creation of artifact to local cache.
@@ -75,7 +102,7 @@ class RESTfulArtifactCache(ArtifactCache):
   def has(self, cache_key):
     if self._localcache.has(cache_key):
       return True
-    return self._request('HEAD', self._remote_path_for_key(cache_key)) is not None
+    return self._has_remote(cache_key)
 
   def use_cached_files(self, cache_key):
     if self._localcache.has(cache_key):
@@ -94,13 +121,105 @@ class RESTfulArtifactCache(ArtifactCache):
 
     return False
 
+  @property
+  def supports_batched_reads(self):
+    return True
+
+  def has_many(self, cache_keys):
+    results = [True] * len(cache_keys)
+    remote_indexes = [index for index, cache_key in enumerate(cache_keys)
+                      if not self._localcache.has(cache_key)]
+    remote_keys = [cache_keys[index] for index in remote_indexes]
+    present = self._probe_many(remote_keys)
+    if present is None:
+      remote_results = self._map_concurrently(self._has_remote, remote_keys)
+    else:
+      remote_results = [cache_key in present for cache_key in remote_keys]
+    for index, result in zip(remote_indexes, remote_results):
+      results[index] = result
+    return results
+
+  def use_cached_files_many(self, cache_keys):
+    # Keys found in the local cache are extracted by the same pool of threads that fetches the
+    # rest.  Of those, only the ones a bulk probe finds are fetched.  Without a bulk probe, a GET
+    # doubles as the existence probe, a 404 being a miss, so each key costs exactly one round trip.
+    results = [False] * len(cache_keys)
+    local_indexes, remote_indexes = [], []
+    for index, cache_key in enumerate(cache_keys):
+      (local_indexes if self._localcache.has(cache_key) else remote_indexes).append(index)
+    present = self._probe_many([cache_keys[index] for index in remote_indexes])
+    if present is not None:
+      remote_indexes = [index for index in remote_indexes if cache_keys[index] in present]
+
+    indexes = local_indexes + remote_indexes
+    fetched = self._map_concurrently(self.use_cached_files,
+                                     [cache_keys[index] for index in indexes])
+    for index, result in zip(indexes, fetched):
+      results[index] = result
+    return results
+
+  def _has_remote(self, cache_key):
+    return self._request('HEAD', self._remote_path_for_key(cache_key)) is not None
+
+  def _probe_many(self, cache_keys):
+    """Probes the server for the artifacts of all the given keys in a single request.
+
+    :returns: The set of the given keys the server has artifacts for, or None if the server does
+              not support bulk probes or the probe failed.
+    """
+    if not cache_keys:
+      return set()
+    if self._supports_bulk_probe is False:
+      return None
+
+    key_by_path = {self._relative_path_for_key(cache_key): cache_key for cache_key in cache_keys}
+    url = self._url_string('{0}/{1}'.format(self._path_prefix, self.BULK_PROBE_PATH))
+    logger.debug('Sending bulk probe for {0} artifacts to {1}'.format(len(key_by_path), url))
+    try:
+      response = RequestsSession.instance().post(url, data='\n'.join(sorted(key_by_path)),
+                                                 timeout=self._timeout_secs)
+    except RequestException as e:
+      logger.debug('Bulk probe of {0} failed: {1}'.format(url, e))
+      return None
+    if int(response.status_code / 100) != 2:
+      logger.debug('Bulk probes are not supported by {0}: {1} {2}'.format(url,
+                                                                         response.status_code,
+                                                                         response.reason))
+      self._supports_bulk_probe = False
+      return None
+    # Servers that accept any POST may answer 2xx without having probed anything.
+    if response.headers.get(self.BULK_PROBE_HEADER) != self.BULK_PROBE_VERSION:
+      logger.debug('Bulk probes are not supported by {0}: no {1}: {2} header in the '
+                   'response'.format(url, self.BULK_PROBE_HEADER, self.BULK_PROBE_VERSION))
+      self._supports_bulk_probe = False
+      return None
+    self._supports_bulk_probe = True
+    return set(key_by_path[path] for path in response.text.splitlines() if path in key_by_path)
+
+  def _map_concurrently(self, func, cache_keys):
+    """Maps func over cache_keys with up to max_concurrent_requests calls in flight at once."""
+    if len(cache_keys) < 2:
+      return [func(cache_key) for cache_key in cache_keys]
+
+    pool = ThreadPool(processes=min(len(cache_keys), self._max_concurrent_requests))
+    try:
+      # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+      # waiting on a condition variable, so we won't be able to ctrl-c out.
+      return pool.map_async(func, cache_keys, chunksize=1).get(timeout=1000000000)
+    finally:
+      pool.close()
+      pool.join()
+
   def delete(self, cache_key):
     self._localcache.delete(cache_key)
     remote_path = self._remote_path_for_key(cache_key)
     self._request('DELETE', remote_path)
 
   def _remote_path_for_key(self, cache_key):
-    return '{0}/{1}/{2}.tgz'.format(self._path_prefix, cache_key.id, cache_key.hash)
+    return '{0}/{1}'.format(self._path_prefix, self._relative_path_for_key(cache_key))
+
+  def _relative_path_for_key(self, cache_key):
+    return '{0}/{1}.tgz'.format(cache_key.id, cache_key.hash)
 
   # Returns a response if we get a 200, None if we get a 404 and raises an exception otherwise.
   def _request(self, method, path, body=None):
@@ -5,12 +5,15 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import multiprocessing
 import os
 from collections import OrderedDict, namedtuple
 
 from twitter.common.collections.orderedset import OrderedSet
 
 from pants.base.exceptions import TaskError
+from pants.base.execution_graph import ExecutionFailure, ExecutionGraph, Job
+from pants.base.worker_pool import SubprocPool, WorkerPool
 from pants.base.workunit import WorkUnit
 from pants.engine.engine import Engine
 from pants.engine.round_manager import RoundManager
@@ -67,7 +70,9 @@ class RoundEngine(Engine):
   class MissingProductError(DependencyError):
     """Indicates an expressed data dependency if not provided by any installed task."""
 
-  GoalInfo = namedtuple('GoalInfo', ['goal', 'tasktypes_by_name', 'goal_dependencies'])
+  # producer_infos_by_task_name holds the ProducerInfos from other goals each task depends on.
+  GoalInfo = namedtuple('GoalInfo', ['goal', 'tasktypes_by_name', 'goal_dependencies',
+                                     'producer_infos_by_task_name'])
 
   def _topological_sort(self, goal_info_by_goal):
     dependees_by_goal = OrderedDict()
@@ -132,10 +137,12 @@ class RoundEngine(Engine):
 
     tasktypes_by_name = OrderedDict()
     goal_dependencies = set()
+    producer_infos_by_task_name = {}
     visited_task_types = set()
     for task_name in reversed(goal.ordered_task_names()):
       task_type = goal.task_type_by_name(task_name)
       tasktypes_by_name[task_name] = task_type
+      producer_infos_by_task_name[task_name] = set()
       visited_task_types.add(task_type)
 
       alternate_target_roots = task_type._alternate_target_roots(context.options,
@@ -168,18 +175,21 @@ class RoundEngine(Engine):
               pass
           else:
             goal_dependencies.add(producer_goal)
+            producer_infos_by_task_name[task_name].add(producer_info)
       except round_manager.MissingProductError as e:
         raise self.MissingProductError(
             "Could not satisfy data dependencies for goal '{name}' with action {action}: {error}"
             .format(name=task_name, action=task_type.__name__, error=e))
 
-    goal_info = self.GoalInfo(goal, tasktypes_by_name, goal_dependencies)
+    goal_info = self.GoalInfo(goal, tasktypes_by_name, goal_dependencies,
+                              producer_infos_by_task_name)
     goal_info_by_goal[goal] = goal_info
 
     for goal_dependency in goal_dependencies:
       self._visit_goal(goal_dependency, context, goal_info_by_goal, target_roots_replacement)
 
-  def _prepare(self, context, goals):
+  def _prepare_goal_infos(self, context, goals):
+    """Returns the GoalInfos of the goals and all the goals they depend on, in execution order."""
     if len(goals) == 0:
       raise TaskError('No goals to prepare')
 
@@ -189,7 +199,10 @@ class RoundEngine(Engine):
       self._visit_goal(goal, context, goal_info_by_goal, target_roots_replacement)
     target_roots_replacement.apply(context)
 
-    for goal_info in reversed(list(self._topological_sort(goal_info_by_goal))):
+    return list(reversed(list(self._topological_sort(goal_info_by_goal))))
+
+  def _prepare(self, context, goals):
+    for goal_info in self._prepare_goal_infos(context, goals):
       yield GoalExecutor(context, goal_info.goal, goal_info.tasktypes_by_name)
 
   def attempt(self, context, goals):
@@ -216,3 +229,156 @@ class RoundEngine(Engine):
     finally:
       if outer_lock_holder:
         context.release_lock()
+
+
+class ParallelRoundEngine(RoundEngine):
+  """A RoundEngine that runs independent tasks concurrently.
+
+  Rather than running each goal's tasks in turn, this builds a graph of all the tasks to run and
+  starts each task as soon as the tasks it depends on have finished.  A task depends on the task
+  installed before it in its goal, since tasks may rely on the order they are installed in.  And
+  goals still run in the order the RoundEngine would run them, unless they are provably
+  independent: neither is a barrier goal, the later goal requires no products from the earlier one
+  and the two produce no products in common.  So, eg: a lint goal that requires nothing from a
+  compile goal runs alongside it, but no goal runs alongside `clean-all` or `gen`.
+
+  As with the RoundEngine, the lock is held from the start of the run until all the tasks of
+  serialized goals have finished.
+  """
+
+  # Goals whose effects no other goal can be isolated from, eg: deleting the workdir or injecting
+  # synthetic targets into the build graph.  They run alone, after every goal ordered before them
+  # and before every goal ordered after them.
+  BARRIER_GOALS = frozenset(['clean-all', 'clean-all-async', 'clean-cache', 'gen', 'invalidate'])
+
+  def __init__(self, num_workers=None):
+    """
+    :param int num_workers: The maximum number of tasks to run at once; defaults to the number of
+                            cpus.
+    """
+    super(ParallelRoundEngine, self).__init__()
+    self._num_workers = num_workers or multiprocessing.cpu_count()
+
+  @staticmethod
+  def _task_key(goal, task_name):
+    return '{}.{}'.format(goal.name, task_name)
+
+  @classmethod
+  def _independent(cls, earlier, later):
+    """Returns True if the goals of the GoalInfos can safely run alongside each other."""
+    if earlier.goal.name in cls.BARRIER_GOALS or later.goal.name in cls.BARRIER_GOALS:
+      return False
+    for producer_infos in later.producer_infos_by_task_name.values():
+      if any(producer_info.goal == earlier.goal for producer_info in producer_infos):
+        return False
+
+    def product_types(goal_info):
+      return set(product_type for task_type in goal_info.tasktypes_by_name.values()
+                 for product_type in task_type.product_types())
+    return not (product_types(earlier) & product_types(later))
+
+  def _task_dependencies(self, goal_infos):
+    """Returns an OrderedDict of each task's key to (goal, name, type, dependency keys).
+
+    The tasks are in the order the RoundEngine would execute them.
+    """
+    goal_info_by_goal = OrderedDict((goal_info.goal, goal_info) for goal_info in goal_infos)
+    last_key_by_goal = {}
+    tasks = OrderedDict()
+    for index, goal_info in enumerate(goal_infos):
+      # The first task of a goal waits for the last task of every earlier goal it isn't provably
+      # independent of.
+      previous_keys = [last_key_by_goal[earlier.goal] for earlier in goal_infos[:index]
+                       if earlier.goal in last_key_by_goal
+                       and not self._independent(earlier, goal_info)]
+      for name, task_type in reversed(goal_info.tasktypes_by_name.items()):
+        key = self._task_key(goal_info.goal, name)
+        dependency_keys = OrderedSet(previous_keys)
+        for producer_info in goal_info.producer_infos_by_task_name[name]:
+          producer_goal_info = goal_info_by_goal[producer_info.goal]
+          for producer_name, producer_type in producer_goal_info.tasktypes_by_name.items():
+            if producer_type == producer_info.task_type:
+              dependency_keys.add(self._task_key(producer_info.goal, producer_name))
+        tasks[key] = (goal_info.goal, name, task_type, list(dependency_keys))
+        previous_keys = [key]
+        last_key_by_goal[goal_info.goal] = key
+    return tasks
+
+  def _explain(self, tasks):
+    """Prints the tasks grouped into the rounds they can run in, given enough workers."""
+    rounds = OrderedDict()
+    round_by_key = {}
+    for key, (_, _, task_type, dependency_keys) in tasks.items():
+      # Tasks are ordered such that the dependencies of each task precede it.
+      task_round = 1 + max([round_by_key[dep] for dep in dependency_keys] or [0])
+      round_by_key[key] = task_round
+      rounds.setdefault(task_round, []).append('{}->{}'.format(key, task_type.__name__))
+
+    print('Parallel Task Schedule:\n')
+    for task_round, task_descriptions in sorted(rounds.items()):
+      print('{round}: [{tasks}]'.format(round=task_round, tasks=', '.join(task_descriptions)))
+
+  def attempt(self, context, goals):
+    goal_infos = self._prepare_goal_infos(context, goals)
+    tasks = self._task_dependencies(goal_infos)
+    context.log.info('Executing tasks in goals {goals} with up to {count} tasks at once'
+                     .format(goals=', '.join(goal_info.goal.name for goal_info in goal_infos),
+                             count=self._num_workers))
+
+    if context.options.for_global_scope().explain:
+      self._explain(tasks)
+      return
+
+    pants_workdir = context.options.for_global_scope().pants_workdir
+    serialized_keys = set(key for key, (goal, _, _, _) in tasks.items() if goal.serialize)
+    task_errors = []
+
+    def run_task(goal, name, task_type):
+      try:
+        # NB: Each task gets a goal workunit of its own, so that its workunit path matches the one
+        # the RoundEngine would give it.
+        with context.new_workunit(name=goal.name, labels=[WorkUnit.GOAL]):
+          with context.new_workunit(name=name, labels=[WorkUnit.TASK]):
+            task = task_type(context, os.path.join(pants_workdir, goal.name, name))
+            task.execute()
+      except Exception as e:
+        task_errors.append(e)
+        raise
+
+    def on_done(key):
+      serialized_keys.discard(key)
+      if not serialized_keys:
+        context.release_lock()
+
+    jobs = []
+    for key, (goal, name, task_type, dependency_keys) in tasks.items():
+      jobs.append(Job(key,
+                      lambda goal=goal, name=name, task_type=task_type: run_task(goal, name,
+                                                                                  task_type),
+                      dependency_keys,
+                      on_success=lambda key=key: on_done(key),
+                      on_failure=lambda key=key: on_done(key)))
+    execution_graph = ExecutionGraph(jobs)
+
+    # Subprocesses must be forked before any threads are started, see SubprocPool.
+    SubprocPool.foreground()
+
+    if serialized_keys:
+      context.acquire_lock()
+    try:
+      with context.new_workunit(name='parallel-tasks') as workunit:
+        # Use the parent of this workunit, so that each task's workunits nest just as they would
+        # under the RoundEngine.
+        pool = WorkerPool(workunit.parent, context.run_tracker, self._num_workers)
+        try:
+          execution_graph.execute(pool, context.log)
+        except ExecutionFailure as e:
+          # Prefer the error raised by the first task to fail, which may carry an exit code.
+          for task_error in task_errors:
+            if isinstance(task_error, TaskError):
+              raise task_error
+          raise TaskError(str(e))
+        finally:
+          pool.shutdown()
+    finally:
+      context.release_lock()
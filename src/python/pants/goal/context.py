@@ -7,6 +7,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 import sys
+import threading
 from collections import defaultdict
 from contextlib import contextmanager
 
@@ -80,6 +81,7 @@ class Context(object):
     self._spec_excludes = spec_excludes
     self._replace_targets(target_roots)
     self._synthetic_targets = defaultdict(list)
+    self._build_graph_lock = threading.RLock()
 
   @property
   def options(self):
@@ -96,6 +98,16 @@ class Context(object):
     """Returns the Products manager for the current run."""
     return self._products
 
+  @property
+  def build_graph_lock(self):
+    """Returns the lock guarding the build graph, for tasks that may run concurrently.
+
+    The context's own methods that read or inject targets hold it already; tasks that mutate
+    targets directly, eg: by injecting dependencies, must hold it while they do unless they are in
+    a goal that never runs concurrently with others, eg: gen.
+    """
+    return self._build_graph_lock
+
   @property
   def target_roots(self):
     """Returns the targets specified on the command line.
@@ -245,15 +257,16 @@ class Context(object):
     if dependencies:
       dependencies = [dep.address for dep in dependencies]
 
-    self.build_graph.inject_synthetic_target(address=address,
-                                             target_type=target_type,
-                                             dependencies=dependencies,
-                                             derived_from=derived_from,
-                                             **kwargs)
-    new_target = self.build_graph.get_target(address)
+    with self._build_graph_lock:
+      self.build_graph.inject_synthetic_target(address=address,
+                                               target_type=target_type,
+                                               dependencies=dependencies,
+                                               derived_from=derived_from,
+                                               **kwargs)
+      new_target = self.build_graph.get_target(address)
 
-    if derived_from:
-      self._synthetic_targets[derived_from].append(new_target)
+      if derived_from:
+        self._synthetic_targets[derived_from].append(new_target)
 
     return new_target
 
@@ -269,15 +282,15 @@ class Context(object):
                           `False` or preorder by default.
     :returns: A list of matching targets.
     """
-    target_root_addresses = [target.address for target in self.target_roots]
-    target_set = self._collect_targets(self.target_roots, postorder=postorder)
+    with self._build_graph_lock:
+      target_set = self._collect_targets(self.target_roots, postorder=postorder)
 
-    synthetics = OrderedSet()
-    for derived_from, synthetic_targets in self._synthetic_targets.items():
-      if derived_from in target_set or derived_from in synthetics:
-        synthetics.update(synthetic_targets)
+      synthetics = OrderedSet()
+      for derived_from, synthetic_targets in self._synthetic_targets.items():
+        if derived_from in target_set or derived_from in synthetics:
+          synthetics.update(synthetic_targets)
 
-    synthetic_set = self._collect_targets(synthetics, postorder=postorder)
+      synthetic_set = self._collect_targets(synthetics, postorder=postorder)
 
     target_set.update(synthetic_set)
 
@@ -304,9 +317,10 @@ class Context(object):
   def resolve(self, spec):
     """Returns an iterator over the target(s) the given address points to."""
     address = SyntheticAddress.parse(spec)
-    # NB: This is an idempotent, short-circuiting call.
-    self.build_graph.inject_address_closure(address)
-    return self.build_graph.transitive_subgraph_of_addresses([address])
+    with self._build_graph_lock:
+      # NB: This is an idempotent, short-circuiting call.
+      self.build_graph.inject_address_closure(address)
+      return self.build_graph.transitive_subgraph_of_addresses([address])
 
   def scan(self, root=None):
     """Scans and parses all BUILD files found under ``root``.
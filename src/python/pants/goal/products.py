@@ -6,20 +6,45 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
-from collections import defaultdict
+import threading
+from collections import defaultdict, deque
 
 from twitter.common.collections import OrderedSet
 
 
 class UnionProducts(object):
-  """Here, products for a target are the ordered union of the products for its transitive deps."""
+  """Here, products for a target are the ordered union of the products for its transitive deps.
+
+  The transitive products of a target are ordered by a breadth-first walk of its closure, as
+  `Target.closure(bfs=True)` orders it.  They are memoized when first requested, until products
+  are next added for the target or one of its transitive deps.  Note that the memoized products
+  assume the dependencies of the targets don't change once products are requested for them.
+  """
   def __init__(self):
     # A map of target to OrderedSet of product members.
     self._products_by_target = defaultdict(OrderedSet)
+    # The first target each product member was added for.
+    self._target_by_product = {}
+
+    self._lock = threading.Lock()
+    # A map of target to a tuple of its transitive product members, in order.
+    self._transitive_products_by_target = {}
+    # A map of target to the targets whose memoized products include its products, ie: those
+    # with it in their closure.  May include targets whose memo was since discarded.
+    self._memoized_dependees_by_target = defaultdict(set)
 
   def add_for_target(self, target, products):
     """Updates the products for a particular target, adding to existing entries."""
-    self._products_by_target[target].update(products)
+    target_products = self._products_by_target[target]
+    with self._lock:
+      added = False
+      for product in products:
+        if product not in target_products:
+          target_products.add(product)
+          self._target_by_product.setdefault(product, target)
+          added = True
+      if added:
+        self._invalidate(target)
 
   def add_for_targets(self, targets, products):
     """Updates the products for the given targets, adding to existing entries."""
@@ -29,30 +54,68 @@ class UnionProducts(object):
 
   def get_for_target(self, target):
     """Gets the transitive product deps for the given target."""
-    return self.get_for_targets([target])
+    return OrderedSet(self._transitive_products(target))
 
   def get_for_targets(self, targets):
     """Gets the transitive product deps for the given targets, in order."""
     products = OrderedSet()
-    visited = set()
-    # Walk the targets transitively to aggregate their products. We do a breadth-first
     for target in targets:
-      for dep in target.closure(bfs=True):
-        if dep not in visited:
-          products.update(self._products_by_target[dep])
-          visited.add(dep)
+      products.update(self._transitive_products(target))
     return products
 
+  def get_for_targets_by_target(self, targets):
+    """Gets the transitive product deps of each of the given targets.
+
+    Unlike `get_for_target`, the products are returned as tuples that share the memoized results,
+    so no per-target copies are made.
+
+    :param targets: An iterable of targets.
+    :returns: A dict from each target to a tuple of its transitive product deps, in order.
+    """
+    return {target: self._transitive_products(target) for target in targets}
+
   def target_for_product(self, product):
     """Looks up the target key for a product.
 
     :param product: The product to search for
     :return: None if there is no target for the product
     """
-    for target, products in self._products_by_target.items():
-      if product in products:
-        return target
-    return None
+    return self._target_by_product.get(product)
+
+  def _invalidate(self, target):
+    """Discards the memoized products of the target and of its transitive dependees."""
+    self._transitive_products_by_target.pop(target, None)
+    for dependee in self._memoized_dependees_by_target.pop(target, ()):
+      self._transitive_products_by_target.pop(dependee, None)
+
+  def _transitive_products(self, target):
+    with self._lock:
+      products = self._transitive_products_by_target.get(target)
+      if products is None:
+        products = self._memoize(target)
+      return products
+
+  def _memoize(self, target):
+    # Walk the target's closure breadth-first, as `Target.closure(bfs=True)` does, to aggregate
+    # the products of its transitive deps.
+    products = []
+    seen_products = set()
+    visited = {target}
+    to_walk = deque([target])
+    while to_walk:
+      dep = to_walk.popleft()
+      self._memoized_dependees_by_target[dep].add(target)
+      for product in self._products_by_target.get(dep, ()):
+        if product not in seen_products:
+          seen_products.add(product)
+          products.append(product)
+      for dep_dep in dep.dependencies:
+        if dep_dep not in visited:
+          visited.add(dep_dep)
+          to_walk.append(dep_dep)
+    products = tuple(products)
+    self._transitive_products_by_target[target] = products
+    return products
 
   def __str__(self):
     return "UnionProducts({})".format(self._products_by_target)
@@ -63,6 +63,8 @@ class RunTracker(Subsystem):
              help='Number of threads for foreground work.')
     register('--num-background-workers', advanced=True, type=int, default=8,
              help='Number of threads for background work.')
+    register('--num-subprocess-workers', advanced=True, type=int, default=None,
+             help='Number of processes for subprocess work.  Defaults to the number of cpus.')
 
   def __init__(self, *args, **kwargs):
     super(RunTracker, self).__init__(*args, **kwargs)
@@ -126,7 +128,7 @@ class RunTracker(Subsystem):
     self._background_root_workunit = None
 
     # Trigger subproc pool init while our memory image is still clean (see SubprocPool docstring)
-    SubprocPool.foreground()
+    SubprocPool.foreground(num_workers=self.get_options().num_subprocess_workers)
 
     self._aborted = False
 
@@ -0,0 +1,198 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from six import binary_type
+
+from pants.subsystem.subsystem import Subsystem
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import safe_mkdir
+
+
+logger = logging.getLogger(__name__)
+
+
+class JarIndex(object):
+  """An index of the entries of jar (and zip) files.
+
+  Listing a jar's entries means reading and parsing its central directory, which across a classpath
+  of many third party jars adds up to seconds per run.  The index lists each jar at most once per
+  run, and can optionally persist the sorted entry names of each jar so that later runs only re-read
+  the jars whose size or mtime has changed since.  Each jar is persisted to its own small file, so
+  a run only loads the entries of the jars it asks about.
+
+  As with git's index, a jar modified in the same second it was listed is not persisted, since a
+  later modification in that second might not change its size or mtime.
+  """
+
+  # Bump this if the on-disk format of persisted entries changes.
+  _VERSION = 1
+
+  class _Listing(object):
+    def __init__(self, entries):
+      self.entries = entries
+      self.names = frozenset(entries)
+      self.classes = frozenset(name for name in entries if name.endswith('.class'))
+
+  def __init__(self, persist_dir=None):
+    """
+    :param string persist_dir: If specified, a directory to load previously listed entries from and
+                               persist newly listed entries to.
+    """
+    self._persist_dir = persist_dir
+    self._lock = threading.Lock()
+    self._listings = {}  # {(realpath, size, mtime): _Listing}
+
+    # The number of jars listed, and the number whose persisted entries were reused.
+    self.listed = 0
+    self.reused = 0
+
+  def entries(self, path):
+    """Returns the names of the entries in the jar at path, sorted.
+
+    Entry names are decoded as utf-8, since in practice jars are found with both utf-8 and
+    undeclared encodings of their entry names.
+
+    :param string path: The path of the jar.
+    :raises: `OSError` if path can't be read, or `zipfile.BadZipfile` if it is not a zip.
+    """
+    return self._listing(path).entries
+
+  def classes(self, path):
+    """Returns the frozenset of the names of the `.class` entries in the jar at path.
+
+    :param string path: The path of the jar.
+    """
+    return self._listing(path).classes
+
+  def contains(self, path, name):
+    """Returns True if the jar at path has an entry with the given name.
+
+    :param string path: The path of the jar.
+    :param string name: The entry name, eg: `org/pantsbuild/Main.class`.
+    """
+    return name in self._listing(path).names
+
+  def find_provider(self, name, jars):
+    """Returns the first of the given jars with an entry with the given name, or None.
+
+    As when classloading, earlier jars take precedence over later ones.
+
+    :param string name: The entry name, eg: `org/pantsbuild/Main.class`.
+    :param jars: An iterable of jar paths.
+    """
+    for jar in jars:
+      if self.contains(jar, name):
+        return jar
+    return None
+
+  def _listing(self, path):
+    realpath = os.path.realpath(path)
+    stat = os.stat(realpath)
+    key = (realpath, stat.st_size, stat.st_mtime)
+    with self._lock:
+      listing = self._listings.get(key)
+    if listing is None:
+      listing = self._load(key) or self._list(key)
+      with self._lock:
+        self._listings[key] = listing
+    return listing
+
+  def _list(self, key):
+    realpath, size, mtime = key
+    with open_zip(realpath, 'r') as jar:
+      entries = sorted(self._decode(name) for name in jar.namelist())
+    listing = self._Listing(entries)
+    with self._lock:
+      self.listed += 1
+    if self._persist_dir and int(mtime) < int(time.time()) - 1:
+      self._persist(key, entries)
+    return listing
+
+  @staticmethod
+  def _decode(name):
+    if isinstance(name, binary_type):
+      return name.decode('utf-8', 'replace')
+    return name
+
+  def _persist_path(self, realpath):
+    digest = hashlib.sha1(realpath.encode('utf-8')).hexdigest()
+    return os.path.join(self._persist_dir, '{}.json'.format(digest))
+
+  def _persist(self, key, entries):
+    realpath, size, mtime = key
+    persist_path = self._persist_path(realpath)
+    tmp_path = '{}.tmp.{}.{}'.format(persist_path, os.getpid(), threading.current_thread().ident)
+    try:
+      safe_mkdir(self._persist_dir)
+      with open(tmp_path, 'w') as fp:
+        json.dump({'version': self._VERSION,
+                   'path': realpath,
+                   'size': size,
+                   'mtime': mtime,
+                   'entries': entries},
+                  fp)
+      os.rename(tmp_path, persist_path)
+    except (IOError, OSError) as e:
+      logger.debug('Failed to persist the entries of {}: {}'.format(realpath, e))
+
+  def _load(self, key):
+    if not self._persist_dir:
+      return None
+    realpath, size, mtime = key
+    persist_path = self._persist_path(realpath)
+    if not os.path.exists(persist_path):
+      return None
+    try:
+      with open(persist_path, 'r') as fp:
+        data = json.load(fp)
+      if (data.get('version') != self._VERSION or
+          (data['path'], data['size'], data['mtime']) != key):
+        return None
+      listing = self._Listing(data['entries'])
+    except (ValueError, KeyError, TypeError) as e:
+      logger.warn('Ignoring corrupt jar index entry at {}: {}'.format(persist_path, e))
+      return None
+    with self._lock:
+      self.reused += 1
+    return listing
+
+
+class JarIndexing(Subsystem):
+  """Configures the JarIndex shared by the tasks that scan the entries of classpath jars."""
+
+  @classmethod
+  def scope_qualifier(cls):
+    return 'jar-index'
+
+  @classmethod
+  def register_options(cls, register):
+    super(JarIndexing, cls).register_options(register)
+    register('--persist', action='store_true', default=True, advanced=True,
+             help='Persist the entries of listed jars so that later runs only re-read the jars '
+                  'that have changed since.')
+    register('--persist-dir', advanced=True, metavar='<dir>',
+             default=os.path.join(register.bootstrap.pants_workdir, 'jar_index'),
+             help='The directory to persist jar entries to.')
+
+  def __init__(self, *args, **kwargs):
+    super(JarIndexing, self).__init__(*args, **kwargs)
+    self._index = None
+
+  @property
+  def index(self):
+    """The JarIndex shared by everything using this subsystem in this run."""
+    if self._index is None:
+      options = self.get_options()
+      self._index = JarIndex(persist_dir=options.persist_dir if options.persist else None)
+    return self._index
@@ -0,0 +1,779 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+from six import binary_type
+from six.moves import map
+
+from pants.java.jar.manifest import Manifest
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import safe_mkdir
+
+
+logger = logging.getLogger(__name__)
+
+
+# Zip entry general purpose flags: encrypted data, the deflate options and utf-8 entry names.
+_ENCRYPTED_FLAG = 0x1
+_DEFLATE_OPTIONS_FLAGS = 0x6
+_UTF8_FLAG = 0x800
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP_FILECOUNT_LIMIT = 0xFFFF
+
+# The extra field java's JarOutputStream marks the first entry of a jar with.
+_JAR_MAGIC = struct.pack(str('<2H'), 0xCAFE, 0)
+
+# The number of bytes copied at a time when copying entry data.
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _entry_name(info):
+  """Returns the name of the given zip entry, decoded as utf-8 as java does."""
+  name = info.filename
+  if isinstance(name, binary_type):
+    return name.decode('utf-8', 'replace')
+  if not info.flag_bits & _UTF8_FLAG:
+    # Under python 3 zipfile decodes names without the utf-8 flag as cp437.
+    try:
+      return name.encode('cp437').decode('utf-8')
+    except UnicodeError:
+      pass
+  return name
+
+
+def _data_offset(fp, info):
+  """Returns the offset of the data of the given zip entry in the zip open as fp."""
+  fp.seek(info.header_offset)
+  header = fp.read(zipfile.sizeFileHeader)
+  if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+    raise zipfile.BadZipfile('Bad local file header at offset {}'.format(info.header_offset))
+  fields = struct.unpack(zipfile.structFileHeader, header)
+  return info.header_offset + zipfile.sizeFileHeader + fields[10] + fields[11]
+
+
+def _copy(infile, outfile, length):
+  while length > 0:
+    data = infile.read(min(length, _CHUNK_SIZE))
+    if not data:
+      raise zipfile.BadZipfile('Unexpected end of file copying entry data.')
+    outfile.write(data)
+    length -= len(data)
+
+
+# The metadata of an entry written by _ZipOutput, named after the equivalent `zipfile.ZipInfo`
+# attributes so the two are interchangeable when copying entries.
+_EntryInfo = namedtuple('_EntryInfo', ['filename', 'header_offset', 'compress_type', 'CRC',
+                                       'compress_size', 'file_size', 'date_time', 'flag_bits',
+                                       'extra', 'comment'])
+
+
+class _ZipOutput(object):
+  """Writes the entries of a zip one after another, and then its central directory once.
+
+  Unlike `zipfile.ZipFile`, entry data is written exactly as given, which allows entries to be
+  copied from other zips without decompressing and recompressing them.
+  """
+
+  def __init__(self, fp, jar=False):
+    """
+    :param fp: The file to write the zip to.
+    :param bool jar: True to mark the zip as a jar, as java's JarOutputStream does.
+    """
+    self._fp = fp
+    self._jar = jar
+    self._infos = []
+
+  def write_entry(self, name, compress_type, crc, file_size, data, date_time, flag_bits=0,
+                  comment=b''):
+    """Writes an entry with the given (possibly compressed) data."""
+    info = self.start_entry(name, compress_type, crc, len(data), file_size, date_time,
+                            flag_bits=flag_bits, comment=comment)
+    self._fp.write(data)
+    return info
+
+  def start_entry(self, name, compress_type, crc, compress_size, file_size, date_time,
+                  flag_bits=0, comment=b''):
+    """Writes the local header of an entry, which the caller must follow with its data.
+
+    :returns: The `_EntryInfo` of the entry.
+    """
+    encoded_name = name.encode('utf-8')
+    flag_bits &= ~_UTF8_FLAG
+    if len(encoded_name) != len(name):
+      flag_bits |= _UTF8_FLAG
+    extra = _JAR_MAGIC if self._jar and not self._infos else b''
+    info = _EntryInfo(name, self._fp.tell(), compress_type, crc, compress_size, file_size,
+                      date_time, flag_bits, extra, comment)
+
+    local_extra = extra
+    if compress_size >= _ZIP64_LIMIT or file_size >= _ZIP64_LIMIT:
+      local_extra = struct.pack(str('<2H2Q'), 1, 16, file_size, compress_size) + extra
+      compress_size = file_size = _ZIP64_LIMIT
+    dosdate, dostime = self._dos_date_time(date_time)
+    self._fp.write(struct.pack(zipfile.structFileHeader, zipfile.stringFileHeader,
+                               self._version(local_extra != extra), 0, flag_bits, compress_type,
+                               dostime, dosdate, crc, compress_size, file_size,
+                               len(encoded_name), len(local_extra)))
+    self._fp.write(encoded_name)
+    self._fp.write(local_extra)
+    self._infos.append(info)
+    return info
+
+  def close(self, comment=b''):
+    """Writes the central directory, ending the zip."""
+    central_directory_offset = self._fp.tell()
+    for info in self._infos:
+      zip64_fields = []
+      file_size, compress_size, header_offset = (info.file_size, info.compress_size,
+                                                 info.header_offset)
+      if file_size >= _ZIP64_LIMIT:
+        zip64_fields.append(file_size)
+        file_size = _ZIP64_LIMIT
+      if compress_size >= _ZIP64_LIMIT:
+        zip64_fields.append(compress_size)
+        compress_size = _ZIP64_LIMIT
+      if header_offset >= _ZIP64_LIMIT:
+        zip64_fields.append(header_offset)
+        header_offset = _ZIP64_LIMIT
+      extra = info.extra
+      if zip64_fields:
+        extra = struct.pack(str('<2H{}Q'.format(len(zip64_fields))), 1, 8 * len(zip64_fields),
+                            *zip64_fields) + extra
+      version = self._version(bool(zip64_fields))
+      encoded_name = info.filename.encode('utf-8')
+      dosdate, dostime = self._dos_date_time(info.date_time)
+      self._fp.write(struct.pack(zipfile.structCentralDir, zipfile.stringCentralDir, version, 0,
+                                 version, 0, info.flag_bits, info.compress_type, dostime, dosdate,
+                                 info.CRC, compress_size, file_size, len(encoded_name), len(extra),
+                                 len(info.comment), 0, 0, 0, header_offset))
+      self._fp.write(encoded_name)
+      self._fp.write(extra)
+      self._fp.write(info.comment)
+
+    central_directory_end = self._fp.tell()
+    count = len(self._infos)
+    size = central_directory_end - central_directory_offset
+    offset = central_directory_offset
+    if count > _ZIP_FILECOUNT_LIMIT or size >= _ZIP64_LIMIT or offset >= _ZIP64_LIMIT:
+      self._fp.write(struct.pack(zipfile.structEndArchive64, zipfile.stringEndArchive64, 44, 45,
+                                 45, 0, 0, count, count, size, offset))
+      self._fp.write(struct.pack(zipfile.structEndArchive64Locator,
+                                 zipfile.stringEndArchive64Locator, 0, central_directory_end, 1))
+      count = min(count, _ZIP_FILECOUNT_LIMIT)
+      size = min(size, _ZIP64_LIMIT)
+      offset = min(offset, _ZIP64_LIMIT)
+    self._fp.write(struct.pack(zipfile.structEndArchive, zipfile.stringEndArchive, 0, 0, count,
+                               count, size, offset, len(comment)))
+    self._fp.write(comment)
+
+  @staticmethod
+  def _version(zip64):
+    return 45 if zip64 else 20
+
+  @staticmethod
+  def _dos_date_time(date_time):
+    year, month, day, hours, minutes, seconds = date_time
+    return (max(year - 1980, 0) << 9 | month << 5 | day,
+            hours << 11 | minutes << 5 | seconds // 2)
+
+
+# The data of an entry as it is stored in a zip, compressed or not.
+_Data = namedtuple('_Data', ['compress_type', 'crc', 'file_size', 'data'])
+
+
+def _compress(contents, compress):
+  crc = zlib.crc32(contents) & 0xFFFFFFFF
+  if not compress:
+    return _Data(zipfile.ZIP_STORED, crc, len(contents), contents)
+  # Unlike zlib.compress, compression objects release the GIL while compressing.
+  compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+  data = compressor.compress(contents) + compressor.flush()
+  return _Data(zipfile.ZIP_DEFLATED, crc, len(contents), data)
+
+
+class _FileSource(object):
+  """The contents of a file, optionally cached compressed in a `CompressedEntryCache`."""
+
+  def __init__(self, path, cache_key=None):
+    self.path = path
+    self.cache_key = cache_key
+
+  def read(self):
+    with open(self.path, 'rb') as fp:
+      return fp.read()
+
+
+class _BytesSource(object):
+  """In-memory contents."""
+
+  def __init__(self, contents):
+    self.contents = contents
+
+  def read(self):
+    return self.contents
+
+
+class _JarEntrySource(object):
+  """An entry of an existing jar, copied without decompressing and recompressing it."""
+
+  def __init__(self, jar_path, info):
+    self.jar_path = jar_path
+    self.info = info
+
+  def read(self):
+    with open_zip(self.jar_path, 'r') as jar:
+      return jar.read(self.info)
+
+  def read_data(self):
+    """Returns the `_Data` of the entry, or None if the jar no longer holds the entry.
+
+    Checks the entry's local header matches its expected name, crc and size, so an entry of a jar
+    replaced since it was listed is detected rather than copied from the wrong offset.
+    """
+    info = self.info
+    try:
+      with open(self.jar_path, 'rb') as fp:
+        fp.seek(info.header_offset)
+        header = fp.read(zipfile.sizeFileHeader)
+        if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+          return None
+        fields = struct.unpack(zipfile.structFileHeader, header)
+        name = fp.read(fields[10])
+        if (fields[7], fields[8], name) != (info.CRC, info.compress_size,
+                                            info.filename.encode('utf-8')):
+          return None
+        fp.seek(fields[11], os.SEEK_CUR)
+        data = fp.read(info.compress_size)
+    except (IOError, OSError):
+      return None
+    if len(data) != info.compress_size:
+      return None
+    return _Data(info.compress_type, info.CRC, info.file_size, data)
+
+
+class CompressedEntryCache(object):
+  """A persistent cache of the compressed contents of the files written to jars.
+
+  Files are cached in groups, eg: one group per target, each group being a jar of the compressed
+  contents of the group's files.  Each of its entries records the path, size and mtime of the file
+  it was compressed from in its comment, and is reused for as long as that file's size and mtime
+  are unchanged.  As with git's index, a file modified in the same second it was compressed is not
+  cached, since a later modification in that second might not change its size or mtime.
+  """
+
+  # Bump this if the on-disk format of cached entries changes.
+  _VERSION = 1
+
+  def __init__(self, cache_dir):
+    """
+    :param string cache_dir: The directory to keep cached entries in.
+    """
+    self._cache_dir = cache_dir
+    self._lock = threading.Lock()
+    self._groups = {}  # {key: (group path, {entry path: (file path, size, mtime, ZipInfo)})}
+
+  def _group_path(self, key):
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(self._cache_dir, '{}.jar'.format(digest))
+
+  def _header(self, key):
+    return {'version': self._VERSION, 'key': key}
+
+  def _group(self, key):
+    with self._lock:
+      group = self._groups.get(key)
+    if group is None:
+      group_path = self._group_path(key)
+      group = (group_path, self._load(key, group_path))
+      with self._lock:
+        self._groups[key] = group
+    return group
+
+  def _load(self, key, group_path):
+    if not os.path.exists(group_path):
+      return {}
+    group = {}
+    try:
+      with open_zip(group_path, 'r') as jar:
+        if json.loads(jar.comment.decode('utf-8')) != self._header(key):
+          return {}
+        for info in jar.infolist():
+          path, size, mtime = json.loads(info.comment.decode('utf-8'))
+          group[_entry_name(info)] = (path, size, mtime, info)
+    except (IOError, zipfile.BadZipfile, ValueError, TypeError) as e:
+      logger.warn('Ignoring corrupt compressed entry cache at {}: {}'.format(group_path, e))
+      return {}
+    return group
+
+  def lookup(self, key, entry_path, path, stat):
+    """Returns a `_JarEntrySource` for the cached contents of a file, or None if not cached.
+
+    :param string key: The group the file was cached in.
+    :param string entry_path: The path of the file's entry in the jar being written.
+    :param string path: The path of the file.
+    :param stat: The current `os.stat` of the file.
+    """
+    group_path, group = self._group(key)
+    cached = group.get(entry_path)
+    if cached is None or tuple(cached[:3]) != (path, stat.st_size, stat.st_mtime):
+      return None
+    info = cached[3]
+    return _JarEntrySource(group_path, _EntryInfo(
+      entry_path, info.header_offset, info.compress_type, info.CRC, info.compress_size,
+      info.file_size, info.date_time, info.flag_bits, b'', b''))
+
+  def update(self, jar_path, written):
+    """Caches the compressed files written to a jar, rewriting the groups that changed.
+
+    :param string jar_path: The path of the jar the files were written to.
+    :param written: A list of (key, path, stat, info) tuples for each file written to the jar, with
+                    the `_EntryInfo` of its (compressed) entry.
+    """
+    by_key = OrderedDict()
+    racy = int(time.time()) - 1
+    for key, path, stat, info in written:
+      if int(stat.st_mtime) < racy:
+        by_key.setdefault(key, []).append((path, stat, info))
+
+    for key, entries in by_key.items():
+      cached = dict((entry_path, tuple(cached[:3]))
+                    for entry_path, cached in self._group(key)[1].items())
+      current = dict((info.filename, (path, stat.st_size, stat.st_mtime))
+                     for path, stat, info in entries)
+      if cached == current:
+        continue
+      try:
+        self._write_group(key, jar_path, entries)
+      except (IOError, OSError, zipfile.BadZipfile) as e:
+        logger.debug('Failed to cache the compressed entries of {}: {}'.format(key, e))
+      with self._lock:
+        self._groups.pop(key, None)
+
+  def _write_group(self, key, jar_path, entries):
+    safe_mkdir(self._cache_dir)
+    group_path = self._group_path(key)
+    tmp_path = '{}.tmp.{}.{}'.format(group_path, os.getpid(), threading.current_thread().ident)
+    try:
+      with open(jar_path, 'rb') as infile:
+        with open(tmp_path, 'wb') as outfile:
+          output = _ZipOutput(outfile)
+          for path, stat, info in entries:
+            comment = json.dumps([path, stat.st_size, stat.st_mtime]).encode('utf-8')
+            output.start_entry(info.filename, info.compress_type, info.CRC,
+                               info.compress_size, info.file_size, info.date_time,
+                               flag_bits=info.flag_bits, comment=comment)
+            infile.seek(_data_offset(infile, info))
+            _copy(infile, outfile, info.compress_size)
+          output.close(comment=json.dumps(self._header(key)).encode('utf-8'))
+      os.rename(tmp_path, group_path)
+    finally:
+      if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+
+
+class JarWriter(object):
+  """Writes a jar in-process, as the jar-tool does but without recompressing compressed entries.
+
+  Entries are gathered from the jar being updated, if any, followed by files, directories and
+  in-memory contents and then the entries of other jars.  Entries whose paths match a skip pattern
+  are dropped, and the duplicates of a path are resolved by the action of the first policy whose
+  pattern matches the path, or else by the default action.  The manifest is written first and
+  parent directory entries are written ahead of the entries they hold, as with the jar-tool.
+
+  The entries of other jars are copied byte-for-byte, as are the files found unchanged in the
+  `CompressedEntryCache`, if one is given.  All other entries are read and compressed on a pool of
+  threads while the jar is written, and the jar's central directory is written once at the end.
+  """
+
+  class Error(Exception):
+    """Indicates an error writing a jar."""
+
+  class DuplicateEntryError(Error):
+    """Raised by the `THROW` action when a duplicate entry is encountered."""
+
+    def __init__(self, path):
+      super(JarWriter.DuplicateEntryError, self).__init__(
+        'Duplicate entry encountered for path {}'.format(path))
+      self.path = path
+
+  # The same actions for duplicate entries the jar-tool takes.
+  SKIP = 'SKIP'
+  REPLACE = 'REPLACE'
+  CONCAT = 'CONCAT'
+  THROW = 'THROW'
+
+  _ACTIONS = frozenset((SKIP, REPLACE, CONCAT, THROW))
+
+  CREATED_BY = 'org.pantsbuild.tools.jar.JarBuilder'
+
+  # The number of entries handed to a compressing thread at a time.
+  _CHUNK_ITEMS = 16
+
+  def __init__(self, path, update=False, compress=True, skip_patterns=None, default_action=SKIP,
+               policies=None, cache=None, max_workers=None):
+    """
+    :param string path: The path to write the jar to.
+    :param bool update: True to add to the existing jar at path, if any, rather than replace it.
+    :param bool compress: True to compress new entries; otherwise they are stored.
+    :param skip_patterns: An optional list of compiled regexes matching entry paths to drop.
+    :param string default_action: The action to take for duplicate entries no policy applies to.
+    :param policies: An optional list of (compiled regex, action) pairs; the action of the first
+                     whose regex matches an entry path is taken for duplicates of that path.
+    :param cache: An optional `CompressedEntryCache` to reuse the compressed contents of files
+                  from, used when `compress` is True.
+    :param int max_workers: The maximum number of threads compressing entries at once; defaults to
+                            the number of cpus.
+    """
+    self._path = path
+    self._update = update
+    self._compress = compress
+    self._skip_patterns = list(skip_patterns or ())
+    self._default_action = self._validate_action(default_action)
+    self._policies = [(pattern, self._validate_action(action))
+                      for pattern, action in policies or ()]
+    self._cache = cache if compress else None
+    self._max_workers = max_workers or multiprocessing.cpu_count()
+
+    self._additions = []  # [(entry path, source)]
+    self._jars = []
+    self._manifest = None
+    self._main = None
+    self._classpath = None
+
+  @classmethod
+  def _validate_action(cls, action):
+    if action not in cls._ACTIONS:
+      raise ValueError('Unrecognized duplicate action: {}'.format(action))
+    return action
+
+  def main(self, main):
+    """Specifies a Main-Class entry for the jar's manifest."""
+    self._main = main
+
+  def classpath(self, classpath):
+    """Specifies a Class-Path entry for the jar's manifest.
+
+    :param list classpath: A list of paths.
+    """
+    self._classpath = list(classpath)
+
+  def write(self, src, dest=None, cache_key=None):
+    """Adds the file at src to the jar at the dest path.
+
+    If src is a directory its descendant files are added instead, at their paths relative to src,
+    prefixed by dest if specified.
+
+    :param string src: The path of a file or directory.
+    :param string dest: The path of the entry in the jar.
+    :param string cache_key: An optional key to cache the compressed contents of the file(s) under.
+    """
+    if not os.path.isdir(src):
+      if dest == Manifest.PATH:
+        with open(src, 'rb') as fp:
+          self._manifest = fp.read()
+      else:
+        self._additions.append((dest, _FileSource(src, cache_key)))
+      return
+
+    prefix = '{}/'.format(dest.rstrip('/')) if dest else ''
+    for root, dirs, files in os.walk(src, followlinks=True):
+      dirs.sort()
+      relroot = os.path.relpath(root, src).replace(os.sep, '/')
+      relroot = '' if relroot == '.' else relroot + '/'
+      for filename in sorted(files):
+        relpath = relroot + filename
+        if relpath != Manifest.PATH:
+          self._additions.append((prefix + relpath,
+                                  _FileSource(os.path.join(root, filename), cache_key)))
+
+  def writestr(self, path, contents):
+    """Adds an entry at path holding the given bytes."""
+    if path == Manifest.PATH:
+      self._manifest = contents
+    else:
+      self._additions.append((path, _BytesSource(contents)))
+
+  def writejar(self, jar):
+    """Adds all the entries of the given jar, save for its manifest."""
+    self._jars.append(jar)
+
+  def close(self):
+    """Writes the jar, replacing the file at its path if any.
+
+    :raises: `JarWriter.Error` if the jar could not be written.
+    """
+    entries = OrderedDict()
+    existing_manifest = None
+    if self._update and os.path.isfile(self._path) and os.path.getsize(self._path) > 0:
+      existing_manifest = self._add_jar_entries(entries, self._path, read_manifest=True)
+    for path, source in self._additions:
+      entries.setdefault(path, []).append(source)
+    for jar in self._jars:
+      self._add_jar_entries(entries, jar)
+
+    manifest = self._manifest_contents(existing_manifest)
+    resolved = []
+    for path, sources in entries.items():
+      source = self._resolve(path, sources)
+      if source is not None:
+        resolved.append((path, source))
+
+    safe_mkdir(os.path.dirname(os.path.abspath(self._path)))
+    tmp_path = '{}.tmp.{}.{}'.format(self._path, os.getpid(), threading.current_thread().ident)
+    try:
+      with open(tmp_path, 'wb') as outfile:
+        written = self._write_entries(outfile, manifest, resolved)
+      os.rename(tmp_path, self._path)
+    except (IOError, OSError, zipfile.BadZipfile) as e:
+      raise self.Error('Failed to write {}: {}'.format(self._path, e))
+    finally:
+      if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+
+    if self._cache is not None:
+      self._cache.update(self._path, written)
+
+  def _add_jar_entries(self, entries, jar_path, read_manifest=False):
+    """Adds the file entries of the given jar to entries, returning its manifest if asked to."""
+    manifest = None
+    try:
+      with open_zip(jar_path, 'r') as jar:
+        for info in jar.infolist():
+          path = _entry_name(info)
+          if path == Manifest.PATH:
+            if read_manifest:
+              manifest = jar.read(info)
+          elif not path.endswith('/'):
+            if info.flag_bits & _ENCRYPTED_FLAG:
+              raise self.Error('Cannot copy the encrypted entry {} of {}'.format(path, jar_path))
+            entries.setdefault(path, []).append(_JarEntrySource(jar_path, info))
+    except (IOError, zipfile.BadZipfile) as e:
+      raise self.Error('Failed to read {}: {}'.format(jar_path, e))
+    return manifest
+
+  def _resolve(self, path, sources):
+    """Returns the source of the entry to write at path, or None if no entry should be written."""
+    if any(pattern.search(path) for pattern in self._skip_patterns):
+      return None
+    if len(sources) == 1:
+      return sources[0]
+
+    action = self._default_action
+    for pattern, policy_action in self._policies:
+      if pattern.search(path):
+        action = policy_action
+        break
+    if action == self.SKIP:
+      return sources[0]
+    if action == self.REPLACE:
+      return sources[-1]
+    if action == self.CONCAT:
+      return _BytesSource(b''.join(source.read() for source in sources))
+    raise self.DuplicateEntryError(path)
+
+  def _manifest_contents(self, existing_manifest):
+    """Returns the manifest to write, as the jar-tool would.
+
+    An existing manifest is kept as is unless a custom manifest, main or classpath is specified,
+    in which case the manifest is rendered from those, with default entries for the rest.
+    """
+    if self._manifest is None and self._main is None and self._classpath is None:
+      if existing_manifest is not None:
+        return existing_manifest
+    sections = _parse_manifest(self._manifest or b'')
+    main_attributes = sections[0]
+    _set_attribute(main_attributes, Manifest.MANIFEST_VERSION, '1.0', overwrite=False)
+    _set_attribute(main_attributes, Manifest.CREATED_BY, self.CREATED_BY, overwrite=False)
+    if self._main is not None:
+      _set_attribute(main_attributes, Manifest.MAIN_CLASS, self._main)
+    if self._classpath is not None:
+      paths = [path for entry in self._classpath for path in entry.split(os.pathsep) if path]
+      _set_attribute(main_attributes, Manifest.CLASS_PATH, ' '.join(paths))
+    return _render_manifest(sections)
+
+  def _write_entries(self, outfile, manifest, resolved):
+    """Writes the manifest and the resolved entries to outfile.
+
+    :returns: A list of (cache key, path, stat, info) tuples for the cacheable files written.
+    """
+    output = _ZipOutput(outfile, jar=True)
+    date_time = time.localtime(time.time())[:6]
+    directories = set()
+
+    def ensure_parent_directories(path):
+      components = path.split('/')[:-1]
+      for i in range(1, len(components) + 1):
+        directory = '/'.join(components[:i]) + '/'
+        if directory not in directories:
+          directories.add(directory)
+          output.write_entry(directory, zipfile.ZIP_STORED, 0, 0, b'', date_time)
+
+    def write_data(path, data):
+      ensure_parent_directories(path)
+      return output.write_entry(path, data.compress_type, data.crc, data.file_size, data.data,
+                                date_time)
+
+    write_data(Manifest.PATH, _compress(manifest, self._compress))
+
+    # Files are read and compressed, or read from the cache, in parallel and in the order they are
+    # written; the entries of other jars are copied here as their turn comes.
+    stats = {}
+    pending = []
+    for path, source in resolved:
+      if isinstance(source, _FileSource):
+        cached = None
+        if self._cache is not None and source.cache_key is not None:
+          stat = os.stat(source.path)
+          stats[path] = stat
+          cached = self._cache.lookup(source.cache_key, path, source.path, stat)
+        pending.append((source, cached, self._compress))
+      elif isinstance(source, _BytesSource):
+        pending.append((source, None, self._compress))
+
+    written = []
+    jar_fp = None
+    try:
+      with self._map(self._prepare, pending) as prepared:
+        for path, source in resolved:
+          if not isinstance(source, _JarEntrySource):
+            info = write_data(path, next(prepared))
+            if path in stats:
+              written.append((source.cache_key, source.path, stats[path], info))
+            continue
+
+          if jar_fp is None or jar_fp.name != source.jar_path:
+            if jar_fp is not None:
+              jar_fp.close()
+            jar_fp = open(source.jar_path, 'rb')
+          entry = source.info
+          ensure_parent_directories(path)
+          output.start_entry(path, entry.compress_type, entry.CRC, entry.compress_size,
+                             entry.file_size, entry.date_time,
+                             flag_bits=entry.flag_bits & _DEFLATE_OPTIONS_FLAGS)
+          jar_fp.seek(_data_offset(jar_fp, entry))
+          _copy(jar_fp, outfile, entry.compress_size)
+    finally:
+      if jar_fp is not None:
+        jar_fp.close()
+
+    output.close()
+    return written
+
+  @staticmethod
+  def _prepare(item):
+    source, cached, compress = item
+    if cached is not None:
+      data = cached.read_data()
+      if data is not None:
+        return data
+    return _compress(source.read(), compress)
+
+  @contextmanager
+  def _map(self, func, items):
+    """Yields an iterator over func applied to each of items in order, using threads if worth it."""
+    workers = min(len(items), self._max_workers)
+    if workers < 2:
+      yield map(func, items)
+      return
+
+    # Items are mapped in chunks to amortize the cost of handing them to the pool.
+    chunks = [items[i:i + self._CHUNK_ITEMS] for i in range(0, len(items), self._CHUNK_ITEMS)]
+
+    def map_chunk(chunk):
+      return [func(item) for item in chunk]
+
+    def iter_results(results):
+      for _ in chunks:
+        # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+        # waiting on a condition variable, so we won't be able to ctrl-c out.
+        for result in results.next(timeout=1000000000):
+          yield result
+
+    pool = ThreadPool(processes=workers)
+    try:
+      yield iter_results(pool.imap(map_chunk, chunks))
+    except BaseException:
+      pool.terminate()
+      raise
+    else:
+      pool.close()
+    finally:
+      pool.join()
+
+
+def _parse_manifest(contents):
+  """Parses a manifest into a list of its sections, each a list of (name, value) attributes.
+
+  The first section holds the main attributes, and is present even if empty.
+  """
+  sections = [[]]
+  for line in re.split(br'\r\n|\r|\n', contents):
+    if not line:
+      if sections[-1]:
+        sections.append([])
+    elif line.startswith(b' ') and sections[-1]:
+      name, value = sections[-1][-1]
+      sections[-1][-1] = (name, value + line[1:])
+    else:
+      name, sep, value = line.partition(b': ')
+      if not sep:
+        raise JarWriter.Error('Invalid manifest line: {!r}'.format(line))
+      sections[-1].append((name, value))
+  if len(sections) > 1 and not sections[-1]:
+    sections.pop()
+  return [[(name.decode('utf-8'), value.decode('utf-8')) for name, value in section]
+          for section in sections]
+
+
+def _set_attribute(attributes, name, value, overwrite=True):
+  """Sets the value of the named attribute, whose name is matched case-insensitively."""
+  for i, (existing_name, _) in enumerate(attributes):
+    if existing_name.lower() == name.lower():
+      if overwrite:
+        attributes[i] = (existing_name, value)
+      return
+  attributes.append((name, value))
+
+
+def _render_manifest(sections):
+  """Renders manifest sections as java does, with CRLF line endings and lines of 72 bytes at most.
+
+  The main attributes start with the manifest version, as in java, followed by the rest sorted by
+  name rather than in java's hash table order.
+  """
+  version = Manifest.MANIFEST_VERSION.lower()
+  main_attributes = ([(name, value) for name, value in sections[0] if name.lower() == version] +
+                     sorted(((name, value) for name, value in sections[0]
+                             if name.lower() != version),
+                            key=lambda attribute: attribute[0].lower()))
+  lines = []
+  for attributes in [main_attributes] + sections[1:]:
+    for name, value in attributes:
+      lines.extend(_wrap('{}: {}'.format(name, value).encode('utf-8')))
+    lines.append(b'')
+  return b''.join(line + b'\r\n' for line in lines)
+
+
+def _wrap(line):
+  if len(line) <= 72:
+    return [line]
+  return [line[:72]] + [b' ' + line[start:start + 71] for start in range(72, len(line), 71)]
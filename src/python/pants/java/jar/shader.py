@@ -10,7 +10,8 @@ from collections import namedtuple
 from contextlib import contextmanager
 
 from pants.java.executor import SubprocessExecutor
-from pants.util.contextutil import open_zip, temporary_file
+from pants.java.jar.jar_index import JarIndex
+from pants.util.contextutil import temporary_file
 
 
 # TODO(John Sirois): Support shading given an input jar and a set of user-supplied rules (these
@@ -114,24 +115,25 @@ class Shader(object):
           paths.add(os.path.relpath(package_path, path))
     return cls._iter_packages(paths)
 
-  @classmethod
-  def _iter_jar_packages(cls, path):
-    with open_zip(path) as jar:
-      paths = set()
-      for pathname in jar.namelist():
-        if cls._potential_package_path(pathname):
-          paths.add(os.path.dirname(pathname))
-      return cls._iter_packages(paths)
-
-  def __init__(self, jarjar, executor=None):
+  def _iter_jar_packages(self, path):
+    paths = set()
+    for pathname in self._jar_index.entries(path):
+      if self._potential_package_path(pathname):
+        paths.add(os.path.dirname(pathname))
+    return self._iter_packages(paths)
+
+  def __init__(self, jarjar, executor=None, jar_index=None):
     """Creates a `Shader` the will use the given `jarjar` jar to create shaded jars.
 
     :param unicode jarjar: The path to the jarjar jar.
     :param executor: An optional java `Executor` to use to create shaded jar files.  Defaults to a
                     `SubprocessExecutor` that uses the default java distribution.
+    :param jar_index: An optional `JarIndex` to list the entries of jars with.  Defaults to an
+                      unpersisted index private to this shader.
     """
     self._jarjar = jarjar
     self._executor = executor or SubprocessExecutor()
+    self._jar_index = jar_index or JarIndex()
     self._system_packages = None
 
   def _calculate_system_packages(self):
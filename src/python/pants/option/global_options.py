@@ -29,6 +29,20 @@ def register_global_options(register):
            help='Times tasks and goals and outputs a report.')
   register('-e', '--explain', action='store_true',
            help='Explain the execution of goals.')
+  register('--parallel-tasks', action='store_true', advanced=True,
+           help='Schedule tasks with a task-level execution graph, running tasks concurrently '
+                'unless one requires products from another or precedes it in a goal. Use with '
+                '--explain to see the parallel schedule.')
+  register('--parallel-task-workers', type=int, advanced=True, metavar='<count>',
+           help='The maximum number of tasks to run at once with --parallel-tasks. Defaults to '
+                'the number of cpus.')
+  register('--loop', action='store_true',
+           help='Keep running after the goals finish: poll BUILD and source files for edits and '
+                'run the goals again whenever they change, reusing the in-memory build graph. '
+                'Only the targets affected by edits are re-parsed and re-fingerprinted. Stop '
+                'with ctrl-c.')
+  register('--loop-poll-interval', type=float, advanced=True, default=0.5, metavar='<seconds>',
+           help='The number of seconds to wait between polls for edits with --loop.')
 
   # TODO: After moving to the new options system these abstraction leaks can go away.
   register('-k', '--kill-nailguns', action='store_true',
@@ -67,6 +81,35 @@ def register_global_options(register):
            help='The cache key generation. Bump this to invalidate every artifact for a scope.')
   register('--cache-compression', advanced=True, type=int, default=5, recursive=True,
            help='The gzip compression level for created artifacts.')
+  register('--cache-artifact-format', advanced=True, recursive=True,
+           choices=['tgz', 'framed'], default='tgz',
+           help='The format of created artifacts. "tgz" creates gzipped tarballs. "framed" creates '
+                'containers of individually compressed files, which are extracted in parallel '
+                'and, when fetched from a remote cache, while still downloading. Artifacts of '
+                'either format can be read regardless of this setting.')
+  register('--local-artifact-cache-layout', advanced=True, recursive=True,
+           choices=['tarball', 'content-addressed'], default='tarball',
+           help='How filesystem artifact caches store artifacts. "tarball" stores a compressed '
+                'tarball per artifact. "content-addressed" stores each distinct file once, no '
+                'matter how many artifacts or tasks produce it, and supports evicting the least '
+                'recently used artifacts with the clean-cache goal.')
+  register('--local-artifact-cache-hardlink', action='store_true', advanced=True, recursive=True,
+           help='Restore files from content-addressed artifact caches by hardlinking rather than '
+                'copying them. Restored files are read-only, so only enable this if no tool '
+                'modifies its outputs in place. Executable files are always copied.')
+  register('--local-artifact-cache-max-size', advanced=True, type=int, default=10 * 1024 ** 3,
+           metavar='<bytes>',
+           help='The size budget of each content-addressed artifact cache, enforced by the '
+                'clean-cache goal.')
+  register('--remote-artifact-cache-max-concurrent-requests', advanced=True, type=int, default=8,
+           recursive=True,
+           help='The maximum number of requests a task makes to a RESTful artifact cache at once '
+                'when reading many artifacts.')
+  register('--remote-artifact-cache-bulk-probe', advanced=True, action='store_true',
+           recursive=True,
+           help='Probe RESTful artifact caches for many artifacts in one POST to <url>/_probe. '
+                'Only servers that answer with an X-Pants-Bulk-Probe: 1 header are trusted; '
+                'others are probed one artifact at a time.')
   register('--print-exception-stacktrace', action='store_true',
            help='Print to console the full exception stack trace if encountered.')
   register('--fail-fast', action='store_true',
@@ -86,6 +129,35 @@ def register_global_options(register):
   register('--pants-support-fetch-timeout-secs', type=int, default=30, advanced=True, recursive=True,
            help='Timeout in seconds for url reads when fetching binary tools from the '
                 'repos specified by --pants-support-baseurls')
+  register('--build-file-code-cache', action='store_true', default=True, advanced=True,
+           help='Persist compiled BUILD file code, and the targets BUILD files free of side '
+                'effects define, in the workdir and reuse them for BUILD files whose contents '
+                'have not changed.')
+  register('--parallel-build-file-parsing', action='store_true', advanced=True,
+           help='Parse batches of BUILD files in parallel across the subprocess pool.  Only the '
+                'targets of BUILD files free of side effects are parsed in parallel, and only when '
+                '--build-file-code-cache is enabled.  The number of workers is controlled by '
+                '--run-tracker-num-subprocess-workers.')
+  register('--source-digest-cache', action='store_true', default=True, advanced=True,
+           help='Persist the digests of source files in the workdir, and only re-read the files '
+                'whose size, mtime or inode have changed since when fingerprinting targets.')
+  register('--dependee-index', action='store_true', default=True, advanced=True,
+           help='Persist an index of the dependencies declared in BUILD files in the workdir, and '
+                'only re-parse the BUILD files that have changed since when finding dependees.')
+  register('--source-owner-index', action='store_true', default=True, advanced=True,
+           help='Persist an index of the sources owned by the targets in each BUILD file in the '
+                'workdir, and only re-parse the BUILD files that have changed, or whose globs '
+                'match in directories whose listings have changed, when mapping sources to '
+                'targets.')
+  register('--source-hashing-workers', type=int, default=1, advanced=True, metavar='<count>',
+           help='Hash the sources of the targets a task is about to check for changes up front, '
+                'with this many threads.  By default, the sources of each target are hashed as it '
+                'is fingerprinted: hashing is CPU bound once files are in the page cache, so more '
+                'threads only help when reading sources is slow, eg: on a network file system.')
+  register('--invalidation-store', choices=['log', 'directory'], default='log', advanced=True,
+           help='Record the hashes of the targets each task has processed in a single log file per '
+                'task, or in one file per target set.  Hashes recorded in the per-target files are '
+                'imported into the log the first time it is used.')
   register('--build-file-rev',
            help='Read BUILD files from this scm rev instead of from the working tree.  This is '
            'useful for implementing pants-aware sparse checkouts.')
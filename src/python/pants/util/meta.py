@@ -21,4 +21,5 @@ Singleton = SingletonMetaclass(str('Singleton'), (object,), {})
 
 
 # Abstract base classes w/o __metaclass__ or meta =, just extend AbstractClass.
-AbstractClass = ABCMeta(str('AbstractClass'), (object,), {})
+# AbstractClass has empty __slots__ so that subclasses may use __slots__ too.
+AbstractClass = ABCMeta(str('AbstractClass'), (object,), {'__slots__': ()})
@@ -0,0 +1,98 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import tempfile
+import time
+import unittest
+
+from twitter.common.dirutil.fileset import Fileset
+
+from pants.backend.core.glob_engine import GlobEngine
+from pants.util.dirutil import safe_mkdir, safe_mkdir_for, safe_rmtree, touch
+
+
+class GlobEngineTest(unittest.TestCase):
+  def setUp(self):
+    self.root = tempfile.mkdtemp()
+    self.addCleanup(safe_rmtree, self.root)
+    for relpath in ('A.java', 'B.scala', '.hidden', 'a/C.java', 'a/.D.java', 'a/b/E.java',
+                    'a/b/F.txt', 'c/G.java', '.dot/H.java'):
+      self.touch(relpath)
+    safe_mkdir(os.path.join(self.root, 'empty'))
+    os.symlink(os.path.join(self.root, 'c'), os.path.join(self.root, 'a', 'link'))
+
+  def touch(self, relpath):
+    path = os.path.join(self.root, relpath)
+    safe_mkdir_for(path)
+    touch(path)
+
+  def age_tree(self):
+    """Backdates every directory's mtime so the engine may reuse their listings."""
+    past = time.time() - 60
+    for dirpath, _, _ in os.walk(self.root):
+      os.utime(dirpath, (past, past))
+
+  def assert_matches_fileset(self, method, *globspecs, **kw):
+    kw['root'] = self.root
+    expected = getattr(Fileset, method)(*globspecs, **dict(kw))
+    actual = getattr(GlobEngine(), method)(*globspecs, **dict(kw))
+    self.assertIsInstance(actual, Fileset)
+    self.assertEqual(sorted(expected), sorted(actual))
+
+  def test_globs(self):
+    self.assert_matches_fileset('globs', '*')
+    self.assert_matches_fileset('globs', '*.java', 'a/*.java')
+    self.assert_matches_fileset('globs', '.*', 'a/.*')
+    self.assert_matches_fileset('globs', '*/*.java', '*/b/*')
+    self.assert_matches_fileset('globs', 'A.java', 'missing.java', 'a/', 'missing/')
+    self.assert_matches_fileset('globs', '*.java', 'A.java')
+
+  def test_rglobs(self):
+    self.assert_matches_fileset('rglobs', '*')
+    self.assert_matches_fileset('rglobs', '*.java', '.*')
+    self.assert_matches_fileset('rglobs', 'a/*', 'a/b/F.txt')
+    self.assert_matches_fileset('rglobs', '*.java', follow_links=True)
+
+  def test_zglobs(self):
+    self.assert_matches_fileset('zglobs', '**/*')
+    self.assert_matches_fileset('zglobs', '**/*.java', 'a/b/')
+    self.assert_matches_fileset('zglobs', 'a/**/*.java', follow_links=True)
+
+  def test_lazy(self):
+    engine = GlobEngine()
+    fileset = engine.globs('*.py', root=self.root)
+    self.touch('late.py')
+    self.assertEqual(['late.py'], list(fileset))
+
+  def test_listings_reused(self):
+    self.age_tree()
+    engine = GlobEngine()
+    self.assertEqual(['a/C.java'], list(engine.globs('a/*.java', root=self.root)))
+    self.assertEqual(['a/C.java', 'a/b', 'a/link'], sorted(engine.globs('a/*', root=self.root)))
+    self.assertEqual(1, engine.listed)
+    self.assertEqual(1, engine.reused)
+
+  def test_changed_directory_relisted(self):
+    self.age_tree()
+    engine = GlobEngine()
+    self.assertEqual(['a/C.java'], list(engine.globs('a/*.java', root=self.root)))
+    self.touch('a/I.java')
+    self.assertEqual(['a/C.java', 'a/I.java'], sorted(engine.globs('a/*.java', root=self.root)))
+    self.assertEqual(2, engine.listed)
+
+  def test_pending_rglobs_walked_together(self):
+    self.age_tree()
+    engine = GlobEngine()
+    java = engine.rglobs('*.java', root=self.root)
+    txt = engine.rglobs('*.txt', root=self.root)
+    self.assertEqual(['.dot/H.java', 'A.java', 'a/C.java', 'a/b/E.java', 'c/G.java'],
+                     sorted(java))
+    listed = engine.listed
+    self.assertEqual(['a/b/F.txt'], sorted(txt))
+    self.assertEqual(listed, engine.listed)
+    self.assertEqual(0, engine.reused)
@@ -6,11 +6,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import pickle
 
 from pants.backend.core.wrapped_globs import Globs, RGlobs
 from pants.backend.jvm.targets.java_library import JavaLibrary
 from pants.base.address_lookup_error import AddressLookupError
 from pants.base.build_file_aliases import BuildFileAliases
+from pants.base.parse_context import ParseContext
 from pants_test.base_test import BaseTest
 
 
@@ -221,3 +223,16 @@ class FilesetRelPathWrapperTest(BaseTest):
     graph = self.context().scan(self.build_root)
     self.assertEqual(['fleem.java', 'morx.java'],
                      list(graph.get_target_from_spec('y').sources_relative_to_source_root()))
+
+  def test_pickled_globs_reglobbed(self):
+    fileset = Globs(ParseContext(rel_path='y', type_aliases={}))('*.java', exclude=['fleem.java'])
+    pickled = pickle.dumps(fileset, pickle.HIGHEST_PROTOCOL)
+    self.create_file('y/zork.java')
+    unpickled = pickle.loads(pickled)
+    self.assertEqual(['morx.java', 'zork.java'], sorted(unpickled))
+    self.assertEqual(fileset.filespec, unpickled.filespec)
+
+  def test_glob_arithmetic_not_pickled(self):
+    globs = Globs(ParseContext(rel_path='y', type_aliases={}))
+    with self.assertRaises(pickle.PicklingError):
+      pickle.dumps(globs('*.java') - ['fleem.java'], pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,177 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+from io import BytesIO
+from textwrap import dedent
+
+from pants.backend.jvm.tasks.jvm_compile.analysis_parser import ParseError
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_index import (ZincAnalysisIndex,
+                                                                           cached_parse)
+from pants.util.contextutil import temporary_dir
+
+
+ANALYSIS = dedent("""
+  format version: 5
+  output mode:
+  1 items
+  0 -> single
+  compile options:
+  1 items
+  0 -> -deprecation
+  products:
+  2 items
+  /src/A.scala -> /classes/A.class
+  /src/B.scala -> /classes/B.class
+  class names:
+  2 items
+  /src/A.scala -> A
+  /src/B.scala -> B
+  source stamps:
+  2 items
+  /src/A.scala -> hash(d1a7a6c3)
+  /src/B.scala -> hash(f4c2a8e0)
+  class names:
+  0 items
+  internal apis:
+  2 items
+  /src/A.scala -> rO0ABXNyABp4c2J0aS5hcGkuU291cmNlQVBJ
+  /src/B.scala -> rO0ABXNyABp4c2J0aS5hcGkuU291cmNlQVBJ
+  compilations:
+  1 items
+  0 -> rO0ABXNyABh4c2J0aS5hcGkuQ29tcGlsYXRpb24
+  """).lstrip().encode('utf-8')
+
+
+class ZincAnalysisIndexTest(unittest.TestCase):
+  def index(self, tmpdir, content=ANALYSIS):
+    path = os.path.join(tmpdir, 'analysis')
+    with open(path, 'wb') as fp:
+      fp.write(content)
+    return ZincAnalysisIndex.from_path(path)
+
+  def test_sections(self):
+    with temporary_dir() as tmpdir:
+      index = self.index(tmpdir)
+      self.assertEqual([b'output mode', b'compile options', b'products', b'class names',
+                        b'source stamps', b'class names', b'internal apis', b'compilations'],
+                       [section.name for section in index.sections])
+      self.assertEqual(2, index.count(b'products'))
+      self.assertEqual(2, index.count(b'class names'))
+      self.assertEqual(0, index.count(b'external apis'))
+
+      products = index.section(b'products')
+      self.assertEqual(b'products:\n2 items\n/src/A.scala -> /classes/A.class\n'
+                       b'/src/B.scala -> /classes/B.class\n',
+                       ANALYSIS[products.start:products.end])
+      self.assertEqual(len(ANALYSIS), index.sections[-1].end)
+
+  def test_sources(self):
+    with temporary_dir() as tmpdir:
+      self.assertEqual({'/src/A.scala', '/src/B.scala'}, self.index(tmpdir).sources())
+
+  def test_write_empty(self):
+    with temporary_dir() as tmpdir:
+      outfile = BytesIO()
+      self.index(tmpdir).write_empty(outfile)
+      self.assertEqual(dedent("""
+        format version: 5
+        output mode:
+        1 items
+        0 -> single
+        compile options:
+        1 items
+        0 -> -deprecation
+        products:
+        0 items
+        class names:
+        0 items
+        source stamps:
+        0 items
+        class names:
+        0 items
+        internal apis:
+        0 items
+        compilations:
+        1 items
+        0 -> rO0ABXNyABh4c2J0aS5hcGkuQ29tcGlsYXRpb24
+        """).lstrip().encode('utf-8'),
+        outfile.getvalue())
+
+  def test_not_an_analysis(self):
+    with temporary_dir() as tmpdir:
+      with self.assertRaises(ParseError):
+        self.index(tmpdir, b'')
+      with self.assertRaises(ParseError):
+        self.index(tmpdir, b'pcd entries:\n0 items\n')
+      with self.assertRaises(ParseError):
+        self.index(tmpdir, b'format version: 5\noutput mode:\n0 items\n')
+
+
+PRODUCTS = {'/src/A.scala': ['/classes/A.class']}
+
+
+class CachedParseTest(unittest.TestCase):
+  def setUp(self):
+    self.parses = 0
+
+  def parse(self):
+    self.parses += 1
+    return PRODUCTS
+
+  def write_analysis(self, path, content=ANALYSIS):
+    with open(path, 'wb') as fp:
+      fp.write(content)
+    # Backdate the analysis so its parse results may be persisted.
+    past = time.time() - 60
+    os.utime(path, (past, past))
+
+  def test_cached(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'analysis')
+      self.write_analysis(path)
+      for _ in range(2):
+        self.assertEqual(PRODUCTS, cached_parse(path, 'products', self.parse))
+      self.assertEqual(1, self.parses)
+      self.assertTrue(os.path.exists(os.path.join(tmpdir, 'analysis.products')))
+
+  def test_key(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'analysis')
+      self.write_analysis(path)
+      cached_parse(path, 'deps', self.parse, key='/classes')
+      cached_parse(path, 'deps', self.parse, key='/classes')
+      cached_parse(path, 'deps', self.parse, key='/other/classes')
+      self.assertEqual(2, self.parses)
+
+  def test_changed_analysis_reparsed(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'analysis')
+      self.write_analysis(path)
+      cached_parse(path, 'products', self.parse)
+      self.write_analysis(path, ANALYSIS + b'\n')
+      cached_parse(path, 'products', self.parse)
+      self.assertEqual(2, self.parses)
+
+  def test_recently_modified_analysis_not_persisted(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'analysis')
+      with open(path, 'wb') as fp:
+        fp.write(ANALYSIS)
+      cached_parse(path, 'products', self.parse)
+      self.assertFalse(os.path.exists(os.path.join(tmpdir, 'analysis.products')))
+
+  def test_corrupt(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'analysis')
+      self.write_analysis(path)
+      with open(os.path.join(tmpdir, 'analysis.products'), 'wb') as fp:
+        fp.write(b'garbage')
+      self.assertEqual(PRODUCTS, cached_parse(path, 'products', self.parse))
+      self.assertEqual(1, self.parses)
@@ -0,0 +1,86 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.backend.jvm.tasks.jvm_compile.scala.zinc_analysis_tools import ZincAnalysisTools
+from pants.util.contextutil import temporary_dir
+
+
+def analysis(*sources):
+  lines = [b'format version: 5', b'compile options:', b'1 items', b'0 -> -deprecation',
+           b'products:', '{} items'.format(len(sources)).encode('utf-8')]
+  lines.extend('{} -> {}.class'.format(source, source[:-6]).encode('utf-8') for source in sources)
+  lines.extend([b'source stamps:', '{} items'.format(len(sources)).encode('utf-8')])
+  lines.extend('{} -> hash(0)'.format(source).encode('utf-8') for source in sources)
+  lines.extend([b'compilations:', b'1 items', b'0 -> rO0ABXNy'])
+  return b'\n'.join(lines) + b'\n'
+
+
+class UnexpectedParse(Exception):
+  pass
+
+
+class RefusingParser(object):
+  """Stands in for the zinc analysis parser when a split or merge should not need to parse."""
+
+  def parse_from_path(self, infile_path):
+    raise UnexpectedParse(infile_path)
+
+
+class ZincAnalysisToolsTest(unittest.TestCase):
+  def setUp(self):
+    self.tools = ZincAnalysisTools(None, RefusingParser(), None)
+
+  def write(self, path, content):
+    with open(path, 'wb') as fp:
+      fp.write(content)
+    return path
+
+  def read(self, path):
+    with open(path, 'rb') as fp:
+      return fp.read()
+
+  def test_split_whole(self):
+    with temporary_dir() as tmpdir:
+      path = self.write(os.path.join(tmpdir, 'analysis'), analysis('/A.scala', '/B.scala'))
+      split = os.path.join(tmpdir, 'split')
+      catchall = os.path.join(tmpdir, 'catchall')
+      self.tools.split_to_paths(path, [(['/A.scala', '/B.scala', '/C.scala'], split)], catchall)
+      self.assertEqual(analysis('/A.scala', '/B.scala'), self.read(split))
+      self.assertEqual(analysis(), self.read(catchall))
+
+  def test_split_none(self):
+    with temporary_dir() as tmpdir:
+      path = self.write(os.path.join(tmpdir, 'analysis'), analysis('/A.scala'))
+      split = os.path.join(tmpdir, 'split')
+      catchall = os.path.join(tmpdir, 'catchall')
+      self.tools.split_to_paths(path, [(['/C.scala'], split)], catchall)
+      self.assertEqual(analysis(), self.read(split))
+      self.assertEqual(analysis('/A.scala'), self.read(catchall))
+
+  def test_split_partial_parses(self):
+    with temporary_dir() as tmpdir:
+      path = self.write(os.path.join(tmpdir, 'analysis'), analysis('/A.scala', '/B.scala'))
+      with self.assertRaises(UnexpectedParse):
+        self.tools.split_to_paths(path, [(['/A.scala'], os.path.join(tmpdir, 'split'))])
+
+  def test_merge_into_empty(self):
+    with temporary_dir() as tmpdir:
+      empty = self.write(os.path.join(tmpdir, 'empty'), analysis())
+      nonempty = self.write(os.path.join(tmpdir, 'nonempty'), analysis('/A.scala'))
+      merged = os.path.join(tmpdir, 'merged')
+      self.tools.merge_from_paths([empty, nonempty], merged)
+      self.assertEqual(analysis('/A.scala'), self.read(merged))
+
+  def test_merge_nonempty_parses(self):
+    with temporary_dir() as tmpdir:
+      a = self.write(os.path.join(tmpdir, 'a'), analysis('/A.scala'))
+      b = self.write(os.path.join(tmpdir, 'b'), analysis('/B.scala'))
+      with self.assertRaises(UnexpectedParse):
+        self.tools.merge_from_paths([a, b], os.path.join(tmpdir, 'merged'))
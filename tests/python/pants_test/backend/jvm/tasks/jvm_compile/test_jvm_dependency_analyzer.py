@@ -0,0 +1,55 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+from collections import defaultdict
+
+from pants.backend.jvm.targets.java_library import JavaLibrary
+from pants.backend.jvm.tasks.jvm_compile.jvm_dependency_analyzer import JvmDependencyAnalyzer
+from pants.goal.products import MultipleRootedProducts
+from pants_test.base_test import BaseTest
+
+
+class JvmDependencyAnalyzerTest(BaseTest):
+  def setUp(self):
+    super(JvmDependencyAnalyzerTest, self).setUp()
+    self.c = self.make_target('src/java/c', JavaLibrary, sources=['C.java'])
+    self.b = self.make_target('src/java/b', JavaLibrary, sources=['B.java'], dependencies=[self.c])
+    self.a = self.make_target('src/java/a', JavaLibrary, sources=['A.java'], dependencies=[self.b])
+    self.d = self.make_target('src/java/d', JavaLibrary, sources=['D.java'])
+
+    context = self.context(target_roots=[self.a, self.d])
+    context.products.safe_create_data('ivy_resolve_symlink_map', dict)
+    self.classes_by_target = context.products.get_data('classes_by_target',
+                                                       lambda: defaultdict(MultipleRootedProducts))
+    self.classes_dir = os.path.join(self.build_root, 'classes')
+    self.analyzer = JvmDependencyAnalyzer(context, 'fatal', 'fatal', False, [])
+
+  def test_transitive_deps(self):
+    transitive_deps_by_target = self.analyzer._compute_transitive_deps_by_target()
+
+    def transitive_deps(target):
+      return {t for t in (self.a, self.b, self.c, self.d) if t in transitive_deps_by_target[target]}
+
+    self.assertEqual({self.b, self.c}, transitive_deps(self.a))
+    self.assertEqual({self.c}, transitive_deps(self.b))
+    self.assertEqual(set(), transitive_deps(self.c))
+    self.assertEqual(set(), transitive_deps(self.d))
+
+  def test_targets_by_file(self):
+    self.classes_by_target[self.b].add_rel_paths(self.classes_dir, ['B.class'])
+    targets_by_file = self.analyzer._compute_targets_by_file()
+    self.assertEqual([self.a], list(targets_by_file[os.path.join(self.build_root,
+                                                                  'src/java/a/A.java')]))
+    self.assertEqual([self.b], list(targets_by_file[os.path.join(self.classes_dir, 'B.class')]))
+
+    # Classes registered by later compiles are mapped by later calls.
+    self.classes_by_target[self.b].add_rel_paths(self.classes_dir, ['B$1.class'])
+    self.classes_by_target[self.c].add_rel_paths(self.classes_dir, ['C.class'])
+    targets_by_file = self.analyzer._compute_targets_by_file()
+    self.assertEqual([self.b], list(targets_by_file[os.path.join(self.classes_dir, 'B$1.class')]))
+    self.assertEqual([self.c], list(targets_by_file[os.path.join(self.classes_dir, 'C.class')]))
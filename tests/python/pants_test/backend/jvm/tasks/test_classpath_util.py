@@ -112,3 +112,36 @@ class ClasspathUtilTest(BaseTest):
     classpath = ClasspathUtil.compute_classpath_for_target(b, classpath_product, [], ['default'])
 
     self.assertEqual([example_jar_path], classpath)
+
+  def test_compute_classpaths_for_targets(self):
+    c = self.make_target('c', JvmTarget)
+    b = self.make_target('b', JvmTarget, dependencies=[c], excludes=[Exclude('com.example', 'lib')])
+    a = self.make_target('a', JvmTarget, dependencies=[b])
+
+    classpath_product = UnionProducts()
+    example_jar_path = os.path.join(self.build_root, 'ivy/jars/com.example/lib/123.4.jar')
+    classes_path = os.path.join(self.build_root, 'classes/b')
+    extra_path = os.path.join(self.build_root, 'extra')
+    classpath_product.add_for_target(b, [('default', classes_path)])
+    classpath_product.add_for_target(c, [('default', example_jar_path)])
+
+    classpaths = ClasspathUtil.compute_classpaths_for_targets([a, c], classpath_product,
+                                                              [('default', extra_path)],
+                                                              ['default'])
+
+    self.assertEqual({a: [classes_path, extra_path], c: [example_jar_path, extra_path]},
+                     classpaths)
+    for target in (a, c):
+      self.assertEqual(classpaths[target],
+                       ClasspathUtil.compute_classpath_for_target(target, classpath_product,
+                                                                  [('default', extra_path)],
+                                                                  ['default']))
+
+  def test_compute_classpaths_for_targets_fails_on_paths_outside_buildroot(self):
+    a = self.make_target('a', JvmTarget)
+
+    classpath_product = UnionProducts()
+    classpath_product.add_for_target(a, [('default', os.path.join(self.build_root, '../outside'))])
+
+    with self.assertRaises(TaskError):
+      ClasspathUtil.compute_classpaths_for_targets([a], classpath_product, [], ['default'])
@@ -73,6 +73,10 @@ class TestContext(Context):
    or "closing".
    """
 
+    @property
+    def parent(self):
+      return None
+
     def output(self, name):
       return sys.stderr
 
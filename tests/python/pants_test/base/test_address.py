@@ -5,7 +5,9 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import copy
 import os
+import pickle
 import unittest
 from contextlib import contextmanager
 
@@ -117,6 +119,21 @@ class SyntheticAddressTest(BaseAddressTest):
     self.assert_address('', 'target', SyntheticAddress.parse(':target'))
     self.assert_address('a/b', 'target', SyntheticAddress.parse(':target', relative_to='a/b'))
 
+  def test_interned(self):
+    address = SyntheticAddress.parse('a/b:target')
+    self.assertIs(address, SyntheticAddress('a/b', 'target'))
+    self.assertIs(address, SyntheticAddress.parse(':target', relative_to='a/b'))
+    self.assertIsNot(address, SyntheticAddress.parse('a/b:other'))
+    with self.assertRaises(AttributeError):
+      address.foo = 'bar'
+
+  def test_copies_are_interned(self):
+    address = SyntheticAddress.parse('a/b:target')
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+      self.assertIs(address, pickle.loads(pickle.dumps(address, protocol)))
+    self.assertIs(address, copy.copy(address))
+    self.assertIs(address, copy.deepcopy(address))
+
 
 class BuildFileAddressTest(BaseAddressTest):
   def test_build_file_forms(self):
@@ -130,3 +147,23 @@ class BuildFileAddressTest(BaseAddressTest):
       build_file = FilesystemBuildFile(root_dir, relpath='')
       self.assert_address('', 'foo', BuildFileAddress(build_file, target_name='foo'))
       self.assertEqual(':foo', BuildFileAddress(build_file, target_name='foo').spec)
+
+  def test_interned(self):
+    with self.workspace('a/BUILD') as root_dir:
+      build_file = FilesystemBuildFile(root_dir, relpath='a')
+      address = BuildFileAddress(build_file)
+      self.assertIs(address, BuildFileAddress(build_file, target_name='a'))
+      self.assertEqual(address, SyntheticAddress.parse('a'))
+      self.assertIsNot(address, SyntheticAddress.parse('a'))
+
+      with self.workspace('a/BUILD') as other_root_dir:
+        other_build_file = FilesystemBuildFile(other_root_dir, relpath='a')
+        self.assertIs(other_build_file, BuildFileAddress(other_build_file).build_file)
+
+  def test_copies_are_interned(self):
+    with self.workspace('a/BUILD') as root_dir:
+      address = BuildFileAddress(FilesystemBuildFile(root_dir, relpath='a'))
+      for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        self.assertIs(address, pickle.loads(pickle.dumps(address, protocol)))
+      self.assertIs(address, copy.copy(address))
+      self.assertIs(address, copy.deepcopy(address))
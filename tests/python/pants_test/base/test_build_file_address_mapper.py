@@ -110,3 +110,19 @@ class BuildFileAddressMapperTest(BaseTest):
     self.assertIsInstance(BuildFileAddressMapper.InvalidBuildFileReference(), AddressLookupError)
     self.assertIsInstance(BuildFileAddressMapper.InvalidAddressError(), AddressLookupError)
     self.assertIsInstance(BuildFileAddressMapper.BuildFileScanError(), AddressLookupError)
+
+  def test_changed_spec_paths(self):
+    self.add_to_build_file('a/BUILD', 'target(name="a")\n')
+    self.add_to_build_file('b/BUILD', 'target(name="b")\n')
+    self.address_mapper.resolve_spec('a')
+    self.address_mapper.resolve_spec('b')
+    self.assertEqual(set(), self.address_mapper.changed_spec_paths())
+
+    self.add_to_build_file('a/BUILD', 'target(name="c")\n')
+    self.add_to_build_file('b/BUILD.sibling', 'target(name="d")\n')
+    self.assertEqual({'a', 'b'}, self.address_mapper.changed_spec_paths())
+
+    self.address_mapper.invalidate_spec_paths(['a', 'b'])
+    self.assertEqual(set(), self.address_mapper.changed_spec_paths())
+    addresses = self.address_mapper.addresses_in_spec_path('a')
+    self.assertEqual({'a:a', 'a:c'}, set(address.spec for address in addresses))
@@ -0,0 +1,129 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+import six
+
+from pants.base.build_file import FilesystemBuildFile
+from pants.base.build_file_code_cache import BuildFileCodeCache
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_open
+
+
+class BuildFileCodeCacheTest(unittest.TestCase):
+  def create_buildfile(self, root_dir, relpath, contents):
+    with safe_open(os.path.join(root_dir, relpath), 'w') as fp:
+      fp.write(contents)
+    return FilesystemBuildFile(root_dir, relpath)
+
+  def execute(self, code):
+    parsed_locals = {}
+    six.exec_(code, {}, parsed_locals)
+    return parsed_locals
+
+  def test_hits_and_misses(self):
+    with temporary_dir() as root_dir:
+      with temporary_dir() as cache_dir:
+        build_file = self.create_buildfile(root_dir, 'a/BUILD', 'x = 1\n')
+
+        cache = BuildFileCodeCache(cache_dir)
+        self.assertEqual({'x': 1}, self.execute(cache.code(build_file)))
+        self.assertEqual({'x': 1}, self.execute(cache.code(build_file)))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+  def test_persistence(self):
+    with temporary_dir() as root_dir:
+      with temporary_dir() as cache_dir:
+        build_file = self.create_buildfile(root_dir, 'a/BUILD', 'x = 1\n')
+
+        cache = BuildFileCodeCache(cache_dir)
+        cache.code(build_file)
+        cache.flush()
+        self.assertTrue(os.path.exists(cache.path))
+
+        cache = BuildFileCodeCache(cache_dir)
+        self.assertEqual({'x': 1}, self.execute(cache.code(build_file)))
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+  def test_invalidated_by_content_change(self):
+    with temporary_dir() as root_dir:
+      with temporary_dir() as cache_dir:
+        build_file = self.create_buildfile(root_dir, 'a/BUILD', 'x = 1\n')
+
+        cache = BuildFileCodeCache(cache_dir)
+        cache.code(build_file)
+        cache.flush()
+
+        self.create_buildfile(root_dir, 'a/BUILD', 'x = 2\n')
+        cache = BuildFileCodeCache(cache_dir)
+        self.assertEqual({'x': 2}, self.execute(cache.code(build_file)))
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+  def test_syntax_error(self):
+    with temporary_dir() as root_dir:
+      with temporary_dir() as cache_dir:
+        build_file = self.create_buildfile(root_dir, 'a/BUILD', 'x = \n')
+        with self.assertRaises(SyntaxError):
+          BuildFileCodeCache(cache_dir).code(build_file)
+
+  def test_corrupt_cache_ignored(self):
+    with temporary_dir() as root_dir:
+      with temporary_dir() as cache_dir:
+        build_file = self.create_buildfile(root_dir, 'a/BUILD', 'x = 1\n')
+
+        cache = BuildFileCodeCache(cache_dir)
+        with safe_open(cache.path, 'wb') as fp:
+          fp.write(b'garbage')
+        self.assertEqual({'x': 1}, self.execute(cache.code(build_file)))
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+  def test_addressables(self):
+    with temporary_dir() as root_dir:
+      with temporary_dir() as cache_dir:
+        build_file = self.create_buildfile(root_dir, 'a/BUILD', 'x = 1\n')
+
+        cache = BuildFileCodeCache(cache_dir)
+        lookup = cache.lookup(build_file, 'aliases')
+        self.assertIsNone(lookup.addressables)
+        self.assertTrue(cache.store_addressables(build_file, lookup, 'aliases', [('x', 1)]))
+        self.assertFalse(cache.store_addressables(build_file, lookup, 'aliases',
+                                                  [('x', lambda: 1)]))
+        cache.flush()
+
+        cache = BuildFileCodeCache(cache_dir)
+        self.assertEqual([('x', 1)], cache.lookup(build_file, 'aliases').addressables)
+        self.assertIsNone(cache.lookup(build_file, 'other aliases').addressables)
+        self.assertEqual((1, 1), (cache.address_map_hits, cache.address_map_misses))
+
+        self.create_buildfile(root_dir, 'a/BUILD', 'x = 2\n')
+        self.assertIsNone(cache.lookup(build_file, 'aliases').addressables)
+
+  def test_dump_and_load_entry(self):
+    with temporary_dir() as root_dir:
+      with temporary_dir() as cache_dir:
+        build_file = self.create_buildfile(root_dir, 'a/BUILD', 'x = 1\n')
+
+        # An in-memory cache, as used by subprocess workers.
+        worker_cache = BuildFileCodeCache(cache_dir=None)
+        lookup = worker_cache.lookup(build_file, 'aliases')
+        self.assertIsNone(worker_cache.dump_entry(build_file))
+        worker_cache.store_addressables(build_file, lookup, 'aliases', [('x', 1)])
+        worker_cache.flush()
+        self.assertEqual([], os.listdir(cache_dir))
+
+        cache = BuildFileCodeCache(cache_dir)
+        self.assertFalse(cache.has_addressables(build_file, 'aliases'))
+        cache.load_entry(build_file.full_path, worker_cache.dump_entry(build_file))
+        self.assertTrue(cache.has_addressables(build_file, 'aliases'))
+        self.assertFalse(cache.has_addressables(build_file, 'other aliases'))
+        self.assertEqual({'x': 1}, self.execute(cache.code(build_file)))
+        self.assertEqual([('x', 1)], cache.lookup(build_file, 'aliases').addressables)
+
+        self.create_buildfile(root_dir, 'a/BUILD', 'x = 2\n')
+        self.assertFalse(cache.has_addressables(build_file, 'aliases'))
@@ -5,11 +5,14 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import multiprocessing
 import os
+from contextlib import contextmanager
 from textwrap import dedent
 
 import pytest
 
+from pants.backend.core.wrapped_globs import Globs
 from pants.backend.jvm.artifact import Artifact
 from pants.backend.jvm.repository import Repository
 from pants.backend.jvm.targets.jar_dependency import JarDependency
@@ -19,6 +22,7 @@ from pants.backend.jvm.targets.scala_library import ScalaLibrary
 from pants.base.address import BuildFileAddress
 from pants.base.build_file import FilesystemBuildFile
 from pants.base.build_file_aliases import BuildFileAliases
+from pants.base.build_file_code_cache import BuildFileCodeCache
 from pants.base.build_file_parser import BuildFileParser
 from pants.base.target import Target
 from pants_test.base_test import BaseTest
@@ -347,3 +351,174 @@ class BuildFileParserExposedContextAwareObjectFactoryTest(BaseTest):
     self.assertIsInstance(BuildFileParser.SiblingConflictException(), BuildFileParser.BuildFileParserError)
     self.assertIsInstance(BuildFileParser.ParseError(), BuildFileParser.BuildFileParserError)
     self.assertIsInstance(BuildFileParser.ExecuteError(), BuildFileParser.BuildFileParserError)
+
+
+class BuildFileParserCodeCacheTest(BaseTest):
+  def setUp(self):
+    super(BuildFileParserCodeCacheTest, self).setUp()
+    self._recorded = []
+
+  def record(self, parse_context):
+    def real_record(name):
+      self._recorded.append(name)
+    return real_record
+
+  @property
+  def alias_groups(self):
+    return BuildFileAliases.create(
+      targets={
+        'java_library': JavaLibrary,
+      },
+      objects={
+        'jar': JarDependency,
+      },
+      context_aware_object_factories={
+        'globs': Globs,
+        'record': self.record,
+      }
+    )
+
+  def parse(self, relpath):
+    # A fresh cache loaded from disk each parse, as in a new run.
+    code_cache = BuildFileCodeCache(os.path.join(self.pants_workdir, 'build_file_code_cache'))
+    parser = BuildFileParser(self._build_configuration, self.build_root, code_cache=code_cache)
+    address_map = parser.parse_build_file(FilesystemBuildFile(self.build_root, relpath))
+    code_cache.flush()
+    return (code_cache.address_map_hits, code_cache.address_map_misses), address_map
+
+  def assert_targets(self, expected, address_map):
+    self.assertEqual(expected,
+                     dict((address.target_name, (addressable.target_type, addressable.kwargs))
+                          for address, addressable in address_map.items()))
+
+  def test_address_map_cached(self):
+    self.add_to_build_file('a/BUILD', dedent("""
+      java_library(name='a', sources=['A.java'], dependencies=['b'])
+      java_library(name='b', sources=[])
+    """))
+    expected = {'a': (JavaLibrary, {'name': 'a', 'sources': ['A.java']}),
+                'b': (JavaLibrary, {'name': 'b', 'sources': []})}
+
+    counts, address_map = self.parse('a/BUILD')
+    self.assertEqual((0, 1), counts)
+    self.assert_targets(expected, address_map)
+
+    counts, address_map = self.parse('a/BUILD')
+    self.assertEqual((1, 0), counts)
+    self.assert_targets(expected, address_map)
+    self.assertEqual(set([BuildFileAddress(FilesystemBuildFile(self.build_root, 'a/BUILD'), name)
+                          for name in ('a', 'b')]),
+                     set(address_map.keys()))
+    self.assertEqual(['b'], address_map[BuildFileAddress(
+      FilesystemBuildFile(self.build_root, 'a/BUILD'), 'a')].dependency_specs)
+
+  def test_changed_build_file(self):
+    self.add_to_build_file('a/BUILD', "java_library(name='a', sources=[])")
+    self.parse('a/BUILD')
+    self.add_to_build_file('a/BUILD', "\njava_library(name='b', sources=[])")
+    counts, address_map = self.parse('a/BUILD')
+    self.assertEqual((0, 1), counts)
+    self.assertEqual(set(['a', 'b']), set(address.target_name for address in address_map))
+
+  def test_invalidated_by_alias_change(self):
+    self.add_to_build_file('a/BUILD', "java_library(name='a', sources=[])")
+    self.parse('a/BUILD')
+    self._build_configuration.register_target_alias('scala_library', ScalaLibrary)
+    self.assertEqual((0, 1), self.parse('a/BUILD')[0])
+    self.assertEqual((1, 0), self.parse('a/BUILD')[0])
+
+  def test_globs_reglobbed(self):
+    self.create_file('a/A.java')
+    self.add_to_build_file('a/BUILD', "java_library(name='a', sources=globs('*.java'))")
+    counts, address_map = self.parse('a/BUILD')
+    self.assertEqual(['A.java'], list(address_map.values()[0].kwargs['sources']))
+
+    self.create_file('a/B.java')
+    counts, address_map = self.parse('a/BUILD')
+    self.assertEqual((1, 0), counts)
+    self.assertEqual(['A.java', 'B.java'], sorted(address_map.values()[0].kwargs['sources']))
+
+  def test_side_effects_not_cached(self):
+    self.add_to_build_file('a/BUILD', "record('a')\njava_library(name='a', sources=[])")
+    self.parse('a/BUILD')
+    counts, address_map = self.parse('a/BUILD')
+    self.assertEqual((0, 1), counts)
+    self.assertEqual(1, len(address_map))
+    self.assertEqual(['a', 'a'], self._recorded)
+
+  def test_imports_not_cached(self):
+    self.add_to_build_file('a/BUILD', "import os\njava_library(name='a', sources=[])")
+    self.parse('a/BUILD')
+    self.assertEqual((0, 1), self.parse('a/BUILD')[0])
+
+  def test_unpicklable_not_cached(self):
+    self.add_to_build_file('a/BUILD', "java_library(name='a', sources=[], x=lambda: None)")
+    self.parse('a/BUILD')
+    counts, address_map = self.parse('a/BUILD')
+    self.assertEqual((0, 1), counts)
+    self.assertEqual(1, len(address_map))
+
+
+  @contextmanager
+  def preparsing_parser(self):
+    # Workers only see the build configuration set before they are forked.
+    BuildFileParser.set_worker_build_configuration(self._build_configuration)
+    pool = multiprocessing.Pool(processes=2)
+    try:
+      code_cache = BuildFileCodeCache(os.path.join(self.pants_workdir, 'build_file_code_cache'))
+      yield code_cache, BuildFileParser(self._build_configuration, self.build_root,
+                                        code_cache=code_cache, parallel_map_func=pool.map)
+    finally:
+      pool.terminate()
+      pool.join()
+      BuildFileParser.set_worker_build_configuration(None)
+
+  def build_file(self, relpath):
+    return FilesystemBuildFile(self.build_root, relpath)
+
+  def test_preparse(self):
+    self.add_to_build_file('a/BUILD', "java_library(name='a', sources=[], dependencies=['b'])")
+    self.add_to_build_file('b/BUILD', "record('b')\njava_library(name='b', sources=[])")
+    with self.preparsing_parser() as (code_cache, parser):
+      parser.preparse_build_files([self.build_file('a/BUILD'), self.build_file('b/BUILD')])
+
+      address_map = parser.parse_build_file(self.build_file('a/BUILD'))
+      self.assertEqual((1, 0), (code_cache.address_map_hits, code_cache.address_map_misses))
+      self.assert_targets({'a': (JavaLibrary, {'name': 'a', 'sources': []})}, address_map)
+      self.assertEqual(['b'], address_map.values()[0].dependency_specs)
+
+      # The side effects of BUILD files are only ever had by the parent.
+      self.assertEqual([], self._recorded)
+      parser.parse_build_file(self.build_file('b/BUILD'))
+      self.assertEqual((1, 1), (code_cache.address_map_hits, code_cache.address_map_misses))
+      self.assertEqual(['b'], self._recorded)
+
+  def test_preparse_addressable_conflict(self):
+    self.add_to_build_file('a/BUILD', dedent("""
+      java_library(name='a', sources=[])
+      java_library(name='a', sources=[])
+    """))
+    with self.preparsing_parser() as (_, parser):
+      parser.preparse_build_files([self.build_file('a/BUILD')])
+      with self.assertRaises(BuildFileParser.AddressableConflictException):
+        parser.parse_build_file(self.build_file('a/BUILD'))
+
+  def test_preparse_sibling_conflict(self):
+    self.add_to_build_file('a/BUILD', "java_library(name='a', sources=[])")
+    self.add_to_build_file('a/BUILD.other', "java_library(name='a', sources=[])")
+    build_file = self.build_file('a/BUILD')
+    with self.preparsing_parser() as (code_cache, parser):
+      parser.preparse_build_files(build_file.family())
+      with self.assertRaises(BuildFileParser.SiblingConflictException):
+        parser.address_map_from_build_file(build_file)
+      self.assertEqual((2, 0), (code_cache.address_map_hits, code_cache.address_map_misses))
+
+  def test_preparse_errors_left_for_parse(self):
+    self.add_to_build_file('a/BUILD', "java_library(name='a', sources=[]")
+    self.add_to_build_file('b/BUILD', "java_library(name='b', sources=[], bad=undefined)")
+    with self.preparsing_parser() as (_, parser):
+      parser.preparse_build_files([self.build_file('a/BUILD'), self.build_file('b/BUILD')])
+      with self.assertRaises(BuildFileParser.ParseError):
+        parser.parse_build_file(self.build_file('a/BUILD'))
+      with self.assertRaises(BuildFileParser.ExecuteError):
+        parser.parse_build_file(self.build_file('b/BUILD'))
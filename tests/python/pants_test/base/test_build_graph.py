@@ -5,15 +5,22 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+from hashlib import sha1
 from textwrap import dedent
 
 from pants.base.address import SyntheticAddress, parse_spec
 from pants.base.address_lookup_error import AddressLookupError
-from pants.base.build_graph import BuildGraph
+from pants.base.build_graph import BuildGraph, CycleException
+from pants.base.fingerprint_strategy import DefaultFingerprintHashingMixin, FingerprintStrategy
 from pants.base.target import Target
 from pants_test.base_test import BaseTest
 
 
+class SpecFingerprintStrategy(DefaultFingerprintHashingMixin, FingerprintStrategy):
+  def compute_fingerprint(self, target):
+    return target.address.spec
+
+
 # TODO(Eric Ayers) There are many untested methods in BuildGraph left to be tested.
 
 class BuildGraphTest(BaseTest):
@@ -270,3 +277,148 @@ class BuildGraphTest(BaseTest):
         '^Addresses in dependencies must be unique. \'other:b\' is referenced more than once.'
         '\s+referenced from :a$'):
       self.inject_address_closure('//:a')
+
+  def test_invalidate_addresses(self):
+    root_address = self.inject_graph('//:foo', {
+      "//:foo": ['a', 'c'],
+      "a": ['a/b:bat'],
+      "a/b:bat": [],
+      "c": [],
+    })
+    bat_address = SyntheticAddress.parse('a/b:bat')
+    c_address = SyntheticAddress.parse('c')
+    self.build_graph.inject_synthetic_target(SyntheticAddress.parse('a/b:bat-gen'), Target,
+                                             derived_from=self.build_graph.get_target(bat_address))
+
+    removed = self.build_graph.invalidate_addresses([bat_address])
+    self.assertEqual({'a/b:bat', 'a/b:bat-gen', 'a:a', ':foo'},
+                     set(address.spec for address in removed))
+    self.assertFalse(self.build_graph.contains_address(root_address))
+    self.assertTrue(self.build_graph.contains_address(c_address))
+    self.assertEqual(set(), set(self.build_graph.dependents_of(c_address)))
+
+    self.build_graph.inject_address_closure(root_address)
+    self.assertEqual(4, len(self.build_graph.transitive_subgraph_of_addresses([root_address])))
+
+  def test_refresh(self):
+    root_address = self.inject_graph('//:foo', {
+      "//:foo": ['a'],
+      "a": ['a/b:bat'],
+      "a/b:bat": [],
+      "c": [],
+    })
+    self.build_graph.inject_address_closure(SyntheticAddress.parse('c'))
+    c_target = self.build_graph.get_target(SyntheticAddress.parse('c'))
+    bat_target = self.build_graph.get_target(SyntheticAddress.parse('a/b:bat'))
+    self.assertEqual(set(), self.build_graph.refresh())
+
+    self.create_file('a/BUILD', "target(name='a', dependencies=['a/b:bat', ':new'])\n"
+                                "target(name='new', dependencies=['c'])\n")
+    self.assertEqual(set(), self.build_graph.refresh())
+
+    # Only the edited BUILD file and its dependees were re-injected.
+    self.assertIs(bat_target, self.build_graph.get_target(bat_target.address))
+    self.assertIs(c_target, self.build_graph.get_target(c_target.address))
+    self.assertEqual({':foo', 'a:a', 'a:new', 'a/b:bat', 'c:c'},
+                     set(target.address.spec for target in
+                         self.build_graph.transitive_subgraph_of_addresses([root_address])))
+
+    self.create_file('a/BUILD', "target(name='renamed')\n")
+    missing = self.build_graph.refresh()
+    self.assertEqual({':foo', 'a:a', 'a:new'}, set(address.spec for address in missing))
+    self.assertTrue(self.build_graph.contains_address(c_target.address))
+
+  def test_transitive_invalidation_hashes(self):
+    bat = self.make_target('a/b:bat')
+    a = self.make_target('a', dependencies=[bat])
+    c = self.make_target('c')
+    foo = self.make_target('foo', dependencies=[a, c])
+
+    strategy = SpecFingerprintStrategy()
+    hashes = self.build_graph.transitive_invalidation_hashes([foo.address, a.address], strategy)
+    self.assertEqual({foo.address, a.address}, set(hashes.keys()))
+    bat_hash = 'a/b:bat-SpecFingerprintStrategy.{}'.format(sha1().hexdigest()[:12])
+    self.assertEqual(bat_hash, bat.transitive_invalidation_hash(strategy))
+    self.assertEqual('a:a-SpecFingerprintStrategy.{}'.format(sha1(bat_hash).hexdigest()[:12]),
+                     hashes[a.address])
+    self.assertEqual(hashes[foo.address], foo.transitive_invalidation_hash(strategy))
+    self.assertEqual(hashes[a.address], a.transitive_invalidation_hash(strategy))
+    self.assertNotEqual(hashes[foo.address], hashes[a.address])
+
+  def test_transitive_invalidation_hashes_deep(self):
+    target = self.make_target('deep:0')
+    for i in range(1, 5000):
+      target = self.make_target('deep:{}'.format(i), dependencies=[target])
+    self.assertIsNotNone(target.transitive_invalidation_hash(SpecFingerprintStrategy()))
+
+  def test_transitive_invalidation_hashes_cycle(self):
+    a = self.make_target('a')
+    b = self.make_target('b', dependencies=[a])
+    self.build_graph.inject_dependency(a.address, b.address)
+    with self.assertRaises(CycleException):
+      self.build_graph.transitive_invalidation_hash(b.address, SpecFingerprintStrategy())
+
+  def test_invalidate_transitive_fingerprints(self):
+    bat = self.make_target('a/b:bat')
+    a = self.make_target('a', dependencies=[bat])
+    c = self.make_target('c')
+    d = self.make_target('d')
+    foo = self.make_target('foo', dependencies=[a, c])
+    addresses = [foo.address, a.address, bat.address, c.address, d.address]
+    strategy = SpecFingerprintStrategy()
+    before = self.build_graph.transitive_invalidation_hashes(addresses, strategy)
+
+    # Only the dependee cone of c is invalidated by a new dependency of c.
+    self.build_graph.inject_dependency(c.address, d.address)
+    fingerprints = self.build_graph._transitive_fingerprints_by_strategy[strategy]
+    self.assertEqual({a.address, bat.address, d.address}, set(fingerprints.keys()))
+
+    after = self.build_graph.transitive_invalidation_hashes(addresses, strategy)
+    self.assertEqual([before[address] for address in (a.address, bat.address, d.address)],
+                     [after[address] for address in (a.address, bat.address, d.address)])
+    self.assertNotEqual(before[c.address], after[c.address])
+    self.assertNotEqual(before[foo.address], after[foo.address])
+
+  def test_iter_closure(self):
+    d = self.make_target('d')
+    c = self.make_target('c', dependencies=[d])
+    b = self.make_target('b', dependencies=[d])
+    a = self.make_target('a', dependencies=[b, c])
+
+    def specs(targets):
+      return [target.address.spec for target in targets]
+
+    self.assertEqual(['a:a', 'b:b', 'd:d', 'c:c'],
+                     specs(self.build_graph.iter_closure([a.address])))
+    self.assertEqual(['d:d', 'b:b', 'c:c', 'a:a'],
+                     specs(self.build_graph.iter_closure([a.address], postorder=True)))
+    self.assertEqual(['a:a', 'c:c'],
+                     specs(self.build_graph.iter_closure([a.address],
+                                                         predicate=lambda t: t is not b,
+                                                         max_depth=1)))
+    self.assertEqual({'d:d', 'b:b', 'c:c'},
+                     set(specs(self.build_graph.iter_dependees([d.address], max_depth=1))))
+
+    closure = self.build_graph.iter_closure([a.address])
+    self.assertEqual(a, next(closure))
+    self.assertEqual(b, next(closure))
+
+  def test_iter_closure_max_depth(self):
+    # d is first reached at depth 2 along a -> b -> c, but is within 2 of a along a -> c.
+    e = self.make_target('e')
+    d = self.make_target('d', dependencies=[e])
+    c = self.make_target('c', dependencies=[d])
+    b = self.make_target('b', dependencies=[c])
+    a = self.make_target('a', dependencies=[b, c])
+    self.assertEqual({'a:a', 'b:b', 'c:c', 'd:d'},
+                     set(target.address.spec
+                         for target in self.build_graph.iter_closure([a.address], max_depth=2)))
+    self.assertEqual([a], list(self.build_graph.iter_closure([a.address], max_depth=0)))
+
+  def test_walk_deep(self):
+    target = self.make_target('deep:0')
+    for i in range(1, 5000):
+      target = self.make_target('deep:{}'.format(i), dependencies=[target])
+    self.assertEqual(5000, len(target.closure()))
+    self.assertEqual(5000, len(self.build_graph.transitive_dependees_of_addresses(
+      [SyntheticAddress.parse('deep:0')])))
@@ -0,0 +1,120 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+from collections import Counter
+
+from pants.backend.core.wrapped_globs import Globs
+from pants.backend.jvm.targets.java_library import JavaLibrary
+from pants.base.address import SyntheticAddress
+from pants.base.build_file_aliases import BuildFileAliases
+from pants.base.build_graph_watcher import BuildGraphWatcher
+from pants.base.fingerprint_strategy import DefaultFingerprintStrategy
+from pants.base.target import Target
+from pants_test.base_test import BaseTest
+
+
+class CountingFingerprintStrategy(DefaultFingerprintStrategy):
+  def __init__(self):
+    self.counts = Counter()
+
+  def compute_fingerprint(self, target):
+    self.counts[target.address.spec] += 1
+    return super(CountingFingerprintStrategy, self).compute_fingerprint(target)
+
+
+class BuildGraphWatcherTest(BaseTest):
+  @property
+  def alias_groups(self):
+    return BuildFileAliases.create(
+      targets={
+        'java_library': JavaLibrary,
+      },
+      context_aware_object_factories={
+        'globs': Globs,
+      },
+    )
+
+  def setUp(self):
+    super(BuildGraphWatcherTest, self).setUp()
+    self.create_file('a/A.java', 'class A {}')
+    self.add_to_build_file('a', "java_library(name='a', sources=globs('*.java'))")
+    self.create_file('b/B.java', 'class B {}')
+    self.add_to_build_file('b', "java_library(name='b', sources=['B.java'], dependencies=['a'])")
+    self.create_file('c/C.java', 'class C {}')
+    self.add_to_build_file('c', "java_library(name='c', sources=['C.java'])")
+    for spec in ('b', 'c'):
+      self.build_graph.inject_address_closure(SyntheticAddress.parse(spec))
+
+    self.watcher = BuildGraphWatcher(self.build_graph, self.build_root)
+    self.watcher.record()
+    self._mtime = os.stat(self.build_root).st_mtime
+
+  def edit(self, relpath, contents):
+    """Writes the file, giving it a later mtime than any before, however quick the edits."""
+    self._mtime += 10
+    path = os.path.join(self.build_root, relpath)
+    existed = os.path.exists(path)
+    self.create_file(relpath, contents)
+    os.utime(path, (self._mtime, self._mtime))
+    if not existed:
+      os.utime(os.path.dirname(path), (self._mtime, self._mtime))
+
+  def target(self, spec):
+    return self.build_graph.get_target(SyntheticAddress.parse(spec))
+
+  def test_no_edits(self):
+    self.assertFalse(self.watcher.poll())
+
+  def test_source_edit_invalidates_owner_fingerprints(self):
+    strategy = CountingFingerprintStrategy()
+    targets = [self.target(spec) for spec in ('a', 'b', 'c')]
+    addresses = [target.address for target in targets]
+    hashes = self.build_graph.transitive_invalidation_hashes(addresses, strategy)
+
+    self.edit('a/A.java', 'class A { int x; }')
+    self.assertTrue(self.watcher.poll())
+    self.assertFalse(self.watcher.poll())
+
+    # Nothing was re-parsed, and only the fingerprint of the edited target was recomputed.
+    self.assertEqual(targets, [self.target(spec) for spec in ('a', 'b', 'c')])
+    new_hashes = self.build_graph.transitive_invalidation_hashes(addresses, strategy)
+    self.assertEqual({'a:a': 2, 'b:b': 1, 'c:c': 1}, strategy.counts)
+    self.assertNotEqual(hashes[addresses[0]], new_hashes[addresses[0]])
+    self.assertNotEqual(hashes[addresses[1]], new_hashes[addresses[1]])
+    self.assertEqual(hashes[addresses[2]], new_hashes[addresses[2]])
+
+  def test_build_file_edit_refreshes_spec_path(self):
+    b, c = self.target('b'), self.target('c')
+    self.edit('b/BUILD', "java_library(name='b', sources=['B.java'])")
+    self.assertTrue(self.watcher.poll())
+
+    self.assertIsNot(b, self.target('b'))
+    self.assertEqual([], self.target('b').dependencies)
+    self.assertIs(c, self.target('c'))
+
+  def test_added_file_reglobs(self):
+    a, c = self.target('a'), self.target('c')
+    self.edit('a/A2.java', 'class A2 {}')
+    self.assertTrue(self.watcher.poll())
+
+    self.assertIsNot(a, self.target('a'))
+    self.assertEqual(['a/A.java', 'a/A2.java'],
+                     sorted(self.target('a').sources_relative_to_buildroot()))
+    self.assertIs(c, self.target('c'))
+
+    self.watcher.record()
+    self.edit('a/A2.java', 'class A2 { int x; }')
+    self.assertTrue(self.watcher.poll())
+
+  def test_synthetic_targets_removed(self):
+    address = SyntheticAddress.parse('c:c-gen')
+    self.build_graph.inject_synthetic_target(address, Target, derived_from=self.target('c'))
+    self.edit('a/A.java', 'class A { int x; }')
+    self.assertTrue(self.watcher.poll())
+    self.assertFalse(self.build_graph.contains_address(address))
+    self.assertIsNotNone(self.target('c'))
@@ -8,10 +8,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import hashlib
 import os
 import tempfile
+import unittest
 from contextlib import contextmanager
 
-from pants.base.build_invalidator import BuildInvalidator, CacheKeyGenerator
+from pants.base.build_invalidator import (BuildInvalidator, CacheKey, CacheKeyGenerator,
+                                          LogInvalidationStore)
 from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_rmtree
 
 
 TEST_CONTENT = 'muppet'
@@ -58,3 +61,105 @@ def test_env(content=TEST_CONTENT):
 #     assert cache.needs_update(key)
 #     cache.update(key)
 #     assert not cache.needs_update(key)
+
+
+class InvalidationStoreTest(unittest.TestCase):
+  def key(self, id, hash):
+    return CacheKey(id, hash, 1)
+
+  def test_stores(self):
+    for store in BuildInvalidator.STORES:
+      with temporary_dir() as root:
+        invalidator = BuildInvalidator(root, store=store)
+        key = self.key('a', 'h1')
+        self.assertTrue(invalidator.needs_update(key))
+        invalidator.update(key)
+        invalidator.flush()
+        self.assertFalse(invalidator.needs_update(key))
+        self.assertTrue(invalidator.needs_update(self.key('a', 'h2')))
+        self.assertEqual('h1', invalidator.existing_hash('a'))
+
+        invalidator.force_invalidate(key)
+        invalidator.flush()
+        self.assertTrue(invalidator.needs_update(key))
+
+        invalidator.update(key)
+        invalidator.flush()
+        invalidator.force_invalidate_all()
+        self.assertTrue(invalidator.needs_update(key))
+
+  def test_log_store_persistence(self):
+    with temporary_dir() as root:
+      invalidator = BuildInvalidator(root, store='log')
+      for i in range(3):
+        invalidator.update(self.key('t{}'.format(i), 'h'))
+      invalidator.force_invalidate(self.key('t1', 'h'))
+      invalidator.flush()
+      store = invalidator._store
+      log_path = store._path
+
+      # A new process reads the log afresh, ignoring any partially written record.
+      with open(log_path, 'ab') as fd:
+        fd.write(b't3.hash\th')
+      LogInvalidationStore._stores_by_root.clear()
+      invalidator = BuildInvalidator(root, store='log')
+      self.assertIsNot(store, invalidator._store)
+      self.assertEqual('h', invalidator.existing_hash('t0'))
+      self.assertIsNone(invalidator.existing_hash('t1'))
+      self.assertIsNone(invalidator.existing_hash('t3'))
+
+  def test_log_store_shared_and_reloaded(self):
+    with temporary_dir() as root:
+      invalidator = BuildInvalidator(root, store='log')
+      invalidator.update(self.key('a', 'h'))
+      invalidator.flush()
+      self.assertIs(invalidator._store, BuildInvalidator(root, store='log')._store)
+
+      # Removing the log (eg: by the invalidate goal) is noticed by the next invalidator.
+      safe_rmtree(root)
+      self.assertIsNone(BuildInvalidator(root, store='log').existing_hash('a'))
+
+  def test_log_store_imports_directory_store(self):
+    with temporary_dir() as root:
+      invalidator = BuildInvalidator(root, store='directory')
+      invalidator.update(self.key('a', 'h'))
+
+      hash_files = [name for name in os.listdir(root) if name.endswith('.hash')]
+
+      invalidator = BuildInvalidator(root, store='log')
+      self.assertEqual('h', invalidator.existing_hash('a'))
+      # The hash files are left for any process still using them, but superseded by the log.
+      self.assertEqual(hash_files, [name for name in os.listdir(root) if name.endswith('.hash')])
+      self.assertIsNone(BuildInvalidator(root, store='directory').existing_hash('a'))
+
+  def test_log_store_compaction(self):
+    with temporary_dir() as root:
+      invalidator = BuildInvalidator(root, store='log')
+      for i in range(2000):
+        invalidator.update(self.key('a', 'h{}'.format(i)))
+        invalidator.flush()
+      with open(invalidator._store._path, 'rb') as fd:
+        self.assertLess(len(fd.readlines()), 1100)
+      LogInvalidationStore._stores_by_root.clear()
+      self.assertEqual('h1999', BuildInvalidator(root, store='log').existing_hash('a'))
+
+  def test_log_store_compaction_keeps_concurrent_records(self):
+    with temporary_dir() as root:
+      # Two processes, each with its own copy of the log.
+      store = LogInvalidationStore(root)
+      other = LogInvalidationStore(root)
+      store.set('a', 'h')
+      store.flush()
+      other.set('b', 'h')
+      other.flush()
+
+      store._COMPACTION_RATIO = 0
+      store._num_records = 1000
+      store.set('a', 'h2')
+      store.flush()
+
+      with open(store._path, 'rb') as fd:
+        self.assertEqual(2, len(fd.readlines()))
+      fresh = LogInvalidationStore(root)
+      self.assertEqual('h2', fresh.get('a'))
+      self.assertEqual('h', fresh.get('b'))
@@ -0,0 +1,74 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+from pants.base.address import SyntheticAddress
+from pants.base.dependee_index import DependeeIndex
+from pants_test.base_test import BaseTest
+
+
+class DependeeIndexTest(BaseTest):
+  def setUp(self):
+    super(DependeeIndexTest, self).setUp()
+    self.persist_path = os.path.join(self.pants_workdir, 'dependee_index.json')
+
+    self.add_to_build_file('a', "target(name='a')")
+    self.add_to_build_file('b', "target(name='b', dependencies=['a'])")
+    self.add_to_build_file('c', "target(name='c', dependencies=['b'])")
+    self.add_to_build_file('d', "target(name='d', dependencies=['a', 'c'])")
+
+  def build_files(self):
+    return self.address_mapper.scan_buildfiles(self.build_root)
+
+  def update(self, index, build_files=None):
+    index.update(self.address_mapper, self.build_graph, build_files or self.build_files())
+    return index
+
+  def dependees(self, index, spec, transitive=False):
+    return sorted(address.spec for address in index.dependees_of([SyntheticAddress.parse(spec)],
+                                                                  transitive=transitive))
+
+  def test_dependees(self):
+    index = self.update(DependeeIndex())
+    self.assertEqual(['b:b', 'd:d'], self.dependees(index, 'a'))
+    self.assertEqual(['b:b', 'c:c', 'd:d'], self.dependees(index, 'a', transitive=True))
+    self.assertEqual(['d:d'], self.dependees(index, 'c', transitive=True))
+    self.assertEqual([], self.dependees(index, 'd', transitive=True))
+    self.assertEqual((4, 0), (index.parsed_spec_paths, index.reused_spec_paths))
+
+  def test_persistence(self):
+    index = self.update(DependeeIndex(self.persist_path))
+    index.save()
+
+    self.reset_build_graph()
+    index = self.update(DependeeIndex(self.persist_path))
+    self.assertEqual(['b:b', 'c:c', 'd:d'], self.dependees(index, 'a', transitive=True))
+    self.assertEqual((0, 4), (index.parsed_spec_paths, index.reused_spec_paths))
+    self.assertFalse(self.build_graph.contains_address(SyntheticAddress.parse('a')))
+
+  def test_changed_build_file_is_reparsed(self):
+    self.update(DependeeIndex(self.persist_path)).save()
+
+    self.create_file('b/BUILD', "target(name='b')")
+    self.add_to_build_file('e', "target(name='e', dependencies=['b'])")
+    self.reset_build_graph()
+    index = self.update(DependeeIndex(self.persist_path))
+    self.assertEqual(['d:d'], self.dependees(index, 'a'))
+    self.assertEqual(['c:c', 'e:e'], self.dependees(index, 'b'))
+    self.assertEqual((2, 3), (index.parsed_spec_paths, index.reused_spec_paths))
+
+  def test_queries_only_see_updated_spec_paths(self):
+    index = self.update(DependeeIndex())
+    self.update(index, [bf for bf in self.build_files() if bf.spec_path != 'd'])
+    self.assertEqual(['b:b', 'c:c'], self.dependees(index, 'a', transitive=True))
+
+  def test_corrupt(self):
+    with open(self.persist_path, 'w') as fp:
+      fp.write('{"version": 1, "entries": {"a": []}}')
+    index = self.update(DependeeIndex(self.persist_path))
+    self.assertEqual(['b:b', 'd:d'], self.dependees(index, 'a'))
@@ -12,7 +12,7 @@ import pytest
 
 from pants.base.deprecated import (BadDecoratorNestingError, BadRemovalVersionError,
                                    MissingRemovalVersionError, PastRemovalVersionError,
-                                   check_deprecated_semver, deprecated)
+                                   check_deprecated_semver, deprecated, deprecated_module)
 from pants.version import VERSION
 
 
@@ -83,6 +83,19 @@ def test_deprecation_hint():
     assert hint_message in str(extract_deprecation_warning())
 
 
+def test_deprecated_module():
+  with _test_deprecation() as extract_deprecation_warning:
+    deprecated_module(FUTURE_VERSION, hint_message='Import the foos from elsewhere.')
+    message = str(extract_deprecation_warning())
+    assert __name__ in message
+    assert 'Import the foos from elsewhere.' in message
+
+
+def test_deprecated_module_removal_version_required():
+  with pytest.raises(MissingRemovalVersionError):
+    deprecated_module(None)
+
+
 def test_removal_version_required():
   with pytest.raises(MissingRemovalVersionError):
     @deprecated(None)
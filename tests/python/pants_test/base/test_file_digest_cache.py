@@ -0,0 +1,118 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import json
+import os
+import time
+import unittest
+
+from pants.base.file_digest_cache import FileDigestCache, digest_file
+from pants.base.hash_utils import hash_file
+from pants.util.contextutil import temporary_dir
+
+
+class FileDigestCacheTest(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir_context = temporary_dir()
+    self.tmpdir = self.tmpdir_context.__enter__()
+    self.persist_path = os.path.join(self.tmpdir, 'digests.json')
+
+  def tearDown(self):
+    FileDigestCache.set_global_instance(None)
+    self.tmpdir_context.__exit__(None, None, None)
+
+  def write(self, name, content, age=10):
+    path = os.path.join(self.tmpdir, name)
+    with open(path, 'w') as fp:
+      fp.write(content)
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return path
+
+  def test_digest(self):
+    path = self.write('a', 'jake jones')
+    cache = FileDigestCache()
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), cache.digest(path))
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), cache.digest(path))
+    self.assertEqual((1, 10, 1, 10), (cache.hashed_files, cache.hashed_bytes,
+                                      cache.skipped_files, cache.skipped_bytes))
+
+  def test_changed_file_is_rehashed(self):
+    path = self.write('a', 'jake jones')
+    cache = FileDigestCache()
+    cache.digest(path)
+    self.write('a', 'jane jones', age=5)
+    self.assertEqual(hashlib.sha1(b'jane jones').hexdigest(), cache.digest(path))
+    self.assertEqual(2, cache.hashed_files)
+
+  def test_racy_file_is_not_cached(self):
+    path = self.write('a', 'jake jones', age=0)
+    cache = FileDigestCache()
+    cache.digest(path)
+    cache.digest(path)
+    self.assertEqual(2, cache.hashed_files)
+
+  def test_persistence(self):
+    path = self.write('a', 'jake jones')
+    cache = FileDigestCache(self.persist_path)
+    cache.digest(path)
+    cache.save()
+
+    cache = FileDigestCache(self.persist_path)
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), cache.digest(path))
+    self.assertEqual(0, cache.hashed_files)
+
+  def test_save_prunes_missing_files(self):
+    kept = self.write('a', 'jake jones')
+    removed = self.write('b', 'jane jones')
+    cache = FileDigestCache(self.persist_path)
+    cache.digest(kept)
+    cache.digest(removed)
+    os.unlink(removed)
+    cache.save()
+
+    with open(self.persist_path, 'r') as fp:
+      self.assertEqual([kept], list(json.load(fp)['entries']))
+
+  def test_uncached_dirs(self):
+    workdir = os.path.join(self.tmpdir, 'workdir')
+    os.mkdir(workdir)
+    path = self.write('workdir/a', 'jake jones')
+    cache = FileDigestCache(self.persist_path, uncached_dirs=[workdir])
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), cache.digest(path))
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), cache.digest(path))
+    self.assertEqual(2, cache.hashed_files)
+
+    # Nor are digests for files under them loaded from caches saved without them uncached.
+    cache = FileDigestCache(self.persist_path)
+    cache.digest(path)
+    cache.save()
+    cache = FileDigestCache(self.persist_path, uncached_dirs=[workdir])
+    cache.digest(path)
+    self.assertEqual(1, cache.hashed_files)
+
+  def test_corrupt(self):
+    with open(self.persist_path, 'w') as fp:
+      fp.write('{"version": 1, "entries": {"a": []}}')
+    path = self.write('a', 'jake jones')
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(),
+                     FileDigestCache(self.persist_path).digest(path))
+
+  def test_missing_file(self):
+    with self.assertRaises(IOError):
+      FileDigestCache().digest(os.path.join(self.tmpdir, 'missing'))
+
+  def test_global_instance(self):
+    path = self.write('a', 'jake jones')
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), digest_file(path))
+
+    cache = FileDigestCache()
+    FileDigestCache.set_global_instance(cache)
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), hash_file(path))
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), digest_file(path))
+    self.assertEqual(1, cache.skipped_files)
@@ -0,0 +1,146 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+from glob import glob1
+
+from pants.base.build_file import FilesystemBuildFile
+from pants.base.filesystem_snapshot import FilesystemSnapshot
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_walk, touch
+from pants_test.base.build_file_test_base import BuildFileTestBase
+
+
+class FilesystemSnapshotTest(BuildFileTestBase):
+  def setUp(self):
+    super(FilesystemSnapshotTest, self).setUp()
+    self.touch('grandparent/.hidden')
+    self.makedirs('excluded/sub')
+    self.touch('excluded/sub/BUILD')
+    os.symlink(self.fullpath('grandparent/parent'), self.fullpath('link'))
+
+  def tearDown(self):
+    FilesystemBuildFile.set_snapshot(None)
+    FilesystemBuildFile.clear_cache()
+    super(FilesystemSnapshotTest, self).tearDown()
+
+  def age(self, path, seconds=10):
+    for root, dirs, files in safe_walk(path):
+      then = time.time() - seconds
+      os.utime(root, (then, then))
+
+  def assert_same_walk(self, expected, actual):
+    def normalize(walk):
+      return sorted((root, sorted(dirs), sorted(files)) for root, dirs, files in walk)
+    self.assertEqual(normalize(expected), normalize(actual))
+
+  def test_walk(self):
+    snapshot = FilesystemSnapshot(self.root_dir)
+    self.assert_same_walk(safe_walk(self.root_dir, topdown=True),
+                          snapshot.walk(self.root_dir, topdown=True))
+    self.assert_same_walk(safe_walk(self.root_dir, topdown=False),
+                          snapshot.walk(self.root_dir, topdown=False))
+
+    # Parents come before children top down, and after them bottom up.
+    roots = [root for root, _, _ in snapshot.walk(self.root_dir, topdown=True)]
+    self.assertLess(roots.index(self.fullpath('grandparent')),
+                    roots.index(self.fullpath('grandparent/parent')))
+    roots = [root for root, _, _ in snapshot.walk(self.root_dir, topdown=False)]
+    self.assertGreater(roots.index(self.fullpath('grandparent')),
+                       roots.index(self.fullpath('grandparent/parent')))
+
+  def test_walk_pruning(self):
+    snapshot = FilesystemSnapshot(self.root_dir)
+    visited = []
+    for root, dirs, files in snapshot.walk(self.root_dir):
+      visited.append(os.path.relpath(root, self.root_dir))
+      if 'parent' in dirs:
+        dirs.remove('parent')
+    self.assertNotIn('grandparent/parent', visited)
+    self.assertIn('grandparent', visited)
+
+  def test_queries(self):
+    snapshot = FilesystemSnapshot(self.root_dir)
+    for path in ('', 'BUILD', 'grandparent/BUILD', 'grandparent/parent/BUILD.dir',
+                 'grandparent/parent/BUILD', 'grandparent/.hidden', 'link', 'link/BUILD',
+                 'does/not/exist', 'grandparent/parent/BUILD/nope'):
+      path = self.fullpath(path)
+      self.assertEqual(os.path.isdir(path), snapshot.isdir(path), path)
+      self.assertEqual(os.path.isfile(path), snapshot.isfile(path), path)
+      self.assertEqual(os.path.exists(path), snapshot.exists(path), path)
+
+    for pattern in ('BUILD*', '*', '.*'):
+      for path in ('grandparent', 'grandparent/parent', 'does/not/exist'):
+        path = self.fullpath(path)
+        self.assertEqual(sorted(glob1(path, pattern)), sorted(snapshot.glob1(path, pattern)))
+
+  def test_lists_each_dir_once(self):
+    snapshot = FilesystemSnapshot(self.root_dir)
+    list(snapshot.walk(self.root_dir))
+    listed = snapshot.listed
+    list(snapshot.walk(self.root_dir))
+    snapshot.isdir(self.fullpath('grandparent/parent/child1'))
+    snapshot.glob1(self.fullpath('grandparent/parent'), 'BUILD*')
+    self.assertEqual(listed, snapshot.listed)
+
+  def test_excludes_and_outside_paths_hit_the_filesystem(self):
+    snapshot = FilesystemSnapshot(self.root_dir, excludes=['excluded'])
+    snapshot.isdir(self.fullpath('excluded/sub'))
+    snapshot.isfile(os.path.join(self.base_dir, 'BUILD'))
+    self.assertEqual(0, snapshot.listed)
+
+    touch(self.fullpath('excluded/sub/BUILD.new'))
+    self.assertTrue(snapshot.isfile(self.fullpath('excluded/sub/BUILD.new')))
+
+  def test_persistence(self):
+    with temporary_dir() as persist_dir:
+      persist_path = os.path.join(persist_dir, 'snapshot.json')
+      self.age(self.root_dir)
+
+      snapshot = FilesystemSnapshot(self.root_dir, persist_path=persist_path)
+      expected = list(snapshot.walk(self.root_dir))
+      snapshot.save()
+
+      snapshot = FilesystemSnapshot(self.root_dir, persist_path=persist_path)
+      self.assertEqual(expected, list(snapshot.walk(self.root_dir)))
+      self.assertEqual(0, snapshot.listed)
+
+      # Only the modified directory is re-listed.
+      touch(self.fullpath('grandparent/parent/child4/BUILD'))
+      snapshot = FilesystemSnapshot(self.root_dir, persist_path=persist_path)
+      self.assertTrue(snapshot.isfile(self.fullpath('grandparent/parent/child4/BUILD')))
+      list(snapshot.walk(self.root_dir))
+      self.assertEqual(1, snapshot.listed)
+
+  def test_racy_listings_not_persisted(self):
+    with temporary_dir() as persist_dir:
+      persist_path = os.path.join(persist_dir, 'snapshot.json')
+      snapshot = FilesystemSnapshot(self.root_dir, persist_path=persist_path)
+      listed = len(list(snapshot.walk(self.root_dir)))
+      snapshot.save()
+
+      snapshot = FilesystemSnapshot(self.root_dir, persist_path=persist_path)
+      list(snapshot.walk(self.root_dir))
+      self.assertEqual(listed, snapshot.listed)
+
+  def test_build_file_scan(self):
+    expected = [bf.relpath for bf in
+                FilesystemBuildFile.scan_buildfiles(self.root_dir, spec_excludes=['excluded'])]
+    self.assertIn('grandparent/parent/child5/BUILD', expected)
+
+    FilesystemBuildFile.clear_cache()
+    FilesystemBuildFile.set_snapshot(FilesystemSnapshot(self.root_dir))
+    actual = [bf.relpath for bf in
+              FilesystemBuildFile.scan_buildfiles(self.root_dir, spec_excludes=['excluded'])]
+    self.assertEqual(expected, actual)
+
+    buildfile = self.create_buildfile('grandparent/parent/BUILD')
+    self.assertEqual(['grandparent/parent/BUILD', 'grandparent/parent/BUILD.twitter'],
+                     [bf.relpath for bf in buildfile.family()])
+    self.assertEqual(['BUILD', 'BUILD.twitter'],
+                     sorted(bf.relpath for bf in buildfile.ancestors()))
@@ -64,6 +64,15 @@ class PayloadTest(BaseTest):
     self.assertNotEqual(fingerprint2, payload.fingerprint(field_keys=('bar',)))
     self.assertEqual(fingerprint2, payload.fingerprint(field_keys=('bar', 'foo')))
 
+  def test_mark_dirty(self):
+    self.create_file('A.java', 'class A {}')
+    payload = self.make_target(':a', JavaLibrary, sources=['A.java']).payload
+    fingerprint1 = payload.fingerprint()
+    self.create_file('A.java', 'class A { int x; }')
+    self.assertEqual(fingerprint1, payload.fingerprint())
+    payload.mark_dirty()
+    self.assertNotEqual(fingerprint1, payload.fingerprint())
+
   def test_none(self):
     payload = Payload()
     payload.add_field('foo', None)
@@ -261,6 +261,31 @@ class PayloadTest(BaseTest):
 
     self.assertNotEqual(fp1, fp2)
 
+  def test_sources_field_precompute_fingerprints(self):
+    self.create_file('foo/bar/a.txt', 'a_contents')
+    self.create_file('foo/bar/b.txt', 'b_contents')
+
+    def fields():
+      return [SourcesField(sources_rel_path='foo/bar', sources=['a.txt']),
+              SourcesField(sources_rel_path='foo/bar', sources=['a.txt', 'b.txt']),
+              SourcesField(sources_rel_path='foo', sources=[])]
+
+    mapped = []
+    def map_func(f, items):
+      mapped.extend(items)
+      return map(f, items)
+
+    precomputed = fields()
+    SourcesField.precompute_fingerprints(precomputed, map_func=map_func)
+    # Each source is hashed once, however many fields it belongs to.
+    self.assertEqual(2, len(mapped))
+    self.assertEqual([field.fingerprint() for field in fields()],
+                     [field.fingerprint() for field in precomputed])
+
+    # Memoized fingerprints are left alone.
+    SourcesField.precompute_fingerprints(precomputed, map_func=map_func)
+    self.assertEqual(2, len(mapped))
+
   def test_fingerprinted_field(self):
     class TestValue(FingerprintedMixin):
       def __init__(self, test_value):
@@ -0,0 +1,133 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+from textwrap import dedent
+
+from pants.backend.core.targets.resources import Resources
+from pants.backend.core.wrapped_globs import Globs, RGlobs
+from pants.backend.jvm.targets.java_library import JavaLibrary
+from pants.base.build_file_aliases import BuildFileAliases
+from pants.base.source_owner_index import SourceOwnerIndex
+from pants_test.base_test import BaseTest
+
+
+class SourceOwnerIndexTest(BaseTest):
+  @property
+  def alias_groups(self):
+    return BuildFileAliases.create(
+      targets={
+        'java_library': JavaLibrary,
+        'resources': Resources,
+      },
+      context_aware_object_factories={
+        'globs': Globs,
+        'rglobs': RGlobs,
+      },
+    )
+
+  def setUp(self):
+    super(SourceOwnerIndexTest, self).setUp()
+    self.persist_path = os.path.join(self.pants_workdir, 'source_owner_index.json')
+
+    self.create_file('src/a/A.java')
+    self.create_file('src/a/sub/B.java')
+    self.create_file('src/c/C.java')
+    self.create_file('res/config.txt')
+    self.add_to_build_file('src/a', dedent("""
+      java_library(name='a',
+        sources=rglobs('*.java'),
+        resources=['res'],
+      )
+      """))
+    self.add_to_build_file('src/c', "java_library(name='c', sources=['C.java'])")
+    self.add_to_build_file('res', "resources(name='res', sources=globs('*.txt'))")
+
+  def owners(self, index, spec_path):
+    owners = index.owners_in_spec_path(self.address_mapper, self.build_graph, spec_path)
+    return {source: sorted(address.spec for address in addresses)
+            for source, addresses in owners.items()}
+
+  def reindex(self):
+    self.reset_build_graph()
+    return SourceOwnerIndex(self.persist_path)
+
+  def test_owners(self):
+    index = SourceOwnerIndex()
+    self.assertEqual({'src/a/A.java': ['src/a:a'],
+                      'src/a/sub/B.java': ['src/a:a'],
+                      'res/config.txt': ['src/a:a']},
+                     self.owners(index, 'src/a'))
+    self.assertEqual({'res/config.txt': ['res:res']},
+                     self.owners(index, 'res'))
+    self.assertEqual((2, 0), (index.parsed_spec_paths, index.reused_spec_paths))
+
+  def test_sources_by_address(self):
+    sources_by_address = SourceOwnerIndex().sources_by_address(self.address_mapper,
+                                                               self.build_graph,
+                                                               'src/a')
+    self.assertEqual({'src/a:a': ['src/a/A.java', 'src/a/sub/B.java']},
+                     {address.spec: sorted(sources)
+                      for address, sources in sources_by_address.items()})
+
+  def test_build_files_by_address(self):
+    build_files = SourceOwnerIndex().build_files_by_address(self.address_mapper,
+                                                            self.build_graph,
+                                                            'src/a')
+    self.assertEqual({'src/a:a': 'src/a/BUILD'},
+                     {address.spec: build_file for address, build_file in build_files.items()})
+
+  def test_persistence(self):
+    index = SourceOwnerIndex(self.persist_path)
+    owners = self.owners(index, 'src/a')
+    index.save()
+
+    index = self.reindex()
+    self.assertEqual(owners, self.owners(index, 'src/a'))
+    self.assertEqual((0, 2), (index.parsed_spec_paths, index.reused_spec_paths))
+    self.assertEqual(0, len(self.build_graph.targets()))
+
+  def test_globbed_dir_listing_change(self):
+    index = SourceOwnerIndex(self.persist_path)
+    self.owners(index, 'src/a')
+    self.owners(index, 'src/c')
+    index.save()
+
+    self.create_file('src/a/sub/deeper/D.java')
+    self.create_file('src/c/D.java')
+    index = self.reindex()
+    self.assertEqual(['src/a:a'], self.owners(index, 'src/a')['src/a/sub/deeper/D.java'])
+    self.assertNotIn('src/c/D.java', self.owners(index, 'src/c'))
+    self.assertEqual((1, 2), (index.parsed_spec_paths, index.reused_spec_paths))
+
+  def test_ignored_dirs(self):
+    self.add_to_build_file('', "resources(name='all', sources=rglobs('*.txt'))")
+    index = SourceOwnerIndex(self.persist_path, ignored_dirs=[self.pants_workdir])
+    self.owners(index, '')
+    index.save()
+
+    self.create_file(os.path.join(os.path.relpath(self.pants_workdir, self.build_root), 'x.txt'))
+    index = SourceOwnerIndex(self.persist_path, ignored_dirs=[self.pants_workdir])
+    self.owners(index, '')
+    self.assertEqual((0, 1), (index.parsed_spec_paths, index.reused_spec_paths))
+
+  def test_changed_build_file(self):
+    index = SourceOwnerIndex(self.persist_path)
+    self.owners(index, 'src/c')
+    index.save()
+
+    self.create_file('src/c/BUILD', "java_library(name='c', sources=['D.java'])")
+    index = self.reindex()
+    self.assertEqual({'src/c/D.java': ['src/c:c']},
+                     self.owners(index, 'src/c'))
+    self.assertEqual((1, 0), (index.parsed_spec_paths, index.reused_spec_paths))
+
+  def test_corrupt(self):
+    with open(self.persist_path, 'w') as fp:
+      fp.write('{"version": 1, "entries": {"src/c": []}}')
+    self.assertEqual({'src/c/C.java': ['src/c:c']},
+                     self.owners(SourceOwnerIndex(self.persist_path), 'src/c'))
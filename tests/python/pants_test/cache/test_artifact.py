@@ -0,0 +1,152 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import stat
+import unittest
+from contextlib import contextmanager
+
+from pants.base.build_invalidator import CacheKey
+from pants.cache.artifact import ArtifactError, FramedArtifact, TarballArtifact
+from pants.cache.local_artifact_cache import LocalArtifactCache
+from pants.util.contextutil import temporary_dir, temporary_file_path
+from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
+
+
+class FramedArtifactTest(unittest.TestCase):
+  FILES = {
+    'out/a/A.class': 'a' * 100,
+    'out/a/b/B.class': 'b' * 5000,
+    'out/a/b/C.class': '',
+    'out/ünicode.txt': 'u',
+  }
+
+  @contextmanager
+  def artifact_root(self):
+    with temporary_dir() as artifact_root:
+      for relpath, content in self.FILES.items():
+        with safe_open(os.path.join(artifact_root, relpath), 'w') as fp:
+          fp.write(content)
+      safe_mkdir(os.path.join(artifact_root, 'out/empty'))
+      os.chmod(os.path.join(artifact_root, 'out/empty'), 0o700)
+      os.chmod(os.path.join(artifact_root, 'out/a/A.class'), 0o755)
+      yield artifact_root
+
+  def assert_extracted(self, artifact_root):
+    for relpath, content in self.FILES.items():
+      with open(os.path.join(artifact_root, relpath)) as fp:
+        self.assertEqual(content, fp.read())
+    self.assertTrue(os.path.isdir(os.path.join(artifact_root, 'out/empty')))
+    self.assertEqual(0o700,
+                     stat.S_IMODE(os.stat(os.path.join(artifact_root, 'out/empty')).st_mode))
+    self.assertEqual(0o755,
+                     stat.S_IMODE(os.stat(os.path.join(artifact_root, 'out/a/A.class')).st_mode))
+
+  def collect(self, artifact_root, path, compression):
+    artifact = FramedArtifact(artifact_root, path, compression)
+    artifact.collect([os.path.join(artifact_root, 'out')])
+    safe_rmtree(os.path.join(artifact_root, 'out'))
+    self.assertTrue(FramedArtifact.is_framed(path))
+
+  def test_round_trip(self):
+    for compression in (0, 9):
+      for max_workers in (1, 4):
+        with self.artifact_root() as artifact_root:
+          with temporary_file_path() as path:
+            self.collect(artifact_root, path, compression)
+            artifact = FramedArtifact(artifact_root, path, max_workers=max_workers)
+            artifact._PARALLEL_THRESHOLD_BYTES = 0
+            artifact.extract()
+            self.assert_extracted(artifact_root)
+            self.assertIn('out/a/b/B.class', set(artifact._relpaths))
+
+  def test_extract_stream(self):
+    with self.artifact_root() as artifact_root:
+      with temporary_file_path() as path:
+        self.collect(artifact_root, path, 9)
+        with open(path, 'rb') as fp:
+          content = fp.read()
+        # Feed the container in chunks small enough to split headers and data.
+        chunks = (content[i:i + 7] for i in range(0, len(content), 7))
+        FramedArtifact(artifact_root, None).extract_stream(chunks)
+        self.assert_extracted(artifact_root)
+
+  def test_truncated(self):
+    with self.artifact_root() as artifact_root:
+      with temporary_file_path() as path:
+        self.collect(artifact_root, path, 9)
+        with open(path, 'rb') as fp:
+          content = fp.read()
+        with self.assertRaises(ArtifactError):
+          FramedArtifact(artifact_root, None).extract_stream(iter([content[:-1]]))
+        with self.assertRaises(ArtifactError):
+          FramedArtifact(artifact_root, None).extract_stream(iter([b'garbage']))
+        # Nothing from the truncated stream is left behind.
+        self.assertEqual([], os.listdir(artifact_root))
+
+  def test_rejects_paths_outside_root(self):
+    for relpath in ('../escaped', 'out/../../escaped', '/tmp/escaped', ''):
+      with temporary_dir() as parent:
+        artifact_root = os.path.join(parent, 'root')
+        safe_mkdir(artifact_root)
+        with temporary_file_path() as path:
+          artifact = FramedArtifact(artifact_root, path, 0)
+          with open(path, 'wb') as out:
+            out.write(FramedArtifact.MAGIC)
+            artifact._write_header(out, FramedArtifact._STORED, 0o644, 1, relpath)
+            out.write(b'x')
+          with self.assertRaises(ArtifactError):
+            artifact.extract()
+          with open(path, 'rb') as fp:
+            with self.assertRaises(ArtifactError):
+              FramedArtifact(artifact_root, None).extract_stream(iter([fp.read()]))
+          self.assertEqual(['root'], os.listdir(parent))
+
+  def test_local_cache_reads_either_format(self):
+    key = CacheKey('muppet_key', 'fake_hash', 42)
+    with self.artifact_root() as artifact_root:
+      with temporary_dir() as cache_root:
+        tgz_cache = LocalArtifactCache(artifact_root, cache_root, 1)
+        framed_cache = LocalArtifactCache(artifact_root, cache_root, 1, artifact_format='framed')
+
+        tgz_cache.insert(key, [os.path.join(artifact_root, 'out')])
+        safe_rmtree(os.path.join(artifact_root, 'out'))
+        self.assertTrue(framed_cache.use_cached_files(key))
+        self.assert_extracted(artifact_root)
+
+        framed_cache.insert(key, [os.path.join(artifact_root, 'out')])
+        safe_rmtree(os.path.join(artifact_root, 'out'))
+        self.assertTrue(tgz_cache.use_cached_files(key))
+        self.assert_extracted(artifact_root)
+
+  def test_stored_while_streaming(self):
+    key = CacheKey('muppet_key', 'fake_hash', 42)
+    with self.artifact_root() as artifact_root:
+      with temporary_dir() as cache_root:
+        cache = LocalArtifactCache(artifact_root, cache_root, 1, artifact_format='framed')
+        with temporary_file_path() as path:
+          self.collect(artifact_root, path, 9)
+          with open(path, 'rb') as fp:
+            self.assertTrue(cache.store_and_use_artifact(key, iter(lambda: fp.read(10), b'')))
+        self.assert_extracted(artifact_root)
+
+        safe_rmtree(os.path.join(artifact_root, 'out'))
+        self.assertTrue(cache.use_cached_files(key))
+        self.assert_extracted(artifact_root)
+
+  def test_tarball_store_and_use(self):
+    key = CacheKey('muppet_key', 'fake_hash', 42)
+    with self.artifact_root() as artifact_root:
+      with temporary_dir() as cache_root:
+        cache = LocalArtifactCache(artifact_root, cache_root, 1, artifact_format='framed')
+        with temporary_file_path() as path:
+          TarballArtifact(artifact_root, path).collect([os.path.join(artifact_root, 'out')])
+          safe_rmtree(os.path.join(artifact_root, 'out'))
+          with open(path, 'rb') as fp:
+            self.assertTrue(cache.store_and_use_artifact(key, iter(lambda: fp.read(3), b'')))
+        self.assert_extracted(artifact_root)
+        self.assertTrue(cache.has(key))
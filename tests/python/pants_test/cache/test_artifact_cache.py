@@ -18,6 +18,7 @@ from pants.cache.cache_setup import (CacheSpecFormatError, EmptyCacheSpecError,
                                      InvalidCacheSpecError, LocalCacheSpecRequiredError,
                                      RemoteCacheSpecRequiredError, create_artifact_cache,
                                      select_best_url)
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
 from pants.cache.restful_artifact_cache import InvalidRESTfulCacheProtoError, RESTfulArtifactCache
 from pants.util.contextutil import pushd, temporary_dir, temporary_file
@@ -63,6 +64,54 @@ class SimpleRESTHandler(SimpleHTTPServer.SimpleHTTPRequestHandler):
     self.end_headers()
 
 
+class ProbingRESTHandler(SimpleRESTHandler):
+  """Also supports bulk probes, and counts the requests it serves by method."""
+
+  requests = None
+
+  def do_GET(self):
+    self.requests.append('GET')
+    return SimpleRESTHandler.do_GET(self)
+
+  def do_HEAD(self):
+    self.requests.append('HEAD')
+    return SimpleRESTHandler.do_HEAD(self)
+
+  def do_POST(self):
+    self.requests.append('POST')
+    prefix, _, probe = self.path.rpartition('/')
+    if probe != RESTfulArtifactCache.BULK_PROBE_PATH:
+      self.send_error(404, 'File not found')
+      return
+    content = self.rfile.read(int(self.headers.getheader('content-length')))
+    present = [path for path in content.splitlines()
+               if os.path.isfile(self.translate_path('{0}/{1}'.format(prefix, path)))]
+    body = '\n'.join(present)
+    self.send_response(200)
+    self.send_header(RESTfulArtifactCache.BULK_PROBE_HEADER,
+                     RESTfulArtifactCache.BULK_PROBE_VERSION)
+    self.send_header('content-length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+
+class NonProbingRESTHandler(ProbingRESTHandler):
+  def do_POST(self):
+    self.requests.append('POST')
+    self.send_error(501, 'Unsupported method')
+
+
+class AcceptingRESTHandler(ProbingRESTHandler):
+  """Accepts any POST without probing, as eg: WebDAV servers do."""
+
+  def do_POST(self):
+    self.requests.append('POST')
+    self.rfile.read(int(self.headers.getheader('content-length')))
+    self.send_response(201)
+    self.send_header('content-length', '0')
+    self.end_headers()
+
+
 TEST_CONTENT1 = 'muppet'
 TEST_CONTENT2 = 'kermit'
 
@@ -75,13 +124,13 @@ class TestArtifactCache(unittest.TestCase):
         yield LocalArtifactCache(artifact_root, cache_root, compression=0)
 
   @contextmanager
-  def setup_server(self):
+  def setup_server(self, handler=SimpleRESTHandler):
     httpd = None
     httpd_thread = None
     try:
       with temporary_dir() as cache_root:
         with pushd(cache_root):  # SimpleRESTHandler serves from the cwd.
-          httpd = SocketServer.TCPServer(('localhost', 0), SimpleRESTHandler)
+          httpd = SocketServer.TCPServer(('localhost', 0), handler)
           port = httpd.server_address[1]
           httpd_thread = Thread(target=httpd.serve_forever)
           httpd_thread.start()
@@ -116,12 +165,13 @@ class TestArtifactCache(unittest.TestCase):
   def test_cache_spec_parsing(self):
     artifact_root = '/bogus/artifact/root'
 
-    def mk_cache(spec):
+    def mk_cache(spec, local_layout='tarball'):
       return create_artifact_cache(MockLogger(), artifact_root, spec,
-                                  'TestTask', compression=1, action='testing')
+                                  'TestTask', compression=1, action='testing',
+                                  local_layout=local_layout)
 
-    def check(expected_type, spec):
-      cache = mk_cache(spec)
+    def check(expected_type, spec, local_layout='tarball'):
+      cache = mk_cache(spec, local_layout=local_layout)
       self.assertTrue(isinstance(cache, expected_type))
       self.assertEquals(cache.artifact_root, artifact_root)
 
@@ -131,6 +181,9 @@ class TestArtifactCache(unittest.TestCase):
       check(RESTfulArtifactCache, 'http://localhost/bar')
       check(RESTfulArtifactCache, 'https://localhost/bar')
       check(RESTfulArtifactCache, [cachedir, 'http://localhost/bar'])
+      check(ContentAddressedArtifactCache, cachedir, local_layout='content-addressed')
+      check(RESTfulArtifactCache, [cachedir, 'http://localhost/bar'],
+            local_layout='content-addressed')
 
       with self.assertRaises(EmptyCacheSpecError):
         mk_cache(None)
@@ -250,3 +303,72 @@ class TestArtifactCache(unittest.TestCase):
       with self.setup_test_file(cache.artifact_root) as path:
         context.subproc_map(call_insert, [(cache, key, [path], False)])
       self.assertEquals(context.subproc_map(call_use_cached_files, [(cache, key)]), [True])
+
+  def test_batched_reads(self):
+    with self.setup_server() as url:
+      with self.setup_local_cache() as local:
+        tmp = TempLocalArtifactCache(local.artifact_root, 0)
+        remote = RESTfulArtifactCache(local.artifact_root, url, tmp)
+        combined = RESTfulArtifactCache(local.artifact_root, url, local)
+        self.assertTrue(combined.supports_batched_reads)
+        self.assertFalse(local.supports_batched_reads)
+
+        keys = [CacheKey('key{}'.format(i), 'fake_hash', 42) for i in range(12)]
+        with self.setup_test_file(local.artifact_root) as path:
+          for key in keys[::2]:
+            remote.insert(key, [path])
+
+        expected = [i % 2 == 0 for i in range(len(keys))]
+        self.assertEquals([False] * len(keys), local.has_many(keys))
+        self.assertEquals(expected, combined.has_many(keys))
+        self.assertEquals(expected, [bool(r) for r in combined.use_cached_files_many(keys)])
+        # Hits are backfilled into the local cache.
+        self.assertEquals(expected, local.has_many(keys))
+        self.assertEquals([], combined.use_cached_files_many([]))
+
+  def do_test_bulk_probe(self, handler, bulk_probe=True):
+    handler.requests = []
+    with self.setup_server(handler=handler) as url:
+      with self.setup_local_cache() as local:
+        tmp = TempLocalArtifactCache(local.artifact_root, 0)
+        remote = RESTfulArtifactCache(local.artifact_root, url, tmp)
+        combined = RESTfulArtifactCache(local.artifact_root, url, local, max_concurrent_requests=4,
+                                        bulk_probe=bulk_probe)
+
+        keys = [CacheKey('key{}'.format(i), 'fake_hash', 42) for i in range(12)]
+        with self.setup_test_file(local.artifact_root) as path:
+          for key in keys[::2]:
+            remote.insert(key, [path])
+          # Seed the local cache with one of the hits.
+          local.insert(keys[0], [path])
+
+        expected = [i % 2 == 0 for i in range(len(keys))]
+        del handler.requests[:]
+        self.assertEquals(expected, combined.has_many(keys))
+        has_requests = list(handler.requests)
+        del handler.requests[:]
+        self.assertEquals(expected, [bool(r) for r in combined.use_cached_files_many(keys)])
+        return has_requests, list(handler.requests)
+
+  def test_bulk_probe(self):
+    has_requests, use_requests = self.do_test_bulk_probe(ProbingRESTHandler)
+    # One probe for the 11 keys missing locally, then a GET for each of the 5 remote hits.
+    self.assertEquals(['POST'], has_requests)
+    self.assertEquals(['POST'] + ['GET'] * 5, use_requests)
+
+  def test_bulk_probe_unsupported(self):
+    has_requests, use_requests = self.do_test_bulk_probe(NonProbingRESTHandler)
+    # After the failed probe, keys are probed individually and it isn't tried again.
+    self.assertEquals(['POST'] + ['HEAD'] * 11, has_requests)
+    self.assertEquals(['GET'] * 11, use_requests)
+
+  def test_bulk_probe_unmarked_response(self):
+    has_requests, use_requests = self.do_test_bulk_probe(AcceptingRESTHandler)
+    # A 2xx answer without the bulk probe header isn't trusted to list the hits.
+    self.assertEquals(['POST'] + ['HEAD'] * 11, has_requests)
+    self.assertEquals(['GET'] * 11, use_requests)
+
+  def test_bulk_probe_disabled(self):
+    has_requests, use_requests = self.do_test_bulk_probe(ProbingRESTHandler, bulk_probe=False)
+    self.assertEquals(['HEAD'] * 11, has_requests)
+    self.assertEquals(['GET'] * 11, use_requests)
@@ -0,0 +1,143 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import stat
+import time
+import unittest
+from contextlib import contextmanager
+
+from pants.base.build_invalidator import CacheKey
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
+
+
+class ContentAddressedArtifactCacheTest(unittest.TestCase):
+  @contextmanager
+  def setup_cache(self, **kwargs):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        yield ContentAddressedArtifactCache(artifact_root, cache_root, 'TestTask', 0, **kwargs)
+
+  def write(self, cache, relpath, content):
+    path = os.path.join(cache.artifact_root, relpath)
+    with safe_open(path, 'w') as fp:
+      fp.write(content)
+    return path
+
+  def read(self, cache, relpath):
+    with open(os.path.join(cache.artifact_root, relpath)) as fp:
+      return fp.read()
+
+  def blobs(self, cache):
+    return [name for _, _, names in os.walk(os.path.join(cache.cache_root, 'blobs'))
+            for name in names]
+
+  def test_round_trip(self):
+    with self.setup_cache() as cache:
+      key = CacheKey('a', 'fake_hash', 42)
+      path = self.write(cache, 'out/a/A.class', 'a')
+      safe_mkdir(os.path.join(cache.artifact_root, 'out/a/empty'))
+      os.chmod(path, 0o755)
+
+      self.assertFalse(cache.has(key))
+      self.assertFalse(cache.use_cached_files(key))
+      cache.insert(key, [os.path.join(cache.artifact_root, 'out/a')])
+      self.assertTrue(cache.has(key))
+
+      safe_rmtree(os.path.join(cache.artifact_root, 'out'))
+      self.assertTrue(cache.use_cached_files(key))
+      self.assertEqual('a', self.read(cache, 'out/a/A.class'))
+      self.assertEqual(0o755, stat.S_IMODE(os.stat(path).st_mode))
+      self.assertTrue(os.path.isdir(os.path.join(cache.artifact_root, 'out/a/empty')))
+
+      cache.delete(key)
+      self.assertFalse(cache.has(key))
+
+  def test_dedup(self):
+    with self.setup_cache() as cache:
+      a = self.write(cache, 'a/Same.class', 'same')
+      b = self.write(cache, 'b/Same.class', 'same')
+      c = self.write(cache, 'c/Other.class', 'other')
+      cache.insert(CacheKey('a', 'h', 1), [a])
+      cache.insert(CacheKey('b', 'h', 1), [b, c])
+      self.assertEqual(2, len(self.blobs(cache)))
+
+  def test_hardlink(self):
+    with self.setup_cache(hardlink=True) as cache:
+      key = CacheKey('a', 'fake_hash', 42)
+      path = self.write(cache, 'a/A.class', 'a')
+      cache.insert(key, [path])
+      os.unlink(path)
+      self.assertTrue(cache.use_cached_files(key))
+      self.assertEqual('a', self.read(cache, 'a/A.class'))
+      self.assertEqual(2, os.stat(path).st_nlink)
+
+  def test_hardlink_keeps_executable_mode(self):
+    with self.setup_cache(hardlink=True) as cache:
+      key = CacheKey('a', 'fake_hash', 42)
+      path = self.write(cache, 'bin/run', '#!/bin/sh')
+      os.chmod(path, 0o755)
+      cache.insert(key, [path])
+      os.unlink(path)
+      self.assertTrue(cache.use_cached_files(key))
+      self.assertEqual('#!/bin/sh', self.read(cache, 'bin/run'))
+      self.assertEqual(0o755, stat.S_IMODE(os.stat(path).st_mode))
+      self.assertEqual(1, os.stat(path).st_nlink)
+
+  def test_missing_blob_is_unreadable(self):
+    with self.setup_cache() as cache:
+      key = CacheKey('a', 'fake_hash', 42)
+      cache.insert(key, [self.write(cache, 'a/A.class', 'a')])
+      safe_rmtree(os.path.join(cache.cache_root, 'blobs'))
+      self.assertFalse(cache.use_cached_files(key))
+      self.assertFalse(cache.has(key))
+
+  def test_prune_evicts_least_recently_used(self):
+    with self.setup_cache() as cache:
+      keys = [CacheKey(name, 'h', 1) for name in ('old', 'shared', 'new')]
+      shared = self.write(cache, 'shared/Shared.class', 'x' * 10)
+      for key in keys:
+        cache.insert(key, [self.write(cache, '{0}/A.class'.format(key.id), key.id * 10), shared])
+
+      # Backdate the manifests and their log entries so that 'new' was used most recently.
+      now = int(time.time())
+      with open(os.path.join(cache.cache_root, 'access.log'), 'w') as fp:
+        for i, key in enumerate(keys):
+          then = now - 1000 + i
+          manifest = os.path.join(cache.cache_root, 'manifests', 'TestTask', key.id, key.hash)
+          os.utime(manifest, (then, then))
+          fp.write('{0} {1}\n'.format(then, os.path.relpath(
+            manifest, os.path.join(cache.cache_root, 'manifests'))))
+
+      # 4 blobs, of 10 bytes shared by all the artifacts and 30, 60 and 30 bytes unique to each.
+      self.assertEqual((0, 0), cache.prune(130))
+      self.assertEqual((1, 30), cache.prune(129))
+      self.assertFalse(cache.has(keys[0]))
+      self.assertTrue(cache.has(keys[1]))
+      self.assertEqual(3, len(self.blobs(cache)))
+
+      self.assertEqual((2, 100), cache.prune(0))
+      self.assertEqual([], self.blobs(cache))
+
+  def test_backs_remote_cache(self):
+    with self.setup_cache() as cache:
+      key = CacheKey('a', 'fake_hash', 42)
+      path = self.write(cache, 'a/A.class', 'a')
+      with cache.insert_paths(key, [os.path.dirname(path)]) as tarball:
+        with open(tarball, 'rb') as fp:
+          content = fp.read()
+      self.assertTrue(cache.has(key))
+
+      # A tarball fetched from a remote cache is extracted and stored.
+      os.unlink(path)
+      other = CacheKey('b', 'fake_hash', 42)
+      self.assertTrue(cache.store_and_use_artifact(other, iter([content])))
+      self.assertEqual('a', self.read(cache, 'a/A.class'))
+      self.assertTrue(cache.has(other))
+      self.assertEqual(1, len(self.blobs(cache)))
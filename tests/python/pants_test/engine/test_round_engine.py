@@ -6,9 +6,16 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import itertools
+import threading
+import time
+from StringIO import StringIO
+
+from mock import patch
 
 from pants.backend.core.tasks.task import Task
-from pants.engine.round_engine import RoundEngine
+from pants.base.exceptions import TaskError
+from pants.engine.round_engine import ParallelRoundEngine, RoundEngine
+from pants.goal.goal import Goal
 from pants_test.base_test import BaseTest
 from pants_test.engine.base_engine_test import EngineTestBase
 
@@ -210,3 +217,141 @@ class RoundEngineTest(EngineTestBase, BaseTest):
 
     with self.assertRaises(self.engine.TargetRootsReplacement.ConflictingProposalsError):
       self.engine.attempt(self._context, self.as_goals('goal1', 'goal2'))
+
+
+class ParallelRoundEngineTest(EngineTestBase, BaseTest):
+  class FakeRunTracker(object):
+    def register_thread(self, parent_workunit):
+      pass
+
+    def log(self, level, *msg_elements):
+      pass
+
+  def setUp(self):
+    super(ParallelRoundEngineTest, self).setUp()
+
+    self.set_options_for_scope('', explain=False)
+    self._context = self.context()
+    self._context.run_tracker = self.FakeRunTracker()
+    self.engine = ParallelRoundEngine(num_workers=4)
+    self.executed = []
+
+  def tearDown(self):
+    self.assertTrue(self._context.is_unlocked())
+    super(ParallelRoundEngineTest, self).tearDown()
+
+  def install_task(self, name, goal, product_types=None, required_data=None, execute=None):
+    class ParallelTask(Task):
+      @classmethod
+      def product_types(cls):
+        return product_types or []
+
+      @classmethod
+      def prepare(cls, options, round_manager):
+        for requirement in (required_data or ()):
+          round_manager.require_data(requirement)
+
+      def execute(me):
+        if execute:
+          execute()
+        self.executed.append(name)
+
+    return super(ParallelRoundEngineTest, self).install_task(name=name, action=ParallelTask,
+                                                            goal=goal)
+
+  def test_independent_tasks_overlap(self):
+    task3_started = threading.Event()
+
+    def wait_for_task3():
+      # Under the serial RoundEngine task1 would run, and so time out here, before task3 starts.
+      task3_started.wait(10)
+      if not task3_started.is_set():
+        raise TaskError('task3 did not run alongside task1')
+
+    self.install_task('task1', goal='goal1', product_types=['1'], execute=wait_for_task3)
+    self.install_task('task2', goal='goal2', required_data=['1'])
+    self.install_task('task3', goal='goal3', execute=task3_started.set)
+
+    self.engine.attempt(self._context, self.as_goals('goal2', 'goal3'))
+
+    # task1 and task3 finish at about the same time, so either may be recorded first.
+    self.assertEqual({'task1', 'task3'}, set(self.executed[:2]))
+    self.assertEqual('task2', self.executed[2])
+
+  def assert_runs_alone(self, goal):
+    running = []
+    overlapped = []
+
+    def run(name):
+      def execute():
+        running.append(name)
+        # Give any task that could run alongside this one the time to start.
+        time.sleep(0.1)
+        if len(running) > 1:
+          overlapped.append(name)
+        running.remove(name)
+      return execute
+
+    self.install_task('task1', goal='goal1', execute=run('task1'))
+    self.install_task('task2', goal=goal, execute=run('task2'))
+    self.install_task('task3', goal='goal3', execute=run('task3'))
+
+    self.engine.attempt(self._context, self.as_goals('goal1', goal, 'goal3'))
+
+    self.assertEqual([], overlapped)
+    self.assertEqual(['task1', 'task2', 'task3'], self.executed)
+
+  def test_barrier_goals_run_alone(self):
+    for goal in ('clean-all', 'gen', 'invalidate'):
+      self.engine = ParallelRoundEngine(num_workers=4)
+      self.executed = []
+      self.assert_runs_alone(goal)
+      Goal.clear()
+
+  def test_goals_sharing_products_keep_order(self):
+    self.install_task('task1', goal='goal1', product_types=['1'])
+    # Were they run alongside each other, the slower task2 would finish last.
+    self.install_task('task2', goal='goal2', product_types=['1'],
+                      execute=lambda: time.sleep(0.2))
+
+    self.engine.attempt(self._context, self.as_goals('goal2', 'goal1'))
+
+    self.assertEqual(['task2', 'task1'], self.executed)
+
+  def test_goal_task_order_respected(self):
+    self.install_task('task1', goal='goal1')
+    self.install_task('task2', goal='goal1')
+    self.install_task('task3', goal='goal1')
+
+    self.engine.attempt(self._context, self.as_goals('goal1'))
+
+    self.assertEqual(['task1', 'task2', 'task3'], self.executed)
+
+  def test_failure(self):
+    def fail():
+      raise TaskError('failed', exit_code=42)
+
+    self.install_task('task1', goal='goal1', product_types=['1'], execute=fail)
+    self.install_task('task2', goal='goal2', required_data=['1'])
+
+    with self.assertRaises(TaskError) as cm:
+      self.engine.attempt(self._context, self.as_goals('goal2'))
+    self.assertEqual(42, cm.exception.exit_code)
+    self.assertEqual([], self.executed)
+
+  def test_explain(self):
+    self.set_options_for_scope('', explain=True)
+    self._context = self.context()
+
+    self.install_task('task1', goal='goal1', product_types=['1'])
+    self.install_task('task2', goal='goal2', required_data=['1'])
+    self.install_task('task3', goal='goal3')
+
+    with patch('sys.stdout', new_callable=StringIO) as output:
+      self.engine.attempt(self._context, self.as_goals('goal2', 'goal3'))
+    schedule = output.getvalue()
+
+    self.assertEqual([], self.executed)
+    self.assertIn('1: [goal1.task1->ParallelTask_goal1_task1, '
+                  'goal3.task3->ParallelTask_goal3_task3]', schedule)
+    self.assertIn('2: [goal2.task2->ParallelTask_goal2_task2]', schedule)
@@ -52,3 +52,65 @@ class UnionProductsTest(BaseTest):
     found_target = self.products.target_for_product(1000)
 
     self.assertIsNone(found_target)
+
+  def test_target_for_product_first_target(self):
+    c = self.make_target('c')
+    b = self.make_target('b')
+    self.products.add_for_target(c, [3])
+    self.products.add_for_target(b, [3, 4])
+
+    self.assertEqual(c, self.products.target_for_product(3))
+    self.assertEqual(b, self.products.target_for_product(4))
+
+  def test_get_for_targets(self):
+    d = self.make_target('d')
+    c = self.make_target('c', dependencies=[d])
+    b = self.make_target('b', dependencies=[d])
+    a = self.make_target('a', dependencies=[b, c])
+    self.products.add_for_target(a, [1])
+    self.products.add_for_target(b, [2])
+    self.products.add_for_target(c, [3, 2])
+    self.products.add_for_target(d, [4])
+
+    self.assertEqual([2, 4, 3, 1], list(self.products.get_for_targets([b, c, a])))
+    self.assertEqual({a: (1, 2, 3, 4), c: (3, 2, 4)},
+                     self.products.get_for_targets_by_target([a, c]))
+
+  def test_memoized_products_updated_on_add(self):
+    c = self.make_target('c')
+    b = self.make_target('b', dependencies=[c])
+    self.products.add_for_target(b, [1])
+    self.assertEqual(OrderedSet([1]), self.products.get_for_target(b))
+
+    self.products.add_for_target(c, [2])
+    self.assertEqual(OrderedSet([1, 2]), self.products.get_for_target(b))
+
+  def test_add_invalidates_only_dependees(self):
+    c = self.make_target('c')
+    b = self.make_target('b', dependencies=[c])
+    a = self.make_target('a', dependencies=[b])
+    d = self.make_target('d')
+    self.products.add_for_target(a, [1])
+    self.products.add_for_target(c, [2])
+    self.products.add_for_target(d, [3])
+    memoized = self.products.get_for_targets_by_target([a, b, d])
+
+    self.products.add_for_target(b, [4])
+    products = self.products.get_for_targets_by_target([a, b, c, d])
+    self.assertEqual({a: (1, 4, 2), b: (4, 2), c: (2,), d: (3,)}, products)
+    self.assertIs(memoized[d], products[d])
+
+  def test_products_ordered_by_bfs_closure(self):
+    e = self.make_target('e')
+    d = self.make_target('d', dependencies=[e])
+    c = self.make_target('c', dependencies=[d])
+    b = self.make_target('b', dependencies=[d])
+    a = self.make_target('a', dependencies=[b, c, e])
+    for product, target in enumerate([a, b, c, d, e]):
+      self.products.add_for_target(target, [product, 'shared'])
+
+    expected = OrderedSet()
+    for target in a.closure(bfs=True):
+      expected.update(self.products._products_by_target[target])
+    self.assertEqual([0, 'shared', 1, 2, 4, 3], list(expected))
+    self.assertEqual(expected, self.products.get_for_target(a))
@@ -0,0 +1,87 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import tempfile
+import time
+import unittest
+
+from pants.java.jar.jar_index import JarIndex
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import safe_rmtree
+
+
+class JarIndexTest(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+    self.addCleanup(safe_rmtree, self.tmpdir)
+    self.persist_dir = os.path.join(self.tmpdir, 'index')
+
+  def create_jar(self, name, *entries):
+    path = os.path.join(self.tmpdir, name)
+    with open_zip(path, 'w') as jar:
+      for entry in entries:
+        jar.writestr(entry, '0xCAFEBABE')
+    # Backdate the jar so the index may persist its entries.
+    past = time.time() - 60
+    os.utime(path, (past, past))
+    return path
+
+  def test_entries(self):
+    jar = self.create_jar('a.jar', 'org/b/B.class', 'META-INF/MANIFEST.MF', 'org/a/A.class')
+    index = JarIndex()
+    self.assertEqual(['META-INF/MANIFEST.MF', 'org/a/A.class', 'org/b/B.class'],
+                     list(index.entries(jar)))
+    self.assertEqual({'org/a/A.class', 'org/b/B.class'}, index.classes(jar))
+    self.assertTrue(index.contains(jar, 'org/a/A.class'))
+    self.assertFalse(index.contains(jar, 'org/c/C.class'))
+    self.assertEqual(1, index.listed)
+
+  def test_find_provider(self):
+    first = self.create_jar('first.jar', 'org/a/A.class')
+    second = self.create_jar('second.jar', 'org/a/A.class', 'org/b/B.class')
+    index = JarIndex()
+    self.assertEqual(first, index.find_provider('org/a/A.class', [first, second]))
+    self.assertEqual(second, index.find_provider('org/b/B.class', [first, second]))
+    self.assertIsNone(index.find_provider('org/c/C.class', [first, second]))
+
+  def test_utf8_entry_names(self):
+    jar = self.create_jar('unicode.jar', 'cucumber/api/java/zh_cn/假如.class')
+    self.assertEqual(['cucumber/api/java/zh_cn/假如.class'], list(JarIndex().entries(jar)))
+
+  def test_persistence(self):
+    jar = self.create_jar('a.jar', 'org/a/A.class')
+    JarIndex(self.persist_dir).entries(jar)
+
+    index = JarIndex(self.persist_dir)
+    self.assertEqual(['org/a/A.class'], list(index.entries(jar)))
+    self.assertEqual((0, 1), (index.listed, index.reused))
+
+  def test_changed_jar_relisted(self):
+    jar = self.create_jar('a.jar', 'org/a/A.class')
+    JarIndex(self.persist_dir).entries(jar)
+
+    self.create_jar('a.jar', 'org/a/A.class', 'org/b/B.class')
+    index = JarIndex(self.persist_dir)
+    self.assertEqual(['org/a/A.class', 'org/b/B.class'], list(index.entries(jar)))
+    self.assertEqual((1, 0), (index.listed, index.reused))
+
+  def test_recently_modified_jar_not_persisted(self):
+    jar = self.create_jar('a.jar', 'org/a/A.class')
+    os.utime(jar, None)
+    JarIndex(self.persist_dir).entries(jar)
+    self.assertFalse(os.path.exists(self.persist_dir))
+
+  def test_corrupt(self):
+    jar = self.create_jar('a.jar', 'org/a/A.class')
+    index = JarIndex(self.persist_dir)
+    index.entries(jar)
+    with open(index._persist_path(os.path.realpath(jar)), 'w') as fp:
+      fp.write('{"version": 1}')
+    index = JarIndex(self.persist_dir)
+    self.assertEqual(['org/a/A.class'], list(index.entries(jar)))
+    self.assertEqual((1, 0), (index.listed, index.reused))
@@ -0,0 +1,287 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import re
+import tempfile
+import time
+import unittest
+import zipfile
+import zlib
+
+from pants.java.jar.jar_writer import CompressedEntryCache, JarWriter
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import safe_mkdir, safe_rmtree
+
+
+DEFAULT_MANIFEST = (b'Manifest-Version: 1.0\r\n'
+                    b'Created-By: org.pantsbuild.tools.jar.JarBuilder\r\n'
+                    b'\r\n')
+
+
+class JarWriterTestBase(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+    self.addCleanup(safe_rmtree, self.tmpdir)
+    self.jar_path = os.path.join(self.tmpdir, 'out.jar')
+
+  def create_file(self, relpath, contents, backdate=True):
+    path = os.path.join(self.tmpdir, relpath)
+    safe_mkdir(os.path.dirname(path))
+    with open(path, 'wb') as fp:
+      fp.write(contents)
+    if backdate:
+      # Backdate the file so its compressed contents may be cached.
+      past = time.time() - 60
+      os.utime(path, (past, past))
+    return path
+
+  def create_jar(self, name, entries):
+    path = os.path.join(self.tmpdir, name)
+    with open_zip(path, 'w', compression=zipfile.ZIP_DEFLATED) as jar:
+      for entry_path, contents in entries:
+        jar.writestr(entry_path, contents)
+    return path
+
+  def write_jar(self, **kwargs):
+    return JarWriter(self.jar_path, **kwargs)
+
+  def read_jar(self):
+    with open_zip(self.jar_path, 'r') as jar:
+      self.assertIsNone(jar.testzip())
+      return [(info.filename, jar.read(info)) for info in jar.infolist()]
+
+
+class JarWriterTest(JarWriterTestBase):
+  def test_write(self):
+    self.create_file('classes/org/a/A.class', b'A')
+    self.create_file('classes/org/b/B.class', b'B')
+    self.create_file('classes/META-INF/MANIFEST.MF', b'Main-Class: ignored')
+    readme = self.create_file('README', b'42')
+
+    writer = self.write_jar()
+    writer.write(os.path.join(self.tmpdir, 'classes'))
+    writer.write(readme, 'docs/README')
+    writer.writestr('org/a/a.properties', b'a=1')
+    writer.close()
+
+    self.assertEqual([('META-INF/', b''),
+                      ('META-INF/MANIFEST.MF', DEFAULT_MANIFEST),
+                      ('org/', b''),
+                      ('org/a/', b''),
+                      ('org/a/A.class', b'A'),
+                      ('org/b/', b''),
+                      ('org/b/B.class', b'B'),
+                      ('docs/', b''),
+                      ('docs/README', b'42'),
+                      ('org/a/a.properties', b'a=1')],
+                     self.read_jar())
+
+  def test_write_directory_to_dest(self):
+    self.create_file('resources/a.txt', b'a')
+
+    writer = self.write_jar()
+    writer.write(os.path.join(self.tmpdir, 'resources'), 'org/r')
+    writer.close()
+
+    self.assertEqual(['META-INF/', 'META-INF/MANIFEST.MF', 'org/', 'org/r/', 'org/r/a.txt'],
+                     [path for path, _ in self.read_jar()])
+
+  def test_compress(self):
+    self.create_file('a.txt', b'a' * 1000)
+    for compress, compress_type in ((True, zipfile.ZIP_DEFLATED), (False, zipfile.ZIP_STORED)):
+      writer = self.write_jar(compress=compress)
+      writer.write(os.path.join(self.tmpdir, 'a.txt'), 'a.txt')
+      writer.close()
+      with open_zip(self.jar_path, 'r') as jar:
+        self.assertEqual(compress_type, jar.getinfo('a.txt').compress_type)
+        self.assertEqual(b'a' * 1000, jar.read('a.txt'))
+
+  def test_writejar_copies_compressed_entries(self):
+    other = self.create_jar('other.jar', [('META-INF/MANIFEST.MF', b'Main-Class: ignored\n'),
+                                          ('org/c/C.class', b'C' * 1000),
+                                          ('org/d/', b'')])
+    writer = self.write_jar()
+    writer.writestr('org/a/A.class', b'A')
+    writer.writejar(other)
+    writer.close()
+
+    self.assertEqual([('META-INF/', b''),
+                      ('META-INF/MANIFEST.MF', DEFAULT_MANIFEST),
+                      ('org/', b''),
+                      ('org/a/', b''),
+                      ('org/a/A.class', b'A'),
+                      ('org/c/', b''),
+                      ('org/c/C.class', b'C' * 1000)],
+                     self.read_jar())
+    with open_zip(other, 'r') as source, open_zip(self.jar_path, 'r') as jar:
+      copied, original = jar.getinfo('org/c/C.class'), source.getinfo('org/c/C.class')
+      self.assertEqual((original.compress_type, original.compress_size, original.CRC),
+                       (copied.compress_type, copied.compress_size, copied.CRC))
+
+  def test_update(self):
+    writer = self.write_jar()
+    writer.writestr('a.txt', b'a')
+    writer.main('org.a.A')
+    writer.close()
+
+    writer = self.write_jar(update=True)
+    writer.writestr('b.txt', b'b')
+    writer.close()
+
+    entries = dict(self.read_jar())
+    self.assertEqual(b'a', entries['a.txt'])
+    self.assertEqual(b'b', entries['b.txt'])
+    self.assertIn(b'Main-Class: org.a.A\r\n', entries['META-INF/MANIFEST.MF'])
+
+    writer = self.write_jar(update=False)
+    writer.writestr('c.txt', b'c')
+    writer.close()
+
+    self.assertEqual(['META-INF/', 'META-INF/MANIFEST.MF', 'c.txt'],
+                     [path for path, _ in self.read_jar()])
+
+  def test_update_empty_file(self):
+    with open(self.jar_path, 'wb'):
+      pass
+    writer = self.write_jar(update=True)
+    writer.writestr('a.txt', b'a')
+    writer.close()
+    self.assertEqual(['META-INF/', 'META-INF/MANIFEST.MF', 'a.txt'],
+                     [path for path, _ in self.read_jar()])
+
+  def test_manifest(self):
+    writer = self.write_jar()
+    writer.writestr('META-INF/MANIFEST.MF',
+                    b'Manifest-Version: 1.0\nmain-class: org.a.Old\nLong: ' + b'x' * 70 + b'\n')
+    writer.main('org.a.A')
+    writer.classpath(['a.jar', 'b.jar{}c.jar'.format(os.pathsep)])
+    writer.close()
+
+    self.assertEqual(b'Manifest-Version: 1.0\r\n'
+                     b'Class-Path: a.jar b.jar c.jar\r\n'
+                     b'Created-By: org.pantsbuild.tools.jar.JarBuilder\r\n'
+                     b'Long: ' + b'x' * 66 + b'\r\n'
+                     b' xxxx\r\n'
+                     b'main-class: org.a.A\r\n'
+                     b'\r\n',
+                     dict(self.read_jar())['META-INF/MANIFEST.MF'])
+
+  def test_skip(self):
+    other = self.create_jar('other.jar', [('META-INF/SIGNER.SF', b'sig'), ('b.txt', b'b')])
+    writer = self.write_jar(skip_patterns=[re.compile(r'\.SF$'), re.compile(r'^a')])
+    writer.writestr('a.txt', b'a')
+    writer.writejar(other)
+    writer.close()
+    self.assertEqual(['META-INF/', 'META-INF/MANIFEST.MF', 'b.txt'],
+                     [path for path, _ in self.read_jar()])
+
+  def assert_duplicates(self, expected, **kwargs):
+    other = self.create_jar('other.jar', [('a.txt', b'2\n'), ('META-INF/services/s', b'2\n')])
+    writer = self.write_jar(**kwargs)
+    writer.writestr('a.txt', b'1\n')
+    writer.writestr('META-INF/services/s', b'1\n')
+    writer.writejar(other)
+    writer.close()
+    entries = dict(self.read_jar())
+    self.assertEqual(expected, (entries['a.txt'], entries['META-INF/services/s']))
+
+  def test_duplicates(self):
+    self.assert_duplicates((b'1\n', b'1\n'))
+    self.assert_duplicates((b'2\n', b'2\n'), default_action=JarWriter.REPLACE)
+    self.assert_duplicates((b'1\n2\n', b'1\n2\n'), default_action=JarWriter.CONCAT)
+    self.assert_duplicates((b'1\n', b'1\n2\n'),
+                           policies=[(re.compile('^META-INF/services/'), JarWriter.CONCAT)])
+
+    os.unlink(self.jar_path)
+    with self.assertRaises(JarWriter.DuplicateEntryError):
+      self.assert_duplicates(None, default_action=JarWriter.THROW)
+    self.assertFalse(os.path.exists(self.jar_path))
+
+  def test_parallel(self):
+    contents = [('org/a/{}.class'.format(i), 'class {}'.format(i).encode('utf-8') * i)
+                for i in range(200)]
+    for path, data in contents:
+      self.create_file(os.path.join('classes', path), data)
+
+    writer = self.write_jar(max_workers=4)
+    writer.write(os.path.join(self.tmpdir, 'classes'))
+    writer.close()
+
+    classes = [(path, data) for path, data in self.read_jar() if path.endswith('.class')]
+    self.assertEqual(sorted(contents), sorted(classes))
+
+  def test_utf8_entry_names(self):
+    writer = self.write_jar()
+    writer.writestr('cucumber/api/java/zh_cn/假如.class', b'A')
+    writer.close()
+    self.assertEqual(b'A', dict(self.read_jar())['cucumber/api/java/zh_cn/假如.class'])
+
+
+class CompressedEntryCacheTest(JarWriterTestBase):
+  def setUp(self):
+    super(CompressedEntryCacheTest, self).setUp()
+    self.cache_dir = os.path.join(self.tmpdir, 'cache')
+
+  def cached(self, path, entry_path, key='a'):
+    cache = CompressedEntryCache(self.cache_dir)
+    return cache.lookup(key, entry_path, path, os.stat(path))
+
+  def write_classes(self, key='a'):
+    writer = self.write_jar(cache=CompressedEntryCache(self.cache_dir))
+    writer.write(os.path.join(self.tmpdir, 'classes'), cache_key=key)
+    writer.close()
+
+  def test_cached(self):
+    a = self.create_file('classes/A.class', b'A' * 1000)
+    self.assertIsNone(self.cached(a, 'A.class'))
+    self.write_classes()
+
+    data = self.cached(a, 'A.class').read_data()
+    self.assertEqual(zipfile.ZIP_DEFLATED, data.compress_type)
+    self.assertEqual(b'A' * 1000, zlib.decompress(data.data, -zlib.MAX_WBITS))
+    self.assertIsNone(self.cached(a, 'A.class', key='b'))
+
+    # Cached entries are copied as is.
+    self.write_classes()
+    self.assertEqual(b'A' * 1000, dict(self.read_jar())['A.class'])
+
+  def test_changed_file_not_reused(self):
+    a = self.create_file('classes/A.class', b'A')
+    self.write_classes()
+    self.create_file('classes/A.class', b'AA')
+    self.assertIsNone(self.cached(a, 'A.class'))
+
+    self.write_classes()
+    self.assertEqual(b'AA', dict(self.read_jar())['A.class'])
+    self.assertIsNotNone(self.cached(a, 'A.class'))
+
+  def test_recently_modified_file_not_cached(self):
+    a = self.create_file('classes/A.class', b'A', backdate=False)
+    self.write_classes()
+    self.assertIsNone(self.cached(a, 'A.class'))
+
+  def test_replaced_cache_not_copied(self):
+    a = self.create_file('classes/A.class', b'A' * 1000)
+    self.write_classes()
+    cached = self.cached(a, 'A.class')
+    for group in os.listdir(self.cache_dir):
+      with open(os.path.join(self.cache_dir, group), 'wb') as fp:
+        fp.write(b'garbage')
+    self.assertIsNone(cached.read_data())
+
+  def test_corrupt(self):
+    a = self.create_file('classes/A.class', b'A')
+    self.write_classes()
+    for group in os.listdir(self.cache_dir):
+      with open(os.path.join(self.cache_dir, group), 'wb') as fp:
+        fp.write(b'garbage')
+    self.assertIsNone(self.cached(a, 'A.class'))
+
+    self.write_classes()
+    self.assertEqual(b'A', dict(self.read_jar())['A.class'])
+    self.assertIsNotNone(self.cached(a, 'A.class'))
@@ -0,0 +1,70 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+from pants.backend.core.tasks.clean import ArtifactCacheCleaner
+from pants.backend.core.tasks.task import Task
+from pants.base.build_invalidator import CacheKey
+from pants.cache.content_addressed_artifact_cache import ContentAddressedArtifactCache
+from pants.goal.goal import Goal
+from pants.goal.task_registrar import TaskRegistrar as task
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_open
+from pants_test.tasks.task_test_base import TaskTestBase
+
+
+class CachingTask(Task):
+  def execute(self):
+    pass
+
+
+class ArtifactCacheCleanerTest(TaskTestBase):
+  @classmethod
+  def task_type(cls):
+    return ArtifactCacheCleaner
+
+  def setUp(self):
+    super(ArtifactCacheCleanerTest, self).setUp()
+    task(name='caching', action=CachingTask).install()
+    self.caching_task_type = Goal.by_name('caching').task_type_by_name('caching')
+    # The cleaner's own scope configures no content-addressed caches.
+    self.set_options(local_artifact_cache_layout='tarball')
+
+  def clean(self):
+    self.create_task(self.context(for_task_types=[self.caching_task_type])).execute()
+
+  def insert(self, cache_root, artifact_root, name, size):
+    cache = ContentAddressedArtifactCache(artifact_root, cache_root, 'CachingTask', 0)
+    path = os.path.join(artifact_root, name)
+    with safe_open(path, 'w') as fp:
+      fp.write(name[0] * size)
+    cache.insert(CacheKey(name, 'fake_hash', 42), [path])
+    return cache
+
+  def test_cleans_caches_of_other_scopes(self):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        cache = self.insert(cache_root, artifact_root, 'a', 10)
+        self.set_options_for_scope('caching',
+                                   local_artifact_cache_layout='content-addressed',
+                                   write_artifact_caches=[cache_root],
+                                   local_artifact_cache_max_size=0)
+
+        self.clean()
+        self.assertFalse(cache.has(CacheKey('a', 'fake_hash', 42)))
+
+  def test_ignores_tarball_caches(self):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        cache = self.insert(cache_root, artifact_root, 'a', 10)
+        self.set_options_for_scope('caching',
+                                   write_artifact_caches=[cache_root],
+                                   local_artifact_cache_max_size=0)
+
+        self.clean()
+        self.assertTrue(cache.has(CacheKey('a', 'fake_hash', 42)))
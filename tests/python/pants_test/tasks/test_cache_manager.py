@@ -10,6 +10,8 @@ import tempfile
 
 from pants.base.build_invalidator import CacheKey, CacheKeyGenerator
 from pants.base.cache_manager import InvalidationCacheManager, InvalidationCheck, VersionedTarget
+from pants.base.payload import Payload
+from pants.base.payload_field import SourcesField
 from pants_test.base_test import BaseTest
 
 
@@ -50,6 +52,7 @@ class InvalidationCacheManagerTest(BaseTest):
     self.cache_manager = InvalidationCacheManagerTest.TestInvalidationCacheManager(self._dir)
 
   def tearDown(self):
+    InvalidationCacheManager.shutdown_hashing_pools()
     shutil.rmtree(self._dir, ignore_errors=True)
     super(InvalidationCacheManagerTest, self).tearDown()
 
@@ -123,3 +126,47 @@ class InvalidationCacheManagerTest(BaseTest):
     self.assertEquals(1, len(partitioned[0].targets))
     self.assertEquals(3, len(partitioned[1].targets))
     self.assertEquals(1, len(partitioned[2].targets))
+
+  def test_partition_by_weight(self):
+    a = self.make_target(':a', dependencies=[])
+    b = self.make_target(':b', dependencies=[a])
+    c = self.make_target(':c', dependencies=[b])
+    d = self.make_target(':d', dependencies=[c])
+
+    all_vts = self.cache_manager._wrap_targets([a, b, c, d])
+
+    # Unweighted, each target counts as 1 source, so 2 fit in each partition.
+    partitioned = InvalidationCheck(all_vts, [], 2).all_vts_partitioned
+    self.assertEquals([[a, b, c], [d]], [vt.targets for vt in partitioned])
+
+    # A heavy target gets a partition to itself, and unweighted targets count as their sources.
+    partitioned = InvalidationCheck(all_vts, [], 2, target_weights={b: 4}).all_vts_partitioned
+    self.assertEquals([[a], [b], [c, d]], [vt.targets for vt in partitioned])
+
+  def test_precompute_source_fingerprints(self):
+    self.create_file('src/a.txt', 'a')
+    self.create_file('src/b.txt', 'b')
+
+    def sources_target(spec, source, dependencies=None):
+      payload = Payload()
+      payload.add_field('sources', SourcesField(sources_rel_path='src', sources=[source]))
+      return self.make_target(spec, dependencies=dependencies, payload=payload)
+
+    a = sources_target(':a', 'a.txt')
+    b = sources_target(':b', 'b.txt', dependencies=[a])
+
+    cache_manager = InvalidationCacheManager(AppendingCacheKeyGenerator(), self._dir, True, None,
+                                             hashing_workers=2)
+    cache_manager.check([b])
+    for target in (a, b):
+      field = target.payload.get_field('sources')
+      self.assertEquals(SourcesField(sources_rel_path='src',
+                                     sources=field.source_paths).fingerprint(),
+                        field._fingerprint_memo)
+
+  def test_hashing_pool_is_shared(self):
+    pool = InvalidationCacheManager._hashing_pool(2)
+    self.assertIs(pool, InvalidationCacheManager._hashing_pool(2))
+
+    InvalidationCacheManager.shutdown_hashing_pools()
+    self.assertIsNot(pool, InvalidationCacheManager._hashing_pool(2))
@@ -7,12 +7,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import unittest
 
-from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
-                                                                 Job, JobExistsError,
-                                                                 NoRootJobError, UnknownJobError)
+from pants.base.execution_graph import (ExecutionFailure, ExecutionGraph, Job, JobExistsError,
+                                        NoRootJobError, UnknownJobError)
 
 
 class ImmediatelyExecutingPool(object):
+  num_workers = 1
+
   def submit_async_work(self, work):
     work.func(*work.args_tuples[0])
 
@@ -37,12 +38,12 @@ class ExecutionGraphTest(unittest.TestCase):
   def execute(self, exec_graph):
     exec_graph.execute(ImmediatelyExecutingPool(), PrintLogger())
 
-  def job(self, name, fn, dependencies, on_success=None, on_failure=None):
+  def job(self, name, fn, dependencies, on_success=None, on_failure=None, weight=1):
     def recording_fn():
       self.jobs_run.append(name)
       fn()
 
-    return Job(name, recording_fn, dependencies, on_success, on_failure)
+    return Job(name, recording_fn, dependencies, on_success, on_failure, weight=weight)
 
   def test_single_job(self):
     exec_graph = ExecutionGraph([self.job("A", passing_fn, [])])
@@ -191,3 +192,35 @@ class ExecutionGraphTest(unittest.TestCase):
                       self.job("Same", passing_fn, [])])
 
     self.assertEqual("Unexecutable graph: Job already scheduled u'Same'", str(cm.exception))
+
+  def test_jobs_on_the_critical_path_run_first(self):
+    exec_graph = ExecutionGraph([self.job("Leaf", passing_fn, []),
+                                 self.job("A", passing_fn, ["B"]),
+                                 self.job("B", passing_fn, [])])
+    self.execute(exec_graph)
+
+    self.assertEqual(self.jobs_run, ["B", "Leaf", "A"])
+
+  def test_weights_decide_the_critical_path(self):
+    exec_graph = ExecutionGraph([self.job("Heavy", passing_fn, [], weight=10),
+                                 self.job("A", passing_fn, ["B"]),
+                                 self.job("B", passing_fn, [])])
+
+    self.assertEqual(["Heavy"], exec_graph.critical_path())
+    self.execute(exec_graph)
+    self.assertEqual(self.jobs_run, ["Heavy", "B", "A"])
+
+  def test_critical_path(self):
+    exec_graph = ExecutionGraph([self.job("A", passing_fn, ["B", "C"]),
+                                 self.job("B", passing_fn, ["D"], weight=5),
+                                 self.job("C", passing_fn, ["D"], weight=2),
+                                 self.job("D", passing_fn, []),
+                                 self.job("E", passing_fn, [], weight=6)])
+
+    self.assertEqual(["D", "B", "A"], exec_graph.critical_path())
+
+    report = exec_graph.format_execution_report(2)
+    self.assertIn("Critical path (7 of 15 total weight): D -> B -> A", report)
+    self.assertNotIn("makespan", report)
+    self.execute(exec_graph)
+    self.assertIn("Estimated makespan", exec_graph.format_execution_report(2))
@@ -304,3 +304,20 @@ class JarBuilderTest(BaseJarTaskTest):
           }
         self.assertEquals(set(expected_entries.items()),
                           set(expected_entries.items()).intersection(set(all_entries.items())))
+
+
+class InProcessJarTaskTest(JarTaskTest):
+  """Runs the JarTaskTest cases against jars written in-process rather than by the jar-tool."""
+
+  def setUp(self):
+    super(InProcessJarTaskTest, self).setUp()
+    self.set_options(in_process_writer=True)
+    self.jar_task = self.prepare_jar_task(self.context())
+
+
+class InProcessJarBuilderTest(JarBuilderTest):
+  """Runs the JarBuilderTest cases against jars written in-process rather than by the jar-tool."""
+
+  def setUp(self):
+    super(InProcessJarBuilderTest, self).setUp()
+    self.set_options(in_process_writer=True)
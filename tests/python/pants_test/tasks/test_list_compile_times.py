@@ -0,0 +1,83 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.backend.jvm.subsystems.compile_times import CompileTimeDB
+from pants.backend.jvm.tasks.list_compile_times import ListCompileTimes
+from pants.base.target import Target
+from pants.util.contextutil import temporary_dir
+from pants_test.tasks.task_test_base import ConsoleTaskTestBase
+
+
+class CompileTimeDBTest(unittest.TestCase):
+  def test_record_and_predict(self):
+    with temporary_dir() as tmpdir:
+      db = CompileTimeDB(os.path.join(tmpdir, 'compile_times.json'))
+      self.assertIsNone(db.predict('java', 'a:a', 10))
+      self.assertIsNone(db.secs_per_source('java'))
+
+      db.record('java', 'a:a', 4.0, 10)
+      db.record('java', 'b:b', 1.0, 10)
+      self.assertEqual(4.0, db.predict('java', 'a:a', 10))
+      self.assertEqual(8.0, db.predict('java', 'a:a', 20))
+      self.assertEqual(0.25, db.secs_per_source('java'))
+      self.assertIsNone(db.predict('scala', 'a:a', 10))
+
+      # Repeated observations are smoothed.
+      db.record('java', 'a:a', 2.0, 10)
+      self.assertEqual(3.0, db.predict('java', 'a:a', 10))
+
+  def test_persistence(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'compile_times.json')
+      db = CompileTimeDB(path)
+      db.record('java', 'a:a', 4.0, 10)
+      db.save()
+
+      db = CompileTimeDB(path)
+      self.assertEqual(['java'], db.languages())
+      self.assertEqual(4.0, db.predict('java', 'a:a', 10))
+
+  def test_corrupt(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'compile_times.json')
+      with open(path, 'w') as fp:
+        fp.write('{"version": 1, "entries": {"java": {"a:a": [1]}}}')
+      self.assertEqual([], CompileTimeDB(path).languages())
+
+
+class ListCompileTimesTest(ConsoleTaskTestBase):
+  @classmethod
+  def task_type(cls):
+    return ListCompileTimes
+
+  def setUp(self):
+    super(ListCompileTimesTest, self).setUp()
+    path = os.path.join(self.build_root, 'compile_times.json')
+    db = CompileTimeDB(path)
+    db.record('java', 'a:a', 1.0, 10)
+    db.record('java', 'b:b', 2.5, 5)
+    db.record('scala', 'c:c', 3.0, 1)
+    db.save()
+    self.set_options_for_scope('compile-times', path=path)
+
+  def test_all(self):
+    self.assert_console_output_ordered('java a:a: 1.000s for 10 sources (1 samples)',
+                                       'java b:b: 2.500s for 5 sources (1 samples)',
+                                       'scala c:c: 3.000s for 1 sources (1 samples)')
+
+  def test_sort_by_time(self):
+    self.assert_console_output_ordered('java b:b: 2.500s for 5 sources (1 samples)',
+                                       'java a:a: 1.000s for 10 sources (1 samples)',
+                                       'scala c:c: 3.000s for 1 sources (1 samples)',
+                                       options={'sort': 'time'})
+
+  def test_targets(self):
+    self.assert_console_output('java b:b: 2.500s for 5 sources (1 samples)',
+                               targets=[self.make_target('b', Target)])
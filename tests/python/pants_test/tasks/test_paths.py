@@ -0,0 +1,42 @@
+# coding=utf-8
+# Copyright 2015 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+from pants.backend.core.tasks.paths import Paths
+from pants.base.target import Target
+from pants_test.tasks.task_test_base import TaskTestBase
+
+
+class PathsTest(TaskTestBase):
+  @classmethod
+  def task_type(cls):
+    return Paths
+
+  def setUp(self):
+    super(PathsTest, self).setUp()
+    self.d = self.make_target('d', Target)
+    self.c = self.make_target('c', Target, dependencies=[self.d])
+    self.b = self.make_target('b', Target, dependencies=[self.c, self.d])
+    self.e = self.make_target('e', Target)
+    self.a = self.make_target('a', Target, dependencies=[self.b, self.c, self.e])
+    self.task = self.create_task(self.context(target_roots=[self.a, self.d]))
+
+  def paths(self, from_target, to_target):
+    return sorted([target.address.spec for target in path]
+                  for path in self.task._iter_paths(from_target, to_target))
+
+  def test_paths(self):
+    self.assertEqual([['a:a', 'b:b', 'c:c', 'd:d'],
+                      ['a:a', 'b:b', 'd:d'],
+                      ['a:a', 'c:c', 'd:d']],
+                     self.paths(self.a, self.d))
+
+  def test_same_target(self):
+    self.assertEqual([['a:a']], self.paths(self.a, self.a))
+
+  def test_no_paths(self):
+    self.assertEqual([], self.paths(self.d, self.a))
+    self.assertEqual([], self.paths(self.e, self.d))